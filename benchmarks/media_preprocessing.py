@@ -0,0 +1,117 @@
+# benchmarks/media_preprocessing.py
+
+import io
+import argparse
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from PIL import Image
+
+from src.agentic_api.media import MediaPreprocessor, downscale
+from src.agentic_api.tools.runtime import get_tool_runtime
+
+
+def make_photo(width: int, height: int, seed: int) -> bytes:
+    """Encode a photo-like JPEG: smooth gradients with sensor-like noise."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.stack([
+        128 + 100 * np.sin(x / (width / (3 + seed % 5))),
+        128 + 100 * np.cos(y / (height / 4)),
+        128 + 60 * np.sin((x + y) / (width / 2)),
+    ], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 6, base.shape), 0, 255).astype(np.uint8)
+    output = io.BytesIO()
+    Image.fromarray(pixels, "RGB").save(output, "JPEG", quality=95)
+    return output.getvalue()
+
+
+def serve(images: dict) -> ThreadingHTTPServer:
+    """Serve the images over HTTP on a local port."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = images[self.path]
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    """Compare bytes and latency of analyzing full-size images and their downscaled versions."""
+    parser = argparse.ArgumentParser(description='Benchmark the image preprocessing stage of the vision analyzer')
+    parser.add_argument('--images', type=int, default=16, help='Number of images (default: 16)')
+    parser.add_argument('--width', type=int, default=3024, help='Width of the source images (default: 3024)')
+    parser.add_argument('--height', type=int, default=4032, help='Height of the source images (default: 4032)')
+    parser.add_argument('--max-dimension', type=int, default=1024, help='Longest side after downscaling (default: 1024)')
+    parser.add_argument('--quality', type=int, default=80, help='JPEG quality after downscaling (default: 80)')
+    parser.add_argument('--uplink-mbps', type=float, default=50, help='Bandwidth to the vision API in Mbit/s (default: 50)')
+    args = parser.parse_args()
+
+    images = {f"/post_{i}.jpg": make_photo(args.width, args.height, i) for i in range(args.images)}
+    server = serve(images)
+    urls = [f"http://127.0.0.1:{server.server_port}{path}" for path in images]
+    runtime = get_tool_runtime()
+
+    # Baseline: the analyzer receives the original bytes
+    start = time.perf_counter()
+    for url in urls:
+        urllib.request.urlopen(url).read()
+    fetch_seconds = (time.perf_counter() - start) / len(urls)
+
+    start = time.perf_counter()
+    for data in images.values():
+        downscale(data, args.max_dimension, args.quality)
+    downscale_seconds = (time.perf_counter() - start) / len(urls)
+
+    with tempfile.TemporaryDirectory() as directory:
+        preprocessor = MediaPreprocessor(directory, args.max_dimension, args.quality)
+
+        async def prepare_all():
+            return await runtime.map(preprocessor.prepare, urls)
+
+        start = time.perf_counter()
+        cold = runtime.run(prepare_all())
+        cold_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        warm = runtime.run(prepare_all())
+        warm_seconds = time.perf_counter() - start
+    server.shutdown()
+
+    failed = [result for result in cold if result["status"] != "prepared"]
+    if failed:
+        raise SystemExit(f"Preprocessing failed: {failed[0].get('reason')}")
+    source_bytes = sum(result["source_bytes"] for result in cold) / len(cold)
+    compact_bytes = sum(result["bytes"] for result in cold) / len(cold)
+    upload_saved = (source_bytes - compact_bytes) * 8 / (args.uplink_mbps * 1e6)
+    source_pixels = args.width * args.height
+    compact_pixels = cold[0]["width"] * cold[0]["height"]
+
+    print(f"Source:               {args.width}x{args.height}, {source_bytes / 1024:8.1f} KiB per image")
+    print(f"Downscaled:           {cold[0]['width']}x{cold[0]['height']}, {compact_bytes / 1024:8.1f} KiB per image "
+          f"({source_bytes / compact_bytes:.1f}x smaller, {source_pixels / compact_pixels:.1f}x fewer pixels)")
+    print(f"Download (local):     {fetch_seconds * 1000:8.1f} ms per image")
+    print(f"Decode+resize+encode: {downscale_seconds * 1000:8.1f} ms per image")
+    print(f"Prepare, cold cache:  {cold_seconds * 1000:8.1f} ms for {len(urls)} images (concurrent download and resize)")
+    print(f"Prepare, warm cache:  {warm_seconds * 1000:8.1f} ms for {len(urls)} images "
+          f"({sum(result['status'] == 'cached' for result in warm)} cached)")
+    print(f"Upload saved:         {(source_bytes - compact_bytes) / 1024:8.1f} KiB, "
+          f"{upload_saved * 1000:.1f} ms per image at {args.uplink_mbps:g} Mbit/s "
+          f"(net {(upload_saved - downscale_seconds) * 1000:+.1f} ms on a cold cache)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/post_memory.py
+
+import argparse
+import gc
+import tracemalloc
+from datetime import datetime, timedelta
+
+from src.agentic_api.posts import PostBatch, PostBatchBuilder
+
+
+def make_record(i: int, hashtag: str, now: datetime) -> dict:
+    """Build one post in the layout produced by SocialMediaScraperTool."""
+    content_type = "text" if i % 3 == 0 else "image" if i % 3 == 1 else "video"
+    return {
+        "id": f"instagram_{hashtag}_{i}",
+        "url": f"https://instagram.com/post/{hashtag}_{i}",
+        "platform": "Instagram",
+        "hashtag": hashtag,
+        "content_type": content_type,
+        "raw_content": f"This is a sample {content_type} post about #{hashtag} on Instagram",
+        "timestamp": (now - timedelta(hours=i % 48)).isoformat(),
+        "engagement_stats": {
+            "likes": (i + 1) * 10,
+            "shares": (i + 1) * 5,
+            "comments": (i + 1) * 3
+        }
+    }
+
+
+def measure(build):
+    """Return (result, bytes retained) for a builder function."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main():
+    """Compare the memory of dict records with a columnar PostBatch."""
+    parser = argparse.ArgumentParser(description='Benchmark memory of collected post representations')
+    parser.add_argument('--posts', type=int, default=200000, help='Number of posts (default: 200000)')
+    parser.add_argument('--hashtags', type=int, default=20, help='Number of distinct hashtags (default: 20)')
+    args = parser.parse_args()
+
+    now = datetime.now()
+    per_hashtag = args.posts // args.hashtags
+    hashtags = [f"tag{h}" for h in range(args.hashtags)]
+
+    def build_records():
+        return [make_record(i, hashtag, now) for hashtag in hashtags for i in range(per_hashtag)]
+
+    def build_batch():
+        builder = PostBatchBuilder()
+        for hashtag in hashtags:
+            for i in range(per_hashtag):
+                builder.append(make_record(i, hashtag, now))
+        return builder.build()
+
+    records, records_bytes = measure(build_records)
+    del records
+    batch, batch_bytes = measure(build_batch)
+
+    print(f"Posts:            {len(batch)}")
+    print(f"Dict records:     {records_bytes / 1024 / 1024:8.1f} MiB ({records_bytes / len(batch):.0f} B/post)")
+    print(f"PostBatch:        {batch_bytes / 1024 / 1024:8.1f} MiB ({batch_bytes / len(batch):.0f} B/post)")
+    print(f"Reduction:        {records_bytes / batch_bytes:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/response_encoding.py
+
+import argparse
+import json
+import time
+
+from fastapi.responses import JSONResponse
+
+from src.agentic_api.compression import brotli, compress_bytes
+from src.agentic_api.responses import FastJSONResponse, orjson
+
+
+def make_report(size_kb: int) -> str:
+    """Build a markdown report similar to the crews' final output."""
+    sections = []
+    i = 0
+    while sum(len(section) for section in sections) < size_kb * 1024:
+        sections.append(
+            f"## Trend {i}: \"Quiet luxury\" layering\n\n"
+            f"- **Score:** {50 + i % 50}/100 (viral)\n"
+            f"- Key insight: Neutral palettes with tailored outerwear are gaining traction in #fashion posts.\n"
+            f"- Engagement: {(i + 1) * 120} likes, {(i + 1) * 30} shares\n\n"
+            "| Element | Alignment | Narrative |\n|---|---|---|\n"
+            f"| Colors | {i % 100}% | Muted earth tones with a single accent |\n\n"
+        )
+        i += 1
+    return "".join(sections)
+
+
+def time_per_call(fn, repeat: int) -> float:
+    """Return the mean time of ``fn`` in microseconds."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    """Compare serialization time and bytes on the wire of a crew report response."""
+    parser = argparse.ArgumentParser(description='Benchmark JSON serialization and compression of report responses')
+    parser.add_argument('--size-kb', type=int, default=40, help='Approximate report size in KB (default: 40)')
+    parser.add_argument('--repeat', type=int, default=200, help='Iterations per measurement (default: 200)')
+    args = parser.parse_args()
+
+    report = make_report(args.size_kb)
+    content = {"result": report, "run_id": "0" * 32}
+
+    std_body = JSONResponse(content).body
+    fast_body = FastJSONResponse(content).body
+    markdown_body = report.encode("utf-8")
+
+    std_time = time_per_call(lambda: JSONResponse(content), args.repeat)
+    fast_time = time_per_call(lambda: FastJSONResponse(content), args.repeat)
+
+    print(f"Report:                   {len(markdown_body) / 1024:8.1f} KiB markdown")
+    print(f"JSONResponse (stdlib):    {std_time:8.1f} us, {len(std_body)} bytes")
+    print(f"FastJSONResponse ({'orjson' if orjson else 'stdlib'}): {fast_time:8.1f} us, {len(fast_body)} bytes"
+          f"  ({std_time / fast_time:.1f}x faster)")
+    print(f"format=markdown:          {len(markdown_body)} bytes (no JSON escaping)")
+
+    encodings = ["gzip"] + (["br"] if brotli is not None else [])
+    for encoding in encodings:
+        compressed = compress_bytes(fast_body, encoding)
+        compress_time = time_per_call(lambda: compress_bytes(fast_body, encoding), max(1, args.repeat // 4))
+        print(f"JSON + {encoding:<4}               {len(compressed)} bytes "
+              f"({len(std_body) / len(compressed):.1f}x smaller than uncompressed), {compress_time:.1f} us")
+        compressed = compress_bytes(markdown_body, encoding)
+        print(f"markdown + {encoding:<4}           {len(compressed)} bytes")
+    if brotli is None:
+        print("brotli not installed; install the 'brotli' package to benchmark br")
+
+
+if __name__ == "__main__":
+    main()
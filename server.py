@@ -2,23 +2,67 @@
 
 import uvicorn
 import os
+import argparse
+import importlib.util
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+APP = "src.agentic_api.api:app"
+
+def default_workers():
+    """Worker count for production mode, tied to the available CPUs"""
+    if os.getenv("WEB_CONCURRENCY"):
+        return int(os.getenv("WEB_CONCURRENCY"))
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    return max(2, cpus)
+
+def production_options():
+    """uvicorn settings for production mode"""
+    # Use the fast event loop and HTTP parser when they are installed (uvicorn[standard])
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "auto"
+    http = "httptools" if importlib.util.find_spec("httptools") else "auto"
+
+    return {
+        "workers": default_workers(),
+        "loop": loop,
+        "http": http,
+        "backlog": int(os.getenv("SERVER_BACKLOG", "2048")),
+        "timeout_keep_alive": int(os.getenv("SERVER_KEEP_ALIVE", "30")),
+        # In-flight crew runs get this long to finish after SIGTERM
+        "timeout_graceful_shutdown": int(os.getenv("CREW_DRAIN_TIMEOUT", "120")),
+        "proxy_headers": True,
+        "server_header": False,
+        "access_log": os.getenv("SERVER_ACCESS_LOG", "false").lower() == "true",
+    }
+
 def main():
     """Run the API server"""
+    parser = argparse.ArgumentParser(description="Run the Agentic API server")
+    parser.add_argument("--production", action="store_true", help="Run in production mode (multiple workers, no reload)")
+    args = parser.parse_args()
+
     # Get port from environment variable or use default
     port = int(os.getenv("API_PORT", "8000"))
-    
-    # Run the server
-    uvicorn.run(
-        "src.agentic_api.api:app",
-        host="0.0.0.0",
-        port=port,
-        reload=True
-    )
+    production = args.production or os.getenv("SERVER_MODE", "development").lower() == "production"
+
+    if production:
+        options = production_options()
+        if options["workers"] > 1:
+            # Workers may exit to recycle themselves; uvicorn's supervisor starts replacements
+            os.environ["WORKER_SUPERVISED"] = "true"
+        print(f"Starting production server on port {port} with {options['workers']} workers "
+              f"(loop={options['loop']}, http={options['http']})")
+        uvicorn.run(APP, host="0.0.0.0", port=port, **options)
+    else:
+        # Development mode reloads on code changes
+        uvicorn.run(
+            APP,
+            host="0.0.0.0",
+            port=port,
+            reload=True
+        )
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -6,6 +6,8 @@ import json
 from dotenv import load_dotenv
 from crewai import Agent, Task, Crew, Process
 from langchain_openai import ChatOpenAI
+from src.agentic_api.artifacts import get_artifact_store
+from src.agentic_api.checkpoints import new_run_id
 
 # Load environment variables
 load_dotenv()
@@ -89,11 +91,12 @@ def main():
         print("\nResult:")
         print(result)
         
-        # Save the result as text
+        # Save the result as text to a workspace of its own
         result_str = str(result)
-        with open("social_media_analysis_result.txt", "w") as f:
-            f.write(result_str)
-        print(f"\nResult saved to social_media_analysis_result.txt")
+        run_id = new_run_id()
+        artifacts = get_artifact_store()
+        artifacts.put_bytes(run_id, "social_media_analysis_result.txt", result_str.encode("utf-8"))
+        print(f"\nResult saved to {os.path.join(artifacts.workspace(run_id), 'social_media_analysis_result.txt')}")
         
     except Exception as e:
         print(f"\nError: {str(e)}")
@@ -0,0 +1,301 @@
+# src/agentic_api/analytics_store.py
+
+import os
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Fix import path
+try:
+    from src.agentic_api.posts import PostBatch, MISSING_COUNT
+except ModuleNotFoundError:
+    # Try relative import if absolute import fails
+    from posts import PostBatch, MISSING_COUNT
+
+# SQLite database holding scored posts and per-run aggregates
+ANALYTICS_DB_PATH = os.getenv("ANALYTICS_DB_PATH", ".analytics/analytics.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    post_id TEXT PRIMARY KEY,
+    run_id TEXT,
+    platform TEXT,
+    hashtag TEXT,
+    account TEXT,
+    content_type TEXT,
+    timestamp REAL,
+    likes INTEGER,
+    shares INTEGER,
+    comments INTEGER,
+    score REAL,
+    trend_category TEXT,
+    url TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_posts_hashtag_timestamp ON posts (hashtag, timestamp);
+CREATE INDEX IF NOT EXISTS idx_posts_timestamp ON posts (timestamp);
+CREATE INDEX IF NOT EXISTS idx_posts_platform_timestamp ON posts (platform, timestamp);
+CREATE INDEX IF NOT EXISTS idx_posts_score ON posts (score DESC);
+CREATE INDEX IF NOT EXISTS idx_posts_run ON posts (run_id);
+
+-- Posts scored by each run, with the values of that run; a post scored
+-- again by a later run stays in the earlier run's aggregates
+CREATE TABLE IF NOT EXISTS run_posts (
+    run_id TEXT NOT NULL,
+    post_id TEXT NOT NULL,
+    grp TEXT NOT NULL,
+    timestamp REAL,
+    likes INTEGER,
+    shares INTEGER,
+    comments INTEGER,
+    score REAL,
+    PRIMARY KEY (run_id, post_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS run_aggregates (
+    run_id TEXT NOT NULL,
+    grp TEXT NOT NULL,
+    posts INTEGER NOT NULL,
+    avg_score REAL,
+    max_score REAL,
+    likes INTEGER NOT NULL,
+    shares INTEGER NOT NULL,
+    comments INTEGER NOT NULL,
+    first_timestamp REAL,
+    last_timestamp REAL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (run_id, grp)
+);
+CREATE INDEX IF NOT EXISTS idx_run_aggregates_updated ON run_aggregates (updated_at);
+"""
+
+POST_COLUMNS = (
+    "post_id", "run_id", "platform", "hashtag", "account", "content_type", "timestamp",
+    "likes", "shares", "comments", "score", "trend_category", "url", "updated_at",
+)
+
+
+def _nullable_floats(values: np.ndarray) -> List[Optional[float]]:
+    return [None if np.isnan(value) else value for value in values.tolist()]
+
+
+def _nullable_counts(values: np.ndarray) -> List[Optional[int]]:
+    return [None if value == MISSING_COUNT else value for value in values.tolist()]
+
+
+def _iso(epoch: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(epoch).isoformat() if epoch is not None else None
+
+
+class AnalyticsStore:
+    """Indexed local store of scored posts and per-run aggregates.
+
+    The score calculator writes every scored dataset here, so trend
+    questions can be answered with indexed SQL queries instead of a crew
+    run. Each thread gets its own connection and the database runs in WAL
+    mode, so readers never block the writer.
+    """
+
+    def __init__(self, path: str = ANALYTICS_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def record_scored(self, batch: PostBatch, run_id: Optional[str] = None) -> None:
+        """Upsert the posts of a scored batch and refresh the run aggregates.
+
+        ``posts`` holds the latest version of every post; the run keeps its
+        own copy of the values it scored in ``run_posts``.
+        """
+        if not len(batch):
+            return
+        now = time.time()
+
+        columns = [
+            batch.strings["id"],
+            [run_id] * len(batch),
+            batch.categoricals["platform"].to_list(),
+            batch.categoricals["hashtag"].to_list(),
+            batch.categoricals["account"].to_list(),
+            batch.categoricals["content_type"].to_list(),
+            _nullable_floats(batch.floats["timestamp"]),
+            _nullable_counts(batch.counts["likes"]),
+            _nullable_counts(batch.counts["shares"]),
+            _nullable_counts(batch.counts["comments"]),
+            _nullable_floats(batch.floats["score"]),
+            batch.categoricals["trend_category"].to_list(),
+            batch.strings["url"],
+            [now] * len(batch),
+        ]
+        rows = [row for row in zip(*columns) if row[0]]
+
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO posts ({', '.join(POST_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(POST_COLUMNS))})",
+                rows,
+            )
+            if run_id:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO run_posts "
+                    "(run_id, post_id, grp, timestamp, likes, shares, comments, score) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (run_id, post_id, hashtag or account or "unknown", timestamp, likes, shares, comments, score)
+                        for post_id, _, _, hashtag, account, _, timestamp, likes, shares, comments, score, _, _, _ in rows
+                    ],
+                )
+                conn.execute("DELETE FROM run_aggregates WHERE run_id = ?", (run_id,))
+                conn.execute(
+                    "INSERT INTO run_aggregates "
+                    "SELECT run_id, grp, COUNT(*), AVG(score), MAX(score), "
+                    "COALESCE(SUM(likes), 0), COALESCE(SUM(shares), 0), COALESCE(SUM(comments), 0), "
+                    "MIN(timestamp), MAX(timestamp), ? "
+                    "FROM run_posts WHERE run_id = ? GROUP BY grp",
+                    (now, run_id),
+                )
+
+    def top_posts(
+        self,
+        hashtags: Optional[List[str]] = None,
+        platform: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        min_score: Optional[float] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        """Return scored posts ordered by score, highest first."""
+        where, params = self._filters(hashtags, platform, since, until)
+        where.append("score IS NOT NULL")
+        if min_score is not None:
+            where.append("score >= ?")
+            params.append(min_score)
+
+        rows = self._connection().execute(
+            "SELECT post_id, platform, hashtag, account, content_type, timestamp, likes, shares, comments, "
+            "score, trend_category, url, run_id FROM posts "
+            f"WHERE {' AND '.join(where)} ORDER BY score DESC, post_id LIMIT ? OFFSET ?",
+            params + [limit + 1, offset],
+        ).fetchall()
+
+        items = []
+        for row in rows[:limit]:
+            item = dict(row)
+            item = {"id": item.pop("post_id"), **item}
+            item["timestamp"] = _iso(item["timestamp"])
+            items.append(item)
+        return self._page(items, len(rows) > limit, limit, offset)
+
+    def hashtag_stats(
+        self,
+        hashtags: Optional[List[str]] = None,
+        platform: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        """Return per-hashtag statistics over the selected time range."""
+        where, params = self._filters(hashtags, platform, since, until)
+        where.append("hashtag IS NOT NULL")
+
+        rows = self._connection().execute(
+            "SELECT hashtag, COUNT(*) AS posts, AVG(score) AS avg_score, MAX(score) AS max_score, "
+            "COALESCE(SUM(likes), 0) AS likes, COALESCE(SUM(shares), 0) AS shares, "
+            "COALESCE(SUM(comments), 0) AS comments, MIN(timestamp) AS first_post, MAX(timestamp) AS last_post "
+            f"FROM posts WHERE {' AND '.join(where)} GROUP BY hashtag "
+            "ORDER BY avg_score DESC, hashtag LIMIT ? OFFSET ?",
+            params + [limit + 1, offset],
+        ).fetchall()
+
+        items = []
+        for row in rows[:limit]:
+            item = dict(row)
+            item["avg_score"] = round(item["avg_score"], 2) if item["avg_score"] is not None else None
+            item["first_post"] = _iso(item["first_post"])
+            item["last_post"] = _iso(item["last_post"])
+            items.append(item)
+        return self._page(items, len(rows) > limit, limit, offset)
+
+    def run_aggregates(self, run_id: Optional[str] = None, limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+        """Return the stored per-run aggregates, most recent runs first."""
+        where, params = ["1 = 1"], []
+        if run_id:
+            where.append("run_id = ?")
+            params.append(run_id)
+
+        rows = self._connection().execute(
+            "SELECT run_id, grp AS \"group\", posts, avg_score, max_score, likes, shares, comments, "
+            "first_timestamp, last_timestamp, updated_at FROM run_aggregates "
+            f"WHERE {' AND '.join(where)} ORDER BY updated_at DESC, run_id, grp LIMIT ? OFFSET ?",
+            params + [limit + 1, offset],
+        ).fetchall()
+
+        items = []
+        for row in rows[:limit]:
+            item = dict(row)
+            for key in ("first_timestamp", "last_timestamp", "updated_at"):
+                item[key] = _iso(item[key])
+            items.append(item)
+        return self._page(items, len(rows) > limit, limit, offset)
+
+    @staticmethod
+    def _filters(
+        hashtags: Optional[List[str]],
+        platform: Optional[str],
+        since: Optional[float],
+        until: Optional[float],
+    ):
+        """Build the WHERE clauses shared by the post queries."""
+        where, params = ["1 = 1"], []
+        if hashtags:
+            where.append(f"hashtag IN ({', '.join('?' * len(hashtags))})")
+            params.extend(hashtags)
+        if platform:
+            where.append("platform = ?")
+            params.append(platform)
+        if since is not None:
+            where.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("timestamp < ?")
+            params.append(until)
+        return where, params
+
+    @staticmethod
+    def _page(items: List[Dict[str, Any]], has_more: bool, limit: int, offset: int) -> Dict[str, Any]:
+        return {
+            "items": items,
+            "limit": limit,
+            "offset": offset,
+            "next_offset": offset + limit if has_more else None,
+        }
+
+
+_analytics_store: Optional[AnalyticsStore] = None
+
+
+def get_analytics_store() -> AnalyticsStore:
+    """Return the shared analytics store."""
+    global _analytics_store
+    if _analytics_store is None:
+        _analytics_store = AnalyticsStore()
+    return _analytics_store
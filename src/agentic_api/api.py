@@ -2,22 +2,64 @@
 
 import os
 import json
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime
 from typing import List, Dict, Any, Optional
 from pathlib import Path
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Depends, Request, Response, status
-from fastapi.responses import RedirectResponse, JSONResponse, HTMLResponse, FileResponse
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query, Header, Depends, Request, Response, status
+from fastapi.responses import RedirectResponse, JSONResponse, HTMLResponse, FileResponse, StreamingResponse, PlainTextResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
 # Import crew modules
+from crewai import Crew
 from .crew import ResearchCrew
 from .social_media_crew import SocialMediaCrew
+from .checkpoints import kickoff_with_checkpoints, get_checkpoint_store, new_run_id, validate_run_id
+from .analytics_store import get_analytics_store
+from .artifacts import get_artifact_store, validate_artifact_name
+from .executor import get_crew_executor, ExecutorSaturated, CREW_DRAIN_TIMEOUT
+from .scheduler import get_scheduler
+from .jobs import get_job_store, new_job_id
+from .static_cache import StaticAssetCache, STATIC_MAX_AGE
+from .responses import FastJSONResponse, markdown_response
+from .compression import CompressionMiddleware
+from .coalescing import get_single_flight, get_idempotency_store, request_fingerprint, IdempotencyConflict
+from .research_batch import BATCH_CONCURRENCY, BATCH_MAX_TOPICS, deduplicate_topics, stream_batch
+from .cancellation import (
+    CancelToken,
+    CrewCancelled,
+    CANCELLED,
+    CLIENT_DISCONNECTED,
+    DEADLINE_EXCEEDED,
+    CREW_DEFAULT_TIMEOUT_SECONDS,
+    record_aborted_run,
+    resolve_timeout
+)
+from .metrics import get_metrics
+from .search_cache import get_search_cache
+from .run_stats import StatsPublisher, collect_worker_stats, get_run_registry, read_rss_bytes, track_run, worker_id
+from .structured_logging import configure_logging, dropped_records, CREW_VERBOSE, LOG_LEVELS
+from .profiling import get_profile_requests, get_profiling_middleware, store_profile, PROFILE_MAX_SECONDS, PROFILE_POLL_SECONDS
+from .memory import get_allocation_tracker, get_worker_recycler, TRACEMALLOC_ON_START
+from .budgets import (
+    get_token_budgets,
+    BudgetExceeded,
+    BUDGET_RESEARCH_TOKENS,
+    BUDGET_SIMPLIFIED_TOKENS,
+    crew_tokens,
+    estimate_social_media_tokens,
+    tenant_of
+)
 
 # Import authentication modules
 from .auth import (
     get_current_active_user, 
+    get_current_admin_user,
     get_cognito_login_url, 
     get_cognito_logout_url,
     exchange_code_for_tokens,
@@ -30,26 +72,87 @@ from .middleware import get_auth_middleware
 # Load environment variables
 load_dotenv()
 
+# Write logs as JSON lines from a background thread
+configure_logging()
+logger = logging.getLogger(__name__)
+
 # Get the directory of the current file
 CURRENT_DIR = Path(__file__).parent
 STATIC_DIR = CURRENT_DIR / "static"
 
+# Build crew templates once per worker before it accepts traffic
+WARMUP_CREWS = os.getenv("WARMUP_CREWS", "true").lower() == "true"
+
+def warm_up_crews() -> None:
+    """Build the crew templates once so the first request doesn't pay for imports and config parsing"""
+    for name, factory in (("research", ResearchCrew), ("social media", SocialMediaCrew)):
+        start = time.perf_counter()
+        try:
+            factory().build()
+            logger.info("Warmed up %s crew in %.2fs", name, time.perf_counter() - start)
+        except Exception as e:
+            logger.warning("Could not warm up %s crew: %s", name, str(e))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up the worker on startup and drain in-flight crews on shutdown"""
+    if WARMUP_CREWS:
+        await asyncio.to_thread(warm_up_crews)
+    # Publish queue positions of background jobs so any worker can report them
+    get_scheduler().on_positions = get_job_store().update_positions
+    # Drop run artifacts past their age or size limit
+    await asyncio.to_thread(get_artifact_store().gc, True)
+    # Share this worker's stats with the admin view served by any worker
+    stats_publisher = StatsPublisher()
+    stats_publisher.start()
+    # Pick up all-workers profile requests
+    get_profile_requests().start()
+    # Record the memory of finished runs and recycle the worker past its limits
+    get_run_registry().on_finished = get_worker_recycler().run_finished
+    if TRACEMALLOC_ON_START:
+        get_allocation_tracker().start()
+    app.state.warmed_up = True
+    yield
+    get_profile_requests().stop()
+    stats_publisher.stop()
+    # The server has stopped accepting requests; give running crews time to finish
+    executor = get_crew_executor()
+    in_flight = executor.in_flight
+    if in_flight:
+        logger.info("Draining %d in-flight crew run(s) (timeout %ds)", in_flight, CREW_DRAIN_TIMEOUT)
+    if not await asyncio.to_thread(executor.drain, CREW_DRAIN_TIMEOUT):
+        logger.warning("Drain timeout reached with crew runs still in progress")
+    await asyncio.to_thread(get_token_budgets().close)
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Agentic API",
     description="API for running AI agent crews for research and social media analysis",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
+app.state.warmed_up = False
+
+# Static files are served from memory with ETag/Last-Modified validation
+static_cache = StaticAssetCache(STATIC_DIR)
+
+# Add authentication middleware (a request/call_next callable, so it is
+# registered as an HTTP middleware function rather than a middleware class)
+app.middleware("http")(get_auth_middleware())
 
-# Mount static files directory
-app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
+# Compress large responses (brotli when available, gzip otherwise)
+app.add_middleware(CompressionMiddleware)
 
-# Add authentication middleware
-app.add_middleware(get_auth_middleware())
+# Profile single requests sent by admins with X-Profile: 1 or ?profile=1
+app.middleware("http")(get_profiling_middleware())
 
 # Define request and response models
 class ResearchRequest(BaseModel):
     topic: str = Field(..., description="The topic to research")
+    run_id: Optional[str] = Field(default=None, description="Run ID used to checkpoint task outputs (generated if omitted)")
+    resume: bool = Field(default=False, description="Resume the run identified by run_id, skipping its completed tasks")
+    log_level: Optional[str] = Field(default=None, pattern=f"^({'|'.join(LOG_LEVELS)})$", description="Log level of this run, 'debug' logs every agent trace (LOG_LEVEL if omitted)")
 
 class SocialMediaRequest(BaseModel):
     hashtags: List[str] = Field(default=["tech", "ai"], description="The hashtags to analyze")
@@ -59,14 +162,353 @@ class SocialMediaRequest(BaseModel):
     use_gpt35_fallback: bool = Field(default=False, description="Use GPT-3.5-Turbo instead of GPT-4o to avoid rate limits")
     instagram_account_url: Optional[str] = Field(default="https://www.instagram.com/kentooyamazaki/", description="Instagram account URL to crawl")
     instagram_max_images: int = Field(default=5, description="Maximum number of images to collect from the Instagram account")
+    run_id: Optional[str] = Field(default=None, description="Run ID used to checkpoint task outputs (generated if omitted)")
+    resume: bool = Field(default=False, description="Resume the run identified by run_id, skipping its completed tasks")
+    log_level: Optional[str] = Field(default=None, pattern=f"^({'|'.join(LOG_LEVELS)})$", description="Log level of this run, 'debug' logs every agent trace (LOG_LEVEL if omitted)")
+
+class BatchResearchRequest(BaseModel):
+    topics: List[str] = Field(..., min_length=1, max_length=BATCH_MAX_TOPICS, description="The topics to research; duplicates are researched once")
+    max_concurrency: int = Field(default=BATCH_CONCURRENCY, ge=1, description="Maximum number of topics of this batch researched at the same time")
+
+class JobResponse(BaseModel):
+    job_id: str = Field(..., description="The job ID")
+    kind: str = Field(..., description="The crew the job runs")
+    priority: str = Field(..., description="Priority class of the job")
+    status: str = Field(..., description="queued, running, succeeded, failed or cancelled")
+    run_id: Optional[str] = Field(default=None, description="Run ID that can be used to resume the run")
+    queue_position: Optional[int] = Field(default=None, description="Position in the queue while the job is queued (1 = next)")
+    estimated_start: Optional[str] = Field(default=None, description="Estimated start time while the job is queued")
+    created_at: str = Field(..., description="Submission time")
+    started_at: Optional[str] = Field(default=None, description="Start time")
+    finished_at: Optional[str] = Field(default=None, description="Completion time")
+    result: Optional[str] = Field(default=None, description="The crew result once the job succeeded")
+    error: Optional[str] = Field(default=None, description="The error if the job failed")
+    cancel_requested: bool = Field(default=False, description="Whether cancellation of the job was requested")
 
 class ResearchResponse(BaseModel):
     result: str = Field(..., description="The research report")
+    run_id: Optional[str] = Field(default=None, description="Run ID that can be used to resume the run")
 
 class SocialMediaResponse(BaseModel):
     result: str = Field(..., description="The social media analysis result")
+    run_id: Optional[str] = Field(default=None, description="Run ID that can be used to resume the run")
+
+class TrendsResponse(BaseModel):
+    view: str = Field(..., description="The requested view")
+    items: List[Dict[str, Any]] = Field(..., description="Posts, hashtag statistics or run aggregates")
+    limit: int = Field(..., description="Maximum number of items in this page")
+    offset: int = Field(..., description="Offset of the first item in this page")
+    next_offset: Optional[int] = Field(default=None, description="Offset of the next page, if there is one")
+
+def parse_timestamp(value: Optional[str], name: str) -> Optional[float]:
+    """Parse an ISO timestamp query parameter to epoch seconds"""
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} timestamp: {value}")
+
+def username_of(user: Optional[User]) -> str:
+    """Name used to account work to a user"""
+    return getattr(user, "username", None) or "anonymous"
+
+def budget_owner(user: Optional[User]):
+    """Return the (user, tenant) whose token budgets a request draws from"""
+    username = username_of(user)
+    return username, tenant_of(username, getattr(user, "email", None))
+
+def budget_exceeded(e: BudgetExceeded) -> HTTPException:
+    """Count a rejected request and build its 429 response"""
+    get_metrics().increment("budget_rejections_total", scope=e.status.scope)
+    get_metrics().increment("budget_rejected_tokens_total", e.estimate)
+    return HTTPException(status_code=429, detail=str(e), headers=e.headers())
+
+def check_budget(user: Optional[User], estimated_tokens: int) -> Dict[str, str]:
+    """Reject a request whose estimated tokens exceed the remaining budget; returns the budget headers"""
+    try:
+        budget = get_token_budgets().check(*budget_owner(user), estimated_tokens)
+    except BudgetExceeded as e:
+        raise budget_exceeded(e)
+    return budget.headers()
+
+def budget_headers(user: Optional[User]) -> Dict[str, str]:
+    """Response headers with the current budget state of a user"""
+    return get_token_budgets().status(*budget_owner(user)).headers()
+
+def reserve_budget(user: Optional[User], estimated_tokens: int):
+    """Reserve the estimated tokens of a run, raising 429 if they don't fit"""
+    try:
+        return get_token_budgets().reserve(*budget_owner(user), estimated_tokens)
+    except BudgetExceeded as e:
+        raise budget_exceeded(e)
+
+def settle_budget(reservation, result=None, error: Optional[BaseException] = None, cancel_token: Optional[CancelToken] = None) -> None:
+    """Charge a run its actual token usage
+    
+    Runs that never started are released; runs that failed after starting
+    keep their estimate since their usage is unknown.
+    """
+    budgets = get_token_budgets()
+    if error is None:
+        budgets.settle(reservation, crew_tokens(result) or reservation.tokens)
+    elif (isinstance(error, HTTPException) and error.status_code == 503) or isinstance(error, ExecutorSaturated) \
+            or (cancel_token is not None and cancel_token.started_at is None):
+        budgets.release(reservation)
+
+async def run_crew(
+    fn,
+    *args,
+    user: Optional[User] = None,
+    priority: str = "interactive",
+    cancel_token: Optional[CancelToken] = None,
+    estimated_tokens: int = 0
+):
+    """Run a blocking crew kickoff through the fair-share scheduler
+    
+    ``estimated_tokens`` are reserved from the user's and tenant's budgets
+    (429 if they don't fit) and replaced by the actual usage afterwards.
+    With a ``cancel_token`` the kickoff receives it as keyword argument, the
+    request fails with 504 once its deadline passes and the run is stopped
+    at its next step when the caller is cancelled.
+    """
+    reservation = reserve_budget(user, estimated_tokens)
+    try:
+        result = await _run_scheduled(fn, *args, user=user, priority=priority, cancel_token=cancel_token)
+    except BaseException as e:
+        settle_budget(reservation, error=e, cancel_token=cancel_token)
+        raise
+    settle_budget(reservation, result)
+    return result
+
+async def _run_scheduled(fn, *args, user: Optional[User], priority: str, cancel_token: Optional[CancelToken]):
+    scheduler = get_scheduler()
+    kwargs = {"cancel_token": cancel_token} if cancel_token is not None else {}
+    timeout = cancel_token.remaining() if cancel_token is not None else None
+    try:
+        return await asyncio.wait_for(
+            scheduler.run(fn, *args, user=username_of(user), priority=priority, **kwargs),
+            timeout
+        )
+    except ExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    except CrewCancelled as e:
+        record_aborted_run(cancel_token, scheduler.average_duration)
+        raise HTTPException(status_code=504 if e.reason == DEADLINE_EXCEEDED else 409, detail=str(e))
+    except asyncio.TimeoutError:
+        # The crew thread stops at its next step
+        cancel_token.cancel(DEADLINE_EXCEEDED)
+        record_aborted_run(cancel_token, scheduler.average_duration)
+        raise HTTPException(status_code=504, detail="Crew run aborted: deadline exceeded")
+    except asyncio.CancelledError:
+        if cancel_token is not None:
+            cancel_token.cancel(CLIENT_DISCONNECTED)
+            record_aborted_run(cancel_token, scheduler.average_duration)
+        raise
+
+async def wait_for_disconnect(request: Request) -> None:
+    """Return once the client has disconnected (the request body must have been read)"""
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+async def cancel_on_disconnect(request: Request, awaitable):
+    """Await ``awaitable``, cancelling it when the client disconnects first"""
+    task = asyncio.ensure_future(awaitable)
+    disconnected = asyncio.ensure_future(wait_for_disconnect(request))
+    try:
+        await asyncio.wait({task, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+        if task.done():
+            return task.result()
+    finally:
+        task.cancel()
+        disconnected.cancel()
+    # Let the crew run clean up before answering the (gone) client
+    await asyncio.gather(task, return_exceptions=True)
+    raise HTTPException(status_code=499, detail="Client closed request")
+
+# Keep references to the tasks finishing background jobs
+_background_jobs = set()
+
+# Cancel tokens of the background jobs queued or running in this worker
+_job_tokens: Dict[str, CancelToken] = {}
+
+def format_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a stored job to a JobResponse"""
+    iso = lambda value: datetime.fromtimestamp(value).isoformat() if value is not None else None
+    response = job["response"] or {}
+    return {
+        "job_id": job["job_id"],
+        "kind": job["kind"],
+        "priority": job["priority"],
+        "status": job["status"],
+        "run_id": job["run_id"],
+        "queue_position": job["queue_position"] if job["status"] == "queued" else None,
+        "estimated_start": iso(job["estimated_start"]) if job["status"] == "queued" else None,
+        "created_at": iso(job["created_at"]),
+        "started_at": iso(job["started_at"]),
+        "finished_at": iso(job["finished_at"]),
+        "result": response.get("result"),
+        "error": job["error"],
+        "cancel_requested": bool(job["cancel_requested"]),
+    }
+
+async def submit_background_job(
+    kind: str,
+    user: Optional[User],
+    priority: str,
+    run_id: str,
+    timeout: float,
+    estimated_tokens: int,
+    fn,
+    *args
+) -> JSONResponse:
+    """Queue a crew run as a background job and return its status"""
+    store = get_job_store()
+    scheduler = get_scheduler()
+    reservation = reserve_budget(user, estimated_tokens)
+    job_id = new_job_id()
+    store.create(job_id, username_of(user), kind, priority, run_id)
+    # The job can be cancelled through any worker, so the crew also polls the store
+    token = CancelToken(timeout, poll=lambda: store.cancel_requested(job_id))
+    
+    def on_start():
+        store.update(job_id, status="running", started_at=time.time())
+    
+    try:
+        job = scheduler.submit(
+            fn, *args, user=username_of(user), priority=priority, job_id=job_id, on_start=on_start, cancel_token=token
+        )
+    except ExecutorSaturated as e:
+        settle_budget(reservation, error=e)
+        store.update(job_id, status="failed", finished_at=time.time(), error=str(e))
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    _job_tokens[job_id] = token
+    
+    async def finish():
+        try:
+            result = await job.future
+            settle_budget(reservation, result)
+            store.update(job_id, status="succeeded", finished_at=time.time(), response={"result": result.raw, "run_id": run_id})
+        except (CrewCancelled, asyncio.CancelledError) as e:
+            # Cancelled through the API or past its deadline; dropped from the queue if it hadn't started
+            settle_budget(reservation, error=e, cancel_token=token)
+            token.cancel(CANCELLED)
+            record_aborted_run(token, scheduler.average_duration)
+            store.update(job_id, status="cancelled", finished_at=time.time(), error=str(e) or f"Crew run aborted: {token.reason}")
+        except Exception as e:
+            settle_budget(reservation, error=e, cancel_token=token)
+            store.update(job_id, status="failed", finished_at=time.time(), error=str(e))
+        finally:
+            _job_tokens.pop(job_id, None)
+    
+    task = asyncio.ensure_future(finish())
+    _background_jobs.add(task)
+    task.add_done_callback(_background_jobs.discard)
+    return JSONResponse(status_code=202, content=format_job(store.get(job_id)), headers=budget_headers(user))
+
+def normalize_list(values: List[str]) -> List[str]:
+    """Normalize a list parameter for request fingerprinting"""
+    return sorted({value.strip().lower() for value in values if value.strip()})
+
+async def execute_once(
+    endpoint: str,
+    payload: Dict[str, Any],
+    current_user: Optional[User],
+    idempotency_key: Optional[str],
+    estimated_tokens: int,
+    execute
+):
+    """Run a crew request at most once per identical in-flight request and per Idempotency-Key
+    
+    The budget is checked after the stored response lookup, so retries of a
+    completed request are replayed even when the budget is used up.
+    Returns the response and extra headers describing how it was produced.
+    """
+    # Only requests of the same user are coalesced: each user's run is charged to their budget
+    fingerprint = request_fingerprint(endpoint, {**payload, "user": username_of(current_user)})
+    single_flight = get_single_flight()
+    scope = f"{username_of(current_user)}:{endpoint}"
+    store = get_idempotency_store() if idempotency_key else None
+    
+    claimed = False
+    if store is not None:
+        try:
+            stored = await asyncio.to_thread(store.claim, scope, idempotency_key, fingerprint)
+        except IdempotencyConflict as e:
+            # The original request runs in this worker: attach to it below
+            if not (e.status_code == 409 and single_flight.in_flight(fingerprint)):
+                raise HTTPException(status_code=e.status_code, detail=e.detail)
+        else:
+            if stored is not None:
+                return stored, {"Idempotent-Replayed": "true"}
+            claimed = True
+    
+    try:
+        check_budget(current_user, estimated_tokens)
+        response, shared = await single_flight.do(fingerprint, execute)
+    except BaseException:
+        if claimed:
+            await asyncio.to_thread(store.release, scope, idempotency_key)
+        raise
+    if claimed:
+        await asyncio.to_thread(store.complete, scope, idempotency_key, response)
+    return response, {"X-Coalesced": "true"} if shared else {}
+
+def resolve_run_id(run_id: Optional[str], resume: bool, current_user: Optional[User]) -> str:
+    """Validate the requested run ID or generate a new one
+    
+    Runs started by another user are reported as not found.
+    """
+    if run_id is None:
+        if resume:
+            raise HTTPException(status_code=400, detail="run_id is required to resume a run")
+        return new_run_id()
+    try:
+        validate_run_id(run_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    store = get_checkpoint_store()
+    if store.has_run(run_id):
+        if store.owner(run_id) != username_of(current_user):
+            raise HTTPException(status_code=404, detail=f"No checkpoints found for run {run_id}")
+    elif resume:
+        raise HTTPException(status_code=404, detail=f"No checkpoints found for run {run_id}")
+    return run_id
 
 # Define API endpoints
+@app.get("/healthz")
+async def healthz():
+    """Liveness probe: the worker is up and serving requests"""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness probe: the worker is warmed up and can accept crew runs"""
+    scheduler = get_scheduler()
+    checks = {
+        "warmed_up": bool(app.state.warmed_up),
+        "executor_available": not scheduler.saturated,
+        "accepting_runs": scheduler.accepting,
+    }
+    ready = all(checks.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not ready",
+            "checks": checks,
+            "crews_running": scheduler.running,
+            "crews_queued": scheduler.queued
+        }
+    )
+
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"])
+async def static_files(path: str, request: Request):
+    """Serve a static asset from the in-memory cache"""
+    response = static_cache.response(request, path, cache_control=f"public, max-age={STATIC_MAX_AGE}")
+    if response is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return response
+
 @app.get("/")
 async def root(request: Request):
     # Check if user is authenticated by looking for the access_token cookie
@@ -77,7 +519,7 @@ async def root(request: Request):
         return {"message": "Welcome to the Agentic API for CrewAI", "authenticated": True}
     else:
         # User is not authenticated, serve the login page
-        return FileResponse(STATIC_DIR / "login.html")
+        return static_cache.response(request, "login.html")
 
 # Authentication endpoints
 @app.get("/auth/login")
@@ -132,57 +574,423 @@ async def get_user(current_user: User = Depends(get_current_active_user)):
     return current_user
 
 @app.post("/api/research", response_model=ResearchResponse)
-async def run_research(request: ResearchRequest, background_tasks: BackgroundTasks, current_user: User = Depends(get_current_active_user)):
+async def run_research(
+    request: ResearchRequest,
+    http_request: Request,
+    background_tasks: BackgroundTasks,
+    format: str = Query("json", pattern="^(json|markdown)$", description="Response format: 'json' or 'markdown' (raw report as text/markdown)"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255, description="Replay the stored response of a previous request with the same key"),
+    priority: str = Query("interactive", pattern="^(interactive|batch)$", description="Priority class: 'interactive' or 'batch'"),
+    background: bool = Query(False, description="Queue the run as a background job and return its job status (202)"),
+    request_timeout: Optional[float] = Header(None, alias="X-Request-Timeout", gt=0, description="Deadline of the crew run in seconds; the run is aborted once it passes"),
+    current_user: User = Depends(get_current_active_user)
+):
     """Run a research crew on a specific topic"""
-    try:
-        # Create and run the crew
-        crew = ResearchCrew()
-        result = crew.build().kickoff(inputs={'topic': request.topic})
-        
-        # Return the result
-        return {"result": result.raw}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error running research crew: {str(e)}")
+    run_id = resolve_run_id(request.run_id, request.resume, current_user)
+    timeout = resolve_timeout(request_timeout)
+    estimated_tokens = BUDGET_RESEARCH_TOKENS
+    if background:
+        check_budget(current_user, estimated_tokens)
+        return await submit_background_job(
+            "research", current_user, priority, run_id, timeout, estimated_tokens,
+            research_kickoff, request.topic, run_id, request.resume, username_of(current_user), request.log_level
+        )
+    
+    async def execute():
+        try:
+            result = await run_crew(
+                research_kickoff, request.topic, run_id, request.resume, username_of(current_user), request.log_level,
+                user=current_user, priority=priority, cancel_token=CancelToken(timeout), estimated_tokens=estimated_tokens
+            )
+            return {"result": result.raw, "run_id": run_id}
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error running research crew (run_id={run_id}): {str(e)}")
+    
+    # Identical requests share one crew run
+    payload = {"topic": " ".join(request.topic.split()).casefold(), "run_id": request.run_id, "resume": request.resume}
+    # Stop the crew if the client goes away before it finishes
+    response, headers = await cancel_on_disconnect(
+        http_request, execute_once("research", payload, current_user, idempotency_key, estimated_tokens, execute)
+    )
+    headers.update(budget_headers(current_user))
+    
+    # Return the result
+    if format == "markdown":
+        return markdown_response(response["result"], headers={"X-Run-ID": response["run_id"], **headers})
+    return FastJSONResponse(response, headers=headers)
+
+@app.post("/api/research/batch")
+async def run_research_batch(request: BatchResearchRequest, current_user: User = Depends(get_current_active_user)):
+    """Research a batch of topics, streaming NDJSON results as each topic finishes"""
+    topics, duplicates = deduplicate_topics(request.topics)
+    if not topics:
+        raise HTTPException(status_code=400, detail="No non-empty topics in the batch")
+    
+    # The whole batch must fit the remaining budget
+    budget = check_budget(current_user, len(topics) * BUDGET_RESEARCH_TOKENS)
+    
+    # Every unique topic gets its own run ID so failed topics can be resumed
+    run_ids = {topic: new_run_id() for topic in topics}
+    scheduler = get_scheduler()
+    
+    async def run_topic(topic: str) -> Dict[str, Any]:
+        # Topics left running when the client disconnects are stopped at their next step
+        run_id = run_ids[topic]
+        result = await run_crew(
+            research_kickoff, topic, run_id, False, username_of(current_user),
+            user=current_user, priority="batch", cancel_token=CancelToken(CREW_DEFAULT_TIMEOUT_SECONDS),
+            estimated_tokens=BUDGET_RESEARCH_TOKENS
+        )
+        return {"run_id": run_id, "result": result.raw}
+    
+    # Topics are scheduled as batch work on the worker's crew executor,
+    # capped per batch so one batch cannot occupy every crew thread
+    concurrency = min(request.max_concurrency, scheduler.max_running)
+    batch_info = {"submitted_topics": len(request.topics), "concurrency": concurrency, "run_ids": run_ids}
+    return StreamingResponse(
+        stream_batch(topics, duplicates, run_topic, concurrency, batch_info),
+        media_type="application/x-ndjson",
+        headers=budget
+    )
 
 @app.post("/api/social-media-analysis", response_model=SocialMediaResponse)
-async def run_social_media_analysis(request: SocialMediaRequest, background_tasks: BackgroundTasks, current_user: User = Depends(get_current_active_user)):
+async def run_social_media_analysis(
+    request: SocialMediaRequest,
+    http_request: Request,
+    background_tasks: BackgroundTasks,
+    format: str = Query("json", pattern="^(json|markdown)$", description="Response format: 'json' or 'markdown' (raw report as text/markdown)"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255, description="Replay the stored response of a previous request with the same key"),
+    priority: str = Query("interactive", pattern="^(interactive|batch)$", description="Priority class: 'interactive' or 'batch'"),
+    background: bool = Query(False, description="Queue the run as a background job and return its job status (202)"),
+    request_timeout: Optional[float] = Header(None, alias="X-Request-Timeout", gt=0, description="Deadline of the crew run in seconds; the run is aborted once it passes"),
+    current_user: User = Depends(get_current_active_user)
+):
     """Run a social media trend analysis crew"""
+    run_id = resolve_run_id(request.run_id, request.resume, current_user)
+    timeout = resolve_timeout(request_timeout)
+    # Reject runs that would collect more content than the remaining budget pays for
+    estimated_tokens = estimate_social_media_tokens(
+        len(request.hashtags),
+        len(request.platforms),
+        request.min_items_per_hashtag,
+        request.instagram_max_images if request.instagram_account_url else 0
+    )
+    if background:
+        check_budget(current_user, estimated_tokens)
+        return await submit_background_job(
+            "social-media-analysis", current_user, priority, run_id, timeout, estimated_tokens,
+            social_media_kickoff, request, run_id, username_of(current_user)
+        )
+    
+    async def execute():
+        try:
+            result = await run_crew(
+                social_media_kickoff, request, run_id, username_of(current_user),
+                user=current_user, priority=priority, cancel_token=CancelToken(timeout), estimated_tokens=estimated_tokens
+            )
+            return {"result": result.raw, "run_id": run_id}
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error running social media analysis crew (run_id={run_id}): {str(e)}")
+    
+    # Identical requests share one crew run
+    payload = request.model_dump()
+    for field in ("hashtags", "platforms", "geo_focus"):
+        payload[field] = normalize_list(payload[field])
+    # Stop the crew if the client goes away before it finishes
+    response, headers = await cancel_on_disconnect(
+        http_request, execute_once("social-media-analysis", payload, current_user, idempotency_key, estimated_tokens, execute)
+    )
+    headers.update(budget_headers(current_user))
+    
+    # Return the result
+    if format == "markdown":
+        return markdown_response(response["result"], headers={"X-Run-ID": response["run_id"], **headers})
+    return FastJSONResponse(response, headers=headers)
+
+def research_kickoff(
+    topic: str,
+    run_id: str,
+    resume: bool = False,
+    owner: Optional[str] = None,
+    log_level: Optional[str] = None,
+    cancel_token: Optional[CancelToken] = None
+):
+    """Build and run the research crew, checkpointing each task output"""
+    crew = ResearchCrew()
+    with track_run(run_id, "research", crew.build(), user=owner, log_level=log_level) as built:
+        result = kickoff_with_checkpoints(
+            built, {'topic': topic}, run_id, resume=resume, cancel_token=cancel_token, owner=owner
+        )
+    store_run_artifacts(run_id, owner, result)
+    return result
+
+def social_media_kickoff(request: SocialMediaRequest, run_id: str, owner: Optional[str] = None, cancel_token: Optional[CancelToken] = None):
+    """Build and run the social media crew for a request"""
+    # Create inputs dictionary
+    inputs = {
+        'hashtags': request.hashtags,
+        'min_items_per_hashtag': request.min_items_per_hashtag,
+        'platforms': request.platforms,
+        'geo_focus': request.geo_focus,
+        'filters': {'language': 'English', 'nsfw_blocked': True},
+        # ZOZO crawler is disabled by setting empty values
+        'zozo_categories': [],
+        'zozo_gender': [],
+        'zozo_brands': [],
+        'zozo_min_items_per_category': 0,
+        # Instagram settings
+        'instagram_account_url': request.instagram_account_url,
+        'instagram_max_images': request.instagram_max_images,
+        # Each run writes its CSV to its own workspace
+        'csv_output_path': os.path.join(get_artifact_store().workspace(run_id), 'social_media_data.csv')
+    }
+    
+    # Create and run the crew, checkpointing each task output
+    crew = SocialMediaCrew(use_gpt35_fallback=request.use_gpt35_fallback, run_id=run_id)
+    with track_run(run_id, "social_media", crew.build(), user=owner, log_level=request.log_level) as built:
+        result = kickoff_with_checkpoints(
+            built, inputs, run_id, resume=request.resume, cancel_token=cancel_token, owner=owner
+        )
+    store_run_artifacts(run_id, owner, result)
+    return result
+
+def simplified_kickoff(crew: Crew, owner: Optional[str] = None):
+    """Run an ad-hoc crew, tracked for the admin stats under a fresh run ID"""
+    with track_run(new_run_id(), "simplified", crew, user=owner) as built:
+        return built.kickoff()
+
+def store_run_artifacts(run_id: str, owner: Optional[str], result) -> None:
+    """Store the report and the files the tools wrote to the run's workspace as artifacts"""
+    artifacts = get_artifact_store()
+    artifacts.collect(run_id, owner=owner)
+    artifacts.put_bytes(run_id, "report.md", result.raw.encode("utf-8"), owner=owner)
+    artifacts.gc()
+
+@app.get("/api/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, current_user: User = Depends(get_current_active_user)):
+    """Get the status of a background crew job, including its queue position and estimated start"""
+    job = await asyncio.to_thread(get_job_store().get, job_id)
+    if job is None or job["username"] != username_of(current_user):
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    # Jobs queued in this worker get a fresh estimate
+    if job["status"] == "queued":
+        for scheduled, position, estimated_start in get_scheduler().estimate_starts():
+            if scheduled.job_id == job_id:
+                job["queue_position"], job["estimated_start"] = position, estimated_start
+                break
+    return format_job(job)
+
+@app.post("/api/jobs/{job_id}/cancel", response_model=JobResponse, status_code=202)
+async def cancel_job(job_id: str, current_user: User = Depends(get_current_active_user)):
+    """Cancel a queued or running background crew job
+    
+    Queued jobs are dropped; running jobs stop at their next agent step.
+    Jobs owned by another worker notice the request within CANCEL_POLL_SECONDS.
+    """
+    store = get_job_store()
+    job = await asyncio.to_thread(store.get, job_id)
+    if job is None or job["username"] != username_of(current_user):
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if job["status"] not in ("queued", "running"):
+        raise HTTPException(status_code=409, detail=f"Job {job_id} already {job['status']}")
+    
+    await asyncio.to_thread(store.update, job_id, cancel_requested=1)
+    token = _job_tokens.get(job_id)
+    if token is not None:
+        token.cancel(CANCELLED)
+        scheduler = get_scheduler()
+        scheduled = scheduler.find(job_id)
+        if scheduled is not None:
+            scheduler.cancel(scheduled)
+        # Give the job a chance to record its new status
+        await asyncio.sleep(0)
+    job = await asyncio.to_thread(store.get, job_id)
+    return JSONResponse(status_code=202, content=format_job(job))
+
+def owned_artifacts(run_id: str, current_user: User) -> Dict[str, Any]:
+    """Return the artifact manifest of a run owned by the user, or raise 404"""
     try:
-        # Create inputs dictionary
-        inputs = {
-            'hashtags': request.hashtags,
-            'min_items_per_hashtag': request.min_items_per_hashtag,
-            'platforms': request.platforms,
-            'geo_focus': request.geo_focus,
-            'filters': {'language': 'English', 'nsfw_blocked': True},
-            # ZOZO crawler is disabled by setting empty values
-            'zozo_categories': [],
-            'zozo_gender': [],
-            'zozo_brands': [],
-            'zozo_min_items_per_category': 0,
-            # Instagram settings
-            'instagram_account_url': request.instagram_account_url,
-            'instagram_max_images': request.instagram_max_images,
-            'csv_output_path': 'social_media_data.csv'  # Default CSV output path
-        }
-        
-        # Create and run the crew
-        crew = SocialMediaCrew(use_gpt35_fallback=request.use_gpt35_fallback)
-        result = crew.build().kickoff(inputs=inputs)
-        
-        # Return the result
-        return {"result": result.raw}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error running social media analysis crew: {str(e)}")
+        manifest = get_artifact_store().manifest(validate_run_id(run_id))
+    except ValueError:
+        raise HTTPException(status_code=404, detail=f"Run {run_id} not found")
+    if not manifest["artifacts"] or manifest.get("owner") != username_of(current_user):
+        raise HTTPException(status_code=404, detail=f"Run {run_id} not found")
+    return manifest
+
+@app.get("/api/runs/{run_id}/artifacts")
+async def list_run_artifacts(run_id: str, current_user: User = Depends(get_current_active_user)):
+    """List the artifacts stored for a run"""
+    manifest = await asyncio.to_thread(owned_artifacts, run_id, current_user)
+    return {
+        "run_id": run_id,
+        "artifacts": [
+            {"name": name, **entry, "url": f"/api/runs/{run_id}/artifacts/{name}"}
+            for name, entry in sorted(manifest["artifacts"].items())
+        ],
+    }
+
+@app.get("/api/runs/{run_id}/artifacts/{name}")
+async def get_run_artifact(run_id: str, name: str, request: Request, current_user: User = Depends(get_current_active_user)):
+    """Download an artifact of a run
+
+    Supports Range requests (206 Partial Content) so large files can be
+    fetched in parts or resumed. The ETag is the SHA-256 of the content.
+    """
+    manifest = await asyncio.to_thread(owned_artifacts, run_id, current_user)
+    entry = manifest["artifacts"].get(name)
+    stored = await asyncio.to_thread(get_artifact_store().get, run_id, name) if entry is not None else None
+    if stored is None:
+        raise HTTPException(status_code=404, detail=f"Artifact {name} not found for run {run_id}")
+    path, entry = stored
+
+    etag = f'"{entry["digest"]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=entry["media_type"], filename=validate_artifact_name(name), headers=headers)
+
+@app.get("/api/metrics")
+async def get_worker_metrics(current_user: User = Depends(get_current_active_user)):
+    """Counters and gauges of the worker that serves the request"""
+    scheduler = get_scheduler()
+    search_cache = await asyncio.to_thread(get_search_cache().stats)
+    return {
+        "pid": os.getpid(),
+        "counters": {
+            **get_metrics().snapshot(),
+            "coalesced_requests_total": get_single_flight().coalesced,
+            "log_records_dropped_total": dropped_records(),
+        },
+        "gauges": {
+            "crews_running": scheduler.running,
+            "crews_queued": scheduler.queued,
+            "average_crew_seconds": round(scheduler.average_duration, 3),
+            "search_cache_entries": search_cache["entries"],
+            "search_cache_hit_rate": search_cache["hit_rate"],
+        },
+    }
+
+@app.get("/api/admin/stats")
+async def get_admin_stats(current_user: User = Depends(get_current_admin_user)):
+    """In-flight runs, queues, executor, caches, rate limiter and memory of every worker
+
+    The worker serving the request reports its live counters; the other
+    workers' snapshots are at most a few seconds old (``STATS_PUBLISH_SECONDS``).
+    The HTML view is at ``/static/admin.html``.
+    """
+    workers = await asyncio.to_thread(collect_worker_stats)
+    return {
+        "generated_at": time.time(),
+        "totals": {
+            "workers": len(workers),
+            "runs_in_flight": sum(len(worker["runs"]) for worker in workers),
+            "queued": sum(worker["queue"]["queued"] for worker in workers),
+            "rss_bytes": sum(worker["rss_bytes"] or 0 for worker in workers),
+        },
+        "workers": workers,
+    }
+
+@app.get("/api/admin/profile")
+async def profile_workers(
+    seconds: float = Query(10, gt=0, le=PROFILE_MAX_SECONDS, description="How long to sample the workers"),
+    format: str = Query("speedscope", pattern="^(speedscope|collapsed)$", description="'speedscope' (JSON for speedscope.app) or 'collapsed' (flame graph input)"),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Sample the stacks of every worker for a few seconds
+
+    Each worker samples all of its threads; thread names are prefixed with
+    the worker. The profile is also stored as artifacts, see the
+    ``X-Profile-Artifacts`` header.
+    """
+    requests = get_profile_requests()
+    workers = [worker["worker"] for worker in await asyncio.to_thread(collect_worker_stats)]
+    profile_id = await asyncio.to_thread(requests.request, seconds)
+    await asyncio.sleep(seconds)
+    profile, reported = await asyncio.to_thread(requests.collect, profile_id, workers, PROFILE_POLL_SECONDS + 5)
+    run_id = await asyncio.to_thread(store_profile, profile, f"all workers for {seconds:g}s", username_of(current_user))
+    headers = {
+        "X-Profile-Artifacts": f"/api/runs/{run_id}/artifacts",
+        "X-Profile-Workers": ",".join(reported),
+    }
+    if format == "collapsed":
+        return PlainTextResponse(profile.to_collapsed(), headers=headers)
+    return FastJSONResponse(profile.to_speedscope(f"all workers for {seconds:g}s"), headers=headers)
+
+@app.get("/api/admin/memory")
+async def get_memory(current_user: User = Depends(get_current_admin_user)):
+    """Memory of this worker: RSS, per-run high-water marks, recycling limits and tracing status"""
+    return {
+        "worker": worker_id(),
+        "rss_bytes": read_rss_bytes(),
+        "recycler": get_worker_recycler().status(),
+        "tracemalloc": get_allocation_tracker().status(),
+    }
+
+@app.post("/api/admin/memory/snapshots")
+async def take_memory_snapshot(
+    limit: int = Query(20, ge=1, le=200, description="Maximum number of modules to return per list"),
+    group: str = Query("module", pattern="^(module|package)$", description="Group allocations by 'module' or top-level 'package'"),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Take an allocation snapshot of this worker and diff it with the previous and first one
+
+    The first call starts ``tracemalloc``, which slows the worker down until
+    it is stopped with ``DELETE /api/admin/memory/snapshots``.
+    """
+    snapshot = await asyncio.to_thread(get_allocation_tracker().snapshot, limit, group)
+    return {"worker": worker_id(), "rss_bytes": read_rss_bytes(), **snapshot}
+
+@app.delete("/api/admin/memory/snapshots")
+async def stop_memory_tracing(current_user: User = Depends(get_current_admin_user)):
+    """Stop tracing allocations and drop the stored snapshots"""
+    await asyncio.to_thread(get_allocation_tracker().stop)
+    return {"worker": worker_id(), "tracemalloc": get_allocation_tracker().status()}
+
+@app.get("/api/trends", response_model=TrendsResponse)
+def get_trends(
+    view: str = Query("top", description="'top' for top posts by score, 'hashtags' for per-hashtag stats, 'runs' for per-run aggregates"),
+    hashtags: Optional[str] = Query(None, description="Comma-separated list of hashtags to filter on"),
+    platform: Optional[str] = Query(None, description="Platform to filter on"),
+    since: Optional[str] = Query(None, description="Only include posts at or after this ISO timestamp"),
+    until: Optional[str] = Query(None, description="Only include posts before this ISO timestamp"),
+    min_score: Optional[float] = Query(None, description="Minimum score of the returned posts (view=top)"),
+    run_id: Optional[str] = Query(None, description="Run to return the aggregates of (view=runs)"),
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of items to return"),
+    offset: int = Query(0, ge=0, description="Number of items to skip"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Query stored trend analytics without running a crew"""
+    hashtag_list = [tag.strip() for tag in hashtags.split(",") if tag.strip()] if hashtags else None
+    since_ts = parse_timestamp(since, "since")
+    until_ts = parse_timestamp(until, "until")
+    
+    store = get_analytics_store()
+    if view == "top":
+        page = store.top_posts(hashtag_list, platform, since_ts, until_ts, min_score, limit, offset)
+    elif view == "hashtags":
+        page = store.hashtag_stats(hashtag_list, platform, since_ts, until_ts, limit, offset)
+    elif view == "runs":
+        page = store.run_aggregates(run_id, limit, offset)
+    else:
+        raise HTTPException(status_code=400, detail=f"Unknown view: {view}")
+    
+    return {"view": view, **page}
 
 @app.get("/api/simplified-social-media-analysis")
 async def run_simplified_social_media_analysis(
     hashtags: str = Query("ai", description="Comma-separated list of hashtags to analyze"),
     min_items: int = Query(3, description="Minimum items to collect per hashtag"),
     use_gpt35_fallback: bool = Query(False, description="Use GPT-3.5-Turbo instead of GPT-4o"),
+    format: str = Query("json", pattern="^(json|markdown)$", description="Response format: 'json' or 'markdown' (raw report as text/markdown)"),
     current_user: User = Depends(get_current_active_user)
 ):
     """Run a simplified social media trend analysis"""
+    check_budget(current_user, BUDGET_SIMPLIFIED_TOKENS)
     try:
         # Process hashtags
         hashtag_list = [tag.strip() for tag in hashtags.split(",")]
@@ -206,7 +1014,7 @@ async def run_simplified_social_media_analysis(
             goal="Collect social media data for specified hashtags and convert to CSV",
             backstory="You are a specialized web crawler focused on Instagram data collection and CSV conversion.",
             llm=llm,
-            verbose=True
+            verbose=CREW_VERBOSE
         )
         
         # Create trend analyst agent
@@ -215,7 +1023,7 @@ async def run_simplified_social_media_analysis(
             goal="Analyze social media data to identify emerging fashion trends",
             backstory="You are an expert in fashion trend analysis with a keen eye for emerging styles.",
             llm=llm,
-            verbose=True
+            verbose=CREW_VERBOSE
         )
         
         # Create data collection task
@@ -236,14 +1044,21 @@ async def run_simplified_social_media_analysis(
         crew = Crew(
             agents=[web_crawler, trend_analyst],
             tasks=[data_collection, trend_analysis],
-            verbose=True,
+            verbose=CREW_VERBOSE,
             process=Process.sequential,
             memory=False  # Disable memory to reduce token usage
         )
         
-        result = crew.kickoff()
+        result = await run_crew(
+            simplified_kickoff, crew, username_of(current_user),
+            user=current_user, priority="interactive", estimated_tokens=BUDGET_SIMPLIFIED_TOKENS
+        )
         
         # Return the result
-        return {"result": str(result)}
+        if format == "markdown":
+            return markdown_response(str(result), headers=budget_headers(current_user))
+        return FastJSONResponse({"result": str(result)}, headers=budget_headers(current_user))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error running simplified social media analysis: {str(e)}")
\ No newline at end of file
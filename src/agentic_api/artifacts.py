@@ -0,0 +1,268 @@
+# src/agentic_api/artifacts.py
+
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import mimetypes
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Fix import path
+try:
+    from src.agentic_api.checkpoints import validate_run_id
+except ModuleNotFoundError:
+    # Try relative import if absolute import fails
+    from checkpoints import validate_run_id
+
+# Root of run workspaces and the content-addressed blob store
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", ".artifacts")
+
+# Runs untouched for longer than this are garbage-collected
+ARTIFACT_MAX_AGE_HOURS = float(os.getenv("ARTIFACT_MAX_AGE_HOURS", "168"))
+
+# Oldest runs are garbage-collected until the blobs fit in this many bytes
+ARTIFACT_MAX_BYTES = int(os.getenv("ARTIFACT_MAX_BYTES", str(2 * 1024 ** 3)))
+
+# Minimum seconds between two garbage collections of a worker
+ARTIFACT_GC_INTERVAL_SECONDS = float(os.getenv("ARTIFACT_GC_INTERVAL_SECONDS", "600"))
+
+# Artifact names become file names in the workspace
+ARTIFACT_NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,127}$")
+
+MANIFEST_FILE = "_manifest.json"
+
+CHUNK_SIZE = 1024 * 1024
+
+# Unreferenced blobs younger than this may belong to a manifest being written
+BLOB_GRACE_SECONDS = 3600
+
+
+def validate_artifact_name(name: str) -> str:
+    """Validate an artifact name and return it unchanged."""
+    if not name or not ARTIFACT_NAME_PATTERN.match(name) or name == MANIFEST_FILE:
+        raise ValueError(f"Invalid artifact name: {name!r}")
+    return name
+
+
+def _write_json_atomic(path: str, data: Any) -> None:
+    """Write JSON to a temporary file and move it into place."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ArtifactStore:
+    """Per-run workspaces backed by a content-addressed blob store.
+
+    Each run writes its files to ``<root>/runs/<run_id>/``, so concurrent
+    runs never share a path. Stored artifacts are moved to
+    ``<root>/blobs/<sha256>`` and hard-linked back into the workspace:
+    identical outputs of different runs share one blob (and one inode).
+    A per-run manifest maps artifact names to their digest. Blobs are
+    read-only, so files in a workspace must be replaced, never rewritten
+    in place.
+    """
+
+    def __init__(self, root: str = ARTIFACT_DIR):
+        self.root = root
+        self.runs_dir = os.path.join(root, "runs")
+        self.blobs_dir = os.path.join(root, "blobs")
+        self._lock = threading.Lock()
+        self._last_gc = 0.0
+
+    def workspace(self, run_id: str) -> str:
+        """Return the workspace directory of a run, creating it if needed."""
+        path = os.path.join(self.runs_dir, validate_run_id(run_id))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def put_bytes(self, run_id: str, name: str, data: bytes, owner: Optional[str] = None) -> Dict[str, Any]:
+        """Store ``data`` as an artifact of a run."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.workspace(run_id), prefix=".", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return self._store(run_id, validate_artifact_name(name), tmp_path, owner)
+
+    def put_file(self, run_id: str, name: str, path: str, owner: Optional[str] = None) -> Dict[str, Any]:
+        """Store a copy of the file at ``path`` as an artifact of a run."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.workspace(run_id), prefix=".", suffix=".tmp")
+        with os.fdopen(fd, "wb") as f, open(path, "rb") as source:
+            shutil.copyfileobj(source, f, CHUNK_SIZE)
+        return self._store(run_id, validate_artifact_name(name), tmp_path, owner)
+
+    def collect(self, run_id: str, owner: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Store the files tools wrote to a run's workspace that aren't artifacts yet."""
+        workspace = self.workspace(run_id)
+        manifest = self.manifest(run_id)
+        stored = []
+        for name in sorted(os.listdir(workspace)):
+            path = os.path.join(workspace, name)
+            if not ARTIFACT_NAME_PATTERN.match(name) or name == MANIFEST_FILE or not os.path.isfile(path):
+                continue
+            entry = manifest["artifacts"].get(name)
+            if entry is not None and os.stat(path).st_ino == self._blob_inode(entry["digest"]):
+                continue
+            # Move the file aside first so the link can take its name
+            fd, tmp_path = tempfile.mkstemp(dir=workspace, prefix=".", suffix=".tmp")
+            os.close(fd)
+            os.replace(path, tmp_path)
+            stored.append(self._store(run_id, name, tmp_path, owner))
+        if owner is not None and manifest.get("owner") is None and not stored:
+            self._update_manifest(run_id, owner=owner)
+        return stored
+
+    def manifest(self, run_id: str) -> Dict[str, Any]:
+        """Return the manifest of a run."""
+        path = os.path.join(self.runs_dir, validate_run_id(run_id), MANIFEST_FILE)
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"run_id": run_id, "owner": None, "artifacts": {}}
+
+    def get(self, run_id: str, name: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Return the blob path and manifest entry of an artifact."""
+        entry = self.manifest(run_id)["artifacts"].get(name)
+        if entry is None:
+            return None
+        path = self._blob_path(entry["digest"])
+        if not os.path.exists(path):
+            return None
+        return path, entry
+
+    def gc(self, force: bool = False) -> Dict[str, int]:
+        """Delete expired runs, then the oldest runs over the size limit, then unreferenced blobs."""
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_gc < ARTIFACT_GC_INTERVAL_SECONDS:
+                return {"runs_deleted": 0, "blobs_deleted": 0}
+            self._last_gc = now
+
+        runs = []
+        if os.path.isdir(self.runs_dir):
+            for run_id in os.listdir(self.runs_dir):
+                run_dir = os.path.join(self.runs_dir, run_id)
+                if os.path.isdir(run_dir):
+                    runs.append((os.stat(run_dir).st_mtime, run_id))
+        runs.sort()
+
+        deleted_runs = set()
+        for mtime, run_id in runs:
+            if now - mtime > ARTIFACT_MAX_AGE_HOURS * 3600:
+                deleted_runs.add(run_id)
+
+        # Shared blobs are only freed once no kept run references them
+        manifests = {run_id: self.manifest(run_id)["artifacts"] for _, run_id in runs}
+        references: Dict[str, int] = {}
+        sizes: Dict[str, int] = {}
+        for run_id, artifacts in manifests.items():
+            if run_id in deleted_runs:
+                continue
+            for digest in {entry["digest"] for entry in artifacts.values()}:
+                references[digest] = references.get(digest, 0) + 1
+            for entry in artifacts.values():
+                sizes[entry["digest"]] = entry["size"]
+        total = sum(sizes.values())
+
+        for _, run_id in runs:
+            if total <= ARTIFACT_MAX_BYTES:
+                break
+            if run_id in deleted_runs:
+                continue
+            deleted_runs.add(run_id)
+            for digest in {entry["digest"] for entry in manifests[run_id].values()}:
+                references[digest] -= 1
+                if not references[digest]:
+                    del references[digest]
+                    total -= sizes.pop(digest)
+
+        for run_id in deleted_runs:
+            shutil.rmtree(os.path.join(self.runs_dir, run_id), ignore_errors=True)
+
+        live = set(references)
+        deleted_blobs = 0
+        if os.path.isdir(self.blobs_dir):
+            for prefix in os.listdir(self.blobs_dir):
+                for digest in os.listdir(os.path.join(self.blobs_dir, prefix)):
+                    path = os.path.join(self.blobs_dir, prefix, digest)
+                    if digest not in live and now - os.stat(path).st_mtime > BLOB_GRACE_SECONDS:
+                        os.remove(path)
+                        deleted_blobs += 1
+        return {"runs_deleted": len(deleted_runs), "blobs_deleted": deleted_blobs}
+
+    def _store(self, run_id: str, name: str, tmp_path: str, owner: Optional[str]) -> Dict[str, Any]:
+        """Move a finished temporary file into the blob store and link it as ``name``."""
+        digest_hash = hashlib.sha256()
+        with open(tmp_path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest_hash.update(chunk)
+        digest = digest_hash.hexdigest()
+        size = os.path.getsize(tmp_path)
+
+        blob_path = self._blob_path(digest)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        if os.path.exists(blob_path):
+            # Identical content is already stored; refresh its age for the collector
+            os.remove(tmp_path)
+            os.utime(blob_path)
+        else:
+            os.chmod(tmp_path, 0o444)
+            os.replace(tmp_path, blob_path)
+
+        # Link the blob into the workspace under its name, replacing any older version
+        workspace = self.workspace(run_id)
+        link_tmp = os.path.join(workspace, f".{name}.{os.getpid()}.{threading.get_ident()}.link")
+        try:
+            os.link(blob_path, link_tmp)
+        except OSError:
+            # Hard links aren't available (e.g. another filesystem), fall back to a copy
+            shutil.copyfile(blob_path, link_tmp)
+        os.replace(link_tmp, os.path.join(workspace, name))
+
+        entry = {
+            "digest": digest,
+            "size": size,
+            "media_type": mimetypes.guess_type(name)[0] or "application/octet-stream",
+            "created_at": time.time(),
+        }
+        self._update_manifest(run_id, owner=owner, artifact=(name, entry))
+        return {"name": name, **entry}
+
+    def _update_manifest(self, run_id: str, owner: Optional[str] = None, artifact: Optional[Tuple[str, Dict[str, Any]]] = None) -> None:
+        with self._lock:
+            manifest = self.manifest(run_id)
+            if owner is not None and manifest.get("owner") is None:
+                manifest["owner"] = owner
+            if artifact is not None:
+                manifest["artifacts"][artifact[0]] = artifact[1]
+            _write_json_atomic(os.path.join(self.workspace(run_id), MANIFEST_FILE), manifest)
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blobs_dir, digest[:2], digest)
+
+    def _blob_inode(self, digest: str) -> Optional[int]:
+        try:
+            return os.stat(self._blob_path(digest)).st_ino
+        except FileNotFoundError:
+            return None
+
+
+_artifact_store: Optional[ArtifactStore] = None
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Return the shared artifact store."""
+    global _artifact_store
+    if _artifact_store is None:
+        _artifact_store = ArtifactStore()
+    return _artifact_store
@@ -25,6 +25,9 @@ JWT_SECRET = os.getenv("JWT_SECRET")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# Comma-separated usernames allowed to use the admin endpoints
+ADMIN_USERS = {username.strip() for username in os.getenv("ADMIN_USERS", "").split(",") if username.strip()}
+
 # Initialize Cognito client
 cognito_idp = boto3.client('cognito-idp', region_name=AWS_REGION)
 
@@ -105,6 +108,16 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+def is_admin(user: Optional[User]) -> bool:
+    """Whether the user may use the admin endpoints"""
+    return user is not None and not user.disabled and user.username in ADMIN_USERS
+
+async def get_current_admin_user(current_user: User = Depends(get_current_active_user)):
+    """Check if the current user is an admin"""
+    if not is_admin(current_user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    return current_user
+
 # AWS Cognito functions
 def get_cognito_login_url():
     """Generate the Cognito hosted UI login URL"""
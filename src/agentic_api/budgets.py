@@ -0,0 +1,323 @@
+# src/agentic_api/budgets.py
+
+import os
+import time
+import logging
+import sqlite3
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+# SQLite database holding the flushed token usage of all workers
+BUDGET_DB_PATH = os.getenv("BUDGET_DB_PATH", ".budgets/usage.sqlite3")
+
+# Length of the rolling budget window and the number of buckets it is split into
+BUDGET_WINDOW_SECONDS = int(os.getenv("BUDGET_WINDOW_SECONDS", "86400"))
+BUDGET_BUCKETS = int(os.getenv("BUDGET_BUCKETS", "24"))
+
+# Tokens per window for each user and each tenant (0 disables the limit)
+BUDGET_USER_TOKENS = int(os.getenv("BUDGET_USER_TOKENS", "2000000"))
+BUDGET_TENANT_TOKENS = int(os.getenv("BUDGET_TENANT_TOKENS", "10000000"))
+
+# Per-user and per-tenant limits, e.g. "alice=5000000,reporting-bot=500000"
+BUDGET_USER_OVERRIDES = os.getenv("BUDGET_USER_OVERRIDES", "")
+BUDGET_TENANT_OVERRIDES = os.getenv("BUDGET_TENANT_OVERRIDES", "")
+
+# Tenant of each user, e.g. "alice=acme,bob=acme"; users not listed belong to
+# the domain of their email address, or without one to a tenant of their own
+BUDGET_TENANTS = os.getenv("BUDGET_TENANTS", "")
+
+# Number of counter shards and how often counters are flushed to the store
+BUDGET_SHARDS = int(os.getenv("BUDGET_SHARDS", "16"))
+BUDGET_FLUSH_SECONDS = float(os.getenv("BUDGET_FLUSH_SECONDS", "5"))
+
+# Pre-flight token estimates of a crew run
+BUDGET_RESEARCH_TOKENS = int(os.getenv("BUDGET_RESEARCH_TOKENS", "30000"))
+BUDGET_SOCIAL_MEDIA_BASE_TOKENS = int(os.getenv("BUDGET_SOCIAL_MEDIA_BASE_TOKENS", "40000"))
+BUDGET_TOKENS_PER_ITEM = int(os.getenv("BUDGET_TOKENS_PER_ITEM", "300"))
+BUDGET_TOKENS_PER_IMAGE = int(os.getenv("BUDGET_TOKENS_PER_IMAGE", "1000"))
+BUDGET_SIMPLIFIED_TOKENS = int(os.getenv("BUDGET_SIMPLIFIED_TOKENS", "8000"))
+
+logger = logging.getLogger(__name__)
+
+
+def parse_limits(spec: str) -> Dict[str, str]:
+    """Parse ``name=value`` pairs separated by commas."""
+    limits = {}
+    for pair in spec.split(","):
+        name, _, value = pair.partition("=")
+        if name.strip() and value.strip():
+            limits[name.strip()] = value.strip()
+    return limits
+
+
+def tenant_of(username: str, email: Optional[str] = None) -> str:
+    """Return the tenant whose budget a user draws from."""
+    tenants = parse_limits(BUDGET_TENANTS)
+    if username in tenants:
+        return tenants[username]
+    if email and "@" in email:
+        return email.rsplit("@", 1)[1].lower()
+    # Users without an email don't share a tenant budget; "/" can't clash with a domain
+    return f"user/{username}"
+
+
+def estimate_social_media_tokens(
+    hashtags: int, platforms: int, min_items_per_hashtag: int, instagram_max_images: int = 0
+) -> int:
+    """Estimate the tokens of a social media analysis from the amount of content it collects."""
+    items = max(1, hashtags) * max(1, platforms) * max(0, min_items_per_hashtag)
+    return BUDGET_SOCIAL_MEDIA_BASE_TOKENS + items * BUDGET_TOKENS_PER_ITEM + instagram_max_images * BUDGET_TOKENS_PER_IMAGE
+
+
+class BudgetStatus:
+    """Budget state of the tighter of a user's and their tenant's budget."""
+
+    __slots__ = ("scope", "limit", "used", "reset_seconds")
+
+    def __init__(self, scope: str, limit: int, used: int, reset_seconds: int):
+        self.scope = scope
+        self.limit = limit
+        self.used = used
+        self.reset_seconds = reset_seconds
+
+    @property
+    def remaining(self) -> Optional[int]:
+        return max(0, self.limit - self.used) if self.limit else None
+
+    def headers(self) -> Dict[str, str]:
+        """Response headers describing the budget."""
+        if not self.limit:
+            return {}
+        return {
+            "X-Budget-Scope": self.scope,
+            "X-Budget-Limit": str(self.limit),
+            "X-Budget-Remaining": str(self.remaining),
+            "X-Budget-Reset": str(self.reset_seconds),
+        }
+
+
+class BudgetExceeded(Exception):
+    """Raised when the estimated tokens of a run exceed the remaining budget."""
+
+    def __init__(self, status: BudgetStatus, estimate: int):
+        super().__init__(
+            f"Estimated {estimate} tokens exceed the remaining {status.scope} budget of "
+            f"{status.remaining} tokens (resets in {status.reset_seconds}s)"
+        )
+        self.status = status
+        self.estimate = estimate
+
+    def headers(self) -> Dict[str, str]:
+        return {**self.status.headers(), "Retry-After": str(self.status.reset_seconds)}
+
+
+class Reservation:
+    """Tokens reserved for a run until its actual usage is known."""
+
+    __slots__ = ("scopes", "tokens", "bucket")
+
+    def __init__(self, scopes: List[str], tokens: int, bucket: int):
+        self.scopes = scopes
+        self.tokens = tokens
+        self.bucket = bucket
+
+
+class _Shard:
+    __slots__ = ("lock", "stored", "pending")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (scope, bucket) -> tokens flushed by all workers / not yet flushed by this one
+        self.stored: Dict[Tuple[str, int], int] = {}
+        self.pending: Dict[Tuple[str, int], int] = {}
+
+
+class TokenBudgets:
+    """Per-user and per-tenant token budgets over a rolling window.
+
+    Usage is counted in time buckets of ``window / buckets`` seconds in
+    sharded in-memory counters, so concurrent requests for different users
+    rarely contend. A background thread periodically adds this worker's
+    pending counts to a SQLite store and reloads the totals of all workers,
+    so budgets are shared across workers within ``flush_interval``.
+    """
+
+    def __init__(
+        self,
+        path: str = BUDGET_DB_PATH,
+        window: int = BUDGET_WINDOW_SECONDS,
+        buckets: int = BUDGET_BUCKETS,
+        shards: int = BUDGET_SHARDS,
+        flush_interval: float = BUDGET_FLUSH_SECONDS,
+    ):
+        self.window = window
+        self.buckets = buckets
+        self.bucket_seconds = max(1, window // buckets)
+        self.flush_interval = flush_interval
+        self.user_limits = {name: int(value) for name, value in parse_limits(BUDGET_USER_OVERRIDES).items()}
+        self.tenant_limits = {name: int(value) for name, value in parse_limits(BUDGET_TENANT_OVERRIDES).items()}
+        self._shards = [_Shard() for _ in range(max(1, shards))]
+        # Makes the check and the count of a reservation one step, so concurrent runs can't overdraw
+        self._reserve_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._flush_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS usage ("
+            "scope TEXT NOT NULL, bucket INTEGER NOT NULL, tokens INTEGER NOT NULL, "
+            "PRIMARY KEY (scope, bucket))"
+        )
+        self._conn.commit()
+        self._reload()
+
+        self._stopped = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="budget-flusher", daemon=True)
+        self._flusher.start()
+
+    def limit(self, scope: str) -> int:
+        kind, _, name = scope.partition(":")
+        if kind == "user":
+            return self.user_limits.get(name, BUDGET_USER_TOKENS)
+        return self.tenant_limits.get(name, BUDGET_TENANT_TOKENS)
+
+    def status(self, username: str, tenant: str, now: Optional[float] = None) -> BudgetStatus:
+        """Return the state of the tighter of the user's and the tenant's budget."""
+        now = time.time() if now is None else now
+        statuses = [self._scope_status(scope, now) for scope in self._scopes(username, tenant)]
+        limited = [status for status in statuses if status.limit]
+        if not limited:
+            return statuses[0]
+        return min(limited, key=lambda status: status.remaining)
+
+    def check(self, username: str, tenant: str, estimate: int) -> BudgetStatus:
+        """Raise BudgetExceeded if ``estimate`` tokens don't fit the remaining budget."""
+        status = self.status(username, tenant)
+        if status.limit and estimate > status.remaining:
+            raise BudgetExceeded(status, estimate)
+        return status
+
+    def reserve(self, username: str, tenant: str, estimate: int) -> Reservation:
+        """Check the budget and count ``estimate`` tokens until the run settles."""
+        with self._reserve_lock:
+            self.check(username, tenant, estimate)
+            reservation = Reservation(self._scopes(username, tenant), estimate, self._bucket(time.time()))
+            self._add(reservation.scopes, reservation.bucket, estimate)
+        return reservation
+
+    def settle(self, reservation: Reservation, tokens: int) -> None:
+        """Replace the reserved estimate with the tokens the run actually used."""
+        self._add(reservation.scopes, reservation.bucket, tokens - reservation.tokens)
+        reservation.tokens = tokens
+
+    def release(self, reservation: Reservation) -> None:
+        """Drop the reservation of a run that never started."""
+        self.settle(reservation, 0)
+
+    def flush(self) -> None:
+        """Write pending counts to the store and reload the totals of all workers."""
+        with self._flush_lock:
+            flushed = []
+            for shard in self._shards:
+                with shard.lock:
+                    flushed.append(dict(shard.pending))
+            rows = [(scope, bucket, tokens) for pending in flushed for (scope, bucket), tokens in pending.items() if tokens]
+            oldest = self._bucket(time.time()) - self.buckets
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO usage (scope, bucket, tokens) VALUES (?, ?, ?) "
+                    "ON CONFLICT (scope, bucket) DO UPDATE SET tokens = tokens + excluded.tokens",
+                    rows,
+                )
+                self._conn.execute("DELETE FROM usage WHERE bucket < ?", (oldest,))
+            stored = self._load()
+            for shard, pending in zip(self._shards, flushed):
+                with shard.lock:
+                    shard.stored = stored[id(shard)]
+                    for key, tokens in pending.items():
+                        remaining = shard.pending.get(key, 0) - tokens
+                        if remaining:
+                            shard.pending[key] = remaining
+                        else:
+                            shard.pending.pop(key, None)
+
+    def close(self) -> None:
+        """Stop the flusher and flush the remaining counts."""
+        self._stopped.set()
+        self.flush()
+
+    def _scopes(self, username: str, tenant: str) -> List[str]:
+        return [f"user:{username}", f"tenant:{tenant}"]
+
+    def _bucket(self, timestamp: float) -> int:
+        return int(timestamp // self.bucket_seconds)
+
+    def _shard(self, scope: str) -> _Shard:
+        return self._shards[zlib.crc32(scope.encode("utf-8")) % len(self._shards)]
+
+    def _add(self, scopes: List[str], bucket: int, tokens: int) -> None:
+        for scope in scopes:
+            shard = self._shard(scope)
+            with shard.lock:
+                shard.pending[(scope, bucket)] = shard.pending.get((scope, bucket), 0) + tokens
+
+    def _scope_status(self, scope: str, now: float) -> BudgetStatus:
+        current = self._bucket(now)
+        oldest = current - self.buckets + 1
+        shard = self._shard(scope)
+        by_bucket: Dict[int, int] = {}
+        with shard.lock:
+            for counts in (shard.stored, shard.pending):
+                for (counted_scope, bucket), tokens in counts.items():
+                    if counted_scope == scope and bucket >= oldest:
+                        by_bucket[bucket] = by_bucket.get(bucket, 0) + tokens
+        used = max(0, sum(by_bucket.values()))
+        # The budget frees up when the oldest bucket with usage leaves the window
+        used_buckets = [bucket for bucket, tokens in by_bucket.items() if tokens > 0]
+        first = min(used_buckets) if used_buckets else current
+        reset_seconds = max(0, int((first + self.buckets) * self.bucket_seconds - now))
+        return BudgetStatus(scope.partition(":")[0], self.limit(scope), used, reset_seconds)
+
+    def _load(self) -> Dict[int, Dict[Tuple[str, int], int]]:
+        oldest = self._bucket(time.time()) - self.buckets
+        stored: Dict[int, Dict[Tuple[str, int], int]] = {id(shard): {} for shard in self._shards}
+        for scope, bucket, tokens in self._conn.execute(
+            "SELECT scope, bucket, tokens FROM usage WHERE bucket >= ?", (oldest,)
+        ):
+            stored[id(self._shard(scope))][(scope, bucket)] = tokens
+        return stored
+
+    def _reload(self) -> None:
+        stored = self._load()
+        for shard in self._shards:
+            with shard.lock:
+                shard.stored = stored[id(shard)]
+
+    def _flush_loop(self) -> None:
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning("Could not flush token budgets: %s", str(e))
+
+
+_token_budgets: Optional[TokenBudgets] = None
+_token_budgets_lock = threading.Lock()
+
+
+def get_token_budgets() -> TokenBudgets:
+    """Return the token budgets of this worker."""
+    global _token_budgets
+    with _token_budgets_lock:
+        if _token_budgets is None:
+            _token_budgets = TokenBudgets()
+    return _token_budgets
+
+
+def crew_tokens(result: Any) -> Optional[int]:
+    """Return the total tokens a crew run reported, if any."""
+    usage = getattr(result, "token_usage", None)
+    tokens = getattr(usage, "total_tokens", None)
+    return tokens if tokens else None
@@ -0,0 +1,105 @@
+# src/agentic_api/cancellation.py
+
+import os
+import time
+import threading
+from typing import Callable, Optional
+
+from .metrics import get_metrics
+
+# Deadline of a crew run when the request doesn't send X-Request-Timeout, in seconds
+CREW_DEFAULT_TIMEOUT_SECONDS = float(os.getenv("CREW_DEFAULT_TIMEOUT_SECONDS", "900"))
+
+# Upper bound for X-Request-Timeout, in seconds
+CREW_MAX_TIMEOUT_SECONDS = float(os.getenv("CREW_MAX_TIMEOUT_SECONDS", "3600"))
+
+# How often a running crew checks for cancellations requested through another worker
+CANCEL_POLL_SECONDS = float(os.getenv("CANCEL_POLL_SECONDS", "5"))
+
+# Cancellation reasons
+CLIENT_DISCONNECTED = "client_disconnected"
+DEADLINE_EXCEEDED = "deadline_exceeded"
+CANCELLED = "cancelled"
+
+
+class CrewCancelled(TimeoutError):
+    """Raised inside a crew run that was cancelled or ran past its deadline.
+
+    Derives from TimeoutError because crewai re-raises those from an agent
+    without retrying the task.
+    """
+
+    def __init__(self, reason: str):
+        super().__init__(f"Crew run aborted: {reason.replace('_', ' ')}")
+        self.reason = reason
+
+
+class CancelToken:
+    """Cooperative cancellation of one crew run.
+
+    The request side cancels the token (client disconnect, cancel endpoint)
+    or lets its deadline pass; the crew thread calls ``check()`` between
+    agent steps and tasks and stops at the next one. ``poll`` is an optional
+    check for cancellations requested elsewhere, called at most every
+    ``CANCEL_POLL_SECONDS``.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, poll: Optional[Callable[[], bool]] = None):
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.reason: Optional[str] = None
+        self.tasks_total = 0
+        self.tasks_done = 0
+        self.started_at: Optional[float] = None
+        self._poll = poll
+        self._polled_at = 0.0
+        self._event = threading.Event()
+
+    def cancel(self, reason: str = CANCELLED) -> None:
+        """Request cancellation; the first reason wins."""
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel(DEADLINE_EXCEEDED)
+        elif self._poll is not None and time.monotonic() - self._polled_at >= CANCEL_POLL_SECONDS:
+            self._polled_at = time.monotonic()
+            if self._poll():
+                self.cancel(CANCELLED)
+        return self._event.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left until the deadline, or None without a deadline."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self) -> None:
+        """Raise CrewCancelled if the run should stop."""
+        if self.cancelled:
+            raise CrewCancelled(self.reason)
+
+
+def resolve_timeout(requested: Optional[float]) -> float:
+    """Return the deadline of a request in seconds, capped by CREW_MAX_TIMEOUT_SECONDS."""
+    if requested is None:
+        return CREW_DEFAULT_TIMEOUT_SECONDS
+    return min(requested, CREW_MAX_TIMEOUT_SECONDS)
+
+
+def record_aborted_run(token: CancelToken, average_duration: float) -> None:
+    """Count an aborted crew run and the work that was saved by stopping it."""
+    metrics = get_metrics()
+    metrics.increment("crew_runs_aborted_total", reason=token.reason)
+    if token.started_at is None:
+        # Dropped from the queue: the whole run was saved
+        metrics.increment("crew_runs_dropped_before_start_total", reason=token.reason)
+        saved = average_duration
+    else:
+        saved = max(0.0, average_duration - (time.monotonic() - token.started_at))
+    metrics.increment("crew_tasks_skipped_total", max(0, token.tasks_total - token.tasks_done))
+    metrics.increment("crew_seconds_saved_estimate_total", round(saved, 3))
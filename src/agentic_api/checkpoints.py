@@ -0,0 +1,242 @@
+# src/agentic_api/checkpoints.py
+
+import os
+import re
+import json
+import uuid
+import tempfile
+from datetime import datetime, timezone
+import time
+from typing import Any, Dict, Optional
+
+from crewai import Crew
+from crewai.crews.crew_output import CrewOutput
+from crewai.tasks.task_output import TaskOutput
+from crewai.utilities.constants import NOT_SPECIFIED
+
+from .cancellation import CancelToken
+
+# Directory where task outputs are persisted, one sub-directory per run ID
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", ".checkpoints")
+
+# Run IDs become directory names, so only allow a safe character set
+RUN_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+INPUTS_FILE = "_inputs.json"
+
+# Key of the user who started a run in its inputs file
+OWNER_KEY = "_owner"
+
+
+def new_run_id() -> str:
+    """Generate a new run ID."""
+    return uuid.uuid4().hex
+
+
+def validate_run_id(run_id: str) -> str:
+    """Validate a run ID and return it unchanged."""
+    if not run_id or not RUN_ID_PATTERN.match(run_id):
+        raise ValueError(f"Invalid run ID: {run_id!r}")
+    return run_id
+
+
+def _write_json_atomic(path: str, data: Any) -> None:
+    """Write JSON to a temporary file and move it into place."""
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class CheckpointStore:
+    """Local store for per-run task outputs.
+
+    Each completed task is written to ``<root>/<run_id>/<task_name>.json``
+    as soon as it finishes, so a run that fails later can be resumed without
+    repeating the expensive tasks that already succeeded.
+    """
+
+    def __init__(self, root: str = CHECKPOINT_DIR):
+        self.root = root
+
+    def run_dir(self, run_id: str) -> str:
+        """Return the directory for a run."""
+        return os.path.join(self.root, validate_run_id(run_id))
+
+    def has_run(self, run_id: str) -> bool:
+        """Check whether anything was stored for a run."""
+        return os.path.isdir(self.run_dir(run_id))
+
+    def save_inputs(self, run_id: str, inputs: Dict[str, Any], owner: Optional[str] = None) -> None:
+        """Persist the kickoff inputs of a run and the user who started it."""
+        run_dir = self.run_dir(run_id)
+        os.makedirs(run_dir, exist_ok=True)
+        _write_json_atomic(os.path.join(run_dir, INPUTS_FILE), {**inputs, OWNER_KEY: owner})
+
+    def load_inputs(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """Load the kickoff inputs of a run, if stored."""
+        inputs = self._read_inputs(run_id)
+        if inputs is not None:
+            inputs.pop(OWNER_KEY, None)
+        return inputs
+
+    def owner(self, run_id: str) -> Optional[str]:
+        """Return the user who started a run; None for runs started from the CLI or before owners were stored."""
+        inputs = self._read_inputs(run_id)
+        return inputs.get(OWNER_KEY) if inputs is not None else None
+
+    def _read_inputs(self, run_id: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.run_dir(run_id), INPUTS_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def save_task_output(self, run_id: str, task_name: str, output: TaskOutput) -> None:
+        """Persist the output of a completed task."""
+        run_dir = self.run_dir(run_id)
+        os.makedirs(run_dir, exist_ok=True)
+        data = {
+            "name": task_name,
+            "description": output.description,
+            "expected_output": output.expected_output,
+            "raw": output.raw,
+            "json_dict": output.json_dict,
+            "agent": output.agent,
+            "completed_at": datetime.now(timezone.utc).isoformat(),
+        }
+        _write_json_atomic(os.path.join(run_dir, f"{task_name}.json"), data)
+
+    def load_task_outputs(self, run_id: str) -> Dict[str, TaskOutput]:
+        """Load all stored task outputs of a run, keyed by task name."""
+        run_dir = self.run_dir(run_id)
+        outputs = {}
+        if not os.path.isdir(run_dir):
+            return outputs
+        for filename in os.listdir(run_dir):
+            if not filename.endswith(".json") or filename == INPUTS_FILE:
+                continue
+            with open(os.path.join(run_dir, filename), "r") as f:
+                data = json.load(f)
+            outputs[data["name"]] = TaskOutput(
+                name=data["name"],
+                description=data["description"],
+                expected_output=data.get("expected_output"),
+                raw=data.get("raw", ""),
+                json_dict=data.get("json_dict"),
+                agent=data.get("agent", ""),
+            )
+        return outputs
+
+
+_checkpoint_store: Optional[CheckpointStore] = None
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    """Return the shared checkpoint store."""
+    global _checkpoint_store
+    if _checkpoint_store is None:
+        _checkpoint_store = CheckpointStore()
+    return _checkpoint_store
+
+
+def _checkpoint_callback(store: CheckpointStore, run_id: str, task_name: str, callback=None):
+    """Wrap a task callback so the task output is persisted on completion."""
+    def wrapper(output: TaskOutput):
+        store.save_task_output(run_id, task_name, output)
+        if callback:
+            return callback(output)
+    return wrapper
+
+
+def _cancellable_callback(token: CancelToken, callback=None):
+    """Wrap a step or task callback so the run stops once ``token`` is cancelled."""
+    def wrapper(output):
+        result = callback(output) if callback else None
+        token.check()
+        return result
+    return wrapper
+
+
+def _counting_callback(token: CancelToken, callback):
+    """Wrap a task callback to count completed tasks on ``token``."""
+    def wrapper(output: TaskOutput):
+        token.tasks_done += 1
+        return callback(output)
+    return wrapper
+
+
+def kickoff_with_checkpoints(
+    crew: Crew,
+    inputs: Dict[str, Any],
+    run_id: str,
+    resume: bool = False,
+    store: Optional[CheckpointStore] = None,
+    cancel_token: Optional[CancelToken] = None,
+    owner: Optional[str] = None,
+) -> CrewOutput:
+    """Kick off a crew, persisting each task output under ``run_id``.
+
+    When ``resume`` is set, tasks that already completed for ``run_id`` are
+    skipped and their stored outputs are fed to the remaining tasks as
+    context. The inputs stored with the original run take precedence so the
+    resumed tasks see the same parameters.
+
+    With a ``cancel_token`` the run stops with ``CrewCancelled`` at the next
+    agent step or task boundary after the token is cancelled. Outputs of the
+    tasks that completed are kept, so the run can be resumed.
+
+    ``owner`` is stored with the inputs; callers serving several users
+    check it before resuming a run (see ``CheckpointStore.owner``).
+    """
+    store = store or get_checkpoint_store()
+    completed: Dict[str, TaskOutput] = {}
+
+    if resume:
+        completed = store.load_task_outputs(run_id)
+        stored_inputs = store.load_inputs(run_id)
+        if stored_inputs is not None:
+            inputs = stored_inputs
+
+    store.save_inputs(run_id, inputs, owner)
+
+    remaining = []
+    for index, task in enumerate(crew.tasks):
+        task_name = task.name or f"task_{index}"
+
+        if task_name in completed:
+            # Keep the task object around with its stored output so later
+            # tasks can still reference it as context
+            task.output = completed[task_name]
+            continue
+
+        if completed and task.context is NOT_SPECIFIED:
+            # Sequential tasks implicitly receive all previous outputs; make
+            # that explicit so skipped tasks still contribute their output
+            task.context = crew.tasks[:index]
+
+        task.callback = _checkpoint_callback(store, run_id, task_name, task.callback)
+        if cancel_token is not None:
+            task.callback = _cancellable_callback(cancel_token, _counting_callback(cancel_token, task.callback))
+        remaining.append(task)
+
+    if not remaining:
+        # Everything already completed, return the stored result
+        tasks_output = [task.output for task in crew.tasks]
+        return CrewOutput(raw=tasks_output[-1].raw, tasks_output=tasks_output)
+
+    crew.tasks = remaining
+    if cancel_token is not None:
+        cancel_token.check()
+        cancel_token.tasks_total = len(remaining)
+        cancel_token.started_at = time.monotonic()
+        # Agents pick up the crew step callback only if they have none of their own
+        for agent in crew.agents:
+            agent.step_callback = _cancellable_callback(cancel_token, agent.step_callback or crew.step_callback)
+    return crew.kickoff(inputs=inputs)
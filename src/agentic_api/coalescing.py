@@ -0,0 +1,163 @@
+# src/agentic_api/coalescing.py
+
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# SQLite database holding the responses of requests sent with an Idempotency-Key
+IDEMPOTENCY_DB_PATH = os.getenv("IDEMPOTENCY_DB_PATH", ".idempotency/keys.sqlite3")
+
+# How long stored responses are replayed
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+
+
+def request_fingerprint(endpoint: str, payload: Dict[str, Any]) -> str:
+    """Hash a normalized request payload."""
+    canonical = json.dumps({"endpoint": endpoint, "payload": payload}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Coalesce identical in-flight calls into one execution.
+
+    The first caller for a key starts the call; callers arriving while it
+    runs await the same result instead of starting their own. The call runs
+    as its own task, so a caller that goes away does not cancel it for the
+    others; it is cancelled once every caller went away.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        self.coalesced = 0
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._flights
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Run ``fn`` once per key; returns (result, shared) where ``shared``
+        tells whether the result came from another caller's execution."""
+        task = self._flights.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task), shared
+        except asyncio.CancelledError:
+            if self._waiters[key] == 1:
+                task.cancel()
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+
+class IdempotencyConflict(Exception):
+    """Raised when an Idempotency-Key can't be used for a request."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class IdempotencyStore:
+    """Stored responses keyed by (scope, Idempotency-Key).
+
+    A key is claimed before the request runs and completed with the
+    response afterwards, so retries of the same request replay the stored
+    response and a key reused for a different request is rejected. Claims
+    of failed requests are released so the request can be retried.
+    """
+
+    def __init__(self, path: str = IDEMPOTENCY_DB_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS idempotency_keys ("
+            "scope TEXT NOT NULL, key TEXT NOT NULL, fingerprint TEXT NOT NULL, "
+            "status TEXT NOT NULL, response TEXT, created_at REAL NOT NULL, "
+            "PRIMARY KEY (scope, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_idempotency_created ON idempotency_keys (created_at)")
+        self._conn.commit()
+
+    def claim(self, scope: str, key: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Claim a key for a new request.
+
+        Returns the stored response if the request already completed,
+        None if the caller now owns the key, and raises
+        ``IdempotencyConflict`` if the key is in use or was used for a
+        different request.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM idempotency_keys WHERE created_at < ?", (now - IDEMPOTENCY_TTL_HOURS * 3600,)
+            )
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO idempotency_keys (scope, key, fingerprint, status, created_at) "
+                "VALUES (?, ?, ?, 'in_progress', ?)",
+                (scope, key, fingerprint, now),
+            ).rowcount
+            if inserted:
+                return None
+            stored_fingerprint, status, response = self._conn.execute(
+                "SELECT fingerprint, status, response FROM idempotency_keys WHERE scope = ? AND key = ?",
+                (scope, key),
+            ).fetchone()
+
+        if stored_fingerprint != fingerprint:
+            raise IdempotencyConflict(422, "Idempotency-Key was already used for a different request")
+        if status != "completed":
+            raise IdempotencyConflict(409, "A request with this Idempotency-Key is still in progress")
+        return json.loads(response)
+
+    def complete(self, scope: str, key: str, response: Dict[str, Any]) -> None:
+        """Store the response of a claimed key."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE idempotency_keys SET status = 'completed', response = ? WHERE scope = ? AND key = ?",
+                (json.dumps(response), scope, key),
+            )
+
+    def release(self, scope: str, key: str) -> None:
+        """Release the claim of a failed request."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM idempotency_keys WHERE scope = ? AND key = ? AND status = 'in_progress'", (scope, key)
+            )
+
+
+_single_flight: Optional[SingleFlight] = None
+_idempotency_store: Optional[IdempotencyStore] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Return the shared single-flight group of this worker."""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """Return the shared idempotency store."""
+    global _idempotency_store
+    if _idempotency_store is None:
+        _idempotency_store = IdempotencyStore()
+    return _idempotency_store
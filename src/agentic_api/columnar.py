@@ -0,0 +1,235 @@
+# src/agentic_api/columnar.py
+
+import os
+import json
+import shutil
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Fix import path
+try:
+    from src.agentic_api.posts import (
+        PostBatch, Categorical, ENGAGEMENT_FIELDS, FLOAT_FIELDS, CATEGORICAL_FIELDS, MISSING_COUNT
+    )
+except ModuleNotFoundError:
+    # Try relative import if absolute import fails
+    from posts import PostBatch, Categorical, ENGAGEMENT_FIELDS, FLOAT_FIELDS, CATEGORICAL_FIELDS, MISSING_COUNT
+
+COLUMNAR_VERSION = 1
+
+META_FILE = "meta.json"
+
+# High-cardinality strings and per-row extras, only read when rows are materialized
+ROWS_FILE = "rows.json"
+
+# Derived numeric column: likes + shares + comments
+ENGAGEMENT = "engagement"
+
+NUMERIC_COLUMNS = ENGAGEMENT_FIELDS + FLOAT_FIELDS + (ENGAGEMENT,)
+
+MISSING_GROUP = "(missing)"
+
+
+def write_columnar(batch: PostBatch, directory: str, **metadata: Any) -> None:
+    """Write a batch as a directory of ``.npy`` columns.
+
+    Numeric columns and categorical codes are plain NumPy files that can be
+    memory-mapped; the directory is written next to its destination and
+    moved into place, so readers never see a partial dataset.
+    """
+    parent = os.path.dirname(directory) or "."
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=parent, suffix=".tmp")
+    try:
+        for key, array in batch.counts.items():
+            np.save(os.path.join(tmp_dir, f"{key}.npy"), np.ascontiguousarray(array, dtype=np.int64))
+        for key, array in batch.floats.items():
+            np.save(os.path.join(tmp_dir, f"{key}.npy"), np.ascontiguousarray(array, dtype=np.float64))
+        for key, column in batch.categoricals.items():
+            np.save(os.path.join(tmp_dir, f"{key}.codes.npy"), np.ascontiguousarray(column.codes, dtype=np.int32))
+        with open(os.path.join(tmp_dir, ROWS_FILE), "w") as f:
+            json.dump({"strings": batch.strings, "extras": batch.extras}, f)
+        with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+            json.dump({
+                "version": COLUMNAR_VERSION,
+                "rows": len(batch),
+                "categories": {key: column.categories for key, column in batch.categoricals.items()},
+                **metadata,
+            }, f)
+        os.replace(tmp_dir, directory)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+class ColumnarDataset:
+    """Read-only view of a columnar dataset directory.
+
+    Columns are memory-mapped on first use, so a query only pages in the
+    columns it touches. ``to_batch`` materializes the whole dataset.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, META_FILE), "r") as f:
+            self.meta = json.load(f)
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return self.meta["rows"]
+
+    def column(self, key: str) -> np.ndarray:
+        """Return a numeric column, memory-mapped."""
+        if key == ENGAGEMENT:
+            total = np.zeros(len(self), dtype=np.int64)
+            for name in ENGAGEMENT_FIELDS:
+                values = self.column(name)
+                total += np.where(values == MISSING_COUNT, 0, values)
+            return total
+        if key not in ENGAGEMENT_FIELDS + FLOAT_FIELDS:
+            raise ValueError(f"Unknown numeric column {key!r}, expected one of {NUMERIC_COLUMNS}")
+        return self._load(f"{key}.npy")
+
+    def categorical(self, key: str) -> Categorical:
+        """Return a categorical column with memory-mapped codes."""
+        if key not in CATEGORICAL_FIELDS:
+            raise ValueError(f"Unknown group column {key!r}, expected one of {CATEGORICAL_FIELDS}")
+        return Categorical(self.meta["categories"][key], self._load(f"{key}.codes.npy"))
+
+    def to_batch(self) -> PostBatch:
+        """Materialize the dataset as a PostBatch (numeric columns stay memory-mapped)."""
+        with open(os.path.join(self.directory, ROWS_FILE), "r") as f:
+            rows = json.load(f)
+        return PostBatch(
+            counts={key: self._load(f"{key}.npy") for key in ENGAGEMENT_FIELDS},
+            floats={key: self._load(f"{key}.npy") for key in FLOAT_FIELDS},
+            categoricals={key: self.categorical(key) for key in CATEGORICAL_FIELDS},
+            strings=rows["strings"],
+            extras=rows["extras"],
+        )
+
+    def where(self, filters: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """Build a row mask from filters.
+
+        Group columns match a value or a list of values; numeric columns
+        take ``min_<column>`` / ``max_<column>`` bounds; ``since`` and
+        ``until`` bound the timestamp (ISO format).
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for name, value in (filters or {}).items():
+            if name in CATEGORICAL_FIELDS:
+                column = self.categorical(name)
+                wanted = value if isinstance(value, list) else [value]
+                lookup = {category.lower(): code for code, category in enumerate(column.categories)}
+                codes = [lookup[str(v).lower()] for v in wanted if str(v).lower() in lookup]
+                mask &= np.isin(column.codes, codes)
+            elif name in ("since", "until"):
+                bound = datetime.fromisoformat(value).timestamp()
+                timestamps = self.column("timestamp")
+                mask &= timestamps >= bound if name == "since" else timestamps < bound
+            elif name.startswith(("min_", "max_")) and name[4:] in NUMERIC_COLUMNS:
+                values = self.column(name[4:])
+                mask &= values >= value if name.startswith("min_") else values <= value
+                if name[4:] in ENGAGEMENT_FIELDS:
+                    # Missing counts are stored as MISSING_COUNT (-1) and must not pass a max_ bound
+                    mask &= values >= 0
+            else:
+                raise ValueError(f"Unknown filter {name!r}")
+        return mask
+
+    def group_by(self, by: str, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, Any]]:
+        """Post counts, engagement sums/means and mean score per value of a group column."""
+        column = self.categorical(by)
+        mask = self.where(filters)
+        # Shift the codes so missing values (-1) get their own group
+        codes = column.codes[mask].astype(np.int64) + 1
+        size = len(column.categories) + 1
+        posts = np.bincount(codes, minlength=size)
+
+        stats: Dict[str, np.ndarray] = {}
+        for name in ENGAGEMENT_FIELDS:
+            values = self.column(name)[mask]
+            present = values != MISSING_COUNT
+            stats[f"{name}_sum"] = np.bincount(codes[present], weights=values[present], minlength=size)
+            stats[f"{name}_present"] = np.bincount(codes[present], minlength=size)
+        scores = self.column("score")[mask]
+        scored = ~np.isnan(scores)
+        score_sums = np.bincount(codes[scored], weights=scores[scored], minlength=size)
+        score_counts = np.bincount(codes[scored], minlength=size)
+
+        groups = {}
+        labels = [MISSING_GROUP] + list(column.categories)
+        for code in np.flatnonzero(posts).tolist():
+            group = {"posts": int(posts[code])}
+            for name in ENGAGEMENT_FIELDS:
+                present = int(stats[f"{name}_present"][code])
+                if present:
+                    group[f"{name}_sum"] = int(stats[f"{name}_sum"][code])
+                    group[f"{name}_mean"] = round(float(stats[f"{name}_sum"][code]) / present, 2)
+            if score_counts[code]:
+                group["score_mean"] = round(float(score_sums[code]) / int(score_counts[code]), 2)
+            groups[labels[code]] = group
+        return groups
+
+    def percentiles(
+        self,
+        column: str,
+        percentiles: Sequence[float] = (50, 90, 99),
+        by: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Percentiles of a numeric column, overall or per value of a group column."""
+        mask = self.where(filters)
+        values = self.column(column)[mask].astype(np.float64)
+        if column in ENGAGEMENT_FIELDS:
+            values[values == MISSING_COUNT] = np.nan
+
+        def summarize(selected: np.ndarray) -> Optional[Dict[str, float]]:
+            selected = selected[~np.isnan(selected)]
+            if not len(selected):
+                return None
+            points = np.percentile(selected, percentiles)
+            return {"count": int(len(selected)), **{f"p{q:g}": round(float(p), 2) for q, p in zip(percentiles, points)}}
+
+        if by is None:
+            return {"all": summarize(values)}
+        group_column = self.categorical(by)
+        codes = group_column.codes[mask]
+        labels = group_column.categories
+        return {
+            (labels[code] if code >= 0 else MISSING_GROUP): summarize(values[codes == code])
+            for code in np.unique(codes).tolist()
+        }
+
+    def hourly(self, filters: Optional[Dict[str, Any]] = None) -> Dict[str, List[Any]]:
+        """Posts and mean engagement per hour of day (UTC)."""
+        mask = self.where(filters)
+        timestamps = self.column("timestamp")[mask]
+        dated = ~np.isnan(timestamps)
+        hours = (np.floor(timestamps[dated] / 3600) % 24).astype(np.int64)
+        engagement = self.column(ENGAGEMENT)[mask][dated]
+        posts = np.bincount(hours, minlength=24)
+        totals = np.bincount(hours, weights=engagement, minlength=24)
+        return {
+            "hour_utc": list(range(24)),
+            "posts": posts.tolist(),
+            "mean_engagement": [round(float(t) / p, 2) if p else None for t, p in zip(totals, posts)],
+            "undated_posts": int((~dated).sum()),
+        }
+
+    def mix(self, by: str, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Share of posts per value of a group column."""
+        groups = self.group_by(by, filters)
+        total = sum(group["posts"] for group in groups.values())
+        return {
+            "total": total,
+            "shares": {key: round(group["posts"] / total, 4) for key, group in groups.items()} if total else {},
+        }
+
+    def _load(self, filename: str) -> np.ndarray:
+        if filename not in self._columns:
+            self._columns[filename] = np.load(os.path.join(self.directory, filename), mmap_mode="r")
+        return self._columns[filename]
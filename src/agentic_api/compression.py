@@ -0,0 +1,201 @@
+# src/agentic_api/compression.py
+
+import os
+import gzip
+import zlib
+from typing import List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Optional dependencies
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+
+# Content types streamed to the client as they are produced; these are
+# compressed and flushed chunk by chunk instead of being buffered
+STREAMING_MEDIA_TYPES = ("application/x-ndjson", "text/event-stream")
+
+# Content types that are already compressed
+INCOMPRESSIBLE_PREFIXES = ("image/", "video/", "audio/", "application/zip", "application/gzip", "application/x-gzip")
+
+
+def supported_encodings() -> List[str]:
+    """Encodings the server can produce, in order of preference."""
+    return (["br"] if brotli is not None else []) + ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported encoding accepted by the client."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        fields = part.strip().split(";")
+        coding = fields[0].strip().lower()
+        quality = 1.0
+        for param in fields[1:]:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            accepted[coding] = quality
+
+    for encoding in supported_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class _Compressor:
+    """Incremental compressor that can flush after every chunk."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, flush: bool = False, finish: bool = False) -> bytes:
+        if self.encoding == "br":
+            output = self._brotli.process(data)
+            if finish:
+                return output + self._brotli.finish()
+            return output + self._brotli.flush() if flush else output
+        output = self._zlib.compress(data)
+        if finish:
+            return output + self._zlib.flush(zlib.Z_FINISH)
+        return output + self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else output
+
+
+def compress_bytes(data: bytes, encoding: str) -> bytes:
+    """Compress a complete body."""
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """Negotiated brotli/gzip compression for responses above a size threshold.
+
+    Brotli is preferred when the ``brotli`` package is installed and the
+    client accepts it, gzip otherwise. Bodies are buffered until they reach
+    the threshold (or end below it, in which case they are sent as is).
+    NDJSON and event streams are compressed chunk by chunk and flushed after
+    every chunk so each line reaches the client without delay.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope.get("method") == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self.app, encoding, self.minimum_size)
+        await responder(scope, receive, send)
+
+
+class _CompressionResponder:
+    """Wraps ``send`` for a single response."""
+
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send = None
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+        self.streaming = False
+        self.buffer = b""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_wrapper)
+
+    async def send_wrapper(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Wait for the first body chunk to decide
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = (
+                message["status"] in (204, 206, 304)
+                or "content-encoding" in headers
+                or "content-range" in headers
+                or content_type.startswith(INCOMPRESSIBLE_PREFIXES)
+            )
+            self.streaming = content_type.startswith(STREAMING_MEDIA_TYPES)
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.passthrough:
+            if self.start_message is not None:
+                await self.send(self.start_message)
+                self.start_message = None
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            if not self.streaming:
+                self.buffer += body
+                if more_body and len(self.buffer) < self.minimum_size:
+                    return
+                body, self.buffer = self.buffer, b""
+
+            start, self.start_message = self.start_message, None
+            if not more_body:
+                # Complete body: compress in one pass if it is large enough
+                if len(body) < self.minimum_size:
+                    await self.send(start)
+                    await self.send({"type": "http.response.body", "body": body})
+                    return
+                body = compress_bytes(body, self.encoding)
+                self._set_encoding_headers(start, content_length=len(body))
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+
+            # Body continues: compress incrementally
+            self.compressor = _Compressor(self.encoding)
+            self._set_encoding_headers(start, content_length=None)
+            await self.send(start)
+
+        if self.compressor is None:
+            await self.send(message)
+            return
+        chunk = self.compressor.compress(body, flush=self.streaming and more_body, finish=not more_body)
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    def _set_encoding_headers(self, start: Message, content_length: Optional[int]) -> None:
+        headers = MutableHeaders(raw=start["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if content_length is None:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(content_length)
@@ -5,6 +5,12 @@ from crewai.project import CrewBase, agent, task, crew, before_kickoff, after_ki
 from crewai.agents.agent_builder.base_agent import BaseAgent
 from typing import List, Dict, Any
 import os
+# Fix import path
+try:
+    from src.agentic_api.structured_logging import CREW_VERBOSE
+except ModuleNotFoundError:
+    # Try relative import if absolute import fails
+    from structured_logging import CREW_VERBOSE
 
 @CrewBase
 class ResearchCrew:
@@ -35,7 +41,7 @@ class ResearchCrew:
         """Create the researcher agent."""
         return Agent(
             config=self.agents_config['researcher'],  # type: ignore[index]
-            verbose=True
+            verbose=CREW_VERBOSE
         )
 
     @agent
@@ -43,7 +49,7 @@ class ResearchCrew:
         """Create the analyst agent."""
         return Agent(
             config=self.agents_config['analyst'],  # type: ignore[index]
-            verbose=True
+            verbose=CREW_VERBOSE
         )
 
     @task
@@ -66,6 +72,6 @@ class ResearchCrew:
         return Crew(
             agents=self.agents,
             tasks=self.tasks,
-            verbose=True,
+            verbose=CREW_VERBOSE,
             process=Process.sequential
         )
\ No newline at end of file
@@ -0,0 +1,151 @@
+# src/agentic_api/dataset_store.py
+
+import os
+import glob
+import json
+import uuid
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Union
+
+# Fix import path
+try:
+    from src.agentic_api.posts import PostBatch
+    from src.agentic_api.columnar import ColumnarDataset, write_columnar
+except ModuleNotFoundError:
+    # Try relative import if absolute import fails
+    from posts import PostBatch
+    from columnar import ColumnarDataset, write_columnar
+
+# Directory where datasets are persisted, one sub-directory per run ID
+DATASET_DIR = os.getenv("DATASET_DIR", ".datasets")
+
+# Number of datasets kept in memory per worker
+DATASET_CACHE_SIZE = int(os.getenv("DATASET_CACHE_SIZE", "64"))
+
+# Datasets written outside of a crew run (e.g. direct tool calls)
+ADHOC_RUN_ID = "adhoc"
+
+
+def summarize_records(records: Union[PostBatch, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Build compact summary statistics for a batch or list of collected records."""
+    if not isinstance(records, PostBatch):
+        records = PostBatch.from_records(records)
+    return records.summary()
+
+
+class DatasetStore:
+    """Out-of-band store for collected datasets.
+
+    Collection tools write their records here and hand the LLM a short
+    dataset ID plus summary statistics. Downstream tools load the records by
+    ID, so the rows never have to be re-emitted as model output tokens.
+    Datasets are held as columnar ``PostBatch`` objects in memory and
+    persisted as a directory of memory-mappable ``.npy`` columns, which
+    ``columnar`` opens for aggregate queries without loading the rows.
+    """
+
+    def __init__(self, root: str = DATASET_DIR):
+        self.root = root
+        self._cache: "OrderedDict[str, PostBatch]" = OrderedDict()
+        self._paths: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def put(self, records: Union[PostBatch, List[Dict[str, Any]]], kind: str = "dataset", run_id: Optional[str] = None) -> str:
+        """Store a batch (or dict records) and return the new dataset ID."""
+        batch = records if isinstance(records, PostBatch) else PostBatch.from_records(records)
+        dataset_id = f"ds_{kind}_{uuid.uuid4().hex[:10]}"
+        path = os.path.join(self.root, run_id or ADHOC_RUN_ID, dataset_id)
+        write_columnar(batch, path, dataset_id=dataset_id, kind=kind, run_id=run_id)
+
+        with self._lock:
+            self._remember(dataset_id, batch, path)
+        return dataset_id
+
+    def get(self, dataset_id: str) -> PostBatch:
+        """Load a dataset."""
+        with self._lock:
+            if dataset_id in self._cache:
+                self._cache.move_to_end(dataset_id)
+                return self._cache[dataset_id]
+
+        path = self._find(dataset_id)
+        if os.path.isdir(path):
+            batch = ColumnarDataset(path).to_batch()
+        else:
+            with open(path, "r") as f:
+                batch = PostBatch.from_columns(json.load(f)["columns"])
+
+        with self._lock:
+            self._remember(dataset_id, batch, path)
+        return batch
+
+    def columnar(self, dataset_id: str) -> ColumnarDataset:
+        """Open a dataset for memory-mapped column queries."""
+        path = self._find(dataset_id)
+        if not os.path.isdir(path):
+            # Datasets written before the columnar format, convert them once
+            with open(path, "r") as f:
+                data = json.load(f)
+            columnar_path = os.path.splitext(path)[0]
+            write_columnar(
+                PostBatch.from_columns(data["columns"]), columnar_path,
+                dataset_id=dataset_id, kind=data.get("kind"), run_id=data.get("run_id"),
+            )
+            os.remove(path)
+            with self._lock:
+                self._paths[dataset_id] = columnar_path
+            path = columnar_path
+        return ColumnarDataset(path)
+
+    def exists(self, dataset_id: str) -> bool:
+        """Check whether a dataset ID is known."""
+        try:
+            self._find(dataset_id)
+            return True
+        except KeyError:
+            return False
+
+    def delete_run(self, run_id: str) -> None:
+        """Delete all datasets of a run."""
+        run_dir = os.path.join(self.root, run_id)
+        with self._lock:
+            for dataset_id, path in list(self._paths.items()):
+                if os.path.dirname(path) == run_dir:
+                    self._paths.pop(dataset_id, None)
+                    self._cache.pop(dataset_id, None)
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+    def _remember(self, dataset_id: str, batch: PostBatch, path: str) -> None:
+        """Cache a batch in memory, evicting the least recently used dataset."""
+        self._cache[dataset_id] = batch
+        self._cache.move_to_end(dataset_id)
+        self._paths[dataset_id] = path
+        while len(self._cache) > DATASET_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def _find(self, dataset_id: str) -> str:
+        """Locate the directory (or legacy JSON file) of a dataset."""
+        if not dataset_id.startswith("ds_") or os.sep in dataset_id:
+            raise KeyError(f"Unknown dataset ID: {dataset_id}")
+        with self._lock:
+            if dataset_id in self._paths:
+                return self._paths[dataset_id]
+        matches = glob.glob(os.path.join(self.root, "*", dataset_id)) or glob.glob(
+            os.path.join(self.root, "*", f"{dataset_id}.json")
+        )
+        if not matches:
+            raise KeyError(f"Unknown dataset ID: {dataset_id}")
+        return matches[0]
+
+
+_dataset_store: Optional[DatasetStore] = None
+
+
+def get_dataset_store() -> DatasetStore:
+    """Return the shared dataset store."""
+    global _dataset_store
+    if _dataset_store is None:
+        _dataset_store = DatasetStore()
+    return _dataset_store
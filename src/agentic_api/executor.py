@@ -0,0 +1,96 @@
+# src/agentic_api/executor.py
+
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Optional, Set
+
+# Number of crews a worker runs concurrently
+CREW_EXECUTOR_WORKERS = int(os.getenv("CREW_EXECUTOR_WORKERS", "4"))
+
+# Crews allowed to wait for a free thread before requests are rejected
+CREW_MAX_PENDING = int(os.getenv("CREW_MAX_PENDING", "16"))
+
+# Seconds in-flight crews get to finish when the worker shuts down
+CREW_DRAIN_TIMEOUT = int(os.getenv("CREW_DRAIN_TIMEOUT", "120"))
+
+
+class ExecutorSaturated(Exception):
+    """Raised when the executor cannot accept more crew jobs."""
+
+
+class CrewExecutor:
+    """Bounded thread pool running the blocking crew kickoffs.
+
+    Crew runs block for minutes, so they are moved off the event loop.
+    The number of running and queued jobs is bounded, and the executor
+    can be drained on shutdown so in-flight runs finish before the worker
+    exits.
+    """
+
+    def __init__(self, max_workers: int = CREW_EXECUTOR_WORKERS, max_pending: int = CREW_MAX_PENDING):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crew")
+        self._futures: Set[Future] = set()
+        self._lock = threading.Lock()
+        self._accepting = True
+
+    @property
+    def in_flight(self) -> int:
+        """Number of running and queued jobs."""
+        with self._lock:
+            return len(self._futures)
+
+    @property
+    def saturated(self) -> bool:
+        """Whether new jobs would be rejected."""
+        return not self._accepting or self.in_flight >= self.max_workers + self.max_pending
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Submit a job, raising ``ExecutorSaturated`` when the queue is full."""
+        with self._lock:
+            if not self._accepting:
+                raise ExecutorSaturated("Worker is shutting down")
+            if len(self._futures) >= self.max_workers + self.max_pending:
+                raise ExecutorSaturated("Too many crew runs in progress")
+            future = self._pool.submit(fn, *args, **kwargs)
+            self._futures.add(future)
+        future.add_done_callback(self._forget)
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a job on the pool and await its result."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def drain(self, timeout: float = CREW_DRAIN_TIMEOUT) -> bool:
+        """Stop accepting jobs and wait for in-flight ones.
+
+        Returns True if every job finished before the deadline.
+        """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            self._accepting = False
+            pending = set(self._futures)
+        if pending:
+            wait(pending, timeout=max(0.0, deadline - time.monotonic()))
+        finished = all(future.done() for future in pending)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        return finished
+
+    def _forget(self, future: Future) -> None:
+        with self._lock:
+            self._futures.discard(future)
+
+
+_crew_executor: Optional[CrewExecutor] = None
+
+
+def get_crew_executor() -> CrewExecutor:
+    """Return the shared crew executor of this worker."""
+    global _crew_executor
+    if _crew_executor is None:
+        _crew_executor = CrewExecutor()
+    return _crew_executor
@@ -0,0 +1,116 @@
+# src/agentic_api/jobs.py
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# SQLite database holding the status of background crew jobs, shared by all workers
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", ".jobs/jobs.sqlite3")
+
+# Finished jobs are kept this long
+JOB_TTL_HOURS = int(os.getenv("JOB_TTL_HOURS", "72"))
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed", "cancelled")
+
+JOB_FIELDS = (
+    "job_id", "username", "kind", "priority", "status", "run_id", "queue_position", "estimated_start",
+    "created_at", "started_at", "finished_at", "response", "error", "cancel_requested",
+)
+
+
+def new_job_id() -> str:
+    """Generate a new job ID."""
+    return f"job_{uuid.uuid4().hex}"
+
+
+class JobStore:
+    """Status of background crew jobs.
+
+    The worker that owns a job writes every transition (and the queue
+    position and estimated start time while it waits), so the status can be
+    read from any worker.
+    """
+
+    def __init__(self, path: str = JOB_DB_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, username TEXT NOT NULL, kind TEXT NOT NULL, priority TEXT NOT NULL, "
+            "status TEXT NOT NULL, run_id TEXT, queue_position INTEGER, estimated_start REAL, "
+            "created_at REAL NOT NULL, started_at REAL, finished_at REAL, response TEXT, error TEXT, "
+            "cancel_requested INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "cancel_requested" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at)")
+        self._conn.commit()
+
+    def create(self, job_id: str, username: str, kind: str, priority: str, run_id: Optional[str] = None) -> None:
+        """Record a new queued job."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (now - JOB_TTL_HOURS * 3600,)
+            )
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, username, kind, priority, status, run_id, created_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                (job_id, username, kind, priority, run_id, now),
+            )
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        """Update fields of a job; ``response`` is stored as JSON."""
+        if "response" in fields:
+            fields["response"] = json.dumps(fields["response"])
+        assignments = ", ".join(f"{name} = ?" for name in fields if name in JOB_FIELDS)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE job_id = ?",
+                [value for name, value in fields.items() if name in JOB_FIELDS] + [job_id],
+            )
+
+    def update_positions(self, positions: List[Tuple[str, int, float]]) -> None:
+        """Store (job_id, queue_position, estimated_start) of queued jobs."""
+        if not positions:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE jobs SET queue_position = ?, estimated_start = ? WHERE job_id = ? AND status = 'queued'",
+                [(position, estimated_start, job_id) for job_id, position, estimated_start in positions],
+            )
+
+    def cancel_requested(self, job_id: str) -> bool:
+        """Whether cancellation of a job was requested."""
+        with self._lock:
+            row = self._conn.execute("SELECT cancel_requested FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job, or None if it is unknown."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["response"] = json.loads(job["response"]) if job["response"] else None
+        return job
+
+
+_job_store: Optional[JobStore] = None
+
+
+def get_job_store() -> JobStore:
+    """Return the shared job store."""
+    global _job_store
+    if _job_store is None:
+        _job_store = JobStore()
+    return _job_store
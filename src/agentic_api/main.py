@@ -4,6 +4,8 @@ import os
 import argparse
 from dotenv import load_dotenv
 from .crew import ResearchCrew
+from .checkpoints import kickoff_with_checkpoints, new_run_id
+from .artifacts import get_artifact_store
 
 # Load environment variables from .env file
 load_dotenv()
@@ -14,21 +16,25 @@ def main():
     parser = argparse.ArgumentParser(description='Run a research crew on a specific topic')
     parser.add_argument('--topic', type=str, default='Artificial Intelligence',
                         help='The topic to research (default: Artificial Intelligence)')
+    parser.add_argument('--resume', type=str, default=None, metavar='RUN_ID',
+                        help='Resume a previous run, skipping its completed tasks')
     args = parser.parse_args()
     
-    # Create and run the crew
+    # Create and run the crew, checkpointing each task output
+    run_id = args.resume or new_run_id()
+    print(f"Run ID: {run_id}")
     crew = ResearchCrew()
-    result = crew.build().kickoff(inputs={'topic': args.topic})
+    result = kickoff_with_checkpoints(crew.build(), {'topic': args.topic}, run_id, resume=bool(args.resume))
     
     # Print the result
     print("\nResearch Report:")
     print(result.raw)
     
-    # Save the result to a file
-    with open('report.md', 'w') as f:
-        f.write(result.raw)
+    # Save the result to the run's workspace
+    artifacts = get_artifact_store()
+    artifacts.put_bytes(run_id, 'report.md', result.raw.encode('utf-8'))
     
-    print("\nReport saved to report.md")
+    print(f"\nReport saved to {os.path.join(artifacts.workspace(run_id), 'report.md')}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,316 @@
+# src/agentic_api/media.py
+
+import os
+import io
+import json
+import time
+import shutil
+import asyncio
+import hashlib
+import logging
+import tempfile
+import subprocess
+import urllib.parse
+import urllib.request
+from typing import Any, Dict, List, Optional, Tuple
+
+# Optional dependencies
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
+
+# Fix import path
+try:
+    from src.agentic_api.metrics import get_metrics
+    from src.agentic_api.tools.runtime import get_tool_runtime
+except ModuleNotFoundError:
+    # Try relative import if absolute import fails
+    from metrics import get_metrics
+    from tools.runtime import get_tool_runtime
+
+# Directory of the downscaled images and key frames, shared by the workers
+MEDIA_CACHE_DIR = os.getenv("MEDIA_CACHE_DIR", ".cache/media")
+
+# Longest side in pixels of the images handed to the vision analyzer
+MEDIA_MAX_DIMENSION = int(os.getenv("MEDIA_MAX_DIMENSION", "1024"))
+
+# JPEG quality of the re-encoded images (1-95)
+MEDIA_JPEG_QUALITY = int(os.getenv("MEDIA_JPEG_QUALITY", "80"))
+
+# Key frames extracted from a video post
+MEDIA_VIDEO_KEYFRAMES = int(os.getenv("MEDIA_VIDEO_KEYFRAMES", "3"))
+
+# Seconds a download (or a key frame extraction) may take
+MEDIA_FETCH_TIMEOUT_SECONDS = float(os.getenv("MEDIA_FETCH_TIMEOUT_SECONDS", "15"))
+
+# Downloads larger than this are abandoned and the original URL is analyzed
+MEDIA_MAX_DOWNLOAD_BYTES = int(os.getenv("MEDIA_MAX_DOWNLOAD_BYTES", str(50 * 1024 * 1024)))
+
+# Seconds the prepared version of a URL is reused without downloading it again
+MEDIA_URL_TTL_SECONDS = float(os.getenv("MEDIA_URL_TTL_SECONDS", "86400"))
+
+# Set to "false" to analyze the original URLs
+MEDIA_PREPROCESSING_ENABLED = os.getenv("MEDIA_PREPROCESSING_ENABLED", "true").lower() == "true"
+
+# URLs come from scraped posts and the LLM; anything else could read local files
+ALLOWED_SCHEMES = ("http", "https")
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".m4v", ".webm", ".mkv", ".m3u8")
+
+CHUNK_SIZE = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+def validate_media_url(url: str) -> str:
+    """Reject URLs that aren't http(s) and return the URL unchanged."""
+    parsed = urllib.parse.urlsplit(url)
+    if parsed.scheme.lower() not in ALLOWED_SCHEMES or not parsed.netloc:
+        raise ValueError(f"Unsupported media URL: {url[:100]!r}, only http and https are allowed")
+    return url
+
+
+# Opener without file: and ftp: handlers, so a redirect can't leave http(s) either
+_opener = urllib.request.OpenerDirector()
+for _handler in (urllib.request.UnknownHandler, urllib.request.HTTPHandler, urllib.request.HTTPSHandler,
+                 urllib.request.HTTPRedirectHandler, urllib.request.HTTPDefaultErrorHandler,
+                 urllib.request.HTTPErrorProcessor):
+    _opener.add_handler(_handler())
+
+
+def is_video_url(url: str) -> bool:
+    """Whether a URL points to a video, judging by its extension."""
+    return url.split("?", 1)[0].lower().endswith(VIDEO_EXTENSIONS)
+
+
+def downscale(data: bytes, max_dimension: int = MEDIA_MAX_DIMENSION, quality: int = MEDIA_JPEG_QUALITY) -> Tuple[bytes, int, int]:
+    """Decode an image, fit it into ``max_dimension`` and re-encode it as JPEG.
+
+    Returns the JPEG and its width and height. Requires Pillow.
+    """
+    if Image is None:
+        raise RuntimeError("Pillow is not installed")
+    with Image.open(io.BytesIO(data)) as image:
+        # JPEGs are decoded at a reduced scale right away when they are much larger than needed
+        image.draft("RGB", (max_dimension, max_dimension))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, "JPEG", quality=quality, optimize=True)
+        return output.getvalue(), image.width, image.height
+
+
+def extract_keyframes(url: str, count: int = MEDIA_VIDEO_KEYFRAMES, max_dimension: int = MEDIA_MAX_DIMENSION,
+                      quality: int = MEDIA_JPEG_QUALITY) -> List[bytes]:
+    """Extract up to ``count`` downscaled key frames of a video as JPEGs.
+
+    Uses ffmpeg, which reads the URL itself and only decodes the key
+    frames. Requires ffmpeg on the PATH.
+    """
+    validate_media_url(url)
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg is not installed")
+    # ffmpeg's JPEG quantizer runs from 2 (best) to 31
+    qscale = max(2, min(31, round(31 - quality * 29 / 100)))
+    scale = f"scale='min({max_dimension},iw)':'min({max_dimension},ih)':force_original_aspect_ratio=decrease"
+    with tempfile.TemporaryDirectory(prefix="keyframes-") as directory:
+        subprocess.run(
+            [ffmpeg, "-nostdin", "-loglevel", "error", "-protocol_whitelist", "http,https,tcp,tls",
+             "-skip_frame", "nokey", "-i", url,
+             "-vf", scale, "-fps_mode", "vfr", "-frames:v", str(count), "-q:v", str(qscale),
+             os.path.join(directory, "%03d.jpg")],
+            check=True, capture_output=True, timeout=MEDIA_FETCH_TIMEOUT_SECONDS * 4,
+        )
+        frames = []
+        for name in sorted(os.listdir(directory)):
+            with open(os.path.join(directory, name), "rb") as f:
+                frames.append(f.read())
+        return frames
+
+
+class MediaPreprocessor:
+    """Compact versions of post images and videos for the vision analyzer.
+
+    Images are downloaded, downscaled to ``MEDIA_MAX_DIMENSION`` and
+    re-encoded as JPEG; videos are reduced to a few key frames. Results
+    are stored under ``MEDIA_CACHE_DIR`` keyed by the hash of the source
+    bytes and the output size, so the same image behind different URLs is
+    processed once, and an index by URL skips the download for
+    ``MEDIA_URL_TTL_SECONDS``. Concurrent requests for a URL share one
+    download. When a step fails, or Pillow or ffmpeg is missing, the
+    result says so and the original URL is analyzed instead.
+    """
+
+    def __init__(self, directory: str = MEDIA_CACHE_DIR, max_dimension: int = MEDIA_MAX_DIMENSION,
+                 quality: int = MEDIA_JPEG_QUALITY):
+        self.directory = directory
+        self.max_dimension = max_dimension
+        self.quality = quality
+        self._inflight: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+        os.makedirs(os.path.join(directory, "urls"), exist_ok=True)
+
+    async def prepare(self, url: str, video: Optional[bool] = None) -> Dict[str, Any]:
+        """Return the compact version of the media at ``url``.
+
+        The result has ``paths`` (one image, or the key frames of a video),
+        the byte sizes before and after, and ``status`` "prepared",
+        "cached", "original" when the original URL has to be used, or
+        "rejected" when the URL isn't http(s) and must not be analyzed.
+        Must be awaited on the tool runtime loop.
+        """
+        try:
+            validate_media_url(url)
+        except ValueError as e:
+            get_metrics().increment("media_cache_requests_total", result="rejected", kind="video" if video else "image")
+            return {"source_url": url, "status": "rejected", "reason": str(e), "paths": []}
+        if video is None:
+            video = is_video_url(url)
+        key = self._url_key(url)
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = self._inflight[key] = asyncio.ensure_future(self._prepare(key, url, video))
+            inflight.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(inflight)
+
+    async def _prepare(self, key: str, url: str, video: bool) -> Dict[str, Any]:
+        runtime = get_tool_runtime()
+        metrics = get_metrics()
+        kind = "video" if video else "image"
+        result = await runtime.offload(self._lookup_url, key)
+        if result is not None:
+            metrics.increment("media_cache_requests_total", result="hit", kind=kind)
+            return {**result, "status": "cached"}
+
+        if not video and Image is None:
+            # Not worth downloading what can't be decoded
+            return {"source_url": url, "status": "original", "reason": "Pillow is not installed", "paths": []}
+
+        start = time.perf_counter()
+        try:
+            if video:
+                result = await runtime.offload(self._prepare_video, url)
+            else:
+                data = await runtime.offload(self._download, url)
+                result = await runtime.offload(self._prepare_image, data)
+        except Exception as e:
+            metrics.increment("media_cache_requests_total", result="error", kind=kind)
+            logger.warning("Could not preprocess %s: %s", url, e)
+            return {"source_url": url, "status": "original", "reason": str(e), "paths": []}
+
+        result = {"source_url": url, "kind": kind, **result}
+        await runtime.offload(self._store_url, key, result)
+        metrics.increment("media_cache_requests_total", result="miss", kind=kind)
+        if result.get("source_bytes"):
+            metrics.increment("media_bytes_saved_total", max(0, result["source_bytes"] - result["bytes"]), kind=kind)
+        return {**result, "status": "prepared", "seconds": round(time.perf_counter() - start, 3)}
+
+    def _download(self, url: str) -> bytes:
+        request = urllib.request.Request(validate_media_url(url), headers={"User-Agent": "agentic-api-media/1.0"})
+        with _opener.open(request, timeout=MEDIA_FETCH_TIMEOUT_SECONDS) as response:
+            chunks = []
+            size = 0
+            while chunk := response.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > MEDIA_MAX_DOWNLOAD_BYTES:
+                    raise ValueError(f"larger than MEDIA_MAX_DOWNLOAD_BYTES ({MEDIA_MAX_DOWNLOAD_BYTES})")
+                chunks.append(chunk)
+        return b"".join(chunks)
+
+    def _prepare_image(self, data: bytes) -> Dict[str, Any]:
+        if Image is None:
+            raise RuntimeError("Pillow is not installed")
+        source_hash = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(f"{source_hash}-{self.max_dimension}-q{self.quality}.jpg")
+        if os.path.exists(path):
+            # Same picture behind another URL: only the download was repeated
+            with Image.open(path) as image:
+                width, height = image.size
+            get_metrics().increment("media_cache_requests_total", result="source_hit", kind="image")
+        else:
+            compact, width, height = downscale(data, self.max_dimension, self.quality)
+            if len(compact) >= len(data):
+                # Already small: keep the source bytes rather than a larger re-encode
+                compact = data
+            self._write_atomic(path, compact)
+        return {
+            "source_sha256": source_hash,
+            "source_bytes": len(data),
+            "bytes": os.path.getsize(path),
+            "width": width,
+            "height": height,
+            "paths": [path],
+        }
+
+    def _prepare_video(self, url: str) -> Dict[str, Any]:
+        frames = extract_keyframes(url, MEDIA_VIDEO_KEYFRAMES, self.max_dimension, self.quality)
+        if not frames:
+            raise ValueError("no key frames found")
+        paths = []
+        for frame in frames:
+            path = self._blob_path(f"{hashlib.sha256(frame).hexdigest()}.jpg")
+            if not os.path.exists(path):
+                self._write_atomic(path, frame)
+            paths.append(path)
+        # The size of the video itself isn't known without downloading it
+        return {"source_bytes": None, "bytes": sum(len(frame) for frame in frames), "paths": paths}
+
+    def _url_key(self, url: str) -> str:
+        return hashlib.sha256(f"{url}|{self.max_dimension}|{self.quality}".encode("utf-8")).hexdigest()
+
+    def _lookup_url(self, key: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self.directory, "urls", f"{key}.json")
+        try:
+            if time.time() - os.path.getmtime(path) > MEDIA_URL_TTL_SECONDS:
+                return None
+            with open(path) as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # The blobs may have been removed since
+        return result if all(os.path.exists(p) for p in result["paths"]) else None
+
+    def _store_url(self, key: str, result: Dict[str, Any]) -> None:
+        self._write_atomic(os.path.join(self.directory, "urls", f"{key}.json"), json.dumps(result).encode("utf-8"))
+
+    def _blob_path(self, name: str) -> str:
+        directory = os.path.join(self.directory, name[:2])
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, name)
+
+    @staticmethod
+    def _write_atomic(path: str, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def summarize(prepared: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a preparation result reported back to the agent."""
+    return {key: prepared[key] for key in ("status", "kind", "paths", "source_bytes", "bytes", "width", "height", "reason")
+            if prepared.get(key) is not None}
+
+
+_media_preprocessor: Optional[MediaPreprocessor] = None
+
+
+def get_media_preprocessor() -> MediaPreprocessor:
+    """Return the media preprocessor of this worker."""
+    global _media_preprocessor
+    if _media_preprocessor is None:
+        _media_preprocessor = MediaPreprocessor()
+    return _media_preprocessor
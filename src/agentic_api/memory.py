@@ -0,0 +1,282 @@
+# src/agentic_api/memory.py
+
+import os
+import sys
+import time
+import signal
+import logging
+import threading
+import tracemalloc
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+# Fix import path
+try:
+    from src.agentic_api.metrics import get_metrics
+    from src.agentic_api.scheduler import get_scheduler
+    from src.agentic_api.executor import CREW_DRAIN_TIMEOUT
+    from src.agentic_api.run_stats import RunState
+except ModuleNotFoundError:
+    # Try relative import if absolute import fails
+    from metrics import get_metrics
+    from scheduler import get_scheduler
+    from executor import CREW_DRAIN_TIMEOUT
+    from run_stats import RunState
+
+# Stack frames stored per traced allocation; one is enough to group by module
+TRACEMALLOC_FRAMES = int(os.getenv("TRACEMALLOC_FRAMES", "1"))
+
+# Trace allocations from startup instead of from the first snapshot request
+TRACEMALLOC_ON_START = os.getenv("TRACEMALLOC_ON_START", "false").lower() == "true"
+
+# Recycle a worker after this many crew runs (0 disables)
+WORKER_MAX_RUNS = int(os.getenv("WORKER_MAX_RUNS", "0"))
+
+# Recycle a worker whose RSS exceeds this many MB after a crew run (0 disables)
+WORKER_MAX_RSS_MB = float(os.getenv("WORKER_MAX_RSS_MB", "0"))
+
+# Whether a supervisor replaces workers that exit: set by ``server.py --production`` with
+# several workers, or by hand when a container restart policy restarts the process
+WORKER_SUPERVISED = os.getenv("WORKER_SUPERVISED", "false").lower() == "true"
+
+# Seconds a recycling worker waits for its queued and running crews before it exits anyway
+WORKER_RECYCLE_DRAIN_SECONDS = float(os.getenv("WORKER_RECYCLE_DRAIN_SECONDS", str(CREW_DRAIN_TIMEOUT)))
+
+# Finished runs whose memory high-water marks are kept
+RUN_HISTORY_SIZE = 50
+
+logger = logging.getLogger(__name__)
+
+
+class ModuleResolver:
+    """Map source files of traced allocations to module names."""
+
+    def __init__(self):
+        self._modules: Dict[str, str] = {}
+        self._known = 0
+
+    def module_of(self, filename: str, group: str = "module") -> str:
+        if len(sys.modules) != self._known:
+            self._refresh()
+        name = self._modules.get(filename)
+        if name is None:
+            name = self._guess(filename)
+        return name.split(".", 1)[0] if group == "package" else name
+
+    def _refresh(self) -> None:
+        modules = {}
+        for name, module in list(sys.modules.items()):
+            filename = getattr(module, "__file__", None)
+            if filename:
+                modules[filename] = name
+        self._modules = modules
+        self._known = len(sys.modules)
+
+    @staticmethod
+    def _guess(filename: str) -> str:
+        # Files that aren't modules, e.g. generated code or "<frozen importlib._bootstrap>"
+        if filename.startswith("<"):
+            return filename
+        parts = filename.replace(os.sep, "/").split("/")
+        if "site-packages" in parts:
+            return parts[parts.index("site-packages") + 1].removesuffix(".py")
+        return os.path.splitext(os.path.basename(filename))[0]
+
+
+class AllocationTracker:
+    """Snapshots of the allocations traced by ``tracemalloc``, grouped by module.
+
+    Tracing is started by the first snapshot (or at startup with
+    ``TRACEMALLOC_ON_START``) and slows allocations down while it runs, so
+    it is stopped again with ``stop``. Each snapshot is compared with the
+    previous one and with the first one, the baseline.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resolver = ModuleResolver()
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._taken = 0
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    def stop(self) -> None:
+        with self._lock:
+            tracemalloc.stop()
+            self._baseline = self._previous = None
+            self._taken = 0
+
+    def status(self) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            return {"tracing": False}
+        current, peak = tracemalloc.get_traced_memory()
+        return {
+            "tracing": True,
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory(),
+            "snapshots_taken": self._taken,
+        }
+
+    def snapshot(self, limit: int = 20, group: str = "module") -> Dict[str, Any]:
+        """Take a snapshot and return the largest modules and the growth since the previous and first snapshot."""
+        self.start()
+        with self._lock:
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            ))
+            previous, baseline = self._previous, self._baseline
+            self._previous = snapshot
+            if self._baseline is None:
+                self._baseline = snapshot
+            self._taken += 1
+
+        result = {**self.status(), "group": group, "top": self._top(snapshot, limit, group)}
+        if previous is not None:
+            result["since_previous"] = self._diff(snapshot, previous, limit, group)
+        if baseline is not None and baseline is not previous:
+            result["since_baseline"] = self._diff(snapshot, baseline, limit, group)
+        return result
+
+    def _top(self, snapshot: tracemalloc.Snapshot, limit: int, group: str) -> List[Dict[str, Any]]:
+        totals: Dict[str, List[int]] = {}
+        for stat in snapshot.statistics("filename"):
+            total = totals.setdefault(self._resolver.module_of(stat.traceback[0].filename, group), [0, 0])
+            total[0] += stat.size
+            total[1] += stat.count
+        top = sorted(totals.items(), key=lambda item: -item[1][0])[:limit]
+        return [{"module": module, "size_bytes": size, "count": count} for module, (size, count) in top]
+
+    def _diff(self, snapshot: tracemalloc.Snapshot, other: tracemalloc.Snapshot, limit: int, group: str) -> List[Dict[str, Any]]:
+        totals: Dict[str, List[int]] = {}
+        for stat in snapshot.compare_to(other, "filename"):
+            total = totals.setdefault(self._resolver.module_of(stat.traceback[0].filename, group), [0, 0, 0])
+            total[0] += stat.size_diff
+            total[1] += stat.count_diff
+            total[2] += stat.size
+        top = sorted(totals.items(), key=lambda item: -abs(item[1][0]))[:limit]
+        return [
+            {"module": module, "size_diff_bytes": size_diff, "count_diff": count_diff, "size_bytes": size}
+            for module, (size_diff, count_diff, size) in top
+        ]
+
+
+class WorkerRecycler:
+    """Restarts a worker after too many crew runs or once its RSS is too high.
+
+    Checked after every run. When a limit is reached the worker stops
+    accepting crew runs (they get 503 and ``/readyz`` fails), waits for its
+    queued and running crews, then sends itself SIGTERM; uvicorn's
+    supervisor (or the container runtime) starts a fresh worker. Without
+    a supervisor (development mode, a single worker) nothing would restart
+    it, so limits are only logged.
+    """
+
+    def __init__(
+        self,
+        max_runs: int = WORKER_MAX_RUNS,
+        max_rss_mb: float = WORKER_MAX_RSS_MB,
+        supervised: bool = WORKER_SUPERVISED,
+    ):
+        self.max_runs = max_runs
+        self.max_rss_mb = max_rss_mb
+        self.supervised = supervised
+        self.runs_completed = 0
+        self.recent_runs: Deque[Dict[str, Any]] = deque(maxlen=RUN_HISTORY_SIZE)
+        self.recycling: Optional[str] = None
+        self._limit_logged = False
+        self._lock = threading.Lock()
+
+    def run_finished(self, run: RunState) -> None:
+        """Record a finished run's memory and recycle the worker if a limit is reached."""
+        growth = run.rss_end - run.rss_start if run.rss_end is not None and run.rss_start is not None else None
+        with self._lock:
+            self.runs_completed += 1
+            self.recent_runs.append({
+                "run_id": run.run_id,
+                "kind": run.kind,
+                "finished_at": time.time(),
+                "duration_seconds": round(time.time() - run.started_at, 1),
+                "rss_start_bytes": run.rss_start,
+                "rss_high_water_bytes": run.rss_high_water,
+                "rss_end_bytes": run.rss_end,
+                "rss_growth_bytes": growth,
+            })
+            reason = self._limit_reached(run.rss_end)
+            if reason is None or self.recycling is not None:
+                reason = None
+            elif not self.supervised:
+                # Exiting would take the whole server down, so only warn (once)
+                if not self._limit_logged:
+                    logger.warning("Not recycling worker %d, no supervisor would restart it: %s", os.getpid(), reason)
+                    self._limit_logged = True
+                reason = None
+            else:
+                self.recycling = reason
+
+        if growth is not None and growth > 0:
+            get_metrics().increment("crew_run_rss_growth_bytes_total", growth, kind=run.kind)
+        if reason is None:
+            return
+        threading.Thread(target=self._recycle, args=(reason,), name="worker-recycler", daemon=True).start()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            recent = list(self.recent_runs)
+        return {
+            "runs_completed": self.runs_completed,
+            "max_runs": self.max_runs or None,
+            "max_rss_mb": self.max_rss_mb or None,
+            "supervised": self.supervised,
+            "recycling": self.recycling,
+            "recent_runs": recent,
+            "max_run_rss_high_water_bytes": max((run["rss_high_water_bytes"] or 0 for run in recent), default=None),
+        }
+
+    def _limit_reached(self, rss: Optional[int]) -> Optional[str]:
+        if self.max_runs and self.runs_completed >= self.max_runs:
+            return f"{self.runs_completed} crew runs completed (WORKER_MAX_RUNS={self.max_runs})"
+        if self.max_rss_mb and rss is not None and rss > self.max_rss_mb * 1024 * 1024:
+            return f"RSS of {rss / 1024 / 1024:.0f} MB exceeds WORKER_MAX_RSS_MB={self.max_rss_mb:g}"
+        return None
+
+    def _recycle(self, reason: str) -> None:
+        logger.warning("Recycling worker %d: %s", os.getpid(), reason)
+        get_metrics().increment("worker_recycles_total")
+        scheduler = get_scheduler()
+        scheduler.accepting = False
+        deadline = time.monotonic() + WORKER_RECYCLE_DRAIN_SECONDS
+        while (scheduler.queued or scheduler.running) and time.monotonic() < deadline:
+            time.sleep(1)
+        if scheduler.queued or scheduler.running:
+            logger.warning("Recycle drain timeout reached with crew runs still in progress")
+        # uvicorn shuts the worker down gracefully and the supervisor replaces it
+        os.kill(os.getpid(), signal.SIGTERM)
+
+
+_allocation_tracker: Optional[AllocationTracker] = None
+_worker_recycler: Optional[WorkerRecycler] = None
+
+
+def get_allocation_tracker() -> AllocationTracker:
+    """Return the allocation tracker of this worker."""
+    global _allocation_tracker
+    if _allocation_tracker is None:
+        _allocation_tracker = AllocationTracker()
+    return _allocation_tracker
+
+
+def get_worker_recycler() -> WorkerRecycler:
+    """Return the worker recycler of this worker."""
+    global _worker_recycler
+    if _worker_recycler is None:
+        _worker_recycler = WorkerRecycler()
+    return _worker_recycler
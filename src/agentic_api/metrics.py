@@ -0,0 +1,53 @@
+# src/agentic_api/metrics.py
+
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional, Tuple
+
+
+class Metrics:
+    """Counters of this worker.
+
+    Counters are identified by a name and optional labels. Values are kept
+    in memory, so each worker reports its own counts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = defaultdict(float)
+
+    def increment(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Add ``value`` to a counter."""
+        key = (name, tuple(sorted((label, str(label_value)) for label, label_value in labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def value(self, name: str, **labels: Any) -> float:
+        """Return the current value of a counter."""
+        key = (name, tuple(sorted((label, str(label_value)) for label, label_value in labels.items())))
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return all counters; labelled counters are returned as a list of {labels, value}."""
+        with self._lock:
+            counters = list(self._counters.items())
+
+        snapshot: Dict[str, Any] = {}
+        for (name, labels), value in sorted(counters):
+            if labels:
+                snapshot.setdefault(name, []).append({"labels": dict(labels), "value": round(value, 3)})
+            else:
+                snapshot[name] = round(value, 3)
+        return snapshot
+
+
+_metrics: Optional[Metrics] = None
+
+
+def get_metrics() -> Metrics:
+    """Return the metrics of this worker."""
+    global _metrics
+    if _metrics is None:
+        _metrics = Metrics()
+    return _metrics
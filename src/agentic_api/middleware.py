@@ -18,6 +18,8 @@ class AuthMiddleware:
         """Initialize the middleware with paths that are exempt from authentication"""
         self.exempt_paths = exempt_paths or [
             "/",
+            "/healthz",
+            "/readyz",
             "/docs",
             "/redoc",
             "/openapi.json",
@@ -0,0 +1,405 @@
+# src/agentic_api/posts.py
+
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import numpy as np
+
+# Engagement counters stored as int64 arrays, -1 marks a missing value
+ENGAGEMENT_FIELDS = ("likes", "shares", "comments")
+
+# Float columns, NaN marks a missing value
+FLOAT_FIELDS = ("timestamp", "score", "virality_score")
+
+# Low-cardinality strings stored as integer codes into a category table
+CATEGORICAL_FIELDS = ("platform", "hashtag", "account", "content_type", "trend_category")
+
+# High-cardinality strings kept as plain Python lists
+STRING_FIELDS = ("id", "url", "image_url", "raw_content", "caption")
+
+MISSING_COUNT = -1
+
+# Fields with a dedicated column, everything else goes into the row extras
+COLUMN_FIELDS = frozenset(
+    ENGAGEMENT_FIELDS + FLOAT_FIELDS + CATEGORICAL_FIELDS + STRING_FIELDS + ("engagement_stats",)
+)
+
+
+def _to_epoch(timestamp: Optional[str]) -> float:
+    """Convert an ISO timestamp to epoch seconds."""
+    if not timestamp:
+        return np.nan
+    return datetime.fromisoformat(timestamp).timestamp()
+
+
+def _to_iso(epoch: float) -> Optional[str]:
+    """Convert epoch seconds back to an ISO timestamp."""
+    if np.isnan(epoch):
+        return None
+    return datetime.fromtimestamp(epoch).isoformat()
+
+
+class Categorical:
+    """A string column stored as int32 codes into a shared category table."""
+
+    __slots__ = ("categories", "codes")
+
+    def __init__(self, categories: List[str], codes: np.ndarray):
+        self.categories = categories
+        self.codes = codes
+
+    @classmethod
+    def from_values(cls, values: List[Optional[str]]) -> "Categorical":
+        """Encode a list of strings, None is stored as code -1."""
+        index: Dict[str, int] = {}
+        codes = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            if value is None:
+                codes[i] = -1
+            else:
+                codes[i] = index.setdefault(value, len(index))
+        return cls(list(index), codes)
+
+    def value(self, i: int) -> Optional[str]:
+        """Return the decoded value of row ``i``."""
+        code = self.codes[i]
+        return None if code < 0 else self.categories[code]
+
+    def counts(self) -> Dict[str, int]:
+        """Count rows per category."""
+        present = self.codes[self.codes >= 0]
+        counts = np.bincount(present, minlength=len(self.categories))
+        return {category: int(count) for category, count in zip(self.categories, counts) if count}
+
+    def to_list(self) -> List[Optional[str]]:
+        """Decode the whole column."""
+        return [None if code < 0 else self.categories[code] for code in self.codes.tolist()]
+
+
+class PostRow:
+    """A lightweight view of one row of a PostBatch.
+
+    Behaves like the dict records the tools used to exchange (``get``,
+    ``[]``, ``in``) so scoring and analysis code can consume either.
+    """
+
+    __slots__ = ("_batch", "_index")
+
+    def __init__(self, batch: "PostBatch", index: int):
+        self._batch = batch
+        self._index = index
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a field value, like ``dict.get``."""
+        value = self._batch.field(key, self._index)
+        return default if value is None else value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._batch.field(key, self._index)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self._batch.field(key, self._index) is not None
+
+    @property
+    def id(self) -> Optional[str]:
+        return self._batch.strings["id"][self._index]
+
+    @property
+    def engagement_stats(self) -> Dict[str, int]:
+        return self._batch.field("engagement_stats", self._index)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Materialize the row as a plain dict."""
+        return self._batch.record(self._index)
+
+    def __repr__(self) -> str:
+        return f"PostRow({self.to_dict()!r})"
+
+
+class PostBatch:
+    """Columnar container for collected posts.
+
+    Numeric engagement fields and timestamps live in NumPy arrays,
+    low-cardinality strings (platform, hashtag, content type) are stored as
+    categorical codes, and rare nested fields such as ``fashion_elements``
+    go into a per-row extras list. Rows are exposed as ``PostRow`` views.
+    """
+
+    def __init__(
+        self,
+        counts: Dict[str, np.ndarray],
+        floats: Dict[str, np.ndarray],
+        categoricals: Dict[str, Categorical],
+        strings: Dict[str, List[Optional[str]]],
+        extras: List[Optional[Dict[str, Any]]],
+    ):
+        self.counts = counts
+        self.floats = floats
+        self.categoricals = categoricals
+        self.strings = strings
+        self.extras = extras
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "PostBatch":
+        """Build a batch from dict records."""
+        builder = PostBatchBuilder()
+        for record in records:
+            builder.append(record)
+        return builder.build()
+
+    @classmethod
+    def concat(cls, batches: List["PostBatch"]) -> "PostBatch":
+        """Concatenate several batches column by column."""
+        if not batches:
+            return PostBatchBuilder().build()
+
+        categoricals = {}
+        for key in CATEGORICAL_FIELDS:
+            # Merge the category tables and remap each batch's codes
+            index: Dict[str, int] = {}
+            remapped = []
+            for batch in batches:
+                column = batch.categoricals[key]
+                lookup = np.array([index.setdefault(c, len(index)) for c in column.categories] + [-1], dtype=np.int32)
+                remapped.append(lookup[column.codes])
+            categoricals[key] = Categorical(list(index), np.concatenate(remapped))
+
+        return cls(
+            counts={key: np.concatenate([b.counts[key] for b in batches]) for key in ENGAGEMENT_FIELDS},
+            floats={key: np.concatenate([b.floats[key] for b in batches]) for key in FLOAT_FIELDS},
+            categoricals=categoricals,
+            strings={key: [v for b in batches for v in b.strings[key]] for key in STRING_FIELDS},
+            extras=[e for b in batches for e in b.extras],
+        )
+
+    def __len__(self) -> int:
+        return len(self.extras)
+
+    def __getitem__(self, index: int) -> PostRow:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return PostRow(self, index)
+
+    def __iter__(self) -> Iterator[PostRow]:
+        for i in range(len(self)):
+            yield PostRow(self, i)
+
+    def field(self, key: str, i: int) -> Any:
+        """Return the value of field ``key`` in row ``i``, or None."""
+        if key in self.strings:
+            return self.strings[key][i]
+        if key in self.categoricals:
+            return self.categoricals[key].value(i)
+        if key in self.counts:
+            value = int(self.counts[key][i])
+            return None if value == MISSING_COUNT else value
+        if key == "timestamp":
+            return _to_iso(self.floats["timestamp"][i])
+        if key in self.floats:
+            value = float(self.floats[key][i])
+            if np.isnan(value):
+                return None
+            return int(value) if value.is_integer() else value
+        if key == "engagement_stats":
+            stats = {}
+            for name in ENGAGEMENT_FIELDS:
+                value = int(self.counts[name][i])
+                if value != MISSING_COUNT:
+                    stats[name] = value
+            return stats
+        extras = self.extras[i]
+        return extras.get(key) if extras else None
+
+    def column(self, key: str) -> List[Any]:
+        """Decode a whole column into a list, missing values become None."""
+        if key in self.strings:
+            return list(self.strings[key])
+        if key in self.categoricals:
+            return self.categoricals[key].to_list()
+        if key in self.counts:
+            return [None if v == MISSING_COUNT else v for v in self.counts[key].tolist()]
+        if key in self.floats:
+            return [self.field(key, i) for i in range(len(self))]
+        return [extras.get(key) if extras else None for extras in self.extras]
+
+    def record(self, i: int) -> Dict[str, Any]:
+        """Materialize row ``i`` as a dict in the original record layout."""
+        record: Dict[str, Any] = {}
+        for key in STRING_FIELDS + CATEGORICAL_FIELDS + ("timestamp", "score", "virality_score"):
+            value = self.field(key, i)
+            if value is not None:
+                record[key] = value
+        record["engagement_stats"] = self.field("engagement_stats", i)
+        if self.extras[i]:
+            record.update(self.extras[i])
+        return record
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Materialize all rows as dicts."""
+        return [self.record(i) for i in range(len(self))]
+
+    def with_fields(self, **columns: List[Any]) -> "PostBatch":
+        """Return a new batch with added or replaced columns.
+
+        Unchanged columns are shared with this batch, not copied.
+        """
+        counts = dict(self.counts)
+        floats = dict(self.floats)
+        categoricals = dict(self.categoricals)
+        strings = dict(self.strings)
+        extras = list(self.extras)
+
+        for key, values in columns.items():
+            if len(values) != len(self):
+                raise ValueError(f"Column {key} has {len(values)} values, expected {len(self)}")
+            if key in ENGAGEMENT_FIELDS:
+                counts[key] = np.array([MISSING_COUNT if v is None else v for v in values], dtype=np.int64)
+            elif key in FLOAT_FIELDS:
+                floats[key] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            elif key in CATEGORICAL_FIELDS:
+                categoricals[key] = Categorical.from_values(values)
+            elif key in STRING_FIELDS:
+                strings[key] = list(values)
+            else:
+                for i, value in enumerate(values):
+                    if value is None:
+                        continue
+                    extras[i] = {**(extras[i] or {}), key: value}
+
+        return PostBatch(counts, floats, categoricals, strings, extras)
+
+    def select(self, mask: np.ndarray) -> "PostBatch":
+        """Return a new batch with the rows where ``mask`` is true."""
+        indices = np.flatnonzero(mask)
+        positions = indices.tolist()
+        return PostBatch(
+            counts={key: array[indices] for key, array in self.counts.items()},
+            floats={key: array[indices] for key, array in self.floats.items()},
+            categoricals={
+                key: Categorical(column.categories, column.codes[indices])
+                for key, column in self.categoricals.items()
+            },
+            strings={key: [values[i] for i in positions] for key, values in self.strings.items()},
+            extras=[self.extras[i] for i in positions],
+        )
+
+    def to_columns(self) -> Dict[str, Any]:
+        """Serialize the batch as plain columns (JSON compatible)."""
+        return {
+            "counts": {key: array.tolist() for key, array in self.counts.items()},
+            "floats": {
+                key: [None if np.isnan(v) else v for v in array.tolist()]
+                for key, array in self.floats.items()
+            },
+            "categoricals": {
+                key: {"categories": column.categories, "codes": column.codes.tolist()}
+                for key, column in self.categoricals.items()
+            },
+            "strings": self.strings,
+            "extras": self.extras,
+        }
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Any]) -> "PostBatch":
+        """Rebuild a batch serialized with ``to_columns``."""
+        return cls(
+            counts={key: np.array(values, dtype=np.int64) for key, values in columns["counts"].items()},
+            floats={
+                key: np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+                for key, values in columns["floats"].items()
+            },
+            categoricals={
+                key: Categorical(column["categories"], np.array(column["codes"], dtype=np.int32))
+                for key, column in columns["categoricals"].items()
+            },
+            strings=columns["strings"],
+            extras=columns["extras"],
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        """Compact summary statistics computed on the columns."""
+        total = len(self)
+        groups = dict(self.categoricals["hashtag"].counts())
+        for account, count in self.categoricals["account"].counts().items():
+            groups[account] = groups.get(account, 0) + count
+
+        engagement_totals = {}
+        engagement_means = {}
+        for name in ENGAGEMENT_FIELDS:
+            values = self.counts[name]
+            # Posts without the metric are left out of its total and its mean
+            present = values[values != MISSING_COUNT]
+            if len(present):
+                engagement_totals[name] = int(present.sum())
+                engagement_means[name] = round(float(present.sum()) / len(present), 2)
+
+        timestamps = self.floats["timestamp"]
+        timestamps = timestamps[~np.isnan(timestamps)]
+        fields = {key for key in STRING_FIELDS if any(v is not None for v in self.strings[key])}
+        fields |= {key for key in CATEGORICAL_FIELDS if (self.categoricals[key].codes >= 0).any()}
+        fields |= {key for key in ("score", "virality_score") if (~np.isnan(self.floats[key])).any()}
+        fields |= {key for extras in self.extras if extras for key in extras}
+        if len(timestamps):
+            fields.add("timestamp")
+        if engagement_totals:
+            fields.add("engagement_stats")
+
+        return {
+            "total_items": total,
+            "platform_distribution": self.categoricals["platform"].counts(),
+            "items_per_group": groups,
+            "content_type_distribution": self.categoricals["content_type"].counts(),
+            "engagement_totals": engagement_totals,
+            "engagement_means": engagement_means,
+            "time_range": [_to_iso(timestamps.min()), _to_iso(timestamps.max())] if len(timestamps) else None,
+            "fields": sorted(fields),
+        }
+
+
+class PostBatchBuilder:
+    """Accumulates posts column by column and freezes them into a PostBatch."""
+
+    def __init__(self):
+        self._counts: Dict[str, List[int]] = {key: [] for key in ENGAGEMENT_FIELDS}
+        self._floats: Dict[str, List[float]] = {key: [] for key in FLOAT_FIELDS}
+        self._categoricals: Dict[str, List[Optional[str]]] = {key: [] for key in CATEGORICAL_FIELDS}
+        self._strings: Dict[str, List[Optional[str]]] = {key: [] for key in STRING_FIELDS}
+        self._extras: List[Optional[Dict[str, Any]]] = []
+
+    def append(self, record: Union[Dict[str, Any], PostRow]) -> None:
+        """Append one post given in the dict record layout."""
+        if isinstance(record, PostRow):
+            record = record.to_dict()
+
+        engagement = record.get("engagement_stats") or {}
+        for key in ENGAGEMENT_FIELDS:
+            value = engagement.get(key)
+            self._counts[key].append(MISSING_COUNT if value is None else value)
+
+        self._floats["timestamp"].append(_to_epoch(record.get("timestamp")))
+        for key in ("score", "virality_score"):
+            value = record.get(key)
+            self._floats[key].append(np.nan if value is None else value)
+
+        for key in CATEGORICAL_FIELDS:
+            self._categoricals[key].append(record.get(key))
+        for key in STRING_FIELDS:
+            self._strings[key].append(record.get(key))
+
+        extras = {key: value for key, value in record.items() if key not in COLUMN_FIELDS}
+        self._extras.append(extras or None)
+
+    def build(self) -> PostBatch:
+        """Freeze the accumulated columns."""
+        return PostBatch(
+            counts={key: np.array(values, dtype=np.int64) for key, values in self._counts.items()},
+            floats={key: np.array(values, dtype=np.float64) for key, values in self._floats.items()},
+            categoricals={key: Categorical.from_values(values) for key, values in self._categoricals.items()},
+            strings=self._strings,
+            extras=self._extras,
+        )
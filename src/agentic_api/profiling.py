@@ -0,0 +1,409 @@
+# src/agentic_api/profiling.py
+
+import os
+import sys
+import json
+import asyncio
+import time
+import uuid
+import shutil
+import logging
+import tempfile
+import threading
+import contextvars
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from crewai.utilities.events import crewai_event_bus
+from crewai.utilities.events.crew_events import CrewKickoffStartedEvent
+from crewai.utilities.events.task_events import TaskStartedEvent
+from fastapi import HTTPException, Request, status
+from fastapi.responses import JSONResponse
+
+# Fix import path
+try:
+    from src.agentic_api.auth import get_current_user, is_admin
+    from src.agentic_api.artifacts import get_artifact_store
+    from src.agentic_api.run_stats import worker_id
+except ModuleNotFoundError:
+    # Try relative import if absolute import fails
+    from auth import get_current_user, is_admin
+    from artifacts import get_artifact_store
+    from run_stats import worker_id
+
+# Milliseconds between two samples of the thread stacks
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "10"))
+
+# Longest profile a request or the all-workers endpoint may take
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "60"))
+
+# Directory through which workers pick up all-workers profile requests and return their samples
+PROFILE_DIR = os.getenv("PROFILE_DIR", ".profiles")
+
+# Seconds between two checks of a worker for profile requests
+PROFILE_POLL_SECONDS = float(os.getenv("PROFILE_POLL_SECONDS", "1"))
+
+# Frames deeper than this are cut off
+MAX_STACK_DEPTH = 128
+
+REQUEST_FILE = "request.json"
+SPEEDSCOPE_ARTIFACT = "profile.speedscope.json"
+COLLAPSED_ARTIFACT = "profile.collapsed.txt"
+
+logger = logging.getLogger(__name__)
+
+# (function, file, first line)
+Frame = Tuple[str, str, int]
+
+# Threads working for the profiled request; crew threads add themselves when their crew or task starts
+_profiled_threads: contextvars.ContextVar[Optional[Set[int]]] = contextvars.ContextVar("profiled_threads", default=None)
+
+
+class Profile:
+    """Sampled stacks, counted per thread and call stack (root first)."""
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.interval_ms = interval_ms
+        self.samples: Counter = Counter()
+        self.started_at = time.time()
+        self.duration = 0.0
+
+    def add(self, thread: str, stack: Tuple[Frame, ...], count: int = 1) -> None:
+        self.samples[(thread, stack)] += count
+
+    def merge(self, other: "Profile", prefix: str = "") -> None:
+        """Add another profile's samples, prefixing its thread names (e.g. with the worker)."""
+        for (thread, stack), count in other.samples.items():
+            self.add(prefix + thread, stack, count)
+        self.duration = max(self.duration, other.duration)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "interval_ms": self.interval_ms,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "samples": [[thread, [list(frame) for frame in stack], count] for (thread, stack), count in self.samples.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Profile":
+        profile = cls(data["interval_ms"])
+        profile.started_at = data["started_at"]
+        profile.duration = data["duration"]
+        for thread, stack, count in data["samples"]:
+            profile.add(thread, tuple(tuple(frame) for frame in stack), count)
+        return profile
+
+    def to_collapsed(self) -> str:
+        """Brendan Gregg's collapsed stack format: ``thread;frame;frame count`` per line."""
+        lines = []
+        for (thread, stack), count in sorted(self.samples.items(), key=lambda item: -item[1]):
+            names = [thread] + [_frame_label(frame) for frame in stack]
+            lines.append(";".join(name.replace(";", ":") for name in names) + f" {count}")
+        return "\n".join(lines) + "\n"
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        """speedscope's file format, one sampled profile per thread (https://www.speedscope.app)."""
+        frames: Dict[Frame, int] = {}
+        profiles: Dict[str, Dict[str, Any]] = {}
+        for (thread, stack), count in sorted(self.samples.items()):
+            profile = profiles.setdefault(thread, {
+                "type": "sampled",
+                "name": thread,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": 0,
+                "samples": [],
+                "weights": [],
+            })
+            profile["samples"].append([frames.setdefault(frame, len(frames)) for frame in stack])
+            profile["weights"].append(count * self.interval_ms)
+            profile["endValue"] += count * self.interval_ms
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "agentic_api",
+            "shared": {"frames": [{"name": function, "file": file, "line": line} for function, file, line in frames]},
+            "profiles": list(profiles.values()),
+        }
+
+
+def _frame_label(frame: Frame) -> str:
+    function, file, line = frame
+    return f"{function} ({os.path.basename(file)}:{line})"
+
+
+class SamplingProfiler:
+    """Samples the stacks of the threads of this process from a background thread.
+
+    Nothing is instrumented: when no profile is running there is no cost,
+    and while one runs the sampler thread reads ``sys._current_frames()``
+    every ``interval_ms``. With ``threads`` only the threads whose idents
+    are in the set (which may grow while sampling) are sampled.
+    """
+
+    def __init__(
+        self,
+        interval_ms: float = PROFILE_INTERVAL_MS,
+        max_seconds: float = PROFILE_MAX_SECONDS,
+        threads: Optional[Set[int]] = None,
+    ):
+        self.profile = Profile(interval_ms)
+        self.max_seconds = max_seconds
+        self.threads = threads
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+
+    def start(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Profile:
+        self._stop.set()
+        self._thread.join()
+        return self.profile
+
+    def _run(self) -> None:
+        interval = self.profile.interval_ms / 1000
+        start = time.monotonic()
+        own = threading.get_ident()
+        while not self._stop.wait(interval) and time.monotonic() - start < self.max_seconds:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident != own and (self.threads is None or ident in self.threads):
+                    self.profile.add(names.get(ident, str(ident)), _stack(frame))
+        self.profile.duration = time.monotonic() - start
+
+
+def _stack(frame: Any) -> Tuple[Frame, ...]:
+    stack = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def profile_current_thread() -> None:
+    """Add the calling thread to the profile of the request it works for, if that request is profiled."""
+    threads = _profiled_threads.get()
+    if threads is not None:
+        threads.add(threading.get_ident())
+
+
+def profile_for(seconds: float, interval_ms: float = PROFILE_INTERVAL_MS) -> Profile:
+    """Sample this process for ``seconds``."""
+    profiler = SamplingProfiler(interval_ms, max_seconds=seconds).start()
+    time.sleep(seconds)
+    return profiler.stop()
+
+
+def store_profile(profile: Profile, name: str, owner: Optional[str]) -> str:
+    """Store a profile as speedscope and collapsed-stack artifacts; returns the artifact run ID."""
+    run_id = f"profile-{uuid.uuid4().hex[:16]}"
+    artifacts = get_artifact_store()
+    artifacts.put_bytes(run_id, SPEEDSCOPE_ARTIFACT, json.dumps(profile.to_speedscope(name)).encode("utf-8"), owner=owner)
+    artifacts.put_bytes(run_id, COLLAPSED_ARTIFACT, profile.to_collapsed().encode("utf-8"), owner=owner)
+    return run_id
+
+
+class ProfileRequests:
+    """Profiles of all workers, coordinated through files in ``PROFILE_DIR``.
+
+    The worker serving the admin request writes ``<profile_id>/request.json``;
+    every worker polls the directory (one ``listdir`` per
+    ``PROFILE_POLL_SECONDS``), samples itself for the requested time and
+    writes ``<profile_id>/<worker>.json``, which the serving worker merges.
+    """
+
+    def __init__(self, worker: str, directory: str = PROFILE_DIR, poll_seconds: float = PROFILE_POLL_SECONDS):
+        self.worker = worker
+        self.directory = directory
+        self.poll_seconds = poll_seconds
+        self._active: set = set()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._loop, name="profile-requests", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def request(self, seconds: float, interval_ms: float = PROFILE_INTERVAL_MS) -> str:
+        """Ask every worker for a profile of the next ``seconds``; returns the profile ID."""
+        profile_id = uuid.uuid4().hex
+        path = os.path.join(self.directory, profile_id)
+        os.makedirs(path)
+        _write_json_atomic(os.path.join(path, REQUEST_FILE), {"seconds": seconds, "interval_ms": interval_ms, "created_at": time.time()})
+        # Start sampling this worker right away instead of at its next poll
+        self.check()
+        return profile_id
+
+    def collect(self, profile_id: str, workers: Iterable[str], timeout: float) -> Tuple[Profile, List[str]]:
+        """Wait for the workers' samples, merge them and remove the request."""
+        path = os.path.join(self.directory, profile_id)
+        expected = set(workers)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and not expected.issubset(self._reported(path)):
+            time.sleep(0.5)
+
+        merged: Optional[Profile] = None
+        reported = []
+        for worker in sorted(self._reported(path)):
+            try:
+                with open(os.path.join(path, f"{worker}.json"), "r") as f:
+                    profile = Profile.from_dict(json.load(f))
+            except (OSError, ValueError):
+                continue
+            if merged is None:
+                merged = Profile(profile.interval_ms)
+                merged.started_at = profile.started_at
+            merged.merge(profile, prefix=f"{worker} ")
+            reported.append(worker)
+        shutil.rmtree(path, ignore_errors=True)
+        return merged or Profile(), reported
+
+    def check(self) -> None:
+        """Start sampling for the pending requests this worker hasn't served yet."""
+        try:
+            profile_ids = os.listdir(self.directory)
+        except FileNotFoundError:
+            return
+        now = time.time()
+        for profile_id in profile_ids:
+            path = os.path.join(self.directory, profile_id)
+            if profile_id in self._active or os.path.exists(os.path.join(path, f"{self.worker}.json")):
+                continue
+            try:
+                with open(os.path.join(path, REQUEST_FILE), "r") as f:
+                    request = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if now > request["created_at"] + request["seconds"] + PROFILE_MAX_SECONDS:
+                # Abandoned request, e.g. the serving worker died
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            self._active.add(profile_id)
+            threading.Thread(
+                target=self._sample, args=(profile_id, request), name=f"profile-{profile_id[:8]}", daemon=True
+            ).start()
+
+    def _sample(self, profile_id: str, request: Dict[str, Any]) -> None:
+        try:
+            profile = profile_for(min(request["seconds"], PROFILE_MAX_SECONDS), request["interval_ms"])
+            path = os.path.join(self.directory, profile_id)
+            if os.path.isdir(path):
+                _write_json_atomic(os.path.join(path, f"{self.worker}.json"), profile.to_dict())
+        except Exception as e:
+            logger.warning("Could not profile worker for %s: %s", profile_id, str(e))
+        finally:
+            self._active.discard(profile_id)
+
+    def _reported(self, path: str) -> set:
+        try:
+            return {name[:-5] for name in os.listdir(path) if name.endswith(".json") and name != REQUEST_FILE and not name.startswith(".")}
+        except FileNotFoundError:
+            return set()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.check()
+            except Exception as e:
+                logger.warning("Could not check profile requests: %s", str(e))
+
+
+def _write_json_atomic(path: str, data: Any) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ProfilingMiddleware:
+    """Runs a single request under the sampling profiler.
+
+    Triggered by the ``X-Profile: 1`` header or the ``profile=1`` query
+    parameter, for admin users only. Only the request's threads are
+    sampled: the event loop thread (which also serves the worker's other
+    requests) and the crew threads running its crew and async tasks.
+    Shared tool runtime threads are left out. With ``background=true`` the
+    request only enqueues a job, so only the enqueueing is profiled. The
+    profile is stored as artifacts and the response carries their location
+    in ``X-Profile-Artifacts``. Requests without the flag pass straight
+    through.
+    """
+
+    def __init__(self):
+        _register_event_handlers()
+
+    async def __call__(self, request: Request, call_next: Callable):
+        flag = request.headers.get("x-profile") or request.query_params.get("profile")
+        if not flag or flag.lower() in ("0", "false"):
+            return await call_next(request)
+
+        try:
+            user = await _admin_of(request)
+        except HTTPException as e:
+            return JSONResponse(status_code=e.status_code, content={"detail": e.detail}, headers=e.headers)
+
+        threads = {threading.get_ident()}
+        token = _profiled_threads.set(threads)
+        profiler = SamplingProfiler(threads=threads).start()
+        try:
+            response = await call_next(request)
+        finally:
+            profile = profiler.stop()
+            _profiled_threads.reset(token)
+        # Streamed bodies are still being produced; only the time until the headers is covered
+        run_id = await asyncio.to_thread(store_profile, profile, f"{request.method} {request.url.path}", user.username)
+        response.headers["X-Profile-Artifacts"] = f"/api/runs/{run_id}/artifacts"
+        return response
+
+
+async def _admin_of(request: Request):
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    user = await get_current_user(token)
+    if not is_admin(user):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    return user
+
+
+_handlers_registered = False
+
+
+def _register_event_handlers() -> None:
+    global _handlers_registered
+    if _handlers_registered:
+        return
+    # Emitted on the crew thread and on the threads of async tasks, which carry the request's context
+    crewai_event_bus.register_handler(CrewKickoffStartedEvent, lambda source, event: profile_current_thread())
+    crewai_event_bus.register_handler(TaskStartedEvent, lambda source, event: profile_current_thread())
+    _handlers_registered = True
+
+
+_profile_requests: Optional[ProfileRequests] = None
+
+
+def get_profile_requests() -> ProfileRequests:
+    """Return the profile request watcher of this worker."""
+    global _profile_requests
+    if _profile_requests is None:
+        _profile_requests = ProfileRequests(worker_id())
+    return _profile_requests
+
+
+def get_profiling_middleware() -> ProfilingMiddleware:
+    """Factory function to create an instance of ProfilingMiddleware"""
+    return ProfilingMiddleware()
@@ -0,0 +1,243 @@
+# src/agentic_api/ranking.py
+
+import os
+import heapq
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Fix import path
+try:
+    from src.agentic_api.posts import PostBatch, ENGAGEMENT_FIELDS, MISSING_COUNT
+except ModuleNotFoundError:
+    # Try relative import if absolute import fails
+    from posts import PostBatch, ENGAGEMENT_FIELDS, MISSING_COUNT
+
+# Number of items kept globally and per group, and the largest allowed value
+TOP_K = int(os.getenv("TOP_K", "10"))
+TOP_K_MAX = int(os.getenv("TOP_K_MAX", "100"))
+
+# Rows of a batch ranked at a time, bounds the memory of the sort
+RANK_CHUNK_SIZE = int(os.getenv("RANK_CHUNK_SIZE", "65536"))
+
+# Fields items are ranked within
+RANK_GROUPS = ("hashtag", "trend_category")
+
+TITLE_LENGTH = 120
+
+
+class RankedItem:
+    """An item in a top-K heap, ordered by score, then engagement, then ID."""
+
+    __slots__ = ("score", "engagement", "id", "row")
+
+    def __init__(self, score: float, engagement: int, item_id: str, row: Dict[str, Any]):
+        self.score = score
+        self.engagement = engagement
+        self.id = item_id
+        self.row = row
+
+    def __lt__(self, other: "RankedItem") -> bool:
+        # "Ranks below": lower score, then lower engagement, then the larger ID
+        if self.score != other.score:
+            return self.score < other.score
+        if self.engagement != other.engagement:
+            return self.engagement < other.engagement
+        return self.id > other.id
+
+
+class TopK:
+    """Bounded min-heap holding the ``k`` best items seen so far.
+
+    The worst kept item sits at the root, so an item that doesn't beat it
+    is rejected in O(1) and an item that does replaces it in O(log k).
+    """
+
+    __slots__ = ("k", "heap", "_ids")
+
+    def __init__(self, k: int):
+        self.k = k
+        self.heap: List[RankedItem] = []
+        self._ids: Dict[str, RankedItem] = {}
+
+    def would_accept(self, score: float, engagement: int, item_id: str) -> bool:
+        if len(self.heap) < self.k:
+            return True
+        return self.heap[0] < RankedItem(score, engagement, item_id, {})
+
+    def push(self, item: RankedItem) -> None:
+        # The same post can reach a ranking through several shards, e.g.
+        # before and after it was rescored: keep the higher-ranked copy
+        kept = self._ids.get(item.id)
+        if kept is not None:
+            if not kept < item:
+                return
+            # Rare, so the O(k) removal is fine
+            self.heap.remove(kept)
+            heapq.heapify(self.heap)
+            del self._ids[item.id]
+        if not self.would_accept(item.score, item.engagement, item.id):
+            return
+        self._ids[item.id] = item
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, item)
+        else:
+            del self._ids[heapq.heapreplace(self.heap, item).id]
+
+    def items(self) -> List[RankedItem]:
+        """Return the kept items, best first."""
+        return sorted(self.heap, reverse=True)
+
+
+def _engagement(batch: PostBatch) -> np.ndarray:
+    total = np.zeros(len(batch), dtype=np.int64)
+    for name in ENGAGEMENT_FIELDS:
+        column = batch.counts[name]
+        total += np.where(column == MISSING_COUNT, 0, column)
+    return total
+
+
+def _ranked_row(batch: PostBatch, i: int, score: float, engagement: int) -> Dict[str, Any]:
+    """Compact row handed to the report instead of the full post."""
+    text = batch.strings["caption"][i] or batch.strings["raw_content"][i] or batch.strings["id"][i] or ""
+    return {
+        "id": batch.strings["id"][i],
+        "title": " ".join(text.split())[:TITLE_LENGTH],
+        "url": batch.strings["url"][i],
+        "platform": batch.field("platform", i),
+        "hashtag": batch.field("hashtag", i),
+        "account": batch.field("account", i),
+        "content_type": batch.field("content_type", i),
+        "timestamp": batch.field("timestamp", i),
+        "trend_category": batch.field("trend_category", i),
+        "score": batch.field("score", i),
+        "engagement": int(engagement),
+        "engagement_stats": batch.field("engagement_stats", i),
+    }
+
+
+class TopKRanker:
+    """Streaming top-K ranking of scored posts, globally and per group.
+
+    Batches are consumed in chunks: each chunk is sorted once on the
+    columns to find the at most ``k`` candidates per group, and only the
+    candidates that beat a heap's current minimum are materialized. Memory
+    stays O(k x groups) however many posts are ranked. Rankings of
+    different shards are merged with ``merge`` or through
+    ``to_dict``/``from_dict``.
+    """
+
+    def __init__(self, k: int = TOP_K, groups: Iterable[str] = RANK_GROUPS):
+        self.k = max(1, min(k, TOP_K_MAX))
+        self.groups = tuple(groups)
+        self.ranked = 0
+        self.top = TopK(self.k)
+        self.by_group: Dict[str, Dict[str, TopK]] = {group: {} for group in self.groups}
+
+    def add(self, batch: PostBatch, chunk_size: int = RANK_CHUNK_SIZE) -> "TopKRanker":
+        """Rank the scored posts of a batch."""
+        if len(batch) <= chunk_size:
+            self._add_chunk(batch)
+            return self
+        positions = np.arange(len(batch))
+        for start in range(0, len(batch), chunk_size):
+            self._add_chunk(batch.select((positions >= start) & (positions < start + chunk_size)))
+        return self
+
+    def merge(self, other: "TopKRanker") -> "TopKRanker":
+        """Fold the ranking of another shard into this one."""
+        self.ranked += other.ranked
+        for item in other.top.heap:
+            self.top.push(item)
+        for group, rankings in other.by_group.items():
+            if group not in self.by_group:
+                continue
+            for key, ranking in rankings.items():
+                target = self.by_group[group].setdefault(key, TopK(self.k))
+                for item in ranking.heap:
+                    target.push(item)
+        return self
+
+    def result(self, k: Optional[int] = None) -> Dict[str, Any]:
+        """Return the top rows globally and per group, best first."""
+        k = self.k if k is None else min(k, self.k)
+        return {
+            "k": k,
+            "ranked_items": self.ranked,
+            "top_items": [item.row for item in self.top.items()[:k]],
+            **{
+                f"top_by_{group}": {
+                    key: [item.row for item in ranking.items()[:k]]
+                    for key, ranking in sorted(rankings.items())
+                }
+                for group, rankings in self.by_group.items()
+            },
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the partial ranking (JSON compatible)."""
+        return {"k": self.k, "groups": list(self.groups), **self.result()}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TopKRanker":
+        """Rebuild a partial ranking serialized with ``to_dict``."""
+        ranker = cls(data["k"], data["groups"])
+        ranker.ranked = data["ranked_items"]
+        for row in data["top_items"]:
+            ranker.top.push(_item_from_row(row))
+        for group in ranker.groups:
+            for key, rows in data[f"top_by_{group}"].items():
+                ranking = ranker.by_group[group].setdefault(key, TopK(ranker.k))
+                for row in rows:
+                    ranking.push(_item_from_row(row))
+        return ranker
+
+    def _add_chunk(self, batch: PostBatch) -> None:
+        if not len(batch):
+            return
+        self.ranked += len(batch)
+        scores = np.nan_to_num(batch.floats["score"], nan=-np.inf)
+        engagement = _engagement(batch)
+        ids = np.array([item_id or "" for item_id in batch.strings["id"]])
+
+        # Global candidates: the k best rows of the chunk
+        order = np.lexsort((ids, -engagement, -scores))[:self.k]
+        self._push(self.top, batch, order, scores, engagement, ids)
+
+        for group in self.groups:
+            codes = batch.categoricals[group].codes
+            categories = batch.categoricals[group].categories
+            # Sort by group, then rank; keep the first k rows of each group
+            order = np.lexsort((ids, -engagement, -scores, codes))
+            sorted_codes = codes[order]
+            starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+            lengths = np.diff(np.r_[starts, len(order)])
+            rank = np.arange(len(order)) - np.repeat(starts, lengths)
+            keep = (rank < self.k) & (sorted_codes >= 0)
+            for code in np.unique(sorted_codes[keep]).tolist():
+                rows = order[keep & (sorted_codes == code)]
+                ranking = self.by_group[group].setdefault(categories[code], TopK(self.k))
+                self._push(ranking, batch, rows, scores, engagement, ids)
+
+    def _push(self, ranking: TopK, batch: PostBatch, rows: np.ndarray, scores, engagement, ids) -> None:
+        for i in rows.tolist():
+            score, item_engagement, item_id = float(scores[i]), int(engagement[i]), str(ids[i])
+            if not ranking.would_accept(score, item_engagement, item_id):
+                # Rows are in rank order, the rest can't be accepted either
+                break
+            ranking.push(RankedItem(score, item_engagement, item_id, _ranked_row(batch, i, score, item_engagement)))
+
+
+def _item_from_row(row: Dict[str, Any]) -> RankedItem:
+    score = row["score"] if row["score"] is not None else -np.inf
+    return RankedItem(float(score), row["engagement"], row["id"] or "", row)
+
+
+def merge_rankings(rankings: List[TopKRanker]) -> Optional[TopKRanker]:
+    """Merge the partial rankings of several shards."""
+    if not rankings:
+        return None
+    merged = TopKRanker(max(ranking.k for ranking in rankings), rankings[0].groups)
+    for ranking in rankings:
+        merged.merge(ranking)
+    return merged
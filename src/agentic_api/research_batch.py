@@ -0,0 +1,103 @@
+# src/agentic_api/research_batch.py
+
+import os
+import re
+import json
+import asyncio
+import unicodedata
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Tuple
+
+# Maximum number of topics in one batch request
+BATCH_MAX_TOPICS = int(os.getenv("BATCH_MAX_TOPICS", "500"))
+
+# Default number of topics of one batch researched at the same time
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "2"))
+
+# Words ignored when comparing topics
+STOPWORDS = frozenset({"a", "an", "the", "of", "in", "on", "for", "and", "to", "about", "with"})
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_topic(topic: str) -> str:
+    """Normalize a topic so that trivially different spellings compare equal.
+
+    Case, accents, punctuation, whitespace, common stopwords and plural
+    ``s`` endings are ignored: "The future of AI agents!" and
+    "future AI agent" normalize to the same key.
+    """
+    text = unicodedata.normalize("NFKD", topic)
+    text = "".join(char for char in text if not unicodedata.combining(char)).casefold()
+    words = []
+    for word in _NON_WORD.sub(" ", text).split():
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return " ".join(words)
+
+
+def deduplicate_topics(topics: List[str]) -> Tuple[List[str], Dict[str, List[str]]]:
+    """Collapse duplicate topics.
+
+    Returns the unique topics (first spelling wins, in request order) and
+    the duplicates mapped to the unique topic that covers them.
+    """
+    unique: Dict[str, str] = {}
+    duplicates: Dict[str, List[str]] = {}
+    for topic in topics:
+        topic = topic.strip()
+        if not topic:
+            continue
+        key = normalize_topic(topic) or topic.casefold()
+        if key in unique:
+            if topic != unique[key]:
+                duplicates.setdefault(unique[key], []).append(topic)
+            continue
+        unique[key] = topic
+    return list(unique.values()), duplicates
+
+
+def _line(data: Dict[str, Any]) -> bytes:
+    return (json.dumps(data) + "\n").encode("utf-8")
+
+
+async def stream_batch(
+    topics: List[str],
+    duplicates: Dict[str, List[str]],
+    run_topic: Callable[[str], Awaitable[Dict[str, Any]]],
+    concurrency: int,
+    batch_info: Dict[str, Any],
+) -> AsyncIterator[bytes]:
+    """Research topics concurrently and yield NDJSON lines as each one finishes.
+
+    The first line describes the batch, then one line per topic is emitted
+    in completion order, and a summary line closes the stream. A failing
+    topic produces an error line and does not affect the others.
+    ``run_topic`` returns the result fields of one topic.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def research(topic: str) -> Dict[str, Any]:
+        async with semaphore:
+            try:
+                return {"topic": topic, "status": "success", **await run_topic(topic)}
+            except Exception as e:
+                return {"topic": topic, "status": "error", "error": str(e)}
+
+    yield _line({"type": "batch", **batch_info, "unique_topics": len(topics), "duplicates": duplicates})
+
+    tasks = [asyncio.ensure_future(research(topic)) for topic in topics]
+    succeeded = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            succeeded += result["status"] == "success"
+            yield _line({"type": "result", **result, "duplicates": duplicates.get(result["topic"], [])})
+    finally:
+        # The client went away: don't start the topics that are still waiting
+        for task in tasks:
+            task.cancel()
+
+    yield _line({"type": "summary", "succeeded": succeeded, "failed": len(topics) - succeeded})
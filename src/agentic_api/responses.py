@@ -0,0 +1,32 @@
+# src/agentic_api/responses.py
+
+from typing import Any, Dict, Optional
+
+from fastapi.responses import JSONResponse, Response
+
+# Optional dependency
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+MARKDOWN_MEDIA_TYPE = "text/markdown; charset=utf-8"
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when it is installed.
+
+    orjson serializes several times faster than the standard library and
+    produces compact output; the standard ``JSONResponse`` rendering is
+    used as a fallback.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        return super().render(content)
+
+
+def markdown_response(report: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Return a report as raw markdown, without JSON string escaping."""
+    return Response(content=report, media_type=MARKDOWN_MEDIA_TYPE, headers=headers)
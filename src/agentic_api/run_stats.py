@@ -0,0 +1,426 @@
+# src/agentic_api/run_stats.py
+
+import os
+import json
+import time
+import socket
+import logging
+import tempfile
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from crewai import Crew
+from crewai.utilities.rpm_controller import RPMController
+from crewai.utilities.events import crewai_event_bus
+from crewai.utilities.events.crew_events import CrewKickoffStartedEvent
+from crewai.utilities.events.task_events import TaskStartedEvent, TaskCompletedEvent
+from crewai.utilities.events.tool_usage_events import (
+    ToolUsageStartedEvent,
+    ToolUsageFinishedEvent,
+    ToolUsageErrorEvent
+)
+
+# Fix import path
+try:
+    from src.agentic_api.metrics import get_metrics
+    from src.agentic_api.scheduler import get_scheduler
+    from src.agentic_api.coalescing import get_single_flight
+    from src.agentic_api.search_cache import hit_rate
+    from src.agentic_api.structured_logging import log_context, propagate_context_to_async_tasks
+except ModuleNotFoundError:
+    # Try relative import if absolute import fails
+    from metrics import get_metrics
+    from scheduler import get_scheduler
+    from coalescing import get_single_flight
+    from search_cache import hit_rate
+    from structured_logging import log_context, propagate_context_to_async_tasks
+
+# Directory where each worker publishes its stats snapshot for the admin view
+STATS_DIR = os.getenv("STATS_DIR", ".stats")
+
+# Seconds between two snapshots of a worker; snapshots older than three intervals are ignored
+STATS_PUBLISH_SECONDS = float(os.getenv("STATS_PUBLISH_SECONDS", "5"))
+
+# A limiter wait shorter than this is not counted as waiting
+LIMITER_WAIT_THRESHOLD_SECONDS = 0.01
+
+logger = logging.getLogger(__name__)
+
+# Run of the current crew thread, copied into the threads of its asynchronous tasks
+_current_run: contextvars.ContextVar[Optional["RunState"]] = contextvars.ContextVar("current_run", default=None)
+
+
+class RunState:
+    """Progress of one crew run in this worker.
+
+    Written by the thread running the crew with plain attribute
+    assignments and read by the stats snapshot without locking; a
+    snapshot may mix values from two consecutive updates.
+    """
+
+    __slots__ = (
+        "run_id", "kind", "user", "started_at", "tasks_total", "tasks_done",
+        "current_task", "current_agent", "current_tool", "tool_started_at", "tool_calls",
+        "rss_start", "rss_high_water", "rss_end",
+    )
+
+    def __init__(self, run_id: str, kind: str, user: Optional[str]):
+        self.run_id = run_id
+        self.kind = kind
+        self.user = user
+        self.started_at = time.time()
+        self.tasks_total: Optional[int] = None
+        self.tasks_done = 0
+        self.current_task: Optional[str] = None
+        self.current_agent: Optional[str] = None
+        self.current_tool: Optional[str] = None
+        self.tool_started_at: Optional[float] = None
+        self.tool_calls = 0
+        # RSS of the whole worker, so concurrent runs see each other's allocations
+        self.rss_start = read_rss_bytes()
+        self.rss_high_water = self.rss_start
+        self.rss_end: Optional[int] = None
+
+    def sample_rss(self) -> None:
+        """Raise the run's RSS high-water mark to the current RSS."""
+        rss = read_rss_bytes()
+        if rss is not None and (self.rss_high_water is None or rss > self.rss_high_water):
+            self.rss_high_water = rss
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        tool_started_at = self.tool_started_at
+        return {
+            "run_id": self.run_id,
+            "kind": self.kind,
+            "user": self.user,
+            "elapsed_seconds": round(now - self.started_at, 1),
+            "tasks_done": self.tasks_done,
+            "tasks_total": self.tasks_total,
+            "current_task": self.current_task,
+            "current_agent": self.current_agent,
+            "current_tool": self.current_tool,
+            "tool_elapsed_seconds": round(now - tool_started_at, 1) if tool_started_at is not None else None,
+            "tool_calls": self.tool_calls,
+            "rss_start_bytes": self.rss_start,
+            "rss_high_water_bytes": self.rss_high_water,
+        }
+
+
+class RunRegistry:
+    """In-flight crew runs of this worker, keyed by run ID.
+
+    crewai events are attributed to a run through the context of the
+    emitting thread: the crew thread sets it, and the threads of
+    ``async_execution`` tasks inherit a copy of it.
+    """
+
+    def __init__(self):
+        self._runs: Dict[str, RunState] = {}
+        # Called on the crew thread with the state of each finished run
+        self.on_finished: Optional[Callable[[RunState], None]] = None
+
+    @contextmanager
+    def track(self, run_id: str, kind: str, user: Optional[str] = None) -> Iterator[RunState]:
+        """Register a run for the duration of the block."""
+        run = RunState(run_id, kind, user)
+        self._runs[run_id] = run
+        token = _current_run.set(run)
+        try:
+            yield run
+        finally:
+            self._runs.pop(run_id, None)
+            _current_run.reset(token)
+            run.sample_rss()
+            run.rss_end = read_rss_bytes()
+            if self.on_finished is not None:
+                try:
+                    self.on_finished(run)
+                except Exception as e:
+                    logger.warning("Could not record finished run %s: %s", run_id, str(e))
+
+    def current(self) -> Optional[RunState]:
+        """Return the run of the calling thread."""
+        return _current_run.get()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        now = time.time()
+        runs = sorted(list(self._runs.values()), key=lambda run: run.started_at)
+        return [run.snapshot(now) for run in runs]
+
+
+class LimiterStats:
+    """Time spent waiting on the LLM rate limiter in this worker.
+
+    Updated without locking by the limited threads; counts are
+    approximate under contention, which is fine for a dashboard.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.waiting = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        waits = self.waits
+        wait_seconds = self.wait_seconds
+        return {
+            "calls": self.calls,
+            "waits": waits,
+            "waiting_now": self.waiting,
+            "wait_seconds_total": round(wait_seconds, 3),
+            "average_wait_seconds": round(wait_seconds / waits, 3) if waits else None,
+            "max_wait_seconds": round(self.max_wait_seconds, 3),
+        }
+
+
+class TimedRPMController(RPMController):
+    """crewai's requests-per-minute limiter, recording how long callers wait."""
+
+    def check_or_wait(self):
+        stats = get_limiter_stats()
+        stats.waiting += 1
+        start = time.monotonic()
+        try:
+            return super().check_or_wait()
+        finally:
+            waited = time.monotonic() - start
+            stats.waiting -= 1
+            stats.calls += 1
+            if waited >= LIMITER_WAIT_THRESHOLD_SECONDS:
+                stats.waits += 1
+                stats.wait_seconds += waited
+                if waited > stats.max_wait_seconds:
+                    stats.max_wait_seconds = waited
+
+
+def time_rate_limiter(crew: Crew) -> Crew:
+    """Replace the RPM controllers of a crew and its agents with timed ones."""
+    replaced: Dict[int, TimedRPMController] = {}
+
+    def timed(controller: Optional[RPMController]) -> Optional[RPMController]:
+        if not isinstance(controller, RPMController) or isinstance(controller, TimedRPMController):
+            return controller
+        if controller.max_rpm is None:
+            return controller
+        if id(controller) not in replaced:
+            controller.stop_rpm_counter()
+            replaced[id(controller)] = TimedRPMController(max_rpm=controller.max_rpm, logger=controller.logger)
+        return replaced[id(controller)]
+
+    def swap(owner: Any) -> None:
+        # _rpm_controller is a private attribute of crewai; leave owners without it untimed
+        if not hasattr(owner, "_rpm_controller"):
+            return
+        try:
+            owner._rpm_controller = timed(owner._rpm_controller)
+        except Exception as e:
+            logger.debug("Could not time the rate limiter of %s: %s", type(owner).__name__, str(e))
+
+    swap(crew)
+    for agent in crew.agents:
+        # The agent executor is created per task and picks up the controller then
+        swap(agent)
+    return crew
+
+
+def _on_crew_started(source: Any, event: CrewKickoffStartedEvent) -> None:
+    run = get_run_registry().current()
+    if run is not None and isinstance(source, Crew):
+        run.tasks_total = len(source.tasks)
+
+
+def _on_task_started(source: Any, event: TaskStartedEvent) -> None:
+    run = get_run_registry().current()
+    if run is not None and event.task is not None:
+        run.current_task = event.task.name
+        run.current_agent = event.task.agent.role.strip() if event.task.agent is not None else None
+
+
+def _on_task_completed(source: Any, event: TaskCompletedEvent) -> None:
+    run = get_run_registry().current()
+    if run is not None:
+        run.tasks_done += 1
+        run.sample_rss()
+
+
+def _on_tool_started(source: Any, event: ToolUsageStartedEvent) -> None:
+    run = get_run_registry().current()
+    if run is not None:
+        run.current_tool = event.tool_name
+        run.tool_started_at = time.time()
+        run.tool_calls += 1
+
+
+def _on_tool_finished(source: Any, event: ToolUsageFinishedEvent) -> None:
+    run = get_run_registry().current()
+    if run is not None:
+        run.current_tool = None
+        run.tool_started_at = None
+        run.sample_rss()
+
+
+def read_rss_bytes() -> Optional[int]:
+    """Resident set size of this process."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak RSS is the best portable approximation (kilobytes on Linux, bytes on macOS)
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if os.uname().sysname == "Darwin" else maxrss * 1024
+
+
+def worker_snapshot() -> Dict[str, Any]:
+    """Stats of this worker from its in-memory counters."""
+    scheduler = get_scheduler()
+    executor = scheduler.executor
+    running = scheduler.running
+    return {
+        "worker": worker_id(),
+        "pid": os.getpid(),
+        "updated_at": time.time(),
+        "rss_bytes": read_rss_bytes(),
+        "runs": get_run_registry().snapshot(),
+        "queue": {
+            "queued": scheduler.queued,
+            "by_priority": scheduler.queued_by_priority,
+            "average_crew_seconds": round(scheduler.average_duration, 3),
+        },
+        "executor": {
+            "workers": executor.max_workers,
+            "running": running,
+            "in_flight": executor.in_flight,
+            "utilization": round(running / executor.max_workers, 3) if executor.max_workers else None,
+        },
+        "caches": {
+            "search": dict(zip(("requests", "hit_rate"), hit_rate(get_metrics().snapshot()))),
+            "coalesced_requests": get_single_flight().coalesced,
+        },
+        "llm_rate_limiter": get_limiter_stats().snapshot(),
+    }
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class StatsPublisher:
+    """Periodically writes this worker's snapshot to ``STATS_DIR``.
+
+    Requests are served by any worker, so the admin view merges the
+    snapshots every worker published with its own live one.
+    """
+
+    def __init__(self, directory: str = STATS_DIR, interval: float = STATS_PUBLISH_SECONDS):
+        self.directory = directory
+        self.interval = interval
+        self.path = os.path.join(directory, f"{worker_id()}.json")
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._loop, name="stats-publisher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval)
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def publish(self) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(worker_snapshot(), f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.publish()
+            except Exception as e:
+                logger.warning("Could not publish worker stats: %s", str(e))
+            self._stop.wait(self.interval)
+
+
+def collect_worker_stats(directory: str = STATS_DIR, max_age: float = 3 * STATS_PUBLISH_SECONDS) -> List[Dict[str, Any]]:
+    """Return the live snapshot of this worker and the recent snapshots of the others."""
+    local = worker_snapshot()
+    workers = [local]
+    now = time.time()
+    if os.path.isdir(directory):
+        for name in sorted(os.listdir(directory)):
+            if name.startswith(".") or not name.endswith(".json") or name == f"{local['worker']}.json":
+                continue
+            try:
+                with open(os.path.join(directory, name), "r") as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if now - snapshot.get("updated_at", 0) <= max_age:
+                workers.append(snapshot)
+    return workers
+
+
+_run_registry: Optional[RunRegistry] = None
+_limiter_stats: Optional[LimiterStats] = None
+_handlers_lock = threading.Lock()
+_handlers_registered = False
+
+
+def register_event_handlers() -> None:
+    """Attribute crewai task and tool events to the tracked runs (idempotent)."""
+    global _handlers_registered
+    with _handlers_lock:
+        if _handlers_registered:
+            return
+        crewai_event_bus.register_handler(CrewKickoffStartedEvent, _on_crew_started)
+        crewai_event_bus.register_handler(TaskStartedEvent, _on_task_started)
+        crewai_event_bus.register_handler(TaskCompletedEvent, _on_task_completed)
+        crewai_event_bus.register_handler(ToolUsageStartedEvent, _on_tool_started)
+        crewai_event_bus.register_handler(ToolUsageFinishedEvent, _on_tool_finished)
+        crewai_event_bus.register_handler(ToolUsageErrorEvent, _on_tool_finished)
+        _handlers_registered = True
+    propagate_context_to_async_tasks()
+
+
+def get_run_registry() -> RunRegistry:
+    """Return the run registry of this worker."""
+    global _run_registry
+    if _run_registry is None:
+        _run_registry = RunRegistry()
+    return _run_registry
+
+
+def get_limiter_stats() -> LimiterStats:
+    """Return the rate limiter stats of this worker."""
+    global _limiter_stats
+    if _limiter_stats is None:
+        _limiter_stats = LimiterStats()
+    return _limiter_stats
+
+
+@contextmanager
+def track_run(run_id: str, kind: str, crew: Crew, user: Optional[str] = None, log_level: Optional[str] = None) -> Iterator[Crew]:
+    """Track a crew run for the admin stats and tag its log records while the block kicks it off."""
+    register_event_handlers()
+    with get_run_registry().track(run_id, kind, user), log_context(run_id=run_id, level=log_level):
+        yield time_rate_limiter(crew)
@@ -0,0 +1,313 @@
+# src/agentic_api/scheduler.py
+
+import os
+import time
+import heapq
+import asyncio
+import logging
+import contextvars
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .executor import CrewExecutor, ExecutorSaturated, get_crew_executor
+
+# Share of capacity of each priority class relative to the others
+PRIORITY_WEIGHTS = {"interactive": 4.0, "batch": 1.0}
+
+# Per-user weights, e.g. "alice=2,reporting-bot=0.5" (default 1)
+SCHEDULER_USER_WEIGHTS = os.getenv("SCHEDULER_USER_WEIGHTS", "")
+
+# Virtual time credited per second of waiting, so low-priority work is not starved
+SCHEDULER_AGING_RATE = float(os.getenv("SCHEDULER_AGING_RATE", str(1 / 60)))
+
+# Maximum number of queued jobs per worker
+SCHEDULER_MAX_QUEUED = int(os.getenv("SCHEDULER_MAX_QUEUED", "200"))
+
+# Assumed job duration until real durations have been observed
+SCHEDULER_DEFAULT_JOB_SECONDS = float(os.getenv("SCHEDULER_DEFAULT_JOB_SECONDS", "120"))
+
+logger = logging.getLogger(__name__)
+
+
+def parse_user_weights(spec: str) -> Dict[str, float]:
+    """Parse ``user=weight`` pairs separated by commas."""
+    weights = {}
+    for pair in spec.split(","):
+        user, _, weight = pair.partition("=")
+        if user.strip() and weight.strip():
+            weights[user.strip()] = float(weight)
+    return weights
+
+
+class ScheduledJob:
+    """A crew job waiting for, or holding, an executor thread."""
+
+    __slots__ = (
+        "job_id", "user", "priority", "fn", "args", "kwargs", "future",
+        "start_tag", "enqueued_at", "started_at", "on_start", "context",
+    )
+
+    def __init__(self, job_id, user, priority, fn, args, kwargs, future, on_start):
+        self.job_id = job_id
+        self.user = user
+        self.priority = priority
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.on_start = on_start
+        self.start_tag = 0.0
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+        # The job runs in the context of the request that submitted it, not of whichever job dispatches it
+        self.context = contextvars.copy_context()
+
+
+class FairShareScheduler:
+    """Weighted fair queuing of crew jobs in front of the crew executor.
+
+    Every (user, priority class) pair is a flow with its own FIFO queue.
+    Jobs get start-time fair queuing tags: a flow with weight ``w`` advances
+    its virtual time by ``1 / w`` per job, so flows share the executor in
+    proportion to their weights no matter how many jobs each one queues.
+    The weight is the user's weight times the class weight, so interactive
+    work is served ahead of batch work. The waiting time is subtracted from
+    the tags (aging), so batch jobs are never starved.
+    """
+
+    def __init__(
+        self,
+        executor: Optional[CrewExecutor] = None,
+        aging_rate: float = SCHEDULER_AGING_RATE,
+        max_queued: int = SCHEDULER_MAX_QUEUED,
+        user_weights: Optional[Dict[str, float]] = None,
+    ):
+        self.executor = executor or get_crew_executor()
+        self.max_running = self.executor.max_workers
+        self.aging_rate = aging_rate
+        self.max_queued = max_queued
+        self.user_weights = user_weights if user_weights is not None else parse_user_weights(SCHEDULER_USER_WEIGHTS)
+        self.average_duration = SCHEDULER_DEFAULT_JOB_SECONDS
+        # Called on a worker thread with the positions of the queued jobs whenever they change
+        self.on_positions: Optional[Callable[[List[Tuple[str, int, float]]], None]] = None
+        # Cleared when the worker is recycled: queued jobs still run, new ones are rejected
+        self.accepting = True
+
+        self._flows: Dict[Tuple[str, str], Deque[ScheduledJob]] = {}
+        self._finish_tags: Dict[Tuple[str, str], float] = {}
+        self._virtual_time = 0.0
+        self._running: Dict[int, ScheduledJob] = {}
+        self._queued = 0
+        self._queued_by_priority: Dict[str, int] = {priority: 0 for priority in PRIORITY_WEIGHTS}
+        self._positions_stale = False
+        self._positions_writer: Optional[asyncio.Task] = None
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    @property
+    def queued_by_priority(self) -> Dict[str, int]:
+        """Number of queued jobs per priority class."""
+        return dict(self._queued_by_priority)
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    @property
+    def saturated(self) -> bool:
+        """Whether new jobs would be rejected."""
+        return not self.accepting or self._queued >= self.max_queued or self.executor.saturated
+
+    def weight(self, user: str, priority: str) -> float:
+        return self.user_weights.get(user, 1.0) * PRIORITY_WEIGHTS[priority]
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        user: str,
+        priority: str = "interactive",
+        job_id: Optional[str] = None,
+        on_start: Optional[Callable[[], None]] = None,
+        **kwargs: Any,
+    ) -> ScheduledJob:
+        """Queue a job; its ``future`` resolves with the result of ``fn``."""
+        if priority not in PRIORITY_WEIGHTS:
+            raise ValueError(f"Unknown priority class {priority!r}, expected one of {tuple(PRIORITY_WEIGHTS)}")
+        if not self.accepting:
+            raise ExecutorSaturated("Worker is restarting")
+        if self._queued >= self.max_queued:
+            raise ExecutorSaturated("Too many crew runs queued")
+
+        future = asyncio.get_running_loop().create_future()
+        job = ScheduledJob(job_id, user, priority, fn, args, kwargs, future, on_start)
+        flow = (user, priority)
+        job.start_tag = max(self._virtual_time, self._finish_tags.get(flow, 0.0))
+        self._finish_tags[flow] = job.start_tag + 1.0 / self.weight(user, priority)
+        self._flows.setdefault(flow, deque()).append(job)
+        self._queued += 1
+        self._queued_by_priority[priority] += 1
+
+        self._dispatch()
+        return job
+
+    async def run(self, fn: Callable[..., Any], *args: Any, user: str, priority: str = "interactive", **kwargs: Any) -> Any:
+        """Queue a job and await its result."""
+        job = self.submit(fn, *args, user=user, priority=priority, **kwargs)
+        try:
+            return await asyncio.shield(job.future)
+        except asyncio.CancelledError:
+            # The caller went away: drop the job if it hasn't started yet
+            if not self.cancel(job):
+                # Nobody awaits the running job anymore; consume its outcome
+                job.future.add_done_callback(lambda future: future.cancelled() or future.exception())
+            raise
+
+    def cancel(self, job: ScheduledJob) -> bool:
+        """Remove a queued job; returns False if it already started."""
+        queue = self._flows.get((job.user, job.priority))
+        if job.started_at is not None or queue is None or job not in queue:
+            return False
+        flow = (job.user, job.priority)
+        last = queue[-1] is job
+        queue.remove(job)
+        # Give the cancelled job's share back to the flow if nothing was queued behind it
+        if last:
+            if not queue:
+                del self._flows[flow]
+            if queue or job.start_tag > self._virtual_time:
+                self._finish_tags[flow] = job.start_tag
+            else:
+                self._finish_tags.pop(flow, None)
+        self._queued -= 1
+        self._queued_by_priority[job.priority] -= 1
+        if not job.future.done():
+            job.future.cancel()
+        self._publish_positions()
+        return True
+
+    def find(self, job_id: str) -> Optional[ScheduledJob]:
+        """Return the queued or running job with this ID."""
+        for job in self._running.values():
+            if job.job_id == job_id:
+                return job
+        for queue in self._flows.values():
+            for job in queue:
+                if job.job_id == job_id:
+                    return job
+        return None
+
+    def queue_order(self, now: Optional[float] = None) -> List[ScheduledJob]:
+        """Return the queued jobs in the order they would be dispatched now."""
+        now = time.monotonic() if now is None else now
+        jobs = [job for queue in self._flows.values() for job in queue]
+        return sorted(jobs, key=lambda job: self._effective_tag(job, now))
+
+    def estimate_starts(self) -> List[Tuple[ScheduledJob, int, float]]:
+        """Return (job, queue position, estimated start as epoch) for the queued jobs."""
+        now = time.monotonic()
+        wall_now = time.time()
+        # Times at which each executor thread becomes free
+        slots = [max(0.0, self.average_duration - (now - job.started_at)) for job in self._running.values()]
+        slots += [0.0] * (self.max_running - len(slots))
+        heapq.heapify(slots)
+
+        estimates = []
+        for position, job in enumerate(self.queue_order(now), start=1):
+            start = heapq.heappop(slots)
+            estimates.append((job, position, wall_now + start))
+            heapq.heappush(slots, start + self.average_duration)
+        return estimates
+
+    def _effective_tag(self, job: ScheduledJob, now: float) -> float:
+        return job.start_tag - self.aging_rate * (now - job.enqueued_at)
+
+    def _dispatch(self) -> None:
+        """Start queued jobs while executor threads are free."""
+        now = time.monotonic()
+        while self._queued and len(self._running) < self.max_running:
+            flow, queue = min(
+                ((flow, queue) for flow, queue in self._flows.items() if queue),
+                key=lambda item: self._effective_tag(item[1][0], now),
+            )
+            job = queue.popleft()
+            if not queue:
+                del self._flows[flow]
+            self._queued -= 1
+            self._queued_by_priority[job.priority] -= 1
+            self._virtual_time = max(self._virtual_time, job.start_tag)
+
+            try:
+                future = self.executor.submit(job.context.run, self._run_job, job)
+            except ExecutorSaturated as e:
+                job.future.set_exception(e)
+                continue
+            job.started_at = now
+            self._running[id(future)] = job
+            loop = asyncio.get_running_loop()
+            future.add_done_callback(lambda done: loop.call_soon_threadsafe(self._finished, done))
+        self._publish_positions()
+
+    @staticmethod
+    def _run_job(job: ScheduledJob) -> Any:
+        """Run a job on its executor thread; the start hook may write to a store, so it runs here too."""
+        if job.on_start is not None:
+            try:
+                job.on_start()
+            except Exception as e:
+                logger.warning("Start hook of job %s failed: %s", job.job_id, str(e))
+        return job.fn(*job.args, **job.kwargs)
+
+    def _finished(self, done: Future) -> None:
+        """Resolve a finished job and start the next one."""
+        job = self._running.pop(id(done))
+        duration = time.monotonic() - job.started_at
+        # Exponentially weighted average of the observed job durations
+        self.average_duration = 0.8 * self.average_duration + 0.2 * duration
+
+        if not job.future.done():
+            if done.cancelled():
+                job.future.cancel()
+            elif done.exception() is not None:
+                job.future.set_exception(done.exception())
+            else:
+                job.future.set_result(done.result())
+        self._dispatch()
+
+    def _publish_positions(self) -> None:
+        """Write the queue positions off the event loop, coalescing changes made during a write."""
+        if self.on_positions is None:
+            return
+        self._positions_stale = True
+        if self._positions_writer is None:
+            self._positions_writer = asyncio.get_running_loop().create_task(self._write_positions())
+
+    async def _write_positions(self) -> None:
+        try:
+            while self._positions_stale:
+                self._positions_stale = False
+                positions = [
+                    (job.job_id, position, estimated_start)
+                    for job, position, estimated_start in self.estimate_starts()
+                    if job.job_id is not None
+                ]
+                try:
+                    await asyncio.to_thread(self.on_positions, positions)
+                except Exception as e:
+                    logger.warning("Could not store queue positions: %s", str(e))
+        finally:
+            self._positions_writer = None
+
+
+_scheduler: Optional[FairShareScheduler] = None
+
+
+def get_scheduler() -> FairShareScheduler:
+    """Return the shared scheduler of this worker."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = FairShareScheduler()
+    return _scheduler
@@ -0,0 +1,252 @@
+# src/agentic_api/search_cache.py
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import sqlite3
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+# Fix import path
+try:
+    from src.agentic_api.metrics import get_metrics
+except ModuleNotFoundError:
+    # Try relative import if absolute import fails
+    from metrics import get_metrics
+
+# SQLite database shared by the workers
+SEARCH_CACHE_DB_PATH = os.getenv("SEARCH_CACHE_DB_PATH", ".cache/search.sqlite3")
+
+# Seconds a search result is served without refreshing it
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "21600"))
+
+# Seconds after the TTL a stale result is still served while it is refreshed in the background
+SEARCH_CACHE_STALE_SECONDS = float(os.getenv("SEARCH_CACHE_STALE_SECONDS", "86400"))
+
+# Seconds a failed search is remembered before it is retried
+SEARCH_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_NEGATIVE_TTL_SECONDS", "300"))
+
+# Maximum number of cached searches; least recently used entries are evicted
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "50000"))
+
+# Set to "false" to disable the cache
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+
+# Seconds one worker owns the refresh of a stale entry
+REFRESH_LEASE_SECONDS = 60
+
+# Writes between two eviction passes
+EVICT_EVERY = 100
+
+FRESH, STALE, NEGATIVE, MISS = "hit", "stale", "negative", "miss"
+
+
+class SearchFailed(Exception):
+    """A search failed recently and the failure is cached."""
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query so trivially different spellings share an entry."""
+    return " ".join(query.split()).casefold()
+
+
+def cache_key(tool: str, query: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Key of a search: the tool, the normalized query and the sorted parameters."""
+    payload = json.dumps([tool, normalize_query(query), params or {}], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def hit_rate(metrics_snapshot: Dict[str, Any]) -> Tuple[int, Optional[float]]:
+    """Number of cache lookups and the share served from the cache, from a metrics snapshot."""
+    counts = {result: 0.0 for result in (FRESH, STALE, NEGATIVE, MISS)}
+    for counter in metrics_snapshot.get("search_cache_requests_total", []):
+        counts[counter["labels"]["result"]] += counter["value"]
+    requests = sum(counts.values())
+    if not requests:
+        return 0, None
+    return int(requests), round((counts[FRESH] + counts[STALE] + counts[NEGATIVE]) / requests, 4)
+
+
+class SearchCache:
+    """Persistent TTL cache for search results.
+
+    Entries live in SQLite, so they survive restarts and are shared by the
+    workers. A fresh entry is returned as is; a stale entry (past its TTL
+    but within ``SEARCH_CACHE_STALE_SECONDS``) is returned immediately and
+    refreshed in the background by one worker; failures are cached for
+    ``SEARCH_CACHE_NEGATIVE_TTL_SECONDS`` so a failing backend isn't hit
+    on every call. Concurrent misses of a key in a worker share one fetch.
+    """
+
+    def __init__(self, path: str = SEARCH_CACHE_DB_PATH, max_entries: int = SEARCH_CACHE_MAX_ENTRIES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._inflight: Dict[str, "asyncio.Future[str]"] = {}
+        self._refreshes: Set["asyncio.Task[None]"] = set()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            "key TEXT PRIMARY KEY, tool TEXT NOT NULL, query TEXT NOT NULL, "
+            "value TEXT, error TEXT, created_at REAL NOT NULL, expires_at REAL NOT NULL, "
+            "stale_until REAL NOT NULL, last_access REAL NOT NULL, refresh_until REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_search_cache_access ON search_cache (last_access)")
+        self._conn.commit()
+
+    def lookup(self, key: str) -> Tuple[str, Optional[str]]:
+        """Return the state of a key (hit, stale, negative or miss) and its value or error."""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, error, expires_at, stale_until FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return MISS, None
+            value, error, expires_at, stale_until = row
+            if now >= stale_until or (error is not None and now >= expires_at):
+                return MISS, None
+            self._conn.execute("UPDATE search_cache SET last_access = ? WHERE key = ?", (now, key))
+        if error is not None:
+            return NEGATIVE, error
+        return (FRESH if now < expires_at else STALE), value
+
+    def store(self, key: str, tool: str, query: str, value: str, ttl: float = SEARCH_CACHE_TTL_SECONDS) -> None:
+        """Cache a search result."""
+        now = time.time()
+        self._write(
+            "INSERT OR REPLACE INTO search_cache "
+            "(key, tool, query, value, error, created_at, expires_at, stale_until, last_access, refresh_until) "
+            "VALUES (?, ?, ?, ?, NULL, ?, ?, ?, ?, NULL)",
+            (key, tool, normalize_query(query), value, now, now + ttl, now + ttl + SEARCH_CACHE_STALE_SECONDS, now),
+        )
+
+    def store_failure(self, key: str, tool: str, query: str, error: str) -> None:
+        """Cache a failed search; a stale result of the key is kept and served instead."""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, stale_until FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and row[0] is not None and row[1] > now:
+                # Release the refresh lease so another attempt can be made later
+                self._conn.execute("UPDATE search_cache SET refresh_until = NULL WHERE key = ?", (key,))
+                return
+        expires_at = now + SEARCH_CACHE_NEGATIVE_TTL_SECONDS
+        self._write(
+            "INSERT OR REPLACE INTO search_cache "
+            "(key, tool, query, value, error, created_at, expires_at, stale_until, last_access, refresh_until) "
+            "VALUES (?, ?, ?, NULL, ?, ?, ?, ?, ?, NULL)",
+            (key, tool, normalize_query(query), error, now, expires_at, expires_at, now),
+        )
+
+    def claim_refresh(self, key: str) -> bool:
+        """Claim the background refresh of a stale key; only one worker wins."""
+        now = time.time()
+        with self._lock, self._conn:
+            return bool(self._conn.execute(
+                "UPDATE search_cache SET refresh_until = ? "
+                "WHERE key = ? AND (refresh_until IS NULL OR refresh_until < ?)",
+                (now + REFRESH_LEASE_SECONDS, key, now),
+            ).rowcount)
+
+    def evict(self) -> int:
+        """Delete dead entries, then the least recently used ones over ``max_entries``."""
+        now = time.time()
+        with self._lock, self._conn:
+            deleted = self._conn.execute(
+                "DELETE FROM search_cache WHERE stale_until <= ? OR (error IS NOT NULL AND expires_at <= ?)", (now, now)
+            ).rowcount
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()
+            if count > self.max_entries:
+                deleted += self._conn.execute(
+                    "DELETE FROM search_cache WHERE key IN "
+                    "(SELECT key FROM search_cache ORDER BY last_access LIMIT ?)",
+                    (count - self.max_entries,),
+                ).rowcount
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count and the hit rate of this worker."""
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()
+        requests, rate = hit_rate(get_metrics().snapshot())
+        return {"entries": entries, "requests": requests, "hit_rate": rate}
+
+    async def get_or_fetch(
+        self,
+        tool: str,
+        query: str,
+        fetch: Callable[[], Awaitable[str]],
+        params: Optional[Dict[str, Any]] = None,
+        ttl: float = SEARCH_CACHE_TTL_SECONDS,
+    ) -> str:
+        """Return the cached result of a search, fetching it on a miss.
+
+        Raises ``SearchFailed`` while a failure of the search is cached, and
+        the fetch's exception when a fresh fetch fails.
+        """
+        if not SEARCH_CACHE_ENABLED:
+            return await fetch()
+
+        key = cache_key(tool, query, params)
+        state, value = await asyncio.to_thread(self.lookup, key)
+        get_metrics().increment("search_cache_requests_total", tool=tool, result=state)
+        if state == FRESH:
+            return value
+        if state == STALE:
+            if await asyncio.to_thread(self.claim_refresh, key):
+                refresh = asyncio.ensure_future(self._fetch(key, tool, query, fetch, ttl))
+                self._refreshes.add(refresh)
+                refresh.add_done_callback(self._refreshed)
+            return value
+        if state == NEGATIVE:
+            raise SearchFailed(value)
+
+        # Concurrent misses of the same key share one fetch
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = self._inflight[key] = asyncio.ensure_future(self._fetch(key, tool, query, fetch, ttl))
+            inflight.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(inflight)
+
+    async def _fetch(self, key: str, tool: str, query: str, fetch: Callable[[], Awaitable[str]], ttl: float) -> str:
+        try:
+            value = await fetch()
+        except Exception as e:
+            get_metrics().increment("search_cache_fetch_failures_total", tool=tool)
+            await asyncio.to_thread(self.store_failure, key, tool, query, str(e) or type(e).__name__)
+            raise
+        await asyncio.to_thread(self.store, key, tool, query, value, ttl)
+        return value
+
+    def _refreshed(self, task: "asyncio.Task[None]") -> None:
+        self._refreshes.discard(task)
+        # The failure is cached; the stale value was already served
+        if not task.cancelled():
+            task.exception()
+
+    def _write(self, sql: str, params: Tuple[Any, ...]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(sql, params)
+            self._writes += 1
+            evict = self._writes % EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+
+_search_cache: Optional[SearchCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """Return the shared search cache."""
+    global _search_cache
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = SearchCache()
+        return _search_cache
@@ -0,0 +1,334 @@
+# src/agentic_api/seen_index.py
+
+import os
+import json
+import math
+import fcntl
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Fix import path
+try:
+    from src.agentic_api.posts import PostBatch
+except ModuleNotFoundError:
+    # Try relative import if absolute import fails
+    from posts import PostBatch
+
+# Directory holding the Bloom filter and the exact index
+SEEN_INDEX_DIR = os.getenv("SEEN_INDEX_DIR", ".seen")
+
+# Expected number of distinct post IDs and the acceptable false positive rate
+SEEN_BLOOM_CAPACITY = int(os.getenv("SEEN_BLOOM_CAPACITY", "50000000"))
+SEEN_BLOOM_ERROR_RATE = float(os.getenv("SEEN_BLOOM_ERROR_RATE", "0.01"))
+
+# Fields that identify the content of a post; engagement stats and
+# timestamps change between scrapes and are left out
+CONTENT_FIELDS = ("platform", "url", "image_url", "raw_content", "caption")
+
+# Fields added by enrichment that change the score of a post
+ENRICHMENT_FIELDS = ("fashion_elements", "virality_score")
+
+# Maximum number of SQL variables per lookup query
+_LOOKUP_CHUNK = 500
+
+
+def content_hash(item: Any) -> str:
+    """Hash the content fields of a post (dict or PostRow)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for field in CONTENT_FIELDS:
+        digest.update((item.get(field) or "").encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def scoring_hash(item: Any) -> str:
+    """Hash the content and enrichment fields of a post, the inputs of its score."""
+    digest = hashlib.blake2b(content_hash(item).encode("utf-8"), digest_size=16)
+    for field in ENRICHMENT_FIELDS:
+        value = item.get(field)
+        # PostRow returns integral floats as ints; hash dicts the same way
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        digest.update(json.dumps(value, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class BloomFilter:
+    """Bloom filter whose bit array is a memory-mapped file.
+
+    The array is sized from the expected capacity (about 60 MB for 50
+    million IDs at 1% false positives) and lives in the page cache rather
+    than on the Python heap, so membership checks stay memory-bounded.
+    """
+
+    def __init__(self, path: str, capacity: int = SEEN_BLOOM_CAPACITY, error_rate: float = SEEN_BLOOM_ERROR_RATE):
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.path = path
+        size = (self.num_bits + 7) // 8
+        # A filter sized for different settings is rebuilt from scratch
+        self.created = not os.path.exists(path) or os.path.getsize(path) != size
+        if self.created:
+            # Create the file aside and move it into place, so no worker maps a half-created file
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            self._bits = np.memmap(tmp_path, dtype=np.uint8, mode="w+", shape=(size,))
+            self._bits.flush()
+            os.replace(tmp_path, path)
+        else:
+            self._bits = np.memmap(path, dtype=np.uint8, mode="r+", shape=(size,))
+
+    def _positions(self, keys: List[str]) -> np.ndarray:
+        """Bit positions of every key, one row of ``num_hashes`` per key."""
+        digests = b"".join(hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest() for key in keys)
+        halves = np.frombuffer(digests, dtype=np.uint64).reshape(-1, 2)
+        # Double hashing: h1 + i * h2 (wrapping uint64 arithmetic)
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            positions = halves[:, :1] + steps * halves[:, 1:]
+        return positions % np.uint64(self.num_bits)
+
+    def add(self, keys: List[str]) -> None:
+        """Add keys to the filter."""
+        if not keys:
+            return
+        positions = self._positions(keys).reshape(-1)
+        masks = np.left_shift(1, (positions & np.uint64(7)).astype(np.uint8)).astype(np.uint8)
+        np.bitwise_or.at(self._bits, (positions >> np.uint64(3)).astype(np.int64), masks)
+
+    def contains(self, keys: List[str]) -> np.ndarray:
+        """Return a mask of the keys that may have been added."""
+        if not keys:
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(keys)
+        masks = np.left_shift(1, (positions & np.uint64(7)).astype(np.uint8)).astype(np.uint8)
+        values = self._bits[(positions >> np.uint64(3)).astype(np.int64)]
+        return ((values & masks) != 0).all(axis=1)
+
+    def flush(self) -> None:
+        self._bits.flush()
+
+
+class SeenIndex:
+    """Persistent record of the posts collected and scored by earlier runs.
+
+    A Bloom filter answers "never seen" for most new posts without touching
+    the disk; only possible hits are looked up in the exact SQLite index,
+    keyed by post ID, which also stores the content hash and the scores
+    computed for the post. The enrichment of the analyzers is stored per
+    post as well, so re-scraped posts with unchanged content aren't sent
+    to the analyzers again.
+    """
+
+    def __init__(self, root: str = SEEN_INDEX_DIR):
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(root, "seen.sqlite3"), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_posts ("
+            "post_id TEXT PRIMARY KEY, content_hash TEXT NOT NULL, "
+            "first_seen REAL NOT NULL, last_seen REAL NOT NULL, scores TEXT, scores_hash TEXT"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_analyses ("
+            "post_id TEXT NOT NULL, kind TEXT NOT NULL, content_hash TEXT NOT NULL, analysis TEXT NOT NULL, "
+            "PRIMARY KEY (post_id, kind)"
+            ") WITHOUT ROWID"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(seen_posts)")}
+        if "scores_hash" not in columns:
+            # Scores stored before the enrichment fields were hashed are recomputed once
+            self._conn.execute("ALTER TABLE seen_posts ADD COLUMN scores_hash TEXT")
+        self._conn.commit()
+
+        # Workers starting together create and populate the filter one at a time
+        with open(os.path.join(root, "seen.bloom.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._bloom = BloomFilter(os.path.join(root, "seen.bloom"))
+            if self._bloom.created:
+                self._rebuild_bloom()
+
+    def partition(self, batch: PostBatch) -> Tuple[np.ndarray, Dict[int, Dict[str, Any]]]:
+        """Classify the posts of a batch against earlier runs.
+
+        Returns a mask of the posts never collected before, and the stored
+        scores of the posts already scored with unchanged content, by row
+        index. The scores may have been computed from enrichment the batch
+        doesn't have yet; ``stored_scores`` only returns exact matches.
+        """
+        unseen = np.ones(len(batch), dtype=bool)
+        scored = {}
+        for i, (digest, scores, _) in self._stored_entries(batch).items():
+            unseen[i] = False
+            if scores is not None and digest == content_hash(batch[i]):
+                scored[i] = json.loads(scores)
+        return unseen, scored
+
+    def record(self, batch: PostBatch) -> None:
+        """Mark the posts of a batch as seen.
+
+        Stored scores are kept while the content is unchanged and dropped
+        when it differs.
+        """
+        now = time.time()
+        rows = [(row.id, content_hash(row), now, now) for row in batch if row.id]
+        if not rows:
+            return
+        with self._lock:
+            # The write transaction also serializes Bloom filter updates
+            # between workers
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO seen_posts (post_id, content_hash, first_seen, last_seen) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(post_id) DO UPDATE SET last_seen = excluded.last_seen, "
+                    "scores = CASE WHEN content_hash = excluded.content_hash THEN scores END, "
+                    "scores_hash = CASE WHEN content_hash = excluded.content_hash THEN scores_hash END, "
+                    "content_hash = excluded.content_hash",
+                    rows,
+                )
+                self._bloom.add([row[0] for row in rows])
+                self._bloom.flush()
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def stored_scores(self, batch: PostBatch) -> Dict[int, Dict[str, Any]]:
+        """Return the stored scores of the posts whose content and enrichment are unchanged, by row index."""
+        return {
+            i: json.loads(scores)
+            for i, (_, scores, scores_digest) in self._stored_entries(batch).items()
+            if scores is not None and scores_digest == scoring_hash(batch[i])
+        }
+
+    def save_scores(self, items: List[Tuple[Any, Dict[str, Any]]]) -> None:
+        """Store the scores of (post, scores) pairs."""
+        now = time.time()
+        rows = [
+            (item.get("id"), content_hash(item), now, now, json.dumps(scores), scoring_hash(item))
+            for item, scores in items if item.get("id")
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO seen_posts (post_id, content_hash, first_seen, last_seen, scores, scores_hash) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(post_id) DO UPDATE SET last_seen = excluded.last_seen, "
+                    "content_hash = excluded.content_hash, scores = excluded.scores, scores_hash = excluded.scores_hash",
+                    rows,
+                )
+                self._bloom.add([row[0] for row in rows])
+                self._bloom.flush()
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+    def stored_analyses(self, kind: str, batch: PostBatch) -> Dict[int, Dict[str, Any]]:
+        """Return the stored ``kind`` analyses of the posts whose content is unchanged, by row index.
+
+        Only posts marked as seen with ``record`` or ``save_scores`` are looked up.
+        """
+        ids = batch.strings["id"]
+        candidates = self._candidates(batch)
+        if not candidates:
+            return {}
+
+        stored = {}
+        with self._lock:
+            for start in range(0, len(candidates), _LOOKUP_CHUNK):
+                chunk = [ids[i] for i in candidates[start:start + _LOOKUP_CHUNK]]
+                placeholders = ",".join("?" * len(chunk))
+                for post_id, digest, analysis in self._conn.execute(
+                    f"SELECT post_id, content_hash, analysis FROM seen_analyses WHERE kind = ? AND post_id IN ({placeholders})",
+                    [kind, *chunk],
+                ):
+                    stored[post_id] = (digest, analysis)
+        return {
+            i: json.loads(stored[ids[i]][1])
+            for i in candidates
+            if ids[i] in stored and stored[ids[i]][0] == content_hash(batch[i])
+        }
+
+    def save_analyses(self, kind: str, items: List[Tuple[Any, Dict[str, Any]]]) -> None:
+        """Store the ``kind`` analyses of (post, analysis) pairs, replacing older ones."""
+        rows = [
+            (item.get("id"), kind, content_hash(item), json.dumps(analysis, default=str))
+            for item, analysis in items if item.get("id")
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO seen_analyses (post_id, kind, content_hash, analysis) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(post_id, kind) DO UPDATE SET "
+                "content_hash = excluded.content_hash, analysis = excluded.analysis",
+                rows,
+            )
+            self._conn.commit()
+
+    def _candidates(self, batch: PostBatch) -> List[int]:
+        """Row indexes of the posts the Bloom filter may have seen."""
+        ids = batch.strings["id"]
+        maybe_seen = self._bloom.contains([post_id or "" for post_id in ids])
+        return [i for i in np.flatnonzero(maybe_seen).tolist() if ids[i]]
+
+    def _stored_entries(self, batch: PostBatch) -> Dict[int, Tuple[str, Optional[str], Optional[str]]]:
+        """Return the index entries of the posts of a batch, by row index.
+
+        Only the posts the Bloom filter may have seen are looked up.
+        """
+        ids = batch.strings["id"]
+        candidates = self._candidates(batch)
+        if not candidates:
+            return {}
+
+        stored = self._lookup([ids[i] for i in candidates])
+        return {i: stored[ids[i]] for i in candidates if ids[i] in stored}
+
+    def _lookup(self, post_ids: List[str]) -> Dict[str, Tuple[str, Optional[str], Optional[str]]]:
+        """Fetch (content_hash, scores, scores_hash) of the given post IDs from the exact index."""
+        stored = {}
+        with self._lock:
+            for start in range(0, len(post_ids), _LOOKUP_CHUNK):
+                chunk = post_ids[start:start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                for post_id, digest, scores, scores_digest in self._conn.execute(
+                    f"SELECT post_id, content_hash, scores, scores_hash FROM seen_posts WHERE post_id IN ({placeholders})",
+                    chunk,
+                ):
+                    stored[post_id] = (digest, scores, scores_digest)
+        return stored
+
+    def _rebuild_bloom(self) -> None:
+        """Repopulate a new Bloom filter from the exact index."""
+        with self._lock:
+            cursor = self._conn.execute("SELECT post_id FROM seen_posts")
+            while True:
+                chunk = cursor.fetchmany(10000)
+                if not chunk:
+                    break
+                self._bloom.add([row[0] for row in chunk])
+            self._bloom.flush()
+
+
+_seen_index: Optional[SeenIndex] = None
+
+
+def get_seen_index() -> SeenIndex:
+    """Return the shared seen-post index."""
+    global _seen_index
+    if _seen_index is None:
+        _seen_index = SeenIndex()
+    return _seen_index
@@ -6,13 +6,19 @@ from crewai.agents.agent_builder.base_agent import BaseAgent
 from crewai.llm import LLM
 from typing import List, Dict, Any
 import os
-import yaml
+import logging
 # Fix import path
 try:
-    from src.agentic_api.tools.social_media_tools import WebSearchTool, SocialMediaScraperTool, GeminiVisionAnalyzerTool, GeminiTextAnalyzerTool, ScoreCalculatorTool, InstagramAccountCrawlerTool, DatasetToCSVTool
+    from src.agentic_api.tools.social_media_tools import WebSearchTool, SocialMediaScraperTool, GeminiVisionAnalyzerTool, GeminiTextAnalyzerTool, ScoreCalculatorTool, InstagramAccountCrawlerTool, DatasetToCSVTool, TrendAggregatesTool, TopItemsTool, DatasetQueryTool
+    from src.agentic_api.tools.runtime import ParallelToolCallsTool
+    from src.agentic_api.structured_logging import CREW_VERBOSE
 except ModuleNotFoundError:
     # Try relative import if absolute import fails
-    from tools.social_media_tools import WebSearchTool, SocialMediaScraperTool, GeminiVisionAnalyzerTool, GeminiTextAnalyzerTool, ScoreCalculatorTool, InstagramAccountCrawlerTool, DatasetToCSVTool
+    from tools.social_media_tools import WebSearchTool, SocialMediaScraperTool, GeminiVisionAnalyzerTool, GeminiTextAnalyzerTool, ScoreCalculatorTool, InstagramAccountCrawlerTool, DatasetToCSVTool, TrendAggregatesTool, TopItemsTool, DatasetQueryTool
+    from tools.runtime import ParallelToolCallsTool
+    from structured_logging import CREW_VERBOSE
+
+logger = logging.getLogger(__name__)
 
 @CrewBase
 class SocialMediaCrew:
@@ -23,20 +29,20 @@ class SocialMediaCrew:
 
     # Paths to YAML configuration files with absolute paths
     base_dir = os.path.dirname(os.path.abspath(__file__))
+    agents_config = os.path.join(base_dir, 'config/social_media_agents.yaml')
+    tasks_config = os.path.join(base_dir, 'config/social_media_tasks.yaml')
     
-    def __init__(self, use_gpt35_fallback=False):
-        """Initialize the crew with optional model selection."""
-        self.use_gpt35_fallback = use_gpt35_fallback
+    def __init__(self, use_gpt35_fallback=False, run_id=None):
+        """Initialize the crew with optional model selection.
         
-        # Load agent and task configurations
-        with open(os.path.join(self.base_dir, 'config/social_media_agents.yaml'), 'r') as f:
-            self.agents_config = yaml.safe_load(f)
-        with open(os.path.join(self.base_dir, 'config/social_media_tasks.yaml'), 'r') as f:
-            self.tasks_config = yaml.safe_load(f)
+        The run ID scopes the datasets written by the collection tools.
+        """
+        self.use_gpt35_fallback = use_gpt35_fallback
+        self.run_id = run_id
             
         # Initialize LLMs with optimized settings
         openai_model = "openai/gpt-3.5-turbo" if self.use_gpt35_fallback else "openai/gpt-4o"
-        print(f"Using OpenAI model: {openai_model}")
+        logger.debug("Using OpenAI model: %s", openai_model)
         
         # Use OpenAI model for both agents
         self.openai_llm = LLM(
@@ -100,15 +106,40 @@ class SocialMediaCrew:
         # Format the final output if needed
         return output
 
+    @agent
+    def hashtag_scraper(self) -> Agent:
+        """Create the hashtag scraper agent."""
+        hashtag_scraper_config = self.agents_config['hashtag_scraper']
+        return Agent(
+            role=hashtag_scraper_config['role'],
+            goal=hashtag_scraper_config['goal'],
+            backstory=hashtag_scraper_config['backstory'],
+            llm=self.openai_llm,
+            verbose=CREW_VERBOSE,
+            tools=[SocialMediaScraperTool(run_id=self.run_id)]
+        )
+
+    @agent
+    def account_crawler(self) -> Agent:
+        """Create the Instagram account crawler agent."""
+        account_crawler_config = self.agents_config['account_crawler']
+        return Agent(
+            role=account_crawler_config['role'],
+            goal=account_crawler_config['goal'],
+            backstory=account_crawler_config['backstory'],
+            llm=self.openai_llm,
+            verbose=CREW_VERBOSE,
+            tools=[InstagramAccountCrawlerTool(run_id=self.run_id)]
+        )
+
     @agent
     def web_crawler(self) -> Agent:
         """Create the web crawler agent."""
-        # Create tools list - ZOZO crawler is removed
+        # Scraping and account crawling have their own agents so the two
+        # collection tasks can run concurrently without sharing an executor
         tools = [
             WebSearchTool(),
-            SocialMediaScraperTool(),
-            InstagramAccountCrawlerTool(),  # Only Instagram crawler is active
-            DatasetToCSVTool()
+            DatasetToCSVTool(run_id=self.run_id)
         ]
         
         # Create agent with tools
@@ -118,7 +149,7 @@ class SocialMediaCrew:
             goal=web_crawler_config['goal'],
             backstory=web_crawler_config['backstory'],
             llm=self.openai_llm,  # Use the initialized OpenAI LLM
-            verbose=True,
+            verbose=CREW_VERBOSE,
             tools=tools
         )
         
@@ -129,10 +160,16 @@ class SocialMediaCrew:
         """Create the trend analyst agent."""
         # Create tools list
         tools = [
-            GeminiVisionAnalyzerTool(),
-            GeminiTextAnalyzerTool(),
-            ScoreCalculatorTool()
+            GeminiVisionAnalyzerTool(run_id=self.run_id),
+            GeminiTextAnalyzerTool(run_id=self.run_id),
+            ScoreCalculatorTool(run_id=self.run_id),
+            TrendAggregatesTool(),
+            TopItemsTool(),
+            DatasetQueryTool()
         ]
+        # Independent calls (e.g. vision and text analysis of the same dataset)
+        # can be issued together and run concurrently in one step
+        tools.append(ParallelToolCallsTool(tools=list(tools)))
         
         # Create agent with tools
         trend_analyst_config = self.agents_config['trend_analyst']
@@ -141,40 +178,48 @@ class SocialMediaCrew:
             goal=trend_analyst_config['goal'],
             backstory=trend_analyst_config['backstory'],
             llm=self.gemini_llm,  # Use the initialized Gemini LLM (which is actually OpenAI)
-            verbose=True,
+            verbose=CREW_VERBOSE,
             tools=tools
         )
         
         return agent
 
+    @task
+    def hashtag_collection_task(self) -> Task:
+        """Create the task for scraping hashtag posts (runs asynchronously)."""
+        return Task(
+            config=self.tasks_config['hashtag_collection_task']  # type: ignore[index]
+        )
+
+    @task
+    def account_collection_task(self) -> Task:
+        """Create the task for crawling the Instagram account (runs asynchronously)."""
+        return Task(
+            config=self.tasks_config['account_collection_task']  # type: ignore[index]
+        )
+
     @task
     def data_collection_task(self) -> Task:
-        """Create the task for crawling social media."""
-        data_collection_config = self.tasks_config['data_collection_task']
+        """Create the task for merging collected data and converting it to CSV."""
         return Task(
-            description=data_collection_config['description'],
-            expected_output=data_collection_config['expected_output'],
-            agent=self.web_crawler
+            config=self.tasks_config['data_collection_task']  # type: ignore[index]
         )
 
     @task
     def trend_analysis_task(self) -> Task:
         """Create the task for analyzing trends."""
-        trend_analysis_config = self.tasks_config['trend_analysis_task']
         return Task(
-            description=trend_analysis_config['description'],
-            expected_output=trend_analysis_config['expected_output'],
-            agent=self.trend_analyst
+            config=self.tasks_config['trend_analysis_task']  # type: ignore[index]
         )
 
     @crew
     def build(self) -> Crew:
         """Build the crew with the agents and tasks."""
         return Crew(
-            agents=[self.web_crawler, self.trend_analyst],
-            tasks=[self.data_collection_task, self.trend_analysis_task],
-            verbose=2,
+            agents=self.agents,
+            tasks=self.tasks,
+            verbose=CREW_VERBOSE,
             process=Process.sequential,
             max_rpm=10,  # Limit requests per minute to avoid rate limits
             memory=False  # Disable memory to reduce token usage
-        )
\ No newline at end of file
+        )
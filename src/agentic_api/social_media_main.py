@@ -7,9 +7,13 @@ from dotenv import load_dotenv
 # Fix import path
 try:
     from src.agentic_api.social_media_crew import SocialMediaCrew
+    from src.agentic_api.checkpoints import kickoff_with_checkpoints, new_run_id
+    from src.agentic_api.artifacts import get_artifact_store
 except ModuleNotFoundError:
     # Try relative import if absolute import fails
     from social_media_crew import SocialMediaCrew
+    from checkpoints import kickoff_with_checkpoints, new_run_id
+    from artifacts import get_artifact_store
 
 # Load environment variables from .env file
 load_dotenv()
@@ -49,8 +53,8 @@ def main():
     parser.add_argument(
         '--csv-output-path',
         type=str,
-        default='social_media_data.csv',
-        help='Path where the CSV file should be saved'
+        default=None,
+        help='Path where the CSV file should be saved (default: the run workspace)'
     )
     
     # Add argument for using GPT-3.5-Turbo as a fallback model
@@ -59,8 +63,21 @@ def main():
         action='store_true',
         help='Use GPT-3.5-Turbo instead of GPT-4o to avoid rate limits'
     )
+    
+    # Add argument for resuming a failed run from its checkpoints
+    parser.add_argument(
+        '--resume',
+        type=str,
+        default=None,
+        metavar='RUN_ID',
+        help='Resume a previous run, skipping its completed tasks'
+    )
     args = parser.parse_args()
     
+    run_id = args.resume or new_run_id()
+    # Without an explicit path the CSV goes to the run's own workspace
+    csv_output_path = args.csv_output_path or os.path.join(get_artifact_store().workspace(run_id), 'social_media_data.csv')
+    
     # Create inputs dictionary
     inputs = {
         'hashtags': args.hashtags,
@@ -76,7 +93,7 @@ def main():
         # Instagram settings
         'instagram_account_url': args.instagram_account,
         'instagram_max_images': 5,  # Hard limit to 5 images as requested
-        'csv_output_path': args.csv_output_path  # Add CSV output path
+        'csv_output_path': csv_output_path  # Add CSV output path
     }
     
     # Print execution information
@@ -94,100 +111,27 @@ def main():
     print(f"Maximum images: {inputs['instagram_max_images']} (Limited to 5 records as requested)")
     print(f"\nCSV Output Configuration:")
     print(f"CSV Output Path: {inputs['csv_output_path']}")
-    print("\n" + "-"*50 + "\n")
     
-    # Create agents directly
-    from src.agentic_api.tools.social_media_tools import WebSearchTool, SocialMediaScraperTool, GeminiVisionAnalyzerTool, GeminiTextAnalyzerTool, ScoreCalculatorTool, InstagramAccountCrawlerTool, DatasetToCSVTool
-    from crewai import Agent, Task, Crew, Process
-    from crewai.llm import LLM
-    import yaml
-    import os
+    print(f"\nRun ID: {run_id}{' (resuming)' if args.resume else ''}")
+    print("\n" + "-"*50 + "\n")
     
-    # Load agent and task configurations
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    with open(os.path.join(base_dir, 'config/social_media_agents.yaml'), 'r') as f:
-        agents_config = yaml.safe_load(f)
-    with open(os.path.join(base_dir, 'config/social_media_tasks.yaml'), 'r') as f:
-        tasks_config = yaml.safe_load(f)
-        
-    # Initialize LLMs with optimized settings and debugging
+    # Initialize the crew with optimized settings and debugging
     try:
-        # Use GPT-3.5-Turbo as fallback if specified
-        openai_model = "openai/gpt-3.5-turbo" if args.use_gpt35_fallback else "openai/gpt-4o"
-        print(f"Using OpenAI model: {openai_model}")
-        
         print("API Keys:")
         print(f"OpenAI API Key: {'Set' if os.getenv('OPENAI_API_KEY') else 'Not Set'}")
         print(f"Google Gemini API Key: {'Set' if os.getenv('GOOGLE_GEMINI_API_KEY') else 'Not Set'}")
         
-        # Use OpenAI model for both agents since Gemini API has quota issues
-        openai_llm = LLM(
-            model=openai_model,
-            temperature=0.5,  # Lower temperature for more focused responses
-            streaming=True,   # Enable streaming to reduce latency and token usage
-            max_tokens=1024   # Limit token generation to reduce usage
-        )
-        # Use OpenAI model for both agents
-        gemini_llm = openai_llm  # Use the same OpenAI LLM for both agents
-        
-        # Create web crawler agent
-        web_crawler = Agent(
-            role=agents_config['web_crawler']['role'],
-            goal=agents_config['web_crawler']['goal'],
-            backstory=agents_config['web_crawler']['backstory'],
-            llm=openai_llm,  # Use the initialized OpenAI LLM
-            verbose=True,
-            tools=[
-                WebSearchTool(),
-                SocialMediaScraperTool(),
-                InstagramAccountCrawlerTool(),
-                DatasetToCSVTool()
-            ]
-        )
-        
-        # Create trend analyst agent
-        trend_analyst = Agent(
-            role=agents_config['trend_analyst']['role'],
-            goal=agents_config['trend_analyst']['goal'],
-            backstory=agents_config['trend_analyst']['backstory'],
-            llm=gemini_llm,  # Use the initialized Gemini LLM
-            verbose=True,
-            tools=[
-                GeminiVisionAnalyzerTool(),
-                GeminiTextAnalyzerTool(),
-                ScoreCalculatorTool()
-            ]
-        )
-        
-        # Create tasks
-        data_collection = Task(
-            description=tasks_config['data_collection_task']['description'],
-            expected_output=tasks_config['data_collection_task']['expected_output'],
-            agent=web_crawler
-        )
-        
-        trend_analysis = Task(
-            description=tasks_config['trend_analysis_task']['description'],
-            expected_output=tasks_config['trend_analysis_task']['expected_output'],
-            agent=trend_analyst
-        )
-        
-        # Create and run the crew with optimized settings
+        # Hashtag scraping and account crawling run as parallel async tasks
+        # inside the crew (see config/social_media_tasks.yaml)
         print("\nInitializing Social Media Crew...")
-        crew = Crew(
-            agents=[web_crawler, trend_analyst],
-            tasks=[data_collection, trend_analysis],
-            verbose=True,
-            process=Process.sequential,
-            max_rpm=10,  # Limit requests per minute to avoid rate limits
-            memory=False  # Disable memory to reduce token usage
-        )
+        crew = SocialMediaCrew(use_gpt35_fallback=args.use_gpt35_fallback, run_id=run_id).build()
         
         print("\nStarting Crew execution...")
         try:
-            result = crew.kickoff(inputs=inputs)
+            result = kickoff_with_checkpoints(crew, inputs, run_id, resume=bool(args.resume))
         except Exception as e:
             print(f"\nError during crew execution: {str(e)}")
+            print(f"Resume this run with: --resume {run_id}")
             import traceback
             print(traceback.format_exc())
             raise
@@ -197,6 +141,12 @@ def main():
         print(traceback.format_exc())
         raise
     
+    # Keep the CSV and the report as artifacts of the run
+    artifacts = get_artifact_store()
+    artifacts.collect(run_id)
+    artifacts.put_bytes(run_id, 'report.md', result.raw.encode('utf-8'))
+    print(f"\nArtifacts saved to {artifacts.workspace(run_id)}")
+    
     # Print the result summary
     print("\nInstagram Analysis Complete!")
     print("\nSummary:")
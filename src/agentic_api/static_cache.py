@@ -0,0 +1,99 @@
+# src/agentic_api/static_cache.py
+
+import os
+import time
+import hashlib
+import mimetypes
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+# Seconds between checks whether a cached file changed on disk
+STATIC_CACHE_REVALIDATE_SECONDS = float(os.getenv("STATIC_CACHE_REVALIDATE_SECONDS", "60"))
+
+# Browser cache lifetime of /static assets
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "3600"))
+
+
+class CachedAsset:
+    """A static file held in memory with its validators."""
+
+    __slots__ = ("body", "media_type", "etag", "last_modified", "mtime_ns", "checked_at")
+
+    def __init__(self, path: Path):
+        stat = path.stat()
+        self.body = path.read_bytes()
+        self.media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        self.etag = f'"{hashlib.blake2b(self.body, digest_size=16).hexdigest()}"'
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.mtime_ns = stat.st_mtime_ns
+        self.checked_at = time.monotonic()
+
+
+class StaticAssetCache:
+    """In-memory cache for static assets with ETag and Last-Modified support.
+
+    Files are read from disk once and then served from memory; conditional
+    requests get a ``304 Not Modified`` without a body. Cached files are
+    re-checked against their mtime at most every
+    ``STATIC_CACHE_REVALIDATE_SECONDS``.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root.resolve()
+        self._assets: Dict[str, CachedAsset] = {}
+        self._lock = threading.Lock()
+
+    def get(self, relative_path: str) -> Optional[CachedAsset]:
+        """Return the cached asset, loading or refreshing it if needed."""
+        asset = self._assets.get(relative_path)
+        if asset is not None and time.monotonic() - asset.checked_at < STATIC_CACHE_REVALIDATE_SECONDS:
+            return asset
+
+        path = (self.root / relative_path).resolve()
+        if self.root not in path.parents or not path.is_file():
+            return None
+
+        with self._lock:
+            asset = self._assets.get(relative_path)
+            if asset is not None and path.stat().st_mtime_ns == asset.mtime_ns:
+                asset.checked_at = time.monotonic()
+                return asset
+            asset = self._assets[relative_path] = CachedAsset(path)
+            return asset
+
+    def response(self, request: Request, relative_path: str, cache_control: str = "no-cache") -> Optional[Response]:
+        """Build the response for an asset, or None if it doesn't exist."""
+        asset = self.get(relative_path)
+        if asset is None:
+            return None
+
+        headers = {
+            "ETag": asset.etag,
+            "Last-Modified": asset.last_modified,
+            "Cache-Control": cache_control,
+        }
+        if self._not_modified(request, asset):
+            return Response(status_code=304, headers=headers)
+        body = b"" if request.method == "HEAD" else asset.body
+        headers["Content-Length"] = str(len(asset.body))
+        return Response(content=body, media_type=asset.media_type, headers=headers)
+
+    @staticmethod
+    def _not_modified(request: Request, asset: CachedAsset) -> bool:
+        """Evaluate If-None-Match, falling back to If-Modified-Since."""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or asset.etag in tags
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return parsedate_to_datetime(asset.last_modified) <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
@@ -0,0 +1,277 @@
+# src/agentic_api/structured_logging.py
+
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import random
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Awaitable, Dict, Iterator, Optional
+
+from crewai import Task
+from crewai.utilities.events import crewai_event_bus
+from crewai.utilities.events.task_events import TaskStartedEvent, TaskCompletedEvent, TaskFailedEvent
+from crewai.utilities.events.tool_usage_events import ToolUsageFinishedEvent, ToolUsageErrorEvent
+from crewai.utilities.events.llm_events import LLMCallCompletedEvent, LLMCallFailedEvent
+
+# Minimum level of records written, unless a run sets its own
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Where the JSON lines are written: "stderr", "stdout" or a file path
+LOG_OUTPUT = os.getenv("LOG_OUTPUT", "stderr")
+
+# Records buffered for the writer thread; further records are dropped instead of blocking
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Share of agent trace records (tool calls, LLM calls) that are kept; runs at debug level keep all
+LOG_TRACE_SAMPLE_RATE = float(os.getenv("LOG_TRACE_SAMPLE_RATE", "0.1"))
+
+# Keep crewai's own console output of agents and crews
+CREW_VERBOSE = os.getenv("CREW_VERBOSE", "false").lower() == "true"
+
+# Loggers of this package; the trace logger carries the sampled agent traces
+PACKAGE_LOGGER = __name__.rpartition(".")[0] or "agentic_api"
+TRACE_LOGGER = f"{PACKAGE_LOGGER}.trace"
+
+LOG_LEVELS = ("debug", "info", "warning", "error")
+
+# Attributes every LogRecord has; anything else was passed with ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "run_id", "task"}
+
+# Run ID, task name and log level of the current run
+_log_context: contextvars.ContextVar[Dict[str, Any]] = contextvars.ContextVar("log_context", default={})
+
+
+@contextmanager
+def log_context(**values: Any) -> Iterator[None]:
+    """Attach values (run_id, task, level) to the records logged within the block."""
+    token = _log_context.set({**_log_context.get(), **values})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+def update_log_context(**values: Any) -> None:
+    """Change values of the current log context, e.g. the task of a running crew."""
+    _log_context.set({**_log_context.get(), **values})
+
+
+def bind_log_context(coroutine: Awaitable[Any]) -> Awaitable[Any]:
+    """Carry the caller's log context into a coroutine run on another thread's loop."""
+    values = _log_context.get()
+
+    async def run():
+        _log_context.set(values)
+        return await coroutine
+
+    return run()
+
+
+_async_tasks_patched = False
+_patch_lock = threading.Lock()
+
+
+def propagate_context_to_async_tasks() -> None:
+    """Run crewai ``async_execution`` tasks in the context of the thread that starts them (idempotent).
+
+    crewai starts a plain thread for each asynchronous task, which begins
+    with an empty context: without this, the records and events of those
+    tasks lose the run's log context and run ID.
+    """
+    global _async_tasks_patched
+    with _patch_lock:
+        if _async_tasks_patched:
+            return
+        _async_tasks_patched = True
+
+    if not (hasattr(Task, "execute_async") and hasattr(Task, "_execute_task_async")):
+        logging.getLogger(__name__).warning("crewai Task has no async execution hooks; async tasks keep an empty log context")
+        return
+    execute_async = Task.execute_async
+    execute_task_async = Task._execute_task_async
+    # Context of each started task, taken on the starting thread and entered on the task's thread
+    contexts: Dict[int, contextvars.Context] = {}
+
+    def start_in_context(self, *args: Any, **kwargs: Any) -> Any:
+        contexts[id(self)] = contextvars.copy_context()
+        try:
+            return execute_async(self, *args, **kwargs)
+        except BaseException:
+            contexts.pop(id(self), None)
+            raise
+
+    def run_in_context(self, *args: Any, **kwargs: Any) -> Any:
+        context = contexts.pop(id(self), None)
+        if context is None:
+            return execute_task_async(self, *args, **kwargs)
+        return context.run(execute_task_async, self, *args, **kwargs)
+
+    Task.execute_async = start_in_context
+    Task._execute_task_async = run_in_context
+
+
+class ContextFilter(logging.Filter):
+    """Add the run context to records and apply per-run levels and trace sampling."""
+
+    def __init__(self, level: str = LOG_LEVEL, sample_rate: float = LOG_TRACE_SAMPLE_RATE):
+        super().__init__()
+        self.level = logging.getLevelName(level)
+        self.sample_rate = sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _log_context.get()
+        level = logging.getLevelName(context["level"].upper()) if context.get("level") else self.level
+        if record.levelno < level:
+            return False
+        if record.name == TRACE_LOGGER and level > logging.DEBUG and random.random() >= self.sample_rate:
+            return False
+        record.run_id = context.get("run_id")
+        record.task = context.get("task")
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that drops records when the queue is full instead of blocking."""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render the message and traceback now; the arguments may change before the writer runs
+        record = logging.makeLogRecord(record.__dict__)
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Plain increment: a lost count under contention is fine
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage(),
+            "run_id": getattr(record, "run_id", None),
+            "task": getattr(record, "task", None),
+            "pid": record.process,
+            "thread": record.threadName,
+        }
+        entry.update({key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES})
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+_handler: Optional[DroppingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+_configure_lock = threading.Lock()
+
+
+def configure_logging() -> None:
+    """Route log records through a bounded queue to a background JSON writer (idempotent)."""
+    global _handler, _listener
+    with _configure_lock:
+        if _handler is not None:
+            return
+        if LOG_OUTPUT in ("stdout", "stderr"):
+            output = logging.StreamHandler(getattr(sys, LOG_OUTPUT))
+        else:
+            os.makedirs(os.path.dirname(LOG_OUTPUT) or ".", exist_ok=True)
+            output = logging.FileHandler(LOG_OUTPUT)
+        output.setFormatter(JsonFormatter())
+
+        _handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        _handler.addFilter(ContextFilter())
+        _listener = QueueListener(_handler.queue, output)
+        _listener.start()
+        atexit.register(stop_logging)
+
+        root = logging.getLogger()
+        root.addHandler(_handler)
+        root.setLevel(LOG_LEVEL)
+        # Records of this package are created down to debug so runs can raise their verbosity
+        logging.getLogger(PACKAGE_LOGGER).setLevel(logging.DEBUG)
+        _register_event_handlers()
+    propagate_context_to_async_tasks()
+
+
+def stop_logging() -> None:
+    """Flush the queued records and stop the writer thread."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def dropped_records() -> int:
+    """Records dropped because the queue was full."""
+    return _handler.dropped if _handler is not None else 0
+
+
+def _register_event_handlers() -> None:
+    logger = logging.getLogger(PACKAGE_LOGGER + ".events")
+    trace = logging.getLogger(TRACE_LOGGER)
+
+    def on_task_started(source: Any, event: TaskStartedEvent) -> None:
+        name = event.task.name if event.task is not None else None
+        update_log_context(task=name)
+        logger.info("Task started", extra={"agent": _agent_role(event.task)})
+
+    def on_task_completed(source: Any, event: TaskCompletedEvent) -> None:
+        logger.info("Task completed", extra={"agent": _agent_role(event.task)})
+
+    def on_task_failed(source: Any, event: TaskFailedEvent) -> None:
+        logger.error("Task failed: %s", event.error, extra={"agent": _agent_role(event.task)})
+
+    def on_tool_finished(source: Any, event: ToolUsageFinishedEvent) -> None:
+        trace.info(
+            "Tool call finished",
+            extra={
+                "agent": event.agent_role,
+                "tool": event.tool_name,
+                "duration_seconds": round((event.finished_at - event.started_at).total_seconds(), 3),
+                "from_cache": event.from_cache,
+            },
+        )
+
+    def on_tool_error(source: Any, event: ToolUsageErrorEvent) -> None:
+        logger.warning("Tool call failed: %s", event.error, extra={"agent": event.agent_role, "tool": event.tool_name})
+
+    def on_llm_completed(source: Any, event: LLMCallCompletedEvent) -> None:
+        trace.info("LLM call completed", extra={"model": getattr(source, "model", None), "call_type": event.call_type.value})
+
+    def on_llm_failed(source: Any, event: LLMCallFailedEvent) -> None:
+        logger.warning("LLM call failed: %s", event.error, extra={"model": getattr(source, "model", None)})
+
+    crewai_event_bus.register_handler(TaskStartedEvent, on_task_started)
+    crewai_event_bus.register_handler(TaskCompletedEvent, on_task_completed)
+    crewai_event_bus.register_handler(TaskFailedEvent, on_task_failed)
+    crewai_event_bus.register_handler(ToolUsageFinishedEvent, on_tool_finished)
+    crewai_event_bus.register_handler(ToolUsageErrorEvent, on_tool_error)
+    crewai_event_bus.register_handler(LLMCallCompletedEvent, on_llm_completed)
+    crewai_event_bus.register_handler(LLMCallFailedEvent, on_llm_failed)
+
+
+def _agent_role(task: Any) -> Optional[str]:
+    agent = getattr(task, "agent", None)
+    return agent.role.strip() if agent is not None else None
@@ -1,20 +1,30 @@
 # src/agentic_api/tools/custom_tool.py
 
-from crewai import BaseTool
 from typing import Any, Dict, Optional
 
-class CustomSearchTool(BaseTool):
+# Fix import path
+try:
+    from src.agentic_api.search_cache import get_search_cache
+    from src.agentic_api.tools.runtime import AsyncTool, tool_error
+except ModuleNotFoundError:
+    # Try relative import if absolute import fails
+    from search_cache import get_search_cache
+    from tools.runtime import AsyncTool, tool_error
+
+class CustomSearchTool(AsyncTool):
     """A custom tool for searching information.
     
     This is an example of how to create a custom tool for CrewAI.
     In a real application, you might want to implement actual search
-    functionality or integrate with external APIs.
+    functionality or integrate with external APIs. Tools doing network
+    I/O implement the async ``_execute`` so concurrent calls overlap on
+    the shared tool runtime instead of each blocking a thread.
     """
     
     name: str = "custom_search"
     description: str = "Search for information about a specific topic"
     
-    def _run(self, query: str, **kwargs: Any) -> str:
+    async def _execute(self, query: str, **kwargs: Any) -> str:
         """Run the custom search tool.
         
         Args:
@@ -23,16 +33,20 @@ class CustomSearchTool(BaseTool):
         Returns:
             A string with the search results
         """
+        # Repeated queries are answered from the shared search cache
+        try:
+            return await get_search_cache().get_or_fetch(self.name, query, lambda: self._search(query))
+        except Exception as e:
+            return tool_error(f"Search failed: {e}")
+    
+    async def _search(self, query: str) -> str:
+        """Query the search backend."""
         # In a real application, you would implement actual search functionality here
-        # For example, you might use a web search API, database query, etc.
+        # For example, you might await an HTTP client, or wrap a blocking client
+        # with `await get_tool_runtime().offload(client.search, query)`
         
         # This is just a placeholder implementation
         return f"Here are the search results for '{query}':\n\n" \
                f"1. Example result 1 for {query}\n" \
                f"2. Example result 2 for {query}\n" \
                f"3. Example result 3 for {query}"
-    
-    async def _arun(self, query: str, **kwargs: Any) -> str:
-        """Run the custom search tool asynchronously."""
-        # For async implementation
-        return self._run(query, **kwargs)
\ No newline at end of file
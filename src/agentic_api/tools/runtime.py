@@ -0,0 +1,296 @@
+# src/agentic_api/tools/runtime.py
+
+import os
+import json
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from crewai.tools import BaseTool
+
+# Fix import path
+try:
+    from src.agentic_api.metrics import get_metrics
+    from src.agentic_api.structured_logging import bind_log_context
+except ModuleNotFoundError:
+    # Try relative import if absolute import fails
+    from metrics import get_metrics
+    from structured_logging import bind_log_context
+
+# Default number of concurrent invocations of one tool in a worker
+TOOL_MAX_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", "8"))
+
+# Per-tool overrides, e.g. "gemini_vision_analyzer=4,web_search=16"
+TOOL_CONCURRENCY_OVERRIDES = os.getenv("TOOL_CONCURRENCY_OVERRIDES", "")
+
+# Seconds a single tool invocation may take
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "120"))
+
+# Seconds an invocation on a whole dataset (called with dataset_id) may take
+TOOL_DATASET_TIMEOUT_SECONDS = float(os.getenv("TOOL_DATASET_TIMEOUT_SECONDS", "1800"))
+
+# Seconds one item of a dataset may take (e.g. downloading and analyzing one image)
+TOOL_ITEM_TIMEOUT_SECONDS = float(os.getenv("TOOL_ITEM_TIMEOUT_SECONDS", str(TOOL_TIMEOUT_SECONDS)))
+
+# Threads running blocking tools and blocking calls of async tools
+TOOL_THREAD_POOL_SIZE = int(os.getenv("TOOL_THREAD_POOL_SIZE", "16"))
+
+# Items of a dataset a tool processes at the same time (e.g. images analyzed)
+TOOL_FANOUT_CONCURRENCY = int(os.getenv("TOOL_FANOUT_CONCURRENCY", "8"))
+
+
+def _parse_overrides(value: str) -> Dict[str, int]:
+    overrides = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, limit = item.split("=", 1)
+            overrides[name.strip()] = int(limit)
+    return overrides
+
+
+class ToolTimeout(TimeoutError):
+    """A tool invocation exceeded its timeout."""
+
+
+class ToolRuntime:
+    """Event loop shared by the tools of a worker.
+
+    Agents run tools from crew threads; async tools are executed on one
+    event loop running in a daemon thread, so their I/O overlaps across
+    crews and within a step. Each tool has a concurrency limit and a
+    timeout; blocking tools are offloaded to a bounded thread pool.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=TOOL_THREAD_POOL_SIZE, thread_name_prefix="tool")
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._overrides = _parse_overrides(TOOL_CONCURRENCY_OVERRIDES)
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Return the runtime's event loop, starting it on first use."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="tool-runtime", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def run(self, coroutine: Awaitable[Any]) -> Any:
+        """Run a coroutine on the runtime loop from synchronous code and wait for it."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("ToolRuntime.run() called from the runtime loop, await the coroutine instead")
+        # Log records of the tool keep the run ID and task of the calling crew thread
+        return asyncio.run_coroutine_threadsafe(bind_log_context(coroutine), self.loop).result()
+
+    async def submit(self, coroutine: Awaitable[Any]) -> Any:
+        """Await a coroutine on the runtime loop from any event loop."""
+        if asyncio.get_running_loop() is self.loop:
+            return await coroutine
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(bind_log_context(coroutine), self.loop))
+
+    async def offload(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking function in the tool thread pool."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    async def invoke(self, tool: BaseTool, **kwargs: Any) -> Any:
+        """Run one tool invocation within the tool's concurrency limit and timeout.
+
+        Async tools are awaited; other tools are run in the thread pool.
+        Invocations on a dataset get ``TOOL_DATASET_TIMEOUT_SECONDS``, since
+        their items are bounded one by one in ``map``. Must be awaited on
+        the runtime loop (see ``submit``).
+        """
+        limit = self._semaphore(tool)
+        if kwargs.get("dataset_id"):
+            timeout = getattr(tool, "dataset_timeout", None) or TOOL_DATASET_TIMEOUT_SECONDS
+        else:
+            timeout = getattr(tool, "timeout", None) or TOOL_TIMEOUT_SECONDS
+        metrics = get_metrics()
+        async with limit:
+            metrics.increment("tool_calls_total", tool=tool.name)
+            try:
+                if isinstance(tool, AsyncTool):
+                    return await asyncio.wait_for(tool._execute(**kwargs), timeout)
+                return await asyncio.wait_for(self.offload(tool._run, **kwargs), timeout)
+            except asyncio.TimeoutError:
+                metrics.increment("tool_timeouts_total", tool=tool.name)
+                raise ToolTimeout(f"Tool {tool.name} timed out after {timeout:g}s")
+
+    async def gather(self, calls: Iterable[Any]) -> List[Any]:
+        """Run independent tool invocations concurrently.
+
+        ``calls`` are ``(tool, kwargs)`` pairs. Results are returned in call
+        order; a failed invocation yields its exception instead of a result.
+        """
+        return await asyncio.gather(*(self.invoke(tool, **kwargs) for tool, kwargs in calls), return_exceptions=True)
+
+    async def map(
+        self,
+        fn: Callable[[Any], Awaitable[Any]],
+        items: Iterable[Any],
+        limit: int = TOOL_FANOUT_CONCURRENCY,
+        timeout: Optional[float] = TOOL_ITEM_TIMEOUT_SECONDS,
+    ) -> List[Any]:
+        """Apply an async function to items with at most ``limit`` in flight, keeping their order.
+
+        Each item gets ``timeout`` seconds once it starts; an item that
+        exceeds it yields a ``ToolTimeout`` instead of a result, so one slow
+        item doesn't fail the others.
+        """
+        semaphore = asyncio.Semaphore(limit)
+
+        async def bounded(item):
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(fn(item), timeout)
+                except asyncio.TimeoutError:
+                    get_metrics().increment("tool_item_timeouts_total")
+                    return ToolTimeout(f"Item timed out after {timeout:g}s")
+
+        return await asyncio.gather(*(bounded(item) for item in items))
+
+    def _semaphore(self, tool: BaseTool) -> asyncio.Semaphore:
+        # Only touched on the runtime loop, so no lock is needed
+        semaphore = self._semaphores.get(tool.name)
+        if semaphore is None:
+            limit = self._overrides.get(tool.name) or getattr(tool, "max_concurrency", None) or TOOL_MAX_CONCURRENCY
+            semaphore = self._semaphores[tool.name] = asyncio.Semaphore(limit)
+        return semaphore
+
+
+_tool_runtime: Optional[ToolRuntime] = None
+_tool_runtime_lock = threading.Lock()
+
+
+def get_tool_runtime() -> ToolRuntime:
+    """Return the tool runtime of this worker."""
+    global _tool_runtime
+    with _tool_runtime_lock:
+        if _tool_runtime is None:
+            _tool_runtime = ToolRuntime()
+        return _tool_runtime
+
+
+def tool_error(message: str) -> str:
+    """Format a tool error the way the tools report errors to the agent."""
+    return json.dumps({"status": "error", "message": message}, indent=2)
+
+
+class AsyncTool(BaseTool):
+    """Base class for tools with a native async implementation.
+
+    Subclasses implement ``async _execute(**kwargs)``. Calls from an agent
+    thread run on the shared tool runtime, within the tool's concurrency
+    limit and timeout, and don't tie up an event loop of their own.
+    """
+
+    # Concurrent invocations of this tool (TOOL_MAX_CONCURRENCY when unset)
+    max_concurrency: Optional[int] = None
+    # Seconds an invocation may take (TOOL_TIMEOUT_SECONDS when unset)
+    timeout: Optional[float] = None
+    # Seconds an invocation with a dataset_id may take (TOOL_DATASET_TIMEOUT_SECONDS when unset)
+    dataset_timeout: Optional[float] = None
+
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs: Any) -> None:
+        super().__pydantic_init_subclass__(**kwargs)
+        if "_execute" in cls.__dict__:
+            # crewai derives the argument schema from the annotations of _run
+            def _run(self, **kwargs: Any) -> Any:
+                return AsyncTool._run(self, **kwargs)
+            _run.__annotations__ = dict(cls._execute.__annotations__)
+            _run.__doc__ = cls._execute.__doc__
+            cls._run = _run
+
+    async def _execute(self, **kwargs: Any) -> Any:
+        raise NotImplementedError
+
+    def _run(self, **kwargs: Any) -> Any:
+        runtime = get_tool_runtime()
+        try:
+            return runtime.run(runtime.invoke(self, **kwargs))
+        except ToolTimeout as e:
+            return tool_error(str(e))
+
+    async def _arun(self, **kwargs: Any) -> Any:
+        runtime = get_tool_runtime()
+        try:
+            return await runtime.submit(runtime.invoke(self, **kwargs))
+        except ToolTimeout as e:
+            return tool_error(str(e))
+
+
+class BlockingTool(BaseTool):
+    """Base class for tools with a blocking ``_run``.
+
+    Async callers get the call offloaded to the tool thread pool, within
+    the tool's concurrency limit and timeout, instead of blocking their
+    event loop.
+    """
+
+    max_concurrency: Optional[int] = None
+    timeout: Optional[float] = None
+    dataset_timeout: Optional[float] = None
+
+    async def _arun(self, **kwargs: Any) -> Any:
+        runtime = get_tool_runtime()
+        try:
+            return await runtime.submit(runtime.invoke(self, **kwargs))
+        except ToolTimeout as e:
+            return tool_error(str(e))
+
+
+class ParallelToolCallsTool(AsyncTool):
+    """A tool for running several independent tool calls in one agent step."""
+
+    name: str = "parallel_tool_calls"
+    description: str = (
+        "Run several independent tool calls at the same time and get all results in one step. "
+        "Pass calls as a list of {\"tool\": <tool name>, \"args\": {<tool arguments>}}. Only combine "
+        "calls that don't need each other's output, e.g. the vision and text analyzers on the same dataset"
+    )
+    tools: List[BaseTool] = []
+
+    async def _execute(self, calls: Optional[List[Dict[str, Any]]] = None, **kwargs: Any) -> str:
+        """Run the parallel tool calls tool.
+
+        Args:
+            calls: Tool calls, each with the tool name and its arguments
+
+        Returns:
+            A JSON string with the result of each call, in call order
+        """
+        tools = {tool.name: tool for tool in self.tools}
+        invocations = []
+        for call in calls or []:
+            tool = tools.get(call.get("tool"))
+            if tool is None:
+                return tool_error(f"Unknown tool {call.get('tool')!r}, available: {', '.join(tools)}")
+            invocations.append((tool, call.get("args") or {}))
+        if not invocations:
+            return tool_error("Provide calls")
+
+        results = await get_tool_runtime().gather(invocations)
+        return json.dumps({
+            "status": "success",
+            "results": [
+                {"tool": tool.name, **({"error": str(result)} if isinstance(result, Exception) else {"result": _decode(result)})}
+                for (tool, _), result in zip(invocations, results)
+            ],
+        }, indent=2)
+
+
+def _decode(result: Any) -> Any:
+    """Embed JSON results as objects rather than strings."""
+    if isinstance(result, str):
+        try:
+            return json.loads(result)
+        except ValueError:
+            return result
+    return result
@@ -1,18 +1,84 @@
 # src/agentic_api/tools/social_media_tools.py
 
-from crewai.tools import BaseTool
 from typing import Any, Dict, List, Optional
 import json
 from datetime import datetime, timedelta
+import csv
 import os
+import tempfile
+# Fix import path
+try:
+    from src.agentic_api.analytics_store import get_analytics_store
+    from src.agentic_api.artifacts import get_artifact_store
+    from src.agentic_api.columnar import NUMERIC_COLUMNS
+    from src.agentic_api.dataset_store import get_dataset_store
+    from src.agentic_api.media import MEDIA_PREPROCESSING_ENABLED, get_media_preprocessor, summarize
+    from src.agentic_api.posts import PostBatch, PostBatchBuilder
+    from src.agentic_api.ranking import TOP_K, TopKRanker, merge_rankings
+    from src.agentic_api.search_cache import get_search_cache
+    from src.agentic_api.seen_index import get_seen_index
+    from src.agentic_api.trend_aggregator import get_trend_aggregator
+    from src.agentic_api.tools.runtime import AsyncTool, BlockingTool, ToolTimeout, get_tool_runtime, tool_error
+except ModuleNotFoundError:
+    # Try relative import if absolute import fails
+    from analytics_store import get_analytics_store
+    from artifacts import get_artifact_store
+    from columnar import NUMERIC_COLUMNS
+    from dataset_store import get_dataset_store
+    from media import MEDIA_PREPROCESSING_ENABLED, get_media_preprocessor, summarize
+    from posts import PostBatch, PostBatchBuilder
+    from ranking import TOP_K, TopKRanker, merge_rankings
+    from search_cache import get_search_cache
+    from seen_index import get_seen_index
+    from trend_aggregator import get_trend_aggregator
+    from tools.runtime import AsyncTool, BlockingTool, ToolTimeout, get_tool_runtime, tool_error
 
-class WebSearchTool(BaseTool):
+# Columns written by DatasetToCSVTool, nested engagement stats are flattened
+CSV_COLUMNS = [
+    "id", "url", "platform", "hashtag", "account", "content_type", "timestamp",
+    "likes", "shares", "comments", "score", "trend_category", "image_url", "raw_content", "caption"
+]
+
+
+def _load_batch(dataset_ids: List[str]) -> PostBatch:
+    """Load and concatenate one or more datasets."""
+    store = get_dataset_store()
+    return PostBatch.concat([store.get(dataset_id) for dataset_id in dataset_ids])
+
+
+def _dataset_reference(dataset_id: str, batch: PostBatch, **extra: Any) -> str:
+    """Return a short dataset handle with summary statistics for the LLM."""
+    return json.dumps({"dataset_id": dataset_id, **batch.summary(), **extra}, indent=2)
+
+
+def _store_collected(batch: PostBatch, kind: str, run_id: Optional[str]) -> str:
+    """Store newly collected posts and return the dataset handle.
+    
+    Posts already scored by an earlier run with unchanged content keep
+    their stored score, and only posts never collected before are folded
+    into the rolling trend aggregates so re-scraped posts are not counted twice.
+    """
+    seen_index = get_seen_index()
+    unseen, scored = seen_index.partition(batch)
+    seen_index.record(batch)
+    get_trend_aggregator().fold(batch.select(unseen))
+    if scored:
+        batch = batch.with_fields(
+            score=[scored[i]["score"] if i in scored else None for i in range(len(batch))],
+            trend_category=[scored[i]["trend_category"] if i in scored else None for i in range(len(batch))],
+        )
+    
+    # Keep the rows out of the LLM context and hand back a short handle
+    dataset_id = get_dataset_store().put(batch, kind=kind, run_id=run_id)
+    return _dataset_reference(dataset_id, batch, previously_scored=len(scored))
+
+class WebSearchTool(AsyncTool):
     """A tool for searching the web using Serper API."""
     
     name: str = "web_search"
     description: str = "Search the web for information about specific hashtags or topics"
     
-    def _run(self, query: str, **kwargs: Any) -> str:
+    async def _execute(self, query: str, **kwargs: Any) -> str:
         """Run the web search tool.
         
         Args:
@@ -21,23 +87,31 @@ class WebSearchTool(BaseTool):
         Returns:
             A string with the search results
         """
+        # Repeated queries are answered from the shared search cache
+        try:
+            return await get_search_cache().get_or_fetch(self.name, query, lambda: self._search(query))
+        except Exception as e:
+            return tool_error(f"Web search failed: {e}")
+    
+    async def _search(self, query: str) -> str:
+        """Query the search backend."""
         # In a real implementation, this would use the Serper API
         # For now, we'll return mock data
         return f"Web search results for '{query}':\n\n" \
                f"1. Recent article about {query} from TechCrunch\n" \
                f"2. Twitter trending topics related to {query}\n" \
                f"3. Reddit discussions about {query}"
-    
-    async def _arun(self, query: str, **kwargs: Any) -> str:
-        """Run the web search tool asynchronously."""
-        return self._run(query, **kwargs)
 
 
-class SocialMediaScraperTool(BaseTool):
+class SocialMediaScraperTool(BlockingTool):
     """A tool for scraping social media content using OpenAI."""
     
     name: str = "social_media_scraper"
-    description: str = "Extract recent (last 48h) images/text/posts for specified hashtags from Instagram using OpenAI"
+    description: str = (
+        "Extract recent (last 48h) images/text/posts for specified hashtags from Instagram using OpenAI. "
+        "Returns a dataset_id with summary statistics; pass the dataset_id to other tools instead of the rows"
+    )
+    run_id: Optional[str] = None
     
     def _run(
         self, 
@@ -54,13 +128,13 @@ class SocialMediaScraperTool(BaseTool):
             min_items_per_hashtag: Minimum number of items to collect per hashtag
             
         Returns:
-            A JSON string with the scraped data
+            A JSON string with the dataset ID and summary statistics
         """
         # In a real implementation, this would use OpenAI to analyze Instagram content
         # For now, we'll return mock data
         
-        # Generate mock data
-        results = []
+        # Generate mock data straight into a columnar batch
+        results = PostBatchBuilder()
         for hashtag in hashtags:
             for i in range(min_items_per_hashtag):
                 platform = "Instagram"
@@ -92,35 +166,48 @@ class SocialMediaScraperTool(BaseTool):
                 
                 results.append(item)
         
-        return json.dumps(results, indent=2)
-    
-    async def _arun(
-        self, 
-        hashtags: List[str], 
-        filters: Dict[str, Any] = {"language": "English", "nsfw_blocked": True},
-        min_items_per_hashtag: int = 25,
-        **kwargs: Any
-    ) -> str:
-        """Run the social media scraper tool asynchronously."""
-        return self._run(hashtags, filters, min_items_per_hashtag, **kwargs)
+        return _store_collected(results.build(), kind="hashtag_posts", run_id=self.run_id)
 
 
-class GeminiVisionAnalyzerTool(BaseTool):
+class GeminiVisionAnalyzerTool(AsyncTool):
     """A tool for analyzing images using Google's Gemini Vision capabilities."""
     
     name: str = "gemini_vision_analyzer"
-    description: str = "Analyze images for sentiment, content, virality potential, and fashion elements using Google Gemini"
+    description: str = (
+        "Analyze images for sentiment, content, virality potential, and fashion elements using Google Gemini. "
+        "Pass a single image_url, or a dataset_id to analyze every image in a collected dataset"
+    )
+    run_id: Optional[str] = None
     
-    def _run(self, image_url: str, **kwargs: Any) -> str:
+    async def _execute(self, image_url: Optional[str] = None, dataset_id: Optional[str] = None, **kwargs: Any) -> str:
         """Run the Gemini vision analyzer tool.
         
         Args:
-            image_url: URL of the image to analyze
+            image_url: URL of the image (or video) to analyze
+            dataset_id: ID of a collected dataset whose images should be analyzed
             
         Returns:
-            A JSON string with the analysis results
+            A JSON string with the analysis results, or with the ID of the
+            enriched dataset when a dataset ID is given
         """
+        if dataset_id:
+            return await self._analyze_dataset(dataset_id)
+        if not image_url:
+            return json.dumps({"status": "error", "message": "Provide image_url or dataset_id"}, indent=2)
+        analysis = await self._analyze_image(image_url)
+        if "error" in analysis:
+            return json.dumps({"status": "error", "message": analysis["error"]}, indent=2)
+        return json.dumps(analysis, indent=2)
+    
+    async def _analyze_image(self, image_url: str, video: Optional[bool] = None) -> Dict[str, Any]:
+        """Analyze a single image, or the key frames of a video."""
+        # Gemini gets the downscaled image (or key frames) instead of the full-size upload
+        media = await get_media_preprocessor().prepare(image_url, video) if MEDIA_PREPROCESSING_ENABLED else None
+        if media is not None and media["status"] == "rejected":
+            return {"image_url": image_url, "error": media["reason"]}
+        
         # In a real implementation, this would use Google's Gemini Vision capabilities
+        # on media["paths"], or on image_url when media["status"] is "original"
         # For now, we'll return mock data
         
         # Generate mock analysis results
@@ -161,29 +248,117 @@ class GeminiVisionAnalyzerTool(BaseTool):
                 }
             }
         }
+        if media is not None:
+            analysis["media"] = summarize(media)
         
-        return json.dumps(analysis, indent=2)
+        return analysis
     
-    async def _arun(self, image_url: str, **kwargs: Any) -> str:
-        """Run the Gemini vision analyzer tool asynchronously."""
-        return self._run(image_url, **kwargs)
+    async def _analyze_dataset(self, dataset_id: str) -> str:
+        """Analyze every image of a dataset concurrently and store the enriched records."""
+        runtime = get_tool_runtime()
+        try:
+            batch = await runtime.offload(get_dataset_store().get, dataset_id)
+        except KeyError as e:
+            return json.dumps({"status": "error", "message": str(e)}, indent=2)
+        
+        # Posts analyzed by an earlier run with unchanged content keep that analysis
+        seen_index = get_seen_index()
+        cached = await runtime.offload(seen_index.stored_analyses, "vision", batch)
+        
+        # Images are independent, so up to TOOL_FANOUT_CONCURRENCY are downloaded and analyzed at a time,
+        # each within TOOL_ITEM_TIMEOUT_SECONDS
+        image_urls = batch.strings["image_url"]
+        content_types = batch.column("content_type")
+        items = [
+            (i, url, content_type == "video")
+            for i, (url, content_type) in enumerate(zip(image_urls, content_types))
+            if url and i not in cached
+        ]
+        results = await runtime.map(lambda item: self._analyze_image(item[1], item[2]), items)
+        analyses = {i: result for (i, _, _), result in zip(items, results)}
+        
+        fashion_elements = []
+        virality_scores = []
+        fresh = []
+        analyzed = 0
+        reused = 0
+        rejected = 0
+        timed_out = 0
+        virality_total = 0
+        source_bytes = 0
+        analyzed_bytes = 0
+        for i in range(len(batch)):
+            analysis = cached.get(i)
+            if analysis is not None:
+                reused += 1
+            else:
+                analysis = analyses.get(i)
+                if isinstance(analysis, ToolTimeout):
+                    timed_out += 1
+                    analysis = None
+                elif analysis is not None and "error" in analysis:
+                    rejected += 1
+                    analysis = None
+                if analysis is not None:
+                    analyzed += 1
+                    fresh.append((batch[i], {key: analysis[key] for key in ("fashion_elements", "virality_score")}))
+                    media = analysis.get("media", {})
+                    if media.get("source_bytes"):
+                        source_bytes += media["source_bytes"]
+                        analyzed_bytes += media["bytes"]
+            if analysis is not None:
+                fashion_elements.append(analysis["fashion_elements"])
+                virality_scores.append(analysis["virality_score"])
+                virality_total += analysis["virality_score"]
+            else:
+                fashion_elements.append(None)
+                virality_scores.append(None)
+        await runtime.offload(seen_index.save_analyses, "vision", fresh)
+        
+        enriched = batch.with_fields(fashion_elements=fashion_elements, virality_score=virality_scores)
+        enriched_id = await runtime.offload(get_dataset_store().put, enriched, kind="vision_enriched", run_id=self.run_id)
+        return json.dumps({
+            "status": "success",
+            "source_dataset_id": dataset_id,
+            "dataset_id": enriched_id,
+            "images_analyzed": analyzed,
+            "images_previously_analyzed": reused,
+            "images_rejected": rejected,
+            "images_timed_out": timed_out,
+            "average_virality_score": round(virality_total / (analyzed + reused), 2) if analyzed + reused else None,
+            "media_bytes": {"source": source_bytes, "analyzed": analyzed_bytes} if source_bytes else None,
+        }, indent=2)
 
 
-class GeminiTextAnalyzerTool(BaseTool):
+class GeminiTextAnalyzerTool(AsyncTool):
     """A tool for analyzing text using Google's Gemini capabilities."""
     
     name: str = "gemini_text_analyzer"
-    description: str = "Analyze text posts for sentiment, engagement potential, and key themes using Google Gemini"
+    description: str = (
+        "Analyze text posts for sentiment, engagement potential, and key themes using Google Gemini. "
+        "Pass a single text, or a dataset_id to analyze every post in a collected dataset"
+    )
+    run_id: Optional[str] = None
     
-    def _run(self, text: str, **kwargs: Any) -> str:
+    async def _execute(self, text: Optional[str] = None, dataset_id: Optional[str] = None, **kwargs: Any) -> str:
         """Run the Gemini text analyzer tool.
         
         Args:
             text: The text to analyze
+            dataset_id: ID of a collected dataset whose posts should be analyzed
             
         Returns:
-            A JSON string with the analysis results
+            A JSON string with the analysis results, or with the ID of the
+            enriched dataset when a dataset ID is given
         """
+        if dataset_id:
+            return await self._analyze_dataset(dataset_id)
+        if not text:
+            return json.dumps({"status": "error", "message": "Provide text or dataset_id"}, indent=2)
+        return json.dumps(await self._analyze_text(text), indent=2)
+    
+    async def _analyze_text(self, text: str) -> Dict[str, Any]:
+        """Analyze a single text."""
         # In a real implementation, this would use Google's Gemini text analysis capabilities
         # For now, we'll return mock data
         
@@ -205,22 +380,84 @@ class GeminiTextAnalyzerTool(BaseTool):
             "audience_appeal": ["tech enthusiasts", "professionals", "early adopters"]
         }
         
-        return json.dumps(analysis, indent=2)
+        return analysis
     
-    async def _arun(self, text: str, **kwargs: Any) -> str:
-        """Run the Gemini text analyzer tool asynchronously."""
-        return self._run(text, **kwargs)
+    async def _analyze_dataset(self, dataset_id: str) -> str:
+        """Analyze every post text of a dataset concurrently and store the enriched records."""
+        runtime = get_tool_runtime()
+        try:
+            batch = await runtime.offload(get_dataset_store().get, dataset_id)
+        except KeyError as e:
+            return json.dumps({"status": "error", "message": str(e)}, indent=2)
+        
+        # Posts analyzed by an earlier run with unchanged content keep that analysis
+        seen_index = get_seen_index()
+        cached = await runtime.offload(seen_index.stored_analyses, "text", batch)
+        
+        texts = [raw_content or caption for raw_content, caption in zip(batch.strings["raw_content"], batch.strings["caption"])]
+        items = [(i, text) for i, text in enumerate(texts) if text and i not in cached]
+        results = await runtime.map(lambda item: self._analyze_text(item[1]), items)
+        analyses = {i: result for (i, _), result in zip(items, results)}
+        
+        sentiments = []
+        themes = []
+        fresh = []
+        theme_counts: Dict[str, int] = {}
+        positive_total = 0.0
+        analyzed = 0
+        reused = 0
+        timed_out = 0
+        for i in range(len(batch)):
+            analysis = cached.get(i)
+            if analysis is not None:
+                reused += 1
+            else:
+                analysis = analyses.get(i)
+                if isinstance(analysis, ToolTimeout):
+                    timed_out += 1
+                    analysis = None
+                if analysis is not None:
+                    analyzed += 1
+                    fresh.append((batch[i], {key: analysis[key] for key in ("sentiment", "key_themes")}))
+            if analysis is not None:
+                sentiments.append(analysis["sentiment"])
+                themes.append(analysis["key_themes"])
+                positive_total += analysis["sentiment"]["positive"]
+                for theme in analysis["key_themes"]:
+                    theme_counts[theme] = theme_counts.get(theme, 0) + 1
+            else:
+                sentiments.append(None)
+                themes.append(None)
+        await runtime.offload(seen_index.save_analyses, "text", fresh)
+        
+        enriched = batch.with_fields(text_sentiment=sentiments, key_themes=themes)
+        enriched_id = await runtime.offload(get_dataset_store().put, enriched, kind="text_enriched", run_id=self.run_id)
+        return json.dumps({
+            "status": "success",
+            "source_dataset_id": dataset_id,
+            "dataset_id": enriched_id,
+            "posts_analyzed": analyzed,
+            "posts_previously_analyzed": reused,
+            "posts_timed_out": timed_out,
+            "average_positive_sentiment": round(positive_total / (analyzed + reused), 3) if analyzed + reused else None,
+            "top_themes": sorted(theme_counts, key=theme_counts.get, reverse=True)[:10],
+        }, indent=2)
 
 
-class ScoreCalculatorTool(BaseTool):
+class ScoreCalculatorTool(BlockingTool):
     """A tool for calculating composite impact scores for social media content."""
     
     name: str = "score_calculator"
-    description: str = "Calculate composite impact scores (0-100) for social media content including fashion elements"
+    description: str = (
+        "Calculate composite impact scores (0-100) for social media content including fashion elements. "
+        "Pass item_data for a single item, or a dataset_id to score every item in a collected dataset"
+    )
+    run_id: Optional[str] = None
     
     def _run(
         self, 
-        item_data: Dict[str, Any],
+        item_data: Optional[Dict[str, Any]] = None,
+        dataset_id: Optional[str] = None,
         weights: Dict[str, float] = {
             "virality": 0.3,
             "sentiment": 0.2,
@@ -237,11 +474,70 @@ class ScoreCalculatorTool(BaseTool):
         
         Args:
             item_data: Data about the social media item
+            dataset_id: ID of a collected dataset whose items should all be scored
             weights: Weights for different factors in the score calculation
             
         Returns:
-            A JSON string with the calculated scores
+            A JSON string with the calculated scores, or with the ID of the
+            scored dataset and a score summary when a dataset ID is given
         """
+        if dataset_id:
+            return self._score_dataset(dataset_id, weights)
+        if not item_data:
+            return json.dumps({"status": "error", "message": "Provide item_data or dataset_id"}, indent=2)
+        
+        item_id, scores = self._score_item(item_data, weights)
+        return json.dumps({item_id: scores}, indent=2)
+    
+    def _score_dataset(self, dataset_id: str, weights: Dict[str, float]) -> str:
+        """Score every item of a dataset and store the scored records."""
+        try:
+            batch = get_dataset_store().get(dataset_id)
+        except KeyError as e:
+            return json.dumps({"status": "error", "message": str(e)}, indent=2)
+        
+        # Reuse the scores of posts scored by earlier runs
+        seen_index = get_seen_index()
+        stored = seen_index.stored_scores(batch)
+        
+        # Rows are PostRow views, so scoring reads the columns without
+        # materializing a dict per item
+        scores = []
+        categories = []
+        computed = []
+        for i, row in enumerate(batch):
+            item_scores = stored.get(i)
+            if item_scores is None:
+                _, item_scores = self._score_item(row, weights)
+                computed.append((row, item_scores))
+            scores.append(item_scores["score"])
+            categories.append(item_scores["trend_category"])
+        seen_index.save_scores(computed)
+        
+        scored = batch.with_fields(score=scores, trend_category=categories)
+        scored_id = get_dataset_store().put(scored, kind="scored", run_id=self.run_id)
+        
+        # Make the scored posts queryable through GET /api/trends
+        get_analytics_store().record_scored(scored, run_id=self.run_id)
+        
+        score_column = scored.floats["score"]
+        ranking = TopKRanker(groups=()).add(scored)
+        return json.dumps({
+            "status": "success",
+            "source_dataset_id": dataset_id,
+            "dataset_id": scored_id,
+            "scored_items": len(scored),
+            "reused_scores": len(stored),
+            "average_score": round(float(score_column.mean()), 2) if len(scored) else None,
+            "trend_category_distribution": scored.categoricals["trend_category"].counts(),
+            "top_items": [
+                {"id": row["id"], "score": row["score"], "trend_category": row["trend_category"]}
+                for row in ranking.result()["top_items"]
+            ],
+        }, indent=2)
+    
+    def _score_item(self, item_data: Dict[str, Any], weights: Dict[str, float]):
+        """Calculate the scores of a single item and return (item_id, scores)."""
         # In a real implementation, this would calculate scores based on actual data
         # For now, we'll return mock data
         
@@ -361,33 +657,160 @@ class ScoreCalculatorTool(BaseTool):
                 }
         
         result = {
-            item_id: {
-                "score": final_score,
-                "trend_category": trend_category,
-                "key_insights": key_insights,
-                "fashion_element_scores": fashion_scores
-            }
+            "score": final_score,
+            "trend_category": trend_category,
+            "key_insights": key_insights,
+            "fashion_element_scores": fashion_scores
         }
         
-        return json.dumps(result, indent=2)
+        return item_id, result
+
+
+class TrendAggregatesTool(BlockingTool):
+    """A tool for reading the rolling trend aggregates."""
     
-    async def _arun(
-        self, 
-        item_data: Dict[str, Any],
-        weights: Dict[str, float] = {
-            "virality": 0.3,
-            "sentiment": 0.2,
-            "visual_impact": 0.15,
-            "author_influence": 0.05,
-            "colors": 0.1,
-            "patterns": 0.05,
-            "fabrics": 0.05,
-            "silhouette": 0.1
-        },
+    name: str = "trend_aggregates"
+    description: str = (
+        "Get rolling-window trend aggregates maintained across runs: post counts, engagement sums/means, "
+        "post velocity and growth rate per hashtag or per content type (dimension: 'hashtag' or 'content_type')"
+    )
+    
+    def _run(self, dimension: str = "hashtag", keys: Optional[List[str]] = None, **kwargs: Any) -> str:
+        """Run the trend aggregates tool.
+        
+        Args:
+            dimension: Either 'hashtag' or 'content_type'
+            keys: Hashtags or content types to return (all when omitted)
+            
+        Returns:
+            A JSON string with the aggregates per key
+        """
+        aggregator = get_trend_aggregator()
+        try:
+            aggregates = aggregator.snapshot(dimension, keys)
+        except ValueError as e:
+            return json.dumps({"status": "error", "message": str(e)}, indent=2)
+        
+        return json.dumps({
+            "dimension": dimension,
+            "window_hours": aggregator.window_seconds // 3600,
+            "aggregates": aggregates
+        }, indent=2)
+
+
+class TopItemsTool(BlockingTool):
+    """A tool for ranking scored posts without passing them through the LLM."""
+    
+    name: str = "top_items"
+    description: str = (
+        "Get the top-K scored posts globally and per hashtag and trend category, ranked by score with ties "
+        "broken by engagement. Pass the scored dataset IDs returned by score_calculator as dataset_ids; "
+        "rankings of several datasets are merged. Returns only the top-K rows"
+    )
+    
+    def _run(
+        self,
+        dataset_ids: Optional[List[str]] = None,
+        dataset_id: Optional[str] = None,
+        k: int = TOP_K,
         **kwargs: Any
     ) -> str:
-        """Run the score calculator tool asynchronously."""
-        return self._run(item_data, weights, **kwargs)
+        """Run the top items tool.
+        
+        Args:
+            dataset_ids: IDs of scored datasets to rank
+            dataset_id: ID of a single scored dataset (alternative to dataset_ids)
+            k: Number of items to return globally and per group
+            
+        Returns:
+            A JSON string with the top rows globally, per hashtag and per trend category
+        """
+        dataset_ids = list(dataset_ids or []) + ([dataset_id] if dataset_id else [])
+        if not dataset_ids:
+            return json.dumps({"status": "error", "message": "Provide dataset_ids"}, indent=2)
+        
+        # Each dataset is ranked on its own and the partial rankings are merged
+        rankings = []
+        store = get_dataset_store()
+        for scored_id in dataset_ids:
+            try:
+                batch = store.get(scored_id)
+            except KeyError as e:
+                return json.dumps({"status": "error", "message": str(e)}, indent=2)
+            rankings.append(TopKRanker(k).add(batch))
+        
+        return json.dumps({
+            "status": "success",
+            "dataset_ids": dataset_ids,
+            **merge_rankings(rankings).result(),
+        }, indent=2)
+
+
+class DatasetQueryTool(BlockingTool):
+    """A tool for aggregate queries over memory-mapped dataset columns."""
+    
+    name: str = "dataset_query"
+    description: str = (
+        "Run an aggregate query over collected datasets without loading the posts. "
+        "query is one of: group_by (posts, engagement sums/means and mean score per value of `by`), "
+        "percentiles (percentiles of numeric `column`, optionally per value of `by`), "
+        "hourly (posts and mean engagement per UTC hour), mix (share of posts per value of `by`). "
+        "`by` is a field such as hashtag, content_type, platform, account or trend_category. "
+        f"`column` is one of {', '.join(NUMERIC_COLUMNS)}. "
+        "filters maps fields to values, min_<column>/max_<column> to bounds and since/until to ISO dates. "
+        "Results are returned per dataset ID"
+    )
+    
+    def _run(
+        self,
+        query: str = "group_by",
+        dataset_ids: Optional[List[str]] = None,
+        dataset_id: Optional[str] = None,
+        by: Optional[str] = None,
+        column: str = "engagement",
+        percentiles: Optional[List[float]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> str:
+        """Run the dataset query tool.
+        
+        Args:
+            query: group_by, percentiles, hourly or mix
+            dataset_ids: IDs of datasets to query
+            dataset_id: ID of a single dataset (alternative to dataset_ids)
+            by: Field to group on
+            column: Numeric column for percentiles
+            percentiles: Percentiles to compute (default 50, 90, 99)
+            filters: Row filters applied before aggregating
+            
+        Returns:
+            A JSON string with the aggregates of each dataset
+        """
+        dataset_ids = list(dataset_ids or []) + ([dataset_id] if dataset_id else [])
+        if not dataset_ids:
+            return json.dumps({"status": "error", "message": "Provide dataset_ids"}, indent=2)
+        if query in ("group_by", "mix") and not by:
+            return json.dumps({"status": "error", "message": f"Query {query} requires `by`"}, indent=2)
+        
+        results = {}
+        store = get_dataset_store()
+        for queried_id in dataset_ids:
+            try:
+                dataset = store.columnar(queried_id)
+                if query == "group_by":
+                    results[queried_id] = dataset.group_by(by, filters)
+                elif query == "percentiles":
+                    results[queried_id] = dataset.percentiles(column, tuple(percentiles or (50, 90, 99)), by, filters)
+                elif query == "hourly":
+                    results[queried_id] = dataset.hourly(filters)
+                elif query == "mix":
+                    results[queried_id] = dataset.mix(by, filters)
+                else:
+                    return json.dumps({"status": "error", "message": f"Unknown query {query!r}"}, indent=2)
+            except (KeyError, ValueError) as e:
+                return json.dumps({"status": "error", "message": str(e).strip("'\"")}, indent=2)
+        
+        return json.dumps({"status": "success", "query": query, "results": results}, indent=2)
 
 
 # ZOZOScraperTool has been removed as per requirements
@@ -395,11 +818,15 @@ class ScoreCalculatorTool(BaseTool):
 
 # Add a new tool for crawling Kento Yamazaki's Instagram account
 
-class InstagramAccountCrawlerTool(BaseTool):
+class InstagramAccountCrawlerTool(BlockingTool):
     """A tool for crawling a specific Instagram account."""
     
     name: str = "instagram_account_crawler"
-    description: str = "Extract images from a specific Instagram account with a maximum limit"
+    description: str = (
+        "Extract images from a specific Instagram account with a maximum limit. "
+        "Returns a dataset_id with summary statistics; pass the dataset_id to other tools instead of the rows"
+    )
+    run_id: Optional[str] = None
     
     def _run(
         self, 
@@ -414,7 +841,7 @@ class InstagramAccountCrawlerTool(BaseTool):
             max_images: Maximum number of images to collect
             
         Returns:
-            A JSON string with the scraped data
+            A JSON string with the dataset ID and summary statistics
         """
         # In a real implementation, this would use web scraping to extract images from the Instagram account
         # For now, we'll return mock data
@@ -422,8 +849,8 @@ class InstagramAccountCrawlerTool(BaseTool):
         # Extract username from URL
         username = account_url.strip('/').split('/')[-1]
         
-        # Generate mock data
-        results = []
+        # Generate mock data straight into a columnar batch
+        results = PostBatchBuilder()
         for i in range(max_images):
             # Create a timestamp within the last week
             days_ago = i % 7
@@ -452,84 +879,104 @@ class InstagramAccountCrawlerTool(BaseTool):
             
             results.append(image)
         
-        return json.dumps(results, indent=2)
-    
-    async def _arun(
-        self, 
-        account_url: str = "https://www.instagram.com/kentooyamazaki/",
-        max_images: int = 5,
-        **kwargs: Any
-    ) -> str:
-        """Run the Instagram account crawler tool asynchronously."""
-        return self._run(account_url, max_images, **kwargs)
+        return _store_collected(results.build(), kind="account_posts", run_id=self.run_id)
 
 
 # Add a new tool for CSV conversion
 
-class DatasetToCSVTool(BaseTool):
+class DatasetToCSVTool(BlockingTool):
     """A tool for converting dataset to CSV format."""
     
     name: str = "dataset_to_csv"
-    description: str = "Convert collected data from JSON to CSV format for easier analysis and sharing"
+    description: str = (
+        "Convert collected data to CSV format for easier analysis and sharing. "
+        "Pass the dataset_ids returned by the collection tools (preferred) or a JSON string as data"
+    )
+    run_id: Optional[str] = None
     
     def _run(
         self, 
-        data: str,
+        data: Optional[str] = None,
         output_path: str = "social_media_data.csv",
+        dataset_ids: Optional[List[str]] = None,
         **kwargs: Any
     ) -> str:
         """Run the dataset to CSV conversion tool.
         
         Args:
-            data: JSON string containing the dataset to convert
+            data: JSON string containing the dataset to convert (or a single dataset ID)
             output_path: Path where the CSV file should be saved
+            dataset_ids: IDs of stored datasets to convert
             
         Returns:
             A string with the path to the saved CSV file and summary statistics
         """
-        # In a real implementation, this would convert JSON data to CSV and save it
-        # For now, we'll return mock data
+        dataset_ids = list(dataset_ids or [])
+        if data and data.strip().startswith("ds_"):
+            dataset_ids.append(data.strip())
+            data = None
         
         try:
-            # Parse the JSON data
-            json_data = json.loads(data)
-            
-            # Count the number of items by platform/source
-            platform_counts = {}
-            for item in json_data:
-                platform = item.get('platform', 'unknown')
-                if platform in platform_counts:
-                    platform_counts[platform] += 1
-                else:
-                    platform_counts[platform] = 1
-            
-            # Generate mock CSV conversion result
-            result = {
-                "status": "success",
-                "output_path": output_path,
-                "total_items": len(json_data),
-                "platform_distribution": platform_counts,
-                "columns": [
-                    "id", "url", "platform", "content_type", "timestamp", 
-                    "likes", "shares", "comments", "score", "trend_category"
-                ],
-                "sample_rows": 5,
-                "file_size_kb": round(len(data) * 0.2 / 1024, 2)  # Rough estimate of CSV file size
-            }
-            
-            return json.dumps(result, indent=2)
+            if dataset_ids:
+                batch = _load_batch(dataset_ids)
+            elif data:
+                # Parse the JSON data
+                batch = PostBatch.from_records(json.loads(data))
+            else:
+                return json.dumps({
+                    "status": "error",
+                    "message": "Provide dataset_ids or data",
+                    "output_path": None
+                }, indent=2)
+        except KeyError as e:
+            return json.dumps({
+                "status": "error",
+                "message": str(e),
+                "output_path": None
+            }, indent=2)
         except json.JSONDecodeError:
             return json.dumps({
                 "status": "error",
                 "message": "Invalid JSON data provided",
                 "output_path": None
             }, indent=2)
+        
+        if self.run_id and not os.path.isabs(output_path):
+            # Each run writes to its own workspace so concurrent runs never share a file
+            output_path = os.path.join(get_artifact_store().workspace(self.run_id), os.path.basename(output_path))
+        self._write_csv(batch, output_path)
+        summary = batch.summary()
+        
+        result = {
+            "status": "success",
+            "output_path": output_path,
+            "dataset_ids": dataset_ids,
+            "total_items": summary["total_items"],
+            "platform_distribution": summary["platform_distribution"],
+            "columns": CSV_COLUMNS,
+            "file_size_kb": round(os.path.getsize(output_path) / 1024, 2)
+        }
+        
+        return json.dumps(result, indent=2)
     
-    async def _arun(
-        self, 
-        data: str,
-        output_path: str = "social_media_data.csv",
-        **kwargs: Any
-    ) -> str:
-        """Run the dataset to CSV conversion tool asynchronously."""
-        return self._run(data, output_path, **kwargs)
\ No newline at end of file
+    def _write_csv(self, batch: PostBatch, output_path: str) -> None:
+        """Write a batch to a CSV file, flattening the engagement stats."""
+        directory = os.path.dirname(output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        # Decode each column once and write the rows by zipping the columns.
+        # The file is replaced atomically: readers never see a partial CSV and
+        # a stored artifact linked at this path is never rewritten in place.
+        columns = [batch.column(name) for name in CSV_COLUMNS]
+        fd, tmp_path = tempfile.mkstemp(dir=directory or ".", prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(CSV_COLUMNS)
+                writer.writerows(zip(*columns))
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
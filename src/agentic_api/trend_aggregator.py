@@ -0,0 +1,177 @@
+# src/agentic_api/trend_aggregator.py
+
+import os
+import time
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Fix import path
+try:
+    from src.agentic_api.posts import PostBatch, ENGAGEMENT_FIELDS, MISSING_COUNT
+except ModuleNotFoundError:
+    # Try relative import if absolute import fails
+    from posts import PostBatch, ENGAGEMENT_FIELDS, MISSING_COUNT
+
+# Length of the sliding window and the size of the buckets it is made of
+TREND_WINDOW_HOURS = int(os.getenv("TREND_WINDOW_HOURS", "48"))
+TREND_BUCKET_MINUTES = int(os.getenv("TREND_BUCKET_MINUTES", "60"))
+
+# SQLite database where the aggregates are persisted between runs and shared by workers
+TREND_STATE_PATH = os.getenv("TREND_STATE_PATH", ".trends/aggregates.sqlite3")
+
+# Dimensions the aggregates are kept for
+DIMENSIONS = ("hashtag", "content_type")
+
+
+def window_snapshot(totals: List[int], recent: int, window_seconds: float) -> Dict[str, Any]:
+    """Aggregates of one key from its window totals (posts, likes, shares, comments) and its posts in the newer half."""
+    posts, likes, shares, comments = totals
+    window_hours = window_seconds / 3600
+    previous = posts - recent
+    return {
+        "posts": posts,
+        "engagement_sums": {"likes": likes, "shares": shares, "comments": comments},
+        "engagement_means": {
+            "likes": round(likes / posts, 2),
+            "shares": round(shares / posts, 2),
+            "comments": round(comments / posts, 2),
+        } if posts else {},
+        "velocity_per_hour": round(posts / window_hours, 3),
+        "recent_velocity_per_hour": round(recent / (window_hours / 2), 3),
+        "growth_rate": round((recent - previous) / previous, 3) if previous else None,
+    }
+
+
+class TrendAggregator:
+    """Incremental per-hashtag and per-content-type trend aggregates.
+
+    New posts are folded in as they are collected instead of recomputing
+    trends from the raw data of every run. Each (key, time bucket) pair is
+    one row in SQLite, so folding a batch upserts only the buckets it
+    touches and evicting expired buckets deletes only those; successive
+    runs and all workers share the same windows.
+    """
+
+    def __init__(
+        self,
+        state_path: str = TREND_STATE_PATH,
+        window_hours: int = TREND_WINDOW_HOURS,
+        bucket_minutes: int = TREND_BUCKET_MINUTES,
+    ):
+        self.state_path = state_path
+        self.window_seconds = window_hours * 3600
+        self.bucket_seconds = bucket_minutes * 60
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(state_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS trend_buckets ("
+            "dimension TEXT NOT NULL, key TEXT NOT NULL, bucket_start REAL NOT NULL, "
+            "posts INTEGER NOT NULL, likes INTEGER NOT NULL, shares INTEGER NOT NULL, comments INTEGER NOT NULL, "
+            "PRIMARY KEY (dimension, key, bucket_start)"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_trend_buckets_start ON trend_buckets (bucket_start)")
+        self._conn.commit()
+
+    def fold(self, batch: PostBatch, now: Optional[float] = None) -> int:
+        """Fold a batch of posts into the aggregates and persist them.
+
+        Returns the number of posts that fell inside the window.
+        """
+        now = time.time() if now is None else now
+        cutoff = now - self.window_seconds
+
+        timestamps = batch.floats["timestamp"]
+        in_window = ~np.isnan(timestamps) & (timestamps >= cutoff)
+        if not in_window.any():
+            return 0
+
+        buckets = (timestamps[in_window] // self.bucket_seconds) * self.bucket_seconds
+        engagement = np.stack([batch.counts[name][in_window] for name in ENGAGEMENT_FIELDS], axis=1)
+        engagement = np.where(engagement == MISSING_COUNT, 0, engagement)
+
+        rows = []
+        for dimension in DIMENSIONS:
+            column = batch.categoricals[dimension]
+            codes = column.codes[in_window]
+            present = codes >= 0
+            # Collapse the posts to one update per (key, bucket) pair
+            pairs, inverse = np.unique(
+                np.stack([codes[present], buckets[present]], axis=1), axis=0, return_inverse=True
+            )
+            inverse = inverse.reshape(-1)
+            posts = np.bincount(inverse, minlength=len(pairs))
+            sums = np.zeros((len(pairs), len(ENGAGEMENT_FIELDS)), dtype=np.int64)
+            np.add.at(sums, inverse, engagement[present])
+            for (code, bucket_start), count, sum_row in zip(pairs.tolist(), posts.tolist(), sums.tolist()):
+                rows.append((dimension, column.categories[int(code)], bucket_start, count, *sum_row))
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO trend_buckets (dimension, key, bucket_start, posts, likes, shares, comments) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(dimension, key, bucket_start) DO UPDATE SET "
+                    "posts = posts + excluded.posts, likes = likes + excluded.likes, "
+                    "shares = shares + excluded.shares, comments = comments + excluded.comments",
+                    rows,
+                )
+                # The oldest bucket still overlaps the window, only buckets ending before it are evicted
+                self._conn.execute("DELETE FROM trend_buckets WHERE bucket_start + ? <= ?", (self.bucket_seconds, cutoff))
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+
+        return int(in_window.sum())
+
+    def snapshot(
+        self,
+        dimension: str = "hashtag",
+        keys: Optional[List[str]] = None,
+        now: Optional[float] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Return the maintained aggregates of one dimension."""
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension {dimension!r}, expected one of {DIMENSIONS}")
+        now = time.time() if now is None else now
+        cutoff = now - self.window_seconds
+        # Compare the newer half of the window with the older half
+        midpoint = now - self.window_seconds / 2
+
+        query = (
+            "SELECT key, SUM(posts), SUM(likes), SUM(shares), SUM(comments), "
+            "SUM(CASE WHEN bucket_start >= ? THEN posts ELSE 0 END) "
+            "FROM trend_buckets WHERE dimension = ? AND bucket_start > ?"
+        )
+        params: List[Any] = [midpoint, dimension, cutoff - self.bucket_seconds]
+        if keys is not None:
+            if not keys:
+                return {}
+            query += f" AND key IN ({','.join('?' * len(keys))})"
+            params.extend(keys)
+        query += " GROUP BY key HAVING SUM(posts) > 0 ORDER BY key"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return {
+            key: window_snapshot([posts, likes, shares, comments], recent, self.window_seconds)
+            for key, posts, likes, shares, comments, recent in rows
+        }
+
+
+_trend_aggregator: Optional[TrendAggregator] = None
+
+
+def get_trend_aggregator() -> TrendAggregator:
+    """Return the shared trend aggregator."""
+    global _trend_aggregator
+    if _trend_aggregator is None:
+        _trend_aggregator = TrendAggregator()
+    return _trend_aggregator
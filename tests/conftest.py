@@ -0,0 +1,33 @@
+# tests/conftest.py
+
+import os
+import tempfile
+
+# Stores default to paths relative to the working directory and are read at
+# import time, so point them at a scratch directory before any module loads
+_STATE_DIR = tempfile.mkdtemp(prefix="agentic-api-tests-")
+
+for name, path in {
+    "JOB_DB_PATH": "jobs.sqlite3",
+    "IDEMPOTENCY_DB_PATH": "idempotency.sqlite3",
+    "BUDGET_DB_PATH": "budgets.sqlite3",
+    "CHECKPOINT_DIR": "checkpoints",
+    "DATASET_DIR": "datasets",
+    "SEEN_INDEX_DIR": "seen",
+    "ANALYTICS_DB_PATH": "analytics.sqlite3",
+    "TREND_STATE_PATH": "trends.sqlite3",
+    "ARTIFACT_DIR": "artifacts",
+    "SEARCH_CACHE_DB_PATH": "search_cache.sqlite3",
+    "STATS_DIR": "stats",
+    "PROFILE_DIR": "profiles",
+    "MEDIA_CACHE_DIR": "media",
+}.items():
+    os.environ.setdefault(name, os.path.join(_STATE_DIR, path))
+
+# Keep the seen-post Bloom filter small instead of the 60 MB production default
+os.environ.setdefault("SEEN_BLOOM_CAPACITY", "10000")
+
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ.setdefault("WARMUP_CREWS", "false")
+os.environ.setdefault("OPENAI_API_KEY", "test")
@@ -0,0 +1,86 @@
+# tests/test_analytics_store.py
+
+import pytest
+
+from src.agentic_api.analytics_store import AnalyticsStore
+from src.agentic_api.posts import PostBatch
+
+
+def scored(*posts):
+    """Scored batch from (id, hashtag, score, likes) tuples."""
+    return PostBatch.from_records([
+        {
+            "id": post_id,
+            "platform": "Instagram",
+            "hashtag": hashtag,
+            "account": None if hashtag else "@brand",
+            "timestamp": f"2027-01-15T{10 + i:02d}:00:00",
+            "engagement_stats": {"likes": likes},
+            "score": score,
+            "trend_category": "rising",
+        }
+        for i, (post_id, hashtag, score, likes) in enumerate(posts)
+    ])
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AnalyticsStore(str(tmp_path / "analytics.sqlite3"))
+
+
+def aggregates(store, run_id):
+    return {item["group"]: item for item in store.run_aggregates(run_id)["items"]}
+
+
+def test_top_posts_and_hashtag_stats(store):
+    store.record_scored(scored(("a", "#style", 80.0, 10), ("b", "#style", 60.0, 5), ("c", "#denim", 90.0, 1), ("d", None, None, 2)), "run-1")
+
+    top = store.top_posts()
+    assert [item["id"] for item in top["items"]] == ["c", "a", "b"]
+    assert top["items"][0]["run_id"] == "run-1" and top["items"][0]["timestamp"].startswith("2027-01-15T12")
+    assert [item["id"] for item in store.top_posts(hashtags=["#style"], min_score=70)["items"]] == ["a"]
+
+    page = store.top_posts(limit=2)
+    assert page["next_offset"] == 2
+    assert [item["id"] for item in store.top_posts(limit=2, offset=2)["items"]] == ["b"]
+
+    stats = {item["hashtag"]: item for item in store.hashtag_stats()["items"]}
+    assert stats["#style"]["posts"] == 2 and stats["#style"]["avg_score"] == 70.0 and stats["#style"]["likes"] == 15
+    assert stats["#denim"]["max_score"] == 90.0
+
+
+def test_run_aggregates(store):
+    store.record_scored(scored(("a", "#style", 80.0, 10), ("b", "#style", 60.0, 5), ("d", None, 40.0, 2)), "run-1")
+    groups = aggregates(store, "run-1")
+    assert set(groups) == {"#style", "@brand"}
+    assert groups["#style"]["posts"] == 2 and groups["#style"]["avg_score"] == 70.0 and groups["#style"]["likes"] == 15
+
+    # Scoring more datasets in the same run adds to its aggregates
+    store.record_scored(scored(("e", "#style", 100.0, 0)), "run-1")
+    assert aggregates(store, "run-1")["#style"]["posts"] == 3
+
+
+def test_rescoring_a_post_keeps_the_earlier_runs_aggregates(store):
+    store.record_scored(scored(("a", "#style", 80.0, 10), ("b", "#style", 60.0, 5)), "run-1")
+    store.record_scored(scored(("a", "#style", 20.0, 50)), "run-2")
+    # run-1 scores another dataset afterwards, which recomputes its aggregates
+    store.record_scored(scored(("c", "#denim", 50.0, 1)), "run-1")
+
+    first = aggregates(store, "run-1")["#style"]
+    assert first["posts"] == 2 and first["avg_score"] == 70.0 and first["likes"] == 15
+    second = aggregates(store, "run-2")["#style"]
+    assert second["posts"] == 1 and second["avg_score"] == 20.0
+
+    # The post itself is stored once, with its latest score
+    items = store.top_posts()["items"]
+    assert [(item["id"], item["score"], item["run_id"]) for item in items] == [
+        ("b", 60.0, "run-1"), ("c", 50.0, "run-1"), ("a", 20.0, "run-2"),
+    ]
+    assert len(store.run_aggregates()["items"]) == 3
+
+
+def test_batches_without_a_run_only_update_posts(store):
+    store.record_scored(scored(("a", "#style", 80.0, 10)))
+    store.record_scored(PostBatch.from_records([]), "run-1")
+    assert store.run_aggregates()["items"] == []
+    assert [item["id"] for item in store.top_posts()["items"]] == ["a"]
@@ -0,0 +1,101 @@
+# tests/test_artifacts.py
+
+import os
+import time
+
+import pytest
+
+from src.agentic_api import artifacts
+from src.agentic_api.artifacts import ArtifactStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(root=str(tmp_path / "artifacts"))
+
+
+def age(store, run_id, seconds):
+    """Backdate a run's workspace and the blobs it references."""
+    past = time.time() - seconds
+    os.utime(os.path.join(store.runs_dir, run_id), (past, past))
+    for entry in store.manifest(run_id)["artifacts"].values():
+        os.utime(store._blob_path(entry["digest"]), (past, past))
+
+
+def test_put_and_get(store):
+    entry = store.put_bytes("run-1", "report.json", b'{"ok": true}', owner="alice")
+    assert entry["name"] == "report.json" and entry["size"] == 12
+    assert entry["media_type"] == "application/json"
+
+    manifest = store.manifest("run-1")
+    assert manifest["owner"] == "alice" and set(manifest["artifacts"]) == {"report.json"}
+    path, stored = store.get("run-1", "report.json")
+    with open(path, "rb") as f:
+        assert f.read() == b'{"ok": true}'
+    assert stored["digest"] == entry["digest"]
+    assert store.get("run-1", "missing.txt") is None
+    assert store.manifest("run-2") == {"run_id": "run-2", "owner": None, "artifacts": {}}
+
+
+def test_invalid_names_are_rejected(store):
+    for run_id, name in [("run-1", "../escape"), ("run-1", "_manifest.json"), ("../run", "a.txt")]:
+        with pytest.raises(ValueError):
+            store.put_bytes(run_id, name, b"x")
+
+
+def test_identical_outputs_share_a_blob(store):
+    first = store.put_bytes("run-1", "a.txt", b"same")
+    second = store.put_bytes("run-2", "b.txt", b"same")
+    assert first["digest"] == second["digest"]
+    blob = os.stat(store._blob_path(first["digest"]))
+    assert os.stat(os.path.join(store.workspace("run-2"), "b.txt")).st_ino == blob.st_ino
+    assert blob.st_nlink == 3
+
+    # Replacing an artifact links the new content without touching the shared blob
+    store.put_bytes("run-1", "a.txt", b"changed")
+    assert store.get("run-2", "b.txt")[1]["digest"] == first["digest"]
+    assert store.get("run-1", "a.txt")[1]["digest"] != first["digest"]
+
+
+def test_collect_stores_files_written_by_tools(store):
+    workspace = store.workspace("run-1")
+    with open(os.path.join(workspace, "chart.png"), "wb") as f:
+        f.write(b"png")
+    stored = store.collect("run-1", owner="alice")
+    assert [entry["name"] for entry in stored] == ["chart.png"]
+    # Already stored files are skipped on the next collection
+    assert store.collect("run-1") == []
+    assert store.manifest("run-1")["owner"] == "alice"
+
+
+def test_gc_deletes_expired_runs_and_their_blobs(store, monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACT_MAX_AGE_HOURS", 1)
+    old = store.put_bytes("old", "a.txt", b"old only")
+    shared = store.put_bytes("old", "b.txt", b"shared")
+    store.put_bytes("new", "b.txt", b"shared")
+    age(store, "old", 2 * 3600)
+
+    assert store.gc(force=True) == {"runs_deleted": 1, "blobs_deleted": 1}
+    assert not os.path.exists(os.path.join(store.runs_dir, "old"))
+    assert not os.path.exists(store._blob_path(old["digest"]))
+    # The blob is still referenced by the kept run
+    assert os.path.exists(store._blob_path(shared["digest"]))
+    assert store.get("new", "b.txt") is not None
+
+
+def test_gc_deletes_oldest_runs_over_the_size_limit(store, monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACT_MAX_BYTES", 250)
+    for i, run_id in enumerate(["first", "second", "third"]):
+        store.put_bytes(run_id, "data.bin", bytes([i]) * 100)
+        age(store, run_id, 2 * artifacts.BLOB_GRACE_SECONDS - i)
+
+    assert store.gc(force=True) == {"runs_deleted": 1, "blobs_deleted": 1}
+    assert sorted(os.listdir(store.runs_dir)) == ["second", "third"]
+
+
+def test_gc_runs_at_most_once_per_interval(store, monkeypatch):
+    monkeypatch.setattr(artifacts, "ARTIFACT_MAX_AGE_HOURS", 0)
+    store.put_bytes("run-1", "a.txt", b"x")
+    store._last_gc = time.time()
+    assert store.gc() == {"runs_deleted": 0, "blobs_deleted": 0}
+    assert os.path.isdir(os.path.join(store.runs_dir, "run-1"))
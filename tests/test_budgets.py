@@ -0,0 +1,108 @@
+# tests/test_budgets.py
+
+import time
+import threading
+
+import pytest
+
+from src.agentic_api import budgets
+from src.agentic_api.budgets import BudgetExceeded, TokenBudgets, estimate_social_media_tokens, tenant_of
+
+
+@pytest.fixture
+def token_budgets(tmp_path, monkeypatch):
+    monkeypatch.setattr(budgets, "BUDGET_USER_TOKENS", 1000)
+    monkeypatch.setattr(budgets, "BUDGET_TENANT_TOKENS", 1500)
+    store = TokenBudgets(str(tmp_path / "usage.sqlite3"), window=3600, buckets=4, flush_interval=3600)
+    yield store
+    store.close()
+
+
+def test_tenant_of(monkeypatch):
+    monkeypatch.setattr(budgets, "BUDGET_TENANTS", "alice=acme")
+    assert tenant_of("alice", "alice@example.com") == "acme"
+    assert tenant_of("bob", "Bob@Example.COM") == "example.com"
+    # Users without an email don't share one tenant
+    assert tenant_of("carol") == "user/carol"
+    assert tenant_of("dave") != tenant_of("carol")
+
+
+def test_estimate_grows_with_the_collected_content():
+    small = estimate_social_media_tokens(1, 1, 10)
+    assert estimate_social_media_tokens(2, 2, 10) > small
+    assert estimate_social_media_tokens(1, 1, 10, instagram_max_images=5) > small
+
+
+def test_reserve_settle_and_release(token_budgets):
+    reservation = token_budgets.reserve("alice", "acme", 600)
+    assert token_budgets.status("alice", "acme").used == 600
+    with pytest.raises(BudgetExceeded) as excinfo:
+        token_budgets.reserve("alice", "acme", 600)
+    assert excinfo.value.status.scope == "user"
+    assert excinfo.value.headers()["Retry-After"]
+
+    token_budgets.settle(reservation, 250)
+    status = token_budgets.status("alice", "acme")
+    assert status.used == 250 and status.remaining == 750
+
+    second = token_budgets.reserve("alice", "acme", 600)
+    token_budgets.release(second)
+    assert token_budgets.status("alice", "acme").used == 250
+
+
+def test_the_tighter_of_user_and_tenant_budget_applies(token_budgets):
+    token_budgets.reserve("alice", "acme", 900)
+    status = token_budgets.status("bob", "acme")
+    assert status.scope == "tenant" and status.remaining == 600
+    with pytest.raises(BudgetExceeded) as excinfo:
+        token_budgets.check("bob", "acme", 700)
+    assert excinfo.value.status.scope == "tenant"
+
+
+def test_concurrent_reservations_cannot_overdraw(token_budgets):
+    accepted = []
+    start = threading.Barrier(20)
+
+    def reserve():
+        start.wait()
+        try:
+            token_budgets.reserve("alice", "acme", 100)
+            accepted.append(1)
+        except BudgetExceeded:
+            pass
+
+    threads = [threading.Thread(target=reserve) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(accepted) == 10
+    assert token_budgets.status("alice", "acme").used == 1000
+
+
+def test_usage_is_shared_through_the_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(budgets, "BUDGET_USER_TOKENS", 1000)
+    path = str(tmp_path / "usage.sqlite3")
+    worker_a = TokenBudgets(path, window=3600, buckets=4, flush_interval=3600)
+    worker_b = TokenBudgets(path, window=3600, buckets=4, flush_interval=3600)
+    try:
+        worker_a.reserve("alice", "acme", 400)
+        assert worker_b.status("alice", "acme").used == 0
+        worker_a.flush()
+        worker_b.flush()
+        assert worker_b.status("alice", "acme").used == 400
+        # Flushing again doesn't count the same tokens twice
+        worker_a.flush()
+        worker_b.flush()
+        assert worker_a.status("alice", "acme").used == 400
+        assert worker_b.status("alice", "acme").used == 400
+    finally:
+        worker_a.close()
+        worker_b.close()
+
+
+def test_usage_expires_with_the_window(token_budgets):
+    token_budgets.reserve("alice", "acme", 800)
+    later = token_budgets.status("alice", "acme").reset_seconds
+    assert 0 < later <= 3600
+    assert token_budgets.status("alice", "acme", now=time.time() + 3600 + token_budgets.bucket_seconds).used == 0
@@ -0,0 +1,122 @@
+# tests/test_cancellation.py
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from src.agentic_api import api, cancellation
+from src.agentic_api.cancellation import (
+    CLIENT_DISCONNECTED, DEADLINE_EXCEEDED, CancelToken, CrewCancelled, resolve_timeout,
+)
+from src.agentic_api.executor import CrewExecutor
+from src.agentic_api.scheduler import FairShareScheduler
+
+
+def test_cancel_token_reasons():
+    token = CancelToken()
+    assert not token.cancelled and token.remaining() is None
+    token.cancel(CLIENT_DISCONNECTED)
+    token.cancel(DEADLINE_EXCEEDED)
+    # The first reason wins
+    with pytest.raises(CrewCancelled) as cancelled:
+        token.check()
+    assert cancelled.value.reason == CLIENT_DISCONNECTED and isinstance(cancelled.value, TimeoutError)
+
+    expired = CancelToken(timeout=0)
+    assert expired.cancelled and expired.reason == DEADLINE_EXCEEDED and expired.remaining() == 0
+
+
+def test_poll_is_throttled(monkeypatch):
+    monkeypatch.setattr(cancellation, "CANCEL_POLL_SECONDS", 0.05)
+    polls = []
+    token = CancelToken(poll=lambda: polls.append(1) or len(polls) >= 2)
+    assert not token.cancelled
+    assert not token.cancelled and len(polls) == 1
+    time.sleep(0.06)
+    assert token.cancelled and token.reason == cancellation.CANCELLED
+
+
+def test_resolve_timeout(monkeypatch):
+    monkeypatch.setattr(cancellation, "CREW_MAX_TIMEOUT_SECONDS", 60)
+    assert resolve_timeout(None) == cancellation.CREW_DEFAULT_TIMEOUT_SECONDS
+    assert resolve_timeout(5) == 5 and resolve_timeout(600) == 60
+
+
+def crew(steps_done, started):
+    """Blocking crew stand-in checking its token between steps."""
+
+    def kickoff(cancel_token):
+        started.set()
+        for _ in range(100):
+            cancel_token.check()
+            steps_done.append(1)
+            time.sleep(0.01)
+        return "finished"
+
+    return kickoff
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    scheduler = FairShareScheduler(executor=CrewExecutor(max_workers=1, max_pending=10), user_weights={})
+    monkeypatch.setattr(api, "get_scheduler", lambda: scheduler)
+    return scheduler
+
+
+def test_deadline_stops_the_crew_with_504(scheduler):
+    steps, started = [], threading.Event()
+    token = CancelToken(timeout=0.1)
+
+    async def scenario():
+        with pytest.raises(HTTPException) as error:
+            await api._run_scheduled(crew(steps, started), user=None, priority="interactive", cancel_token=token)
+        return error.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 504 and token.reason == DEADLINE_EXCEEDED
+    time.sleep(0.05)
+    # The crew thread stopped at its next step instead of running all 100
+    assert 0 < len(steps) < 50
+
+
+def test_client_disconnect_cancels_the_crew(scheduler):
+    steps, started = [], threading.Event()
+    token = CancelToken(timeout=30)
+
+    class Disconnecting:
+        async def receive(self):
+            await asyncio.to_thread(started.wait, 5)
+            return {"type": "http.disconnect"}
+
+    async def scenario():
+        run = api._run_scheduled(crew(steps, started), user=None, priority="interactive", cancel_token=token)
+        with pytest.raises(HTTPException) as error:
+            await api.cancel_on_disconnect(Disconnecting(), run)
+        return error.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 499 and token.reason == CLIENT_DISCONNECTED
+    time.sleep(0.05)
+    assert len(steps) < 50
+
+
+def test_queued_runs_past_their_deadline_never_start(scheduler):
+    release = threading.Event()
+    steps, started = [], threading.Event()
+    token = CancelToken(timeout=0.05)
+
+    async def scenario():
+        blocker = scheduler.submit(release.wait, 5, user="blocker")
+        with pytest.raises(HTTPException) as error:
+            await api._run_scheduled(crew(steps, started), user=None, priority="interactive", cancel_token=token)
+        release.set()
+        await blocker.future
+        return error.value
+
+    assert asyncio.run(scenario()).status_code == 504
+    # Dropped from the queue before a thread picked it up
+    assert token.started_at is None and scheduler.queued == 0
+    assert not started.wait(0.1)
@@ -0,0 +1,54 @@
+# tests/test_checkpoints.py
+
+import json
+import os
+from datetime import datetime
+
+import pytest
+from crewai.tasks.task_output import TaskOutput
+
+from src.agentic_api.checkpoints import CheckpointStore, validate_run_id
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CheckpointStore(str(tmp_path / "checkpoints"))
+
+
+def test_validate_run_id():
+    assert validate_run_id("abc_123-x") == "abc_123-x"
+    for run_id in ["", "../etc", "a/b", "a" * 65, "run id"]:
+        with pytest.raises(ValueError):
+            validate_run_id(run_id)
+
+
+def test_inputs_and_owner(store):
+    assert not store.has_run("run-1")
+    assert store.load_inputs("run-1") is None and store.owner("run-1") is None
+
+    store.save_inputs("run-1", {"hashtags": ["#style"]}, owner="alice")
+    assert store.has_run("run-1")
+    assert store.load_inputs("run-1") == {"hashtags": ["#style"]}
+    assert store.owner("run-1") == "alice"
+
+    # Runs started from the CLI have no owner
+    store.save_inputs("run-2", {"hashtags": []})
+    assert store.owner("run-2") is None
+
+
+def test_task_outputs_round_trip(store):
+    store.save_inputs("run-1", {"hashtags": []})
+    output = TaskOutput(description="Collect posts", expected_output="JSON", raw='{"posts": []}',
+                        json_dict={"posts": []}, agent="collector")
+    store.save_task_output("run-1", "collect_posts", output)
+
+    loaded = store.load_task_outputs("run-1")
+    assert list(loaded) == ["collect_posts"]
+    assert loaded["collect_posts"].raw == '{"posts": []}'
+    assert loaded["collect_posts"].json_dict == {"posts": []}
+    assert loaded["collect_posts"].agent == "collector"
+    assert store.load_task_outputs("run-2") == {}
+    assert not [name for name in os.listdir(store.run_dir("run-1")) if name.endswith(".tmp")]
+    with open(os.path.join(store.run_dir("run-1"), "collect_posts.json")) as f:
+        completed_at = datetime.fromisoformat(json.load(f)["completed_at"])
+    assert completed_at.utcoffset() is not None
@@ -0,0 +1,183 @@
+# tests/test_coalescing.py
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from src.agentic_api import api, budgets
+from src.agentic_api.auth import User, get_current_active_user
+from src.agentic_api.coalescing import IdempotencyConflict, IdempotencyStore, SingleFlight, request_fingerprint
+
+
+class FakeUser:
+    def __init__(self, username, email=None):
+        self.username = username
+        self.email = email
+
+
+def test_fingerprint_ignores_key_order():
+    assert request_fingerprint("research", {"a": 1, "b": [1, 2]}) == request_fingerprint("research", {"b": [1, 2], "a": 1})
+    assert request_fingerprint("research", {"a": 1}) != request_fingerprint("social-media-analysis", {"a": 1})
+
+
+def test_single_flight_shares_one_execution():
+    calls = []
+
+    async def scenario():
+        group = SingleFlight()
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "result"
+
+        results = await asyncio.gather(*(group.do("key", work) for _ in range(5)))
+        return group, results
+
+    group, results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert [result for result, _ in results] == ["result"] * 5
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert group.coalesced == 4 and not group.in_flight("key")
+
+
+def test_single_flight_is_cancelled_only_when_every_caller_left():
+    async def scenario():
+        group = SingleFlight()
+        started = asyncio.Event()
+
+        async def work():
+            started.set()
+            await asyncio.sleep(0.1)
+            return "done"
+
+        first = asyncio.ensure_future(group.do("key", work))
+        await started.wait()
+        second = asyncio.ensure_future(group.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        result = await second
+        third = asyncio.ensure_future(group.do("other", work))
+        await asyncio.sleep(0.01)
+        flight = group._flights["other"]
+        third.cancel()
+        await asyncio.sleep(0.01)
+        return result, flight.cancelled()
+
+    result, cancelled = asyncio.run(scenario())
+    assert result == ("done", True)
+    assert cancelled
+
+
+def test_idempotency_store_replays_and_rejects(tmp_path):
+    store = IdempotencyStore(str(tmp_path / "keys.sqlite3"))
+    assert store.claim("alice:research", "k", "fp") is None
+    with pytest.raises(IdempotencyConflict) as in_progress:
+        store.claim("alice:research", "k", "fp")
+    assert in_progress.value.status_code == 409
+    store.complete("alice:research", "k", {"result": "r"})
+    assert store.claim("alice:research", "k", "fp") == {"result": "r"}
+    with pytest.raises(IdempotencyConflict) as reused:
+        store.claim("alice:research", "k", "other")
+    assert reused.value.status_code == 422
+    # Keys are scoped per user and endpoint
+    assert store.claim("bob:research", "k", "fp") is None
+    # A failed request's claim is released for the retry
+    store.release("bob:research", "k")
+    assert store.claim("bob:research", "k", "fp") is None
+
+
+@pytest.fixture
+def fresh_stores(tmp_path, monkeypatch):
+    store = IdempotencyStore(str(tmp_path / "keys.sqlite3"))
+    group = SingleFlight()
+    budget_store = budgets.TokenBudgets(str(tmp_path / "usage.sqlite3"), flush_interval=3600)
+    monkeypatch.setattr(api, "get_idempotency_store", lambda: store)
+    monkeypatch.setattr(api, "get_single_flight", lambda: group)
+    monkeypatch.setattr(api, "get_token_budgets", lambda: budget_store)
+    yield
+    budget_store.close()
+
+
+def test_completed_requests_replay_without_a_budget_check(fresh_stores):
+    calls = []
+
+    async def execute():
+        calls.append(1)
+        return {"result": "fresh", "run_id": "run"}
+
+    user = FakeUser("alice")
+    first = asyncio.run(api.execute_once("research", {"topic": "x"}, user, "key-1", 10, execute))
+    # The retry would not fit the budget, but its response is already stored
+    replay = asyncio.run(api.execute_once("research", {"topic": "x"}, user, "key-1", 10 ** 12, execute))
+    assert first == ({"result": "fresh", "run_id": "run"}, {})
+    assert replay == ({"result": "fresh", "run_id": "run"}, {"Idempotent-Replayed": "true"})
+    assert len(calls) == 1
+
+    with pytest.raises(HTTPException) as exceeded:
+        asyncio.run(api.execute_once("research", {"topic": "x"}, user, "key-2", 10 ** 12, execute))
+    assert exceeded.value.status_code == 429
+    # The rejected request didn't keep its key claimed
+    assert asyncio.run(api.execute_once("research", {"topic": "x"}, user, "key-2", 10, execute))[0]["result"] == "fresh"
+
+
+def test_identical_requests_are_coalesced_per_user(fresh_stores):
+    calls = []
+
+    async def execute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"result": "r", "run_id": "run"}
+
+    async def scenario():
+        return await asyncio.gather(
+            api.execute_once("research", {"topic": "x"}, FakeUser("alice"), None, 10, execute),
+            api.execute_once("research", {"topic": "x"}, FakeUser("alice"), None, 10, execute),
+            api.execute_once("research", {"topic": "x"}, FakeUser("bob"), None, 10, execute),
+        )
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert [headers for _, headers in results] == [{}, {"X-Coalesced": "true"}, {}]
+
+
+@pytest.fixture
+def client(fresh_stores, monkeypatch):
+    runs = []
+
+    class Result:
+        def __init__(self, raw):
+            self.raw = raw
+
+    async def run_crew(fn, topic, run_id, *args, **kwargs):
+        runs.append(topic)
+        return Result(f"report {len(runs)} on {topic}")
+
+    monkeypatch.setattr(api, "run_crew", run_crew)
+    api.app.dependency_overrides[get_current_active_user] = lambda: User(username="alice")
+    client = TestClient(api.app)
+    client.runs = runs
+    yield client
+    api.app.dependency_overrides.pop(get_current_active_user, None)
+
+
+def test_duplicate_idempotency_keys_replay_the_stored_response(client):
+    headers = {"Idempotency-Key": "retry-1"}
+    first = client.post("/api/research", json={"topic": "Denim  jackets"}, headers=headers)
+    assert first.status_code == 200 and "Idempotent-Replayed" not in first.headers
+
+    # A retry with the same key and an equivalent body gets the stored response without a crew run
+    retry = client.post("/api/research", json={"topic": "denim jackets"}, headers=headers)
+    assert retry.status_code == 200 and retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json() == {"result": "report 1 on Denim  jackets", "run_id": first.json()["run_id"]}
+    markdown = client.post("/api/research?format=markdown", json={"topic": "denim jackets"}, headers=headers)
+    assert markdown.text == "report 1 on Denim  jackets" and markdown.headers["X-Run-ID"] == first.json()["run_id"]
+    assert client.runs == ["Denim  jackets"]
+
+    # Reusing the key for a different request is rejected
+    conflict = client.post("/api/research", json={"topic": "linen"}, headers=headers)
+    assert conflict.status_code == 422
+    # Without a key every request runs
+    assert client.post("/api/research", json={"topic": "denim jackets"}).json()["result"] == "report 2 on denim jackets"
@@ -0,0 +1,59 @@
+# tests/test_columnar.py
+
+import numpy as np
+import pytest
+
+from src.agentic_api.columnar import ColumnarDataset, write_columnar
+from src.agentic_api.posts import PostBatch
+
+POSTS = [
+    {"id": "1", "hashtag": "#style", "platform": "tiktok", "score": 80.0, "timestamp": "2026-01-01T10:00:00+00:00",
+     "engagement_stats": {"likes": 5, "shares": 1, "comments": 0}},
+    {"id": "2", "hashtag": "#style", "platform": "instagram", "score": None, "timestamp": "2026-01-01T11:30:00+00:00",
+     "engagement_stats": {}},
+    {"id": "3", "hashtag": "#denim", "platform": "tiktok", "score": 40.0, "timestamp": None,
+     "engagement_stats": {"likes": 50, "shares": 10, "comments": 2}},
+    {"id": "4", "hashtag": None, "platform": "TikTok", "score": 60.0, "timestamp": "2026-01-02T10:15:00+00:00",
+     "engagement_stats": {"likes": 8}},
+]
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    directory = str(tmp_path / "dataset")
+    write_columnar(PostBatch.from_records(POSTS), directory, kind="test")
+    return ColumnarDataset(directory)
+
+
+def test_round_trip(dataset):
+    assert len(dataset) == 4 and dataset.meta["kind"] == "test"
+    assert isinstance(dataset.column("likes"), np.memmap)
+    batch = dataset.to_batch()
+    assert batch.strings["id"] == ["1", "2", "3", "4"]
+    assert batch.field("hashtag", 2) == "#denim"
+
+
+def test_filters(dataset):
+    assert dataset.where({"hashtag": "#STYLE"}).tolist() == [True, True, False, False]
+    assert dataset.where({"hashtag": ["#style", "#denim"]}).tolist() == [True, True, True, False]
+    assert dataset.where({"min_score": 50}).tolist() == [True, False, False, True]
+    assert dataset.where({"since": "2026-01-01T11:00:00+00:00"}).tolist() == [False, True, False, True]
+    with pytest.raises(ValueError):
+        dataset.where({"max_unknown": 1})
+
+
+def test_max_filters_exclude_missing_counts(dataset):
+    # Post 2 has no like count (stored as -1) and must not count as "at most 10 likes"
+    assert dataset.where({"max_likes": 10}).tolist() == [True, False, False, True]
+    assert dataset.where({"max_comments": 0}).tolist() == [True, False, False, False]
+    assert dataset.where({"max_engagement": 10}).tolist() == [True, True, False, True]
+
+
+def test_group_by_skips_missing_counts(dataset):
+    groups = dataset.group_by("hashtag")
+    assert groups["#style"]["posts"] == 2
+    assert groups["#style"]["likes_mean"] == 5.0
+    assert groups["#style"]["score_mean"] == 80.0
+    assert groups["(missing)"]["posts"] == 1
+    assert dataset.percentiles("likes", (50,))["all"] == {"count": 3, "p50": 8.0}
+    assert dataset.hourly()["undated_posts"] == 1
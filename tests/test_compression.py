@@ -0,0 +1,113 @@
+# tests/test_compression.py
+
+import asyncio
+import gzip
+import zlib
+
+import pytest
+
+from src.agentic_api import compression
+from src.agentic_api.compression import CompressionMiddleware, negotiate_encoding
+
+
+def respond(headers, chunks, status=200):
+    """ASGI app sending the given body chunks."""
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": status, "headers": [(k.encode(), v.encode()) for k, v in headers]})
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+
+    return app
+
+
+def call(app, accept_encoding="gzip", method="GET", minimum_size=100):
+    """Run a request through the middleware; returns the response headers and body messages."""
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": "/",
+        "headers": [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else [],
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(CompressionMiddleware(app, minimum_size=minimum_size)(scope, receive, send))
+    start, bodies = sent[0], sent[1:]
+    headers = {key.decode().lower(): value.decode() for key, value in start["headers"]}
+    return start["status"], headers, [message["body"] for message in bodies]
+
+
+def test_negotiate_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert compression.supported_encodings() == ["gzip"]
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip, br") == "gzip"
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("*") == "gzip"
+
+
+def test_negotiate_encoding_prefers_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object())
+    assert compression.supported_encodings() == ["br", "gzip"]
+    assert negotiate_encoding("gzip, br") == "br"
+    assert negotiate_encoding("*") == "br"
+    assert negotiate_encoding("gzip, br;q=0") == "gzip"
+    assert negotiate_encoding("deflate") is None
+
+
+def test_brotli_bodies_decompress():
+    brotli = pytest.importorskip("brotli")
+    body = b'{"report": "' + b"trend " * 500 + b'"}'
+    _, headers, bodies = call(respond([("content-type", "application/json")], [body]), accept_encoding="br, gzip")
+    assert headers["content-encoding"] == "br"
+    assert brotli.decompress(b"".join(bodies)) == body
+
+
+def test_large_bodies_are_gzipped():
+    body = b'{"report": "' + b"trend " * 500 + b'"}'
+    status, headers, bodies = call(respond([("content-type", "application/json"), ("content-length", str(len(body)))], [body]))
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    compressed = b"".join(bodies)
+    assert int(headers["content-length"]) == len(compressed) < len(body)
+    assert gzip.decompress(compressed) == body
+
+
+def test_bodies_sent_in_pieces_are_buffered_and_compressed():
+    chunks = [b"x" * 60, b"y" * 60, b"z" * 60]
+    _, headers, bodies = call(respond([("content-type", "text/plain")], chunks))
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    assert gzip.decompress(b"".join(bodies)) == b"".join(chunks)
+
+
+def test_small_bodies_and_unaccepted_requests_pass_through():
+    _, headers, bodies = call(respond([("content-type", "application/json")], [b'{"ok": true}']))
+    assert "content-encoding" not in headers and bodies == [b'{"ok": true}']
+    body = b"a" * 500
+    _, headers, bodies = call(respond([("content-type", "text/plain")], [body]), accept_encoding="")
+    assert "content-encoding" not in headers and b"".join(bodies) == body
+
+
+def test_partial_and_precompressed_content_passes_through():
+    body = b"a" * 500
+    status, headers, bodies = call(respond([("content-type", "text/plain"), ("content-range", "bytes 0-499/1000")], [body], status=206))
+    assert status == 206 and "content-encoding" not in headers and bodies == [body]
+    _, headers, bodies = call(respond([("content-type", "image/jpeg")], [body]))
+    assert "content-encoding" not in headers and bodies == [body]
+
+
+def test_ndjson_streams_are_flushed_line_by_line():
+    lines = [b'{"topic": "%d", "result": "%s"}\n' % (i, b"r" * 200) for i in range(3)]
+    _, headers, bodies = call(respond([("content-type", "application/x-ndjson")], lines))
+    assert headers["content-encoding"] == "gzip"
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # Each chunk decompresses to its line on arrival, without waiting for the end of the stream
+    assert [decompressor.decompress(chunk) for chunk in bodies] == lines
@@ -0,0 +1,87 @@
+# tests/test_dataset_store.py
+
+import csv
+import json
+import os
+
+import pytest
+
+from src.agentic_api import dataset_store
+from src.agentic_api.dataset_store import DatasetStore
+from src.agentic_api.posts import PostBatch
+from src.agentic_api.tools import social_media_tools
+from src.agentic_api.tools.social_media_tools import DatasetToCSVTool, SocialMediaScraperTool
+
+RECORDS = [
+    {"id": f"p{i}", "platform": "Instagram", "hashtag": "#style", "content_type": "image",
+     "engagement_stats": {"likes": i, "shares": 1, "comments": 0}}
+    for i in range(5)
+]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = DatasetStore(str(tmp_path / "datasets"))
+    monkeypatch.setattr(social_media_tools, "get_dataset_store", lambda: store)
+    return store
+
+
+def test_datasets_are_read_back_from_disk(store):
+    dataset_id = store.put(RECORDS, kind="hashtag_posts", run_id="run-1")
+    assert dataset_id.startswith("ds_hashtag_posts_")
+    assert os.path.isdir(os.path.join(store.root, "run-1", dataset_id))
+
+    # Another worker (empty cache) finds the dataset on disk
+    other = DatasetStore(store.root)
+    assert other.get(dataset_id).to_records() == store.get(dataset_id).to_records()
+    assert other.exists(dataset_id) and not other.exists("ds_missing")
+    for unknown in ["ds_missing", "../etc", "not-a-dataset"]:
+        with pytest.raises(KeyError):
+            other.get(unknown)
+
+
+def test_memory_cache_is_bounded(store, monkeypatch):
+    monkeypatch.setattr(dataset_store, "DATASET_CACHE_SIZE", 2)
+    ids = [store.put(RECORDS[:i + 1]) for i in range(3)]
+    assert list(store._cache) == ids[1:]
+    # Evicted datasets are reloaded from their columns
+    assert len(store.get(ids[0])) == 1
+    assert list(store._cache) == [ids[2], ids[0]]
+
+
+def test_legacy_json_datasets_are_converted_for_column_queries(store):
+    dataset_id = "ds_legacy_0123456789"
+    os.makedirs(os.path.join(store.root, "old-run"))
+    legacy_path = os.path.join(store.root, "old-run", f"{dataset_id}.json")
+    with open(legacy_path, "w") as f:
+        json.dump({"kind": "legacy", "run_id": "old-run", "columns": PostBatch.from_records(RECORDS).to_columns()}, f)
+
+    assert len(store.get(dataset_id)) == 5
+    dataset = store.columnar(dataset_id)
+    assert dataset.column("likes").tolist() == [0, 1, 2, 3, 4]
+    assert not os.path.exists(legacy_path)
+
+
+def test_delete_run(store):
+    kept = store.put(RECORDS, run_id="run-2")
+    deleted = store.put(RECORDS, run_id="run-1")
+    store.delete_run("run-1")
+    assert not store.exists(deleted) and store.exists(kept)
+
+
+def test_tools_hand_over_dataset_ids_instead_of_rows(store, tmp_path):
+    handle = json.loads(SocialMediaScraperTool()._run(hashtags=["denim", "linen"], min_items_per_hashtag=4))
+    # The LLM sees a handle and summary statistics, never the posts
+    assert set(handle) >= {"dataset_id", "total_items", "items_per_group", "engagement_totals"}
+    assert handle["total_items"] == 8 and "This is a sample" not in json.dumps(handle)
+
+    other = store.put(RECORDS, kind="account_posts")
+    output_path = str(tmp_path / "out.csv")
+    result = json.loads(DatasetToCSVTool()._run(dataset_ids=[handle["dataset_id"], other], output_path=output_path))
+    assert result["status"] == "success" and result["total_items"] == 13
+    with open(output_path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 13 and rows[-1]["likes"] == "4"
+
+    error = json.loads(DatasetToCSVTool()._run(dataset_ids=["ds_missing"], output_path=output_path))
+    assert error["status"] == "error"
@@ -0,0 +1,58 @@
+# tests/test_executor.py
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.agentic_api.executor import CrewExecutor, ExecutorSaturated
+
+
+def test_jobs_run_off_the_event_loop():
+    executor = CrewExecutor(max_workers=2, max_pending=0)
+
+    async def scenario():
+        return threading.current_thread(), await executor.run(threading.current_thread)
+
+    loop_thread, job_thread = asyncio.run(scenario())
+    assert job_thread is not loop_thread and job_thread.name.startswith("crew")
+
+
+def test_full_executor_rejects_jobs():
+    executor = CrewExecutor(max_workers=1, max_pending=1)
+    release = threading.Event()
+    futures = [executor.submit(release.wait, 5) for _ in range(2)]
+    assert executor.in_flight == 2 and executor.saturated
+    with pytest.raises(ExecutorSaturated):
+        executor.submit(time.sleep, 0)
+    release.set()
+    for future in futures:
+        future.result(5)
+    # Finished jobs free their slots
+    deadline = time.monotonic() + 5
+    while executor.in_flight and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not executor.saturated
+
+
+def test_drain_waits_for_in_flight_jobs_and_stops_accepting():
+    executor = CrewExecutor(max_workers=1, max_pending=1)
+    running = executor.submit(time.sleep, 0.2)
+    assert executor.drain(timeout=5) is True
+    assert running.done()
+    with pytest.raises(ExecutorSaturated, match="shutting down"):
+        executor.submit(time.sleep, 0)
+
+
+def test_drain_gives_up_at_the_deadline():
+    executor = CrewExecutor(max_workers=1, max_pending=1)
+    release = threading.Event()
+    executor.submit(release.wait, 5)
+    queued = executor.submit(time.sleep, 0)
+    start = time.monotonic()
+    assert executor.drain(timeout=0.1) is False
+    assert time.monotonic() - start < 1
+    # Queued jobs that never started are cancelled
+    assert queued.cancelled()
+    release.set()
@@ -0,0 +1,93 @@
+# tests/test_health_static.py
+
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from src.agentic_api import static_cache as static_cache_module
+from src.agentic_api.api import app
+from src.agentic_api.scheduler import get_scheduler
+from src.agentic_api.static_cache import StaticAssetCache
+
+
+def request(method="GET", **headers):
+    return Request({
+        "type": "http",
+        "method": method,
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+@pytest.fixture
+def assets(tmp_path):
+    (tmp_path / "static").mkdir()
+    (tmp_path / "static" / "app.js").write_text("console.log('v1')")
+    (tmp_path / "secret.txt").write_text("secret")
+    return StaticAssetCache(tmp_path / "static")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # The lifespan isn't run, so readiness is set by hand
+    monkeypatch.setattr(app.state, "warmed_up", True)
+    return TestClient(app)
+
+
+def test_assets_are_served_with_validators(assets):
+    response = assets.response(request(), "app.js", cache_control="public, max-age=60")
+    assert response.status_code == 200 and response.body == b"console.log('v1')"
+    assert response.headers["content-type"].startswith(("text/javascript", "application/javascript"))
+    assert response.headers["cache-control"] == "public, max-age=60"
+    etag = response.headers["etag"]
+
+    assert assets.response(request(if_none_match=etag), "app.js").status_code == 304
+    assert assets.response(request(if_none_match=f"W/{etag}, \"other\""), "app.js").status_code == 304
+    assert assets.response(request(if_none_match='"other"'), "app.js").status_code == 200
+    last_modified = response.headers["last-modified"]
+    assert assets.response(request(if_modified_since=last_modified), "app.js").status_code == 304
+    assert assets.response(request(if_modified_since="Thu, 01 Jan 1970 00:00:00 GMT"), "app.js").status_code == 200
+
+    head = assets.response(request("HEAD"), "app.js")
+    assert head.body == b"" and head.headers["content-length"] == str(len(response.body))
+
+
+def test_paths_outside_the_root_are_not_served(assets):
+    assert assets.response(request(), "../secret.txt") is None
+    assert assets.response(request(), "missing.js") is None
+
+
+def test_changed_files_are_reloaded_after_revalidation(assets, monkeypatch):
+    first = assets.get("app.js")
+    path = assets.root / "app.js"
+    path.write_text("console.log('v2')")
+    later = time.time() + 10
+    os.utime(path, (later, later))
+
+    # Served from memory until the revalidation interval has passed
+    assert assets.get("app.js") is first
+    monkeypatch.setattr(static_cache_module, "STATIC_CACHE_REVALIDATE_SECONDS", 0)
+    second = assets.get("app.js")
+    assert second.body == b"console.log('v2')" and second.etag != first.etag
+
+
+def test_health_and_readiness(client, monkeypatch):
+    assert client.get("/healthz").json() == {"status": "ok"}
+
+    response = client.get("/readyz")
+    assert response.status_code == 200 and response.json()["status"] == "ready"
+
+    monkeypatch.setattr(get_scheduler(), "accepting", False)
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["checks"]["accepting_runs"] is False
+
+
+def test_static_route(client):
+    response = client.get("/static/login.html")
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/html")
+    assert client.get("/static/login.html", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+    assert client.get("/static/..%2Fapi.py").status_code == 404
+    assert client.get("/static/missing.css").status_code == 404
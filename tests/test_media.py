@@ -0,0 +1,133 @@
+# tests/test_media.py
+
+import io
+import os
+import shutil
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+from src.agentic_api.media import MediaPreprocessor, downscale, is_video_url, summarize, validate_media_url
+from src.agentic_api.tools.runtime import get_tool_runtime
+
+
+def make_image(width, height, mode="RGB", fmt="JPEG"):
+    output = io.BytesIO()
+    Image.new(mode, (width, height), (200, 100, 50) if mode == "RGB" else (200, 100, 50, 128)).save(output, fmt)
+    return output.getvalue()
+
+
+@pytest.fixture
+def server():
+    images = {
+        "/large.jpg": make_image(2000, 1000),
+        "/copy.jpg": make_image(2000, 1000),
+        "/small.png": make_image(40, 20, "RGBA", "PNG"),
+    }
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(self.path)
+            body = images.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    httpd.base_url = f"http://127.0.0.1:{httpd.server_port}"
+    httpd.requests = requests
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def preprocessor(tmp_path):
+    return MediaPreprocessor(str(tmp_path / "media"), max_dimension=256, quality=80)
+
+
+def prepare(preprocessor, *urls):
+    runtime = get_tool_runtime()
+
+    async def prepare_all():
+        return await runtime.map(preprocessor.prepare, list(urls))
+
+    return runtime.run(prepare_all())
+
+
+def test_validate_media_url():
+    assert validate_media_url("https://cdn.example.com/a.jpg") == "https://cdn.example.com/a.jpg"
+    for url in ["file:///etc/passwd", "ftp://example.com/a.jpg", "http:///a.jpg", "/etc/passwd", "data:image/png;base64,AA"]:
+        with pytest.raises(ValueError):
+            validate_media_url(url)
+    assert is_video_url("https://cdn.example.com/clip.MP4?sig=1")
+    assert not is_video_url("https://cdn.example.com/clip.jpg?format=mp4")
+
+
+def test_downscale_fits_the_longest_side():
+    data, width, height = downscale(make_image(2000, 1000), max_dimension=256)
+    assert (width, height) == (256, 128)
+    with Image.open(io.BytesIO(data)) as image:
+        assert image.format == "JPEG" and image.size == (256, 128)
+
+    # Transparent images are flattened onto white, smaller ones aren't enlarged
+    data, width, height = downscale(make_image(40, 20, "RGBA", "PNG"), max_dimension=256)
+    assert (width, height) == (40, 20)
+    with Image.open(io.BytesIO(data)) as image:
+        assert image.mode == "RGB"
+
+
+def test_prepare_then_cached(server, preprocessor):
+    url = f"{server.base_url}/large.jpg"
+    [first] = prepare(preprocessor, url)
+    assert first["status"] == "prepared" and first["kind"] == "image"
+    assert (first["width"], first["height"]) == (256, 128)
+    assert first["bytes"] < first["source_bytes"] and os.path.exists(first["paths"][0])
+
+    [second] = prepare(preprocessor, url)
+    assert second["status"] == "cached" and second["paths"] == first["paths"]
+    assert server.requests == ["/large.jpg"]
+    assert set(summarize(second)) == {"status", "kind", "paths", "source_bytes", "bytes", "width", "height"}
+
+
+def test_same_image_behind_another_url_shares_the_blob(server, preprocessor):
+    first, second = prepare(preprocessor, f"{server.base_url}/large.jpg", f"{server.base_url}/copy.jpg")
+    assert first["status"] == second["status"] == "prepared"
+    assert first["paths"] == second["paths"]
+
+
+def test_concurrent_requests_share_one_download(server, preprocessor):
+    url = f"{server.base_url}/large.jpg"
+    results = prepare(preprocessor, url, url, url)
+    assert [result["status"] for result in results] == ["prepared"] * 3
+    assert server.requests == ["/large.jpg"]
+
+
+def test_small_images_keep_their_source_bytes(server, preprocessor):
+    [result] = prepare(preprocessor, f"{server.base_url}/small.png")
+    assert result["status"] == "prepared"
+    assert result["bytes"] <= result["source_bytes"]
+
+
+def test_failures_fall_back_to_the_original_url(server, preprocessor):
+    rejected, missing = prepare(preprocessor, "file:///etc/passwd", f"{server.base_url}/missing.jpg")
+    assert rejected["status"] == "rejected" and rejected["paths"] == []
+    assert missing["status"] == "original" and "404" in missing["reason"]
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is not None, reason="ffmpeg is installed")
+def test_videos_without_ffmpeg_use_the_original_url(server, preprocessor):
+    [result] = prepare(preprocessor, f"{server.base_url}/clip.mp4")
+    assert result["status"] == "original" and "ffmpeg" in result["reason"]
+    assert server.requests == []
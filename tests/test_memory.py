@@ -0,0 +1,148 @@
+# tests/test_memory.py
+
+import logging
+import os
+import threading
+import tracemalloc
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.agentic_api import auth, memory
+from src.agentic_api.api import app
+from src.agentic_api.auth import User, get_current_active_user
+from src.agentic_api.memory import AllocationTracker, ModuleResolver, WorkerRecycler
+from src.agentic_api.run_stats import RunState
+
+MB = 1024 * 1024
+
+# Allocations made by this module, kept alive between two snapshots
+retained = []
+
+
+@pytest.fixture(autouse=True)
+def stop_tracing():
+    yield
+    tracemalloc.stop()
+    retained.clear()
+
+
+def test_files_are_resolved_to_modules():
+    resolver = ModuleResolver()
+    assert resolver.module_of(memory.__file__) == "src.agentic_api.memory"
+    assert resolver.module_of(memory.__file__, group="package") == "src"
+    assert resolver.module_of("/usr/lib/python3/site-packages/numpy/core/numeric.py") == "numpy"
+    assert resolver.module_of("/usr/lib/python3/site-packages/six.py") == "six"
+    assert resolver.module_of("<frozen importlib._bootstrap>") == "<frozen importlib._bootstrap>"
+    assert resolver.module_of("/tmp/generated_module.py") == "generated_module"
+
+
+def test_snapshots_show_growth_by_module():
+    tracker = AllocationTracker()
+    assert tracker.status() == {"tracing": False}
+
+    first = tracker.snapshot()
+    assert first["tracing"] and "since_previous" not in first
+    retained.extend(bytearray(1024) for _ in range(2000))
+    second = tracker.snapshot(limit=5)
+    # The first snapshot is both the previous one and the baseline
+    assert "since_baseline" not in second and len(second["top"]) <= 5
+    growth = {entry["module"]: entry["size_diff_bytes"] for entry in second["since_previous"]}
+    assert growth[__name__] > 2 * MB * 0.9
+
+    third = tracker.snapshot()
+    assert third["since_baseline"][0]["module"] == __name__ and third["snapshots_taken"] == 3
+
+    tracker.stop()
+    assert tracker.status() == {"tracing": False} and not tracker.tracing
+
+
+def finished_run(rss_end_mb=100, run_id="run-1"):
+    run = RunState(run_id, "social_media", None)
+    run.rss_start, run.rss_high_water, run.rss_end = 80 * MB, 120 * MB, rss_end_mb * MB
+    return run
+
+
+@pytest.fixture
+def recycled(monkeypatch):
+    reasons = []
+    done = threading.Event()
+
+    def recycle(self, reason):
+        reasons.append(reason)
+        done.set()
+
+    monkeypatch.setattr(WorkerRecycler, "_recycle", recycle)
+    return reasons, done
+
+
+def test_supervised_workers_recycle_after_max_runs(recycled):
+    reasons, done = recycled
+    recycler = WorkerRecycler(max_runs=2, supervised=True)
+    recycler.run_finished(finished_run())
+    assert recycler.recycling is None
+    recycler.run_finished(finished_run(run_id="run-2"))
+    assert done.wait(5) and reasons == ["2 crew runs completed (WORKER_MAX_RUNS=2)"]
+    # Runs finishing while the worker drains don't recycle it again
+    recycler.run_finished(finished_run(run_id="run-3"))
+    assert len(reasons) == 1
+
+    status = recycler.status()
+    assert status["recycling"] == reasons[0] and status["runs_completed"] == 3
+    assert status["recent_runs"][0]["rss_growth_bytes"] == 20 * MB
+    assert status["max_run_rss_high_water_bytes"] == 120 * MB
+
+
+def test_supervised_workers_recycle_over_max_rss(recycled):
+    reasons, done = recycled
+    recycler = WorkerRecycler(max_rss_mb=512, supervised=True)
+    recycler.run_finished(finished_run(rss_end_mb=500))
+    recycler.run_finished(finished_run(rss_end_mb=600))
+    assert done.wait(5) and reasons == ["RSS of 600 MB exceeds WORKER_MAX_RSS_MB=512"]
+
+
+def test_unsupervised_workers_only_warn_once(recycled, caplog):
+    reasons, _ = recycled
+    recycler = WorkerRecycler(max_runs=1, supervised=False)
+    with caplog.at_level(logging.WARNING, logger=memory.__name__):
+        for i in range(3):
+            recycler.run_finished(finished_run(run_id=f"run-{i}"))
+    assert reasons == [] and recycler.recycling is None
+    assert [record.getMessage().startswith("Not recycling worker") for record in caplog.records] == [True]
+
+
+def test_recycling_drains_the_scheduler_then_terminates(monkeypatch):
+    class Scheduler:
+        accepting, queued, running = True, 0, 0
+
+    scheduler = Scheduler()
+    signals = []
+    monkeypatch.setattr(memory, "get_scheduler", lambda: scheduler)
+    monkeypatch.setattr(memory.os, "kill", lambda pid, signal: signals.append((pid, signal)))
+    WorkerRecycler(supervised=True)._recycle("test")
+    assert not scheduler.accepting
+    assert signals == [(os.getpid(), memory.signal.SIGTERM)]
+
+
+def test_memory_endpoints(monkeypatch):
+    monkeypatch.setattr(auth, "ADMIN_USERS", {"admin"})
+    monkeypatch.setattr(memory, "_allocation_tracker", AllocationTracker())
+    recycler = WorkerRecycler()
+    recycler.run_finished(finished_run())
+    monkeypatch.setattr(memory, "_worker_recycler", recycler)
+    app.dependency_overrides[get_current_active_user] = lambda: User(username="admin")
+    try:
+        client = TestClient(app)
+        status = client.get("/api/admin/memory").json()
+        assert status["tracemalloc"] == {"tracing": False} and status["rss_bytes"] > 0
+        assert status["recycler"]["recent_runs"][0]["run_id"] == "run-1"
+
+        client.post("/api/admin/memory/snapshots")
+        snapshot = client.post("/api/admin/memory/snapshots?group=package&limit=3").json()
+        assert snapshot["tracing"] and snapshot["group"] == "package" and len(snapshot["top"]) <= 3
+        assert "since_previous" in snapshot
+        assert client.post("/api/admin/memory/snapshots?group=file").status_code == 422
+
+        assert client.delete("/api/admin/memory/snapshots").json()["tracemalloc"] == {"tracing": False}
+    finally:
+        app.dependency_overrides.clear()
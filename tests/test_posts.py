@@ -0,0 +1,53 @@
+# tests/test_posts.py
+
+from src.agentic_api.posts import ENGAGEMENT_FIELDS, PostBatch
+
+RECORDS = [
+    {"id": "1", "platform": "Instagram", "hashtag": "#style", "content_type": "image",
+     "timestamp": "2026-01-01T10:00:00", "engagement_stats": {"likes": 10, "shares": 2, "comments": 1}},
+    {"id": "2", "platform": "Instagram", "hashtag": "#style", "content_type": "video",
+     "timestamp": "2026-01-01T12:00:00", "engagement_stats": {"likes": 30}},
+    {"id": "3", "platform": "TikTok", "account": "@denim", "content_type": "image",
+     "timestamp": None, "engagement_stats": {}},
+    {"id": "4", "platform": "TikTok", "hashtag": "#denim", "content_type": "text",
+     "timestamp": "2026-01-02T08:30:00", "engagement_stats": {"likes": 0, "shares": 4}},
+]
+
+
+def row_summary(records):
+    """Engagement statistics computed record by record, the way they were before the columnar batch."""
+    totals, counts = {}, {}
+    for record in records:
+        for name, value in record.get("engagement_stats", {}).items():
+            totals[name] = totals.get(name, 0) + value
+            counts[name] = counts.get(name, 0) + 1
+    return totals, {name: round(totals[name] / counts[name], 2) for name in totals}
+
+
+def test_summary_matches_the_rows_with_missing_engagement():
+    summary = PostBatch.from_records(RECORDS).summary()
+    totals, means = row_summary(RECORDS)
+    assert summary["engagement_totals"] == totals
+    # Posts without a metric don't drag its mean down
+    assert summary["engagement_means"] == means == {"likes": 13.33, "shares": 3.0, "comments": 1.0}
+    assert summary["total_items"] == 4
+    assert summary["platform_distribution"] == {"Instagram": 2, "TikTok": 2}
+    assert summary["items_per_group"] == {"#style": 2, "#denim": 1, "@denim": 1}
+    assert summary["time_range"] == ["2026-01-01T10:00:00", "2026-01-02T08:30:00"]
+
+
+def test_summary_of_posts_without_engagement():
+    summary = PostBatch.from_records([{"id": "1", "platform": "TikTok"}]).summary()
+    assert summary["engagement_totals"] == {} and summary["engagement_means"] == {}
+    assert "engagement_stats" not in summary["fields"]
+
+
+def test_rows_round_trip():
+    batch = PostBatch.from_records(RECORDS)
+    for record, row in zip(RECORDS, batch):
+        assert row.id == record["id"]
+        assert row.engagement_stats == record["engagement_stats"]
+        assert row.get("hashtag") == record.get("hashtag")
+    assert set(batch[1].engagement_stats) <= set(ENGAGEMENT_FIELDS)
+    selected = batch.select(batch.counts["likes"] > 5)
+    assert selected.strings["id"] == ["1", "2"]
@@ -0,0 +1,120 @@
+# tests/test_profiling.py
+
+import contextvars
+import json
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.agentic_api import auth, middleware, profiling
+from src.agentic_api.api import app
+from src.agentic_api.artifacts import get_artifact_store
+from src.agentic_api.profiling import (
+    COLLAPSED_ARTIFACT, SPEEDSCOPE_ARTIFACT, Profile, ProfileRequests, SamplingProfiler, profile_current_thread,
+)
+
+FRAME_A = ("handler", "/app/api.py", 10)
+FRAME_B = ("kickoff", "/app/crew.py", 20)
+
+
+def spin(stop, name):
+    def busy_loop_of_test():
+        while not stop.is_set():
+            sum(range(100))
+
+    thread = threading.Thread(target=busy_loop_of_test, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+def crew_step():
+    profile_current_thread()
+    time.sleep(0.1)
+
+
+def test_only_the_requested_threads_are_sampled():
+    stop = threading.Event()
+    threads = {threading.get_ident()}
+    token = profiling._profiled_threads.set(threads)
+    try:
+        profiler = SamplingProfiler(interval_ms=2, threads=threads).start()
+        spin(stop, "unrelated")
+        # A thread joining the request's profile, the way crew threads do when their crew starts
+        joined = threading.Thread(target=contextvars.copy_context().run, args=(crew_step,), name="crew")
+        joined.start()
+        joined.join()
+        profile = profiler.stop()
+    finally:
+        stop.set()
+        profiling._profiled_threads.reset(token)
+
+    sampled = {thread for thread, _ in profile.samples}
+    assert "crew" in sampled and "unrelated" not in sampled
+    assert profile.duration >= 0.1
+    crew_stacks = [stack for (thread, stack), _ in profile.samples.items() if thread == "crew"]
+    assert any(frame[0] == "crew_step" for stack in crew_stacks for frame in stack)
+
+
+def test_unprofiled_requests_leave_threads_alone():
+    profile_current_thread()
+    assert profiling._profiled_threads.get() is None
+
+
+def test_profile_formats():
+    profile = Profile(interval_ms=10)
+    profile.add("MainThread", (FRAME_A, FRAME_B), 3)
+    profile.add("MainThread", (FRAME_A,))
+    other = Profile.from_dict(json.loads(json.dumps(profile.to_dict())))
+    assert other.samples == profile.samples
+
+    merged = Profile(interval_ms=10)
+    merged.merge(other, prefix="worker-1 ")
+    assert merged.to_collapsed() == (
+        "worker-1 MainThread;handler (api.py:10);kickoff (crew.py:20) 3\n"
+        "worker-1 MainThread;handler (api.py:10) 1\n"
+    )
+
+    speedscope = profile.to_speedscope("GET /api/metrics")
+    assert [frame["name"] for frame in speedscope["shared"]["frames"]] == ["handler", "kickoff"]
+    [thread] = speedscope["profiles"]
+    assert thread["samples"] == [[0], [0, 1]] and thread["weights"] == [10, 30] and thread["endValue"] == 40
+
+
+def test_workers_answer_profile_requests_through_the_directory(tmp_path):
+    serving = ProfileRequests("worker-1", str(tmp_path))
+    other = ProfileRequests("worker-2", str(tmp_path))
+    profile_id = serving.request(0.1, interval_ms=5)
+    other.check()
+    # A request being served isn't picked up twice
+    other.check()
+    assert len([thread for thread in threading.enumerate() if thread.name == f"profile-{profile_id[:8]}"]) == 2
+
+    time.sleep(0.1)
+    profile, reported = serving.collect(profile_id, ["worker-1", "worker-2"], timeout=5)
+    assert reported == ["worker-1", "worker-2"]
+    assert {thread.split(" ")[0] for thread, _ in profile.samples} == {"worker-1", "worker-2"}
+    assert not (tmp_path / profile_id).exists()
+
+
+@pytest.fixture
+def tokens(monkeypatch):
+    monkeypatch.setattr(auth, "JWT_SECRET", "test-secret")
+    monkeypatch.setattr(middleware, "JWT_SECRET", "test-secret")
+    monkeypatch.setattr(auth, "ADMIN_USERS", {"admin"})
+    return lambda username: {"Authorization": f"Bearer {auth.create_access_token({'sub': username})[0]}"}
+
+
+def test_admins_can_profile_a_request(tokens):
+    client = TestClient(app)
+    assert "x-profile-artifacts" not in client.get("/api/metrics", headers=tokens("admin")).headers
+    assert client.get("/api/metrics?profile=1", headers=tokens("alice")).status_code == 403
+    assert client.get("/api/metrics", headers={"X-Profile": "1"}).status_code == 401
+
+    response = client.get("/api/metrics", headers={**tokens("admin"), "X-Profile": "1"})
+    assert response.status_code == 200 and "counters" in response.json()
+    run_id = response.headers["x-profile-artifacts"].split("/")[3]
+    path, _ = get_artifact_store().get(run_id, SPEEDSCOPE_ARTIFACT)
+    assert json.loads(open(path).read())["name"] == "GET /api/metrics"
+    assert get_artifact_store().get(run_id, COLLAPSED_ARTIFACT) is not None
@@ -0,0 +1,93 @@
+# tests/test_ranking.py
+
+import json
+import random
+
+from src.agentic_api.posts import PostBatch
+from src.agentic_api.ranking import RankedItem, TopK, TopKRanker, merge_rankings
+
+
+def make_posts(count, seed=0, prefix="post"):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"{prefix}-{i}",
+            "hashtag": rng.choice(["#style", "#denim", "#ootd"]),
+            "trend_category": rng.choice(["rising", "stable", None]),
+            "score": rng.choice([None, round(rng.uniform(0, 100), 1)]),
+            "engagement_stats": {"likes": rng.randint(0, 500), "shares": rng.randint(0, 50)},
+        }
+        for i in range(count)
+    ]
+
+
+def expected_ids(posts, k):
+    def key(post):
+        score = post["score"] if post["score"] is not None else float("-inf")
+        engagement = sum(post["engagement_stats"].values())
+        return (-score, -engagement, post["id"])
+
+    return [post["id"] for post in sorted(posts, key=key)[:k]]
+
+
+def ids(rows):
+    return [row["id"] for row in rows]
+
+
+def test_topk_keeps_the_k_best():
+    ranking = TopK(3)
+    for score in [5, 1, 9, 7, 3, 8]:
+        ranking.push(RankedItem(score, 0, f"id-{score}", {}))
+    assert [item.score for item in ranking.items()] == [9, 8, 7]
+    assert not ranking.would_accept(6, 0, "id-6")
+    # Ties on score are broken by engagement, then by the smaller ID
+    assert ranking.would_accept(7, 1, "id-x")
+
+
+def test_topk_keeps_the_higher_ranked_copy_of_a_duplicate():
+    ranking = TopK(2)
+    ranking.push(RankedItem(10, 0, "a", {"version": 1}))
+    ranking.push(RankedItem(50, 0, "b", {}))
+    ranking.push(RankedItem(90, 0, "a", {"version": 2}))
+    ranking.push(RankedItem(20, 0, "a", {"version": 3}))
+    assert [(item.id, item.score) for item in ranking.items()] == [("a", 90), ("b", 50)]
+    assert ranking.items()[0].row == {"version": 2}
+    ranking.push(RankedItem(70, 0, "c", {}))
+    assert [item.id for item in ranking.items()] == ["a", "c"]
+
+
+def test_streaming_ranking_matches_a_full_sort():
+    posts = make_posts(500)
+    ranker = TopKRanker(k=10).add(PostBatch.from_records(posts), chunk_size=64)
+    result = ranker.result()
+    assert result["ranked_items"] == 500
+    assert ids(result["top_items"]) == expected_ids(posts, 10)
+    for hashtag in ("#style", "#denim", "#ootd"):
+        group = [post for post in posts if post["hashtag"] == hashtag]
+        assert ids(result["top_by_hashtag"][hashtag]) == expected_ids(group, 10)
+    # Posts without a trend category get no group
+    assert set(result["top_by_trend_category"]) == {"rising", "stable"}
+
+
+def test_merged_shards_match_a_single_ranking():
+    posts = make_posts(300, seed=1)
+    shards = [TopKRanker(k=5).add(PostBatch.from_records(posts[i::3])) for i in range(3)]
+    # Partial rankings survive serialization between workers
+    shards[1] = TopKRanker.from_dict(json.loads(json.dumps(shards[1].to_dict())))
+    merged = merge_rankings(shards).result()
+    single = TopKRanker(k=5).add(PostBatch.from_records(posts)).result()
+    assert merged["ranked_items"] == 300
+    assert ids(merged["top_items"]) == ids(single["top_items"])
+    assert {key: ids(rows) for key, rows in merged["top_by_hashtag"].items()} == \
+        {key: ids(rows) for key, rows in single["top_by_hashtag"].items()}
+    assert merge_rankings([]) is None
+
+
+def test_a_rescored_post_replaces_its_earlier_ranking():
+    before = {"id": "p", "hashtag": "#style", "score": 10.0, "engagement_stats": {"likes": 1}}
+    after = {**before, "score": 95.0}
+    others = [{"id": f"o{i}", "hashtag": "#style", "score": 50.0, "engagement_stats": {"likes": i}} for i in range(3)]
+    first = TopKRanker(k=4).add(PostBatch.from_records([before] + others))
+    second = TopKRanker(k=4).add(PostBatch.from_records([after]))
+    top = merge_rankings([first, second]).result()["top_items"]
+    assert [(row["id"], row["score"]) for row in top] == [("p", 95.0), ("o2", 50.0), ("o1", 50.0), ("o0", 50.0)]
@@ -0,0 +1,114 @@
+# tests/test_research_batch.py
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.agentic_api import api, budgets
+from src.agentic_api.auth import User, get_current_active_user
+from src.agentic_api.research_batch import deduplicate_topics, normalize_topic, stream_batch
+
+
+def test_normalize_topic():
+    assert normalize_topic("The future of AI agents!") == normalize_topic("future AI agent")
+    assert normalize_topic("Café  Trends") == "cafe trend"
+    # Words ending in "ss" keep their ending
+    assert normalize_topic("dress") == "dress"
+
+
+def test_deduplicate_topics_keeps_the_first_spelling():
+    topics, duplicates = deduplicate_topics(["AI agents", "  ", "ai agent", "Denim", "AI  Agents!", "denim", "linen"])
+    assert topics == ["AI agents", "Denim", "linen"]
+    assert duplicates == {"AI agents": ["ai agent", "AI  Agents!"], "Denim": ["denim"]}
+
+
+def collect(stream):
+    async def consume():
+        return [json.loads(line) async for line in stream]
+
+    return asyncio.run(consume())
+
+
+def test_stream_yields_results_in_completion_order_within_the_concurrency():
+    running = []
+    peak = []
+
+    async def run_topic(topic):
+        running.append(topic)
+        peak.append(len(running))
+        await asyncio.sleep({"slow": 0.1, "fast": 0.01, "broken": 0.02}[topic])
+        running.remove(topic)
+        if topic == "broken":
+            raise RuntimeError("crew failed")
+        return {"result": topic.upper()}
+
+    lines = collect(stream_batch(["slow", "fast", "broken"], {"fast": ["Fast"]}, run_topic, 2, {"submitted_topics": 4}))
+    assert lines[0] == {"type": "batch", "submitted_topics": 4, "unique_topics": 3, "duplicates": {"fast": ["Fast"]}}
+    results = lines[1:-1]
+    assert [line["topic"] for line in results] == ["fast", "broken", "slow"]
+    assert results[0] == {"type": "result", "topic": "fast", "status": "success", "result": "FAST", "duplicates": ["Fast"]}
+    # A failing topic doesn't affect the others
+    assert results[1]["status"] == "error" and results[1]["error"] == "crew failed"
+    assert lines[-1] == {"type": "summary", "succeeded": 2, "failed": 1}
+    assert max(peak) == 2
+
+
+def test_closing_the_stream_cancels_waiting_topics():
+    started = []
+
+    async def run_topic(topic):
+        started.append(topic)
+        await asyncio.sleep(0.01 if topic == "first" else 1)
+        return {}
+
+    async def read_first_result():
+        stream = stream_batch(["first", "second", "third"], {}, run_topic, 1, {})
+        await stream.__anext__()
+        result = json.loads(await stream.__anext__())
+        await stream.aclose()
+        await asyncio.sleep(0.05)
+        return result
+
+    assert asyncio.run(read_first_result())["topic"] == "first"
+    assert started == ["first", "second"]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    researched = []
+
+    class Result:
+        def __init__(self, raw):
+            self.raw = raw
+
+    async def run_crew(fn, topic, run_id, *args, priority, **kwargs):
+        researched.append((topic, priority))
+        return Result(f"report on {topic}")
+
+    budget_store = budgets.TokenBudgets(str(tmp_path / "usage.sqlite3"), flush_interval=3600)
+    monkeypatch.setattr(api, "get_token_budgets", lambda: budget_store)
+    monkeypatch.setattr(api, "run_crew", run_crew)
+    api.app.dependency_overrides[get_current_active_user] = lambda: User(username="alice")
+    client = TestClient(api.app)
+    client.researched = researched
+    yield client
+    api.app.dependency_overrides.pop(get_current_active_user, None)
+    budget_store.close()
+
+
+def test_batch_endpoint_researches_each_unique_topic_once(client):
+    response = client.post("/api/research/batch", json={"topics": ["AI agents", "ai agent", "Denim"], "max_concurrency": 8})
+    assert response.status_code == 200 and response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    batch, results, summary = lines[0], lines[1:-1], lines[-1]
+    assert batch["unique_topics"] == 2 and batch["duplicates"] == {"AI agents": ["ai agent"]}
+    # Each unique topic gets its own run ID, and the concurrency is capped by the scheduler
+    assert set(batch["run_ids"]) == {"AI agents", "Denim"} and len(set(batch["run_ids"].values())) == 2
+    assert batch["concurrency"] <= api.get_scheduler().max_running
+    assert sorted(result["result"] for result in results) == ["report on AI agents", "report on Denim"]
+    assert summary == {"type": "summary", "succeeded": 2, "failed": 0}
+    assert sorted(client.researched) == [("AI agents", "batch"), ("Denim", "batch")]
+
+    assert client.post("/api/research/batch", json={"topics": [" ", ""]}).status_code == 400
@@ -0,0 +1,131 @@
+# tests/test_run_stats.py
+
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from crewai.utilities.rpm_controller import RPMController
+from fastapi.testclient import TestClient
+
+from src.agentic_api import auth, run_stats
+from src.agentic_api.api import app
+from src.agentic_api.auth import User, get_current_active_user
+from src.agentic_api.run_stats import (
+    LimiterStats, RunRegistry, StatsPublisher, TimedRPMController, collect_worker_stats, time_rate_limiter, worker_id,
+)
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = RunRegistry()
+    monkeypatch.setattr(run_stats, "_run_registry", registry)
+    return registry
+
+
+def test_events_are_attributed_to_the_run_of_the_thread(registry):
+    finished = []
+    registry.on_finished = finished.append
+    task = SimpleNamespace(name="scrape", agent=SimpleNamespace(role=" Data Collector\n"))
+
+    with registry.track("run-1", "social_media", user="alice") as run:
+        assert registry.current() is run
+        run_stats._on_task_started(None, SimpleNamespace(task=task))
+        run_stats._on_tool_started(None, SimpleNamespace(tool_name="social_media_scraper"))
+        [snapshot] = registry.snapshot()
+        assert snapshot["current_task"] == "scrape" and snapshot["current_agent"] == "Data Collector"
+        assert snapshot["current_tool"] == "social_media_scraper" and snapshot["tool_elapsed_seconds"] is not None
+
+        # Events of other threads aren't attributed to the run
+        other = threading.Thread(target=run_stats._on_task_completed, args=(None, SimpleNamespace()))
+        other.start()
+        other.join()
+        run_stats._on_tool_finished(None, SimpleNamespace())
+        run_stats._on_task_completed(None, SimpleNamespace())
+        assert run.tasks_done == 1 and run.tool_calls == 1 and run.current_tool is None
+
+    assert registry.snapshot() == [] and registry.current() is None
+    assert finished == [run] and run.rss_end is not None and run.rss_high_water >= run.rss_start
+
+
+def test_a_failing_finish_hook_does_not_fail_the_run(registry):
+    def broken(run):
+        raise RuntimeError("store down")
+
+    registry.on_finished = broken
+    with registry.track("run-1", "research"):
+        pass
+
+
+def test_limiter_waits_are_recorded(monkeypatch):
+    stats = LimiterStats()
+    monkeypatch.setattr(run_stats, "_limiter_stats", stats)
+    monkeypatch.setattr(RPMController, "_wait_for_next_minute", lambda self: time.sleep(0.05))
+    controller = TimedRPMController(max_rpm=1)
+    try:
+        controller.check_or_wait()
+        controller.check_or_wait()
+    finally:
+        controller.stop_rpm_counter()
+
+    snapshot = stats.snapshot()
+    assert snapshot["calls"] == 2 and snapshot["waits"] == 1 and snapshot["waiting_now"] == 0
+    assert snapshot["max_wait_seconds"] >= 0.05 and snapshot["average_wait_seconds"] == snapshot["wait_seconds_total"]
+
+
+def test_shared_rate_limiters_stay_shared():
+    shared = RPMController(max_rpm=10)
+    unlimited = RPMController()
+    crew = SimpleNamespace(
+        _rpm_controller=shared,
+        agents=[SimpleNamespace(_rpm_controller=shared), SimpleNamespace(_rpm_controller=unlimited), SimpleNamespace()],
+    )
+    time_rate_limiter(crew)
+    try:
+        assert isinstance(crew._rpm_controller, TimedRPMController) and crew._rpm_controller.max_rpm == 10
+        assert crew.agents[0]._rpm_controller is crew._rpm_controller
+        assert crew.agents[1]._rpm_controller is unlimited
+    finally:
+        crew._rpm_controller.stop_rpm_counter()
+
+
+def test_admin_view_merges_recent_worker_snapshots(tmp_path):
+    publisher = StatsPublisher(str(tmp_path), interval=0.05)
+    publisher.start()
+    time.sleep(0.1)
+    assert json.loads(open(publisher.path).read())["worker"] == worker_id()
+
+    now = time.time()
+    (tmp_path / "other-1.json").write_text(json.dumps({"worker": "other-1", "updated_at": now}))
+    (tmp_path / "gone-2.json").write_text(json.dumps({"worker": "gone-2", "updated_at": now - 60}))
+    (tmp_path / ".partial.tmp").write_text("{")
+    (tmp_path / "broken-3.json").write_text("{")
+
+    workers = collect_worker_stats(str(tmp_path), max_age=15)
+    # The serving worker reports live stats instead of its published file
+    assert [worker["worker"] for worker in workers] == [worker_id(), "other-1"]
+
+    publisher.stop()
+    assert not os.path.exists(publisher.path)
+
+
+def test_admin_stats_endpoint(monkeypatch, registry):
+    monkeypatch.setattr(auth, "ADMIN_USERS", {"admin"})
+    user = User(username="alice")
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    try:
+        client = TestClient(app)
+        assert client.get("/api/admin/stats").status_code == 403
+
+        user = User(username="admin")
+        with registry.track("run-1", "research", user="alice"):
+            stats = client.get("/api/admin/stats").json()
+    finally:
+        app.dependency_overrides.clear()
+
+    assert stats["totals"]["workers"] == 1 and stats["totals"]["runs_in_flight"] == 1
+    [worker] = stats["workers"]
+    assert worker["runs"][0]["run_id"] == "run-1" and worker["rss_bytes"] > 0
+    assert set(worker) >= {"queue", "executor", "caches", "llm_rate_limiter"}
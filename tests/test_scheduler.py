@@ -0,0 +1,206 @@
+# tests/test_scheduler.py
+
+import asyncio
+import threading
+import contextvars
+import time
+
+import pytest
+
+from src.agentic_api.executor import CrewExecutor, ExecutorSaturated
+from src.agentic_api.jobs import JobStore
+from src.agentic_api.scheduler import FairShareScheduler, parse_user_weights
+
+
+def make_scheduler(**kwargs):
+    return FairShareScheduler(executor=CrewExecutor(max_workers=1, max_pending=50), user_weights=kwargs.pop("user_weights", {}), **kwargs)
+
+
+def occupy(scheduler):
+    """Submit a job that holds the only executor thread until the returned event is set."""
+    release = threading.Event()
+    scheduler.submit(release.wait, 5, user="blocker", job_id="blocker")
+    return release
+
+
+def test_parse_user_weights():
+    assert parse_user_weights("alice=2, bot=0.5,,broken") == {"alice": 2.0, "bot": 0.5}
+
+
+def test_flows_share_the_executor_in_proportion_to_their_weights():
+    async def scenario():
+        scheduler = make_scheduler(user_weights={"bob": 2.0}, aging_rate=0)
+        release = occupy(scheduler)
+        for i in range(4):
+            scheduler.submit(lambda: None, user="alice", job_id=f"alice-{i}")
+            scheduler.submit(lambda: None, user="bob", job_id=f"bob-{i}")
+        order = [job.user for job in scheduler.queue_order()]
+        release.set()
+        return order
+
+    order = asyncio.run(scenario())
+    # Bob's weight of 2 gets him two jobs for every one of Alice's, however many each queued
+    assert order[:6] == ["alice", "bob", "bob", "alice", "bob", "bob"]
+
+
+def test_interactive_jobs_get_four_times_the_share_of_batch_jobs():
+    async def scenario():
+        scheduler = make_scheduler(aging_rate=0)
+        release = occupy(scheduler)
+        for i in range(2):
+            scheduler.submit(lambda: None, user="alice", priority="batch", job_id=f"batch-{i}")
+        for i in range(8):
+            scheduler.submit(lambda: None, user="alice", priority="interactive", job_id=f"interactive-{i}")
+        order = [job.job_id for job in scheduler.queue_order()]
+        release.set()
+        return order
+
+    order = asyncio.run(scenario())
+    # Both flows start together; the second batch job waits for four interactive ones
+    assert order.index("batch-1") > order.index("interactive-3")
+    assert order.index("batch-1") < order.index("interactive-5")
+
+
+def test_waiting_batch_jobs_age_ahead_of_new_interactive_jobs():
+    async def scenario():
+        scheduler = make_scheduler(aging_rate=1 / 60)
+        release = occupy(scheduler)
+        scheduler.submit(lambda: None, user="alice", priority="batch", job_id="batch-0")
+        batch = scheduler.submit(lambda: None, user="alice", priority="batch", job_id="batch-1")
+        for i in range(3):
+            scheduler.submit(lambda: None, user="bob", priority="interactive", job_id=f"interactive-{i}")
+        now = time.monotonic()
+        fresh = [job.job_id for job in scheduler.queue_order(now)]
+        # Pretend the second batch job has been waiting for two minutes
+        batch.enqueued_at -= 120
+        aged = [job.job_id for job in scheduler.queue_order(now)]
+        release.set()
+        return fresh, aged
+
+    fresh, aged = asyncio.run(scenario())
+    assert fresh[-1] == "batch-1"
+    assert aged[0] == "batch-1"
+
+
+def test_run_returns_the_result_and_records_durations():
+    async def scenario():
+        scheduler = make_scheduler()
+        result = await scheduler.run(lambda x: x * 2, 21, user="alice")
+        return scheduler, result
+
+    scheduler, result = asyncio.run(scenario())
+    assert result == 42
+    assert scheduler.running == 0 and scheduler.queued == 0
+    assert scheduler.average_duration < 120
+
+
+def test_cancel_removes_a_queued_job_and_returns_its_share():
+    async def scenario():
+        scheduler = make_scheduler(aging_rate=0)
+        release = occupy(scheduler)
+        first = scheduler.submit(lambda: None, user="alice", job_id="first")
+        tag_before = scheduler._finish_tags[("alice", "interactive")]
+        last = scheduler.submit(lambda: None, user="alice", job_id="last")
+        cancelled = scheduler.cancel(last)
+        state = (cancelled, last.future.cancelled(), scheduler.queued, scheduler._finish_tags[("alice", "interactive")])
+        # A started job can't be cancelled
+        running = scheduler.find("blocker")
+        state += (scheduler.cancel(running), scheduler.find("last"))
+        scheduler.cancel(first)
+        state += (("alice", "interactive") in scheduler._flows,)
+        release.set()
+        return tag_before, state
+
+    tag_before, (cancelled, future_cancelled, queued, tag_after, cancel_running, found, flow_left) = asyncio.run(scenario())
+    assert cancelled and future_cancelled
+    assert queued == 1
+    assert tag_after == tag_before
+    assert cancel_running is False
+    assert found is None
+    assert flow_left is False
+
+
+def test_submit_rejects_when_full_or_not_accepting():
+    async def scenario():
+        scheduler = make_scheduler(max_queued=1)
+        release = occupy(scheduler)
+        scheduler.submit(lambda: None, user="alice")
+        with pytest.raises(ExecutorSaturated):
+            scheduler.submit(lambda: None, user="alice")
+        scheduler.accepting = False
+        assert scheduler.saturated
+        with pytest.raises(ExecutorSaturated):
+            scheduler.submit(lambda: None, user="bob")
+        with pytest.raises(ValueError):
+            scheduler.submit(lambda: None, user="bob", priority="urgent")
+        release.set()
+
+    asyncio.run(scenario())
+
+
+def test_queue_positions_are_written_off_the_event_loop(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    writes = []
+
+    def on_positions(positions):
+        writes.append(threading.get_ident())
+        store.update_positions(positions)
+
+    async def scenario():
+        scheduler = make_scheduler(aging_rate=0)
+        scheduler.on_positions = on_positions
+        release = occupy(scheduler)
+        for i in range(3):
+            store.create(f"job-{i}", "alice", "research", "interactive")
+            scheduler.submit(lambda: None, user="alice", job_id=f"job-{i}")
+        await asyncio.sleep(0.2)
+        release.set()
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert writes and loop_thread not in writes
+    # Submitting three jobs in a row is coalesced into fewer writes
+    assert len(writes) < 4
+    assert [store.get(f"job-{i}")["queue_position"] for i in range(3)] == [1, 2, 3]
+    assert store.get("job-0")["estimated_start"] < store.get("job-2")["estimated_start"]
+
+
+def test_jobs_run_in_the_context_of_their_submitter():
+    request = contextvars.ContextVar("request", default=None)
+
+    async def scenario():
+        scheduler = make_scheduler()
+        release = threading.Event()
+
+        async def submit_as(name, fn):
+            request.set(name)
+            return scheduler.submit(fn, user=name)
+
+        first = await asyncio.create_task(submit_as("first", lambda: (release.wait(5), request.get())[1]))
+        # Dispatched from the callback of the first job once it finishes
+        second = await asyncio.create_task(submit_as("second", request.get))
+        release.set()
+        return await first.future, await second.future
+
+    assert asyncio.run(scenario()) == ("first", "second")
+
+
+def test_start_hook_runs_on_the_executor_thread_before_the_job():
+    events = []
+
+    async def scenario():
+        scheduler = make_scheduler()
+
+        def on_start():
+            events.append(("start", threading.current_thread()))
+            raise RuntimeError("store unavailable")
+
+        job = scheduler.submit(lambda: events.append(("run", threading.current_thread())) or "done",
+                               user="alice", on_start=on_start)
+        return threading.current_thread(), await job.future
+
+    loop_thread, result = asyncio.run(scenario())
+    # A failing hook is logged and doesn't fail the job
+    assert result == "done"
+    assert [name for name, _ in events] == ["start", "run"]
+    assert events[0][1] is events[1][1] is not loop_thread
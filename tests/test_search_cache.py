@@ -0,0 +1,156 @@
+# tests/test_search_cache.py
+
+import asyncio
+
+import pytest
+
+from src.agentic_api import search_cache
+from src.agentic_api.search_cache import (
+    FRESH, MISS, NEGATIVE, STALE, SearchCache, SearchFailed, cache_key, hit_rate,
+)
+
+
+class Clock:
+    """Stands in for the time module of search_cache."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(search_cache, "time", clock)
+    monkeypatch.setattr(search_cache, "SEARCH_CACHE_STALE_SECONDS", 100)
+    monkeypatch.setattr(search_cache, "SEARCH_CACHE_NEGATIVE_TTL_SECONDS", 5)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return SearchCache(str(tmp_path / "search.sqlite3"))
+
+
+class Backend:
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+
+    async def search(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise ConnectionError("backend down")
+        return f"results {self.calls}"
+
+
+def test_trivially_different_queries_share_a_key():
+    assert cache_key("web_search", "  Summer  DRESSES ") == cache_key("web_search", "summer dresses")
+    assert cache_key("web_search", "summer dresses") != cache_key("custom_search", "summer dresses")
+    assert cache_key("web_search", "q", {"limit": 5}) != cache_key("web_search", "q", {"limit": 10})
+
+
+def test_entries_go_stale_then_expire(cache, clock):
+    key = cache_key("web_search", "linen")
+    assert cache.lookup(key) == (MISS, None)
+    cache.store(key, "web_search", "linen", "cached", ttl=10)
+    assert cache.lookup(key) == (FRESH, "cached")
+    clock.now += 11
+    assert cache.lookup(key) == (STALE, "cached")
+    clock.now += 100
+    assert cache.lookup(key) == (MISS, None)
+
+
+def test_get_or_fetch_serves_hits_without_fetching(cache, clock, tmp_path):
+    backend = Backend()
+
+    async def scenario():
+        # Concurrent misses share one fetch
+        first = await asyncio.gather(*(cache.get_or_fetch("web_search", "linen", backend.search, ttl=10) for _ in range(3)))
+        again = await cache.get_or_fetch("web_search", " LINEN", backend.search, ttl=10)
+        return first, again
+
+    first, again = asyncio.run(scenario())
+    assert first == ["results 1"] * 3 and again == "results 1"
+    assert backend.calls == 1
+    # The entry survives a restart
+    restarted = SearchCache(str(tmp_path / "search.sqlite3"))
+    assert restarted.lookup(cache_key("web_search", "linen")) == (FRESH, "results 1")
+
+
+def test_stale_entries_are_served_and_refreshed_in_the_background(cache, clock):
+    backend = Backend()
+
+    async def scenario():
+        await cache.get_or_fetch("web_search", "linen", backend.search, ttl=10)
+        clock.now += 11
+        stale = await cache.get_or_fetch("web_search", "linen", backend.search, ttl=10)
+        # A second stale read doesn't start another refresh
+        also_stale = await cache.get_or_fetch("web_search", "linen", backend.search, ttl=10)
+        await asyncio.gather(*cache._refreshes)
+        refreshed = await cache.get_or_fetch("web_search", "linen", backend.search, ttl=10)
+        return stale, also_stale, refreshed
+
+    assert asyncio.run(scenario()) == ("results 1", "results 1", "results 2")
+    assert backend.calls == 2
+
+
+def test_failures_are_cached_briefly(cache, clock):
+    backend = Backend()
+    backend.fail = True
+
+    async def search():
+        return await cache.get_or_fetch("web_search", "linen", backend.search, ttl=10)
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(search())
+    with pytest.raises(SearchFailed, match="backend down"):
+        asyncio.run(search())
+    assert backend.calls == 1
+    assert cache.lookup(cache_key("web_search", "linen")) == (NEGATIVE, "backend down")
+
+    clock.now += 6
+    backend.fail = False
+    assert asyncio.run(search()) == "results 2"
+
+
+def test_a_failed_refresh_keeps_the_stale_result(cache, clock):
+    key = cache_key("web_search", "linen")
+    cache.store(key, "web_search", "linen", "cached", ttl=10)
+    clock.now += 11
+    assert cache.claim_refresh(key) and not cache.claim_refresh(key)
+    cache.store_failure(key, "web_search", "linen", "backend down")
+    assert cache.lookup(key) == (STALE, "cached")
+    # The lease is released so the refresh can be retried
+    assert cache.claim_refresh(key)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = SearchCache(str(tmp_path / "search.sqlite3"), max_entries=2)
+    keys = [cache_key("web_search", query) for query in ("a", "b", "c")]
+    for key, query in zip(keys, "abc"):
+        cache.store(key, "web_search", query, query)
+        clock.now += 1
+    cache.lookup(keys[0])
+    assert cache.evict() == 1
+    assert [cache.lookup(key)[0] for key in keys] == [FRESH, MISS, FRESH]
+
+
+def test_disabled_cache_always_fetches(cache, monkeypatch):
+    monkeypatch.setattr(search_cache, "SEARCH_CACHE_ENABLED", False)
+    backend = Backend()
+    for _ in range(2):
+        asyncio.run(cache.get_or_fetch("web_search", "linen", backend.search))
+    assert backend.calls == 2
+
+
+def test_hit_rate():
+    counter = lambda result, value: {"labels": {"tool": "web_search", "result": result}, "value": value}
+    snapshot = {"search_cache_requests_total": [
+        counter(FRESH, 6), counter(STALE, 1), counter(NEGATIVE, 1), counter(MISS, 2),
+    ]}
+    assert hit_rate(snapshot) == (10, 0.8)
+    assert hit_rate({}) == (0, None)
@@ -0,0 +1,159 @@
+# tests/test_seen_index.py
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from src.agentic_api.posts import PostBatch
+from src.agentic_api.seen_index import BloomFilter, SeenIndex, content_hash, scoring_hash
+
+
+def make_posts(count, caption="look", **extra):
+    return [
+        {"id": f"p{i}", "platform": "tiktok", "url": f"https://example.com/{i}", "caption": f"{caption} {i}", **extra}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def index(tmp_path):
+    return SeenIndex(str(tmp_path / "seen"))
+
+
+def test_bloom_filter_has_no_false_negatives(tmp_path):
+    bloom = BloomFilter(str(tmp_path / "bloom"), capacity=1000, error_rate=0.01)
+    assert bloom.created
+    keys = [f"post-{i}" for i in range(1000)]
+    bloom.add(keys)
+    assert bloom.contains(keys).all()
+    others = bloom.contains([f"other-{i}" for i in range(1000)])
+    assert others.sum() < 50
+    assert bloom.contains([]).shape == (0,)
+
+    bloom.flush()
+    reopened = BloomFilter(str(tmp_path / "bloom"), capacity=1000, error_rate=0.01)
+    assert not reopened.created and reopened.contains(keys).all()
+    # Different sizing settings start a new filter
+    assert BloomFilter(str(tmp_path / "bloom"), capacity=5000, error_rate=0.01).created
+
+
+def test_hashes_ignore_engagement_but_scoring_hash_covers_enrichment():
+    post = make_posts(1)[0]
+    assert content_hash(post) == content_hash({**post, "engagement_stats": {"likes": 10}, "timestamp": "now"})
+    assert content_hash(post) != content_hash({**post, "caption": "edited"})
+    assert content_hash(post) == content_hash({**post, "virality_score": 80.0})
+    assert scoring_hash(post) != scoring_hash({**post, "virality_score": 80.0})
+    # Dicts and PostRow views of the same post hash alike
+    enriched = {**post, "virality_score": 80.0, "fashion_elements": {"colors": ["red"]}}
+    assert scoring_hash(enriched) == scoring_hash(PostBatch.from_records([enriched])[0])
+
+
+def test_partition_and_record(index):
+    batch = PostBatch.from_records(make_posts(3))
+    unseen, scored = index.partition(batch)
+    assert unseen.tolist() == [True, True, True] and scored == {}
+
+    index.record(batch.select(np.array([True, True, False])))
+    unseen, scored = index.partition(batch)
+    assert unseen.tolist() == [False, False, True] and scored == {}
+
+
+def test_stored_scores_require_unchanged_enrichment(index):
+    posts = make_posts(2, virality_score=50.0)
+    index.save_scores([(posts[0], {"score": 70}), (posts[1], {"score": 20})])
+
+    batch = PostBatch.from_records(posts)
+    assert index.stored_scores(batch) == {0: {"score": 70}, 1: {"score": 20}}
+
+    # Enrichment changed the score inputs of the first post, so only partition still reports it
+    rescored = PostBatch.from_records([{**posts[0], "virality_score": 90.0}, posts[1]])
+    assert index.stored_scores(rescored) == {1: {"score": 20}}
+    unseen, scored = index.partition(rescored)
+    assert unseen.tolist() == [False, False] and scored == {0: {"score": 70}, 1: {"score": 20}}
+
+
+def test_record_drops_scores_when_content_changes(index):
+    posts = make_posts(2)
+    index.save_scores([(post, {"score": 50}) for post in posts])
+
+    index.record(PostBatch.from_records([{**posts[0], "caption": "edited"}, posts[1]]))
+    batch = PostBatch.from_records([{**posts[0], "caption": "edited"}, posts[1]])
+    unseen, scored = index.partition(batch)
+    assert unseen.tolist() == [False, False]
+    assert scored == {1: {"score": 50}}
+    assert index.stored_scores(batch) == {1: {"score": 50}}
+
+
+def test_bloom_filter_is_rebuilt_from_the_exact_index(tmp_path):
+    root = str(tmp_path / "seen")
+    SeenIndex(root).record(PostBatch.from_records(make_posts(5)))
+
+    # A lost or resized filter is repopulated when the next worker opens the index
+    os.remove(os.path.join(root, "seen.bloom"))
+    reopened = SeenIndex(root)
+    unseen, _ = reopened.partition(PostBatch.from_records(make_posts(6)))
+    assert unseen.tolist() == [False] * 5 + [True]
+    assert os.path.exists(os.path.join(root, "seen.bloom.lock"))
+
+
+def test_stored_analyses_require_unchanged_content(index):
+    posts = make_posts(2)
+    batch = PostBatch.from_records(posts)
+    index.record(batch)
+    index.save_analyses("vision", [(batch[0], {"virality_score": 75}), (batch[1], {"virality_score": 40})])
+    assert index.stored_analyses("vision", batch) == {0: {"virality_score": 75}, 1: {"virality_score": 40}}
+    assert index.stored_analyses("text", batch) == {}
+
+    edited = PostBatch.from_records([{**posts[0], "image_url": "https://example.com/new.jpg"}, posts[1]])
+    assert index.stored_analyses("vision", edited) == {1: {"virality_score": 40}}
+
+
+def test_rescraped_posts_are_not_analyzed_again(index, monkeypatch):
+    from src.agentic_api.tools import social_media_tools
+    from src.agentic_api.tools.runtime import get_tool_runtime
+    from src.agentic_api.tools.social_media_tools import (
+        GeminiTextAnalyzerTool, GeminiVisionAnalyzerTool, ScoreCalculatorTool, _store_collected,
+    )
+
+    monkeypatch.setattr(social_media_tools, "get_seen_index", lambda: index)
+    monkeypatch.setattr(social_media_tools, "MEDIA_PREPROCESSING_ENABLED", False)
+    calls = {"image": 0, "text": 0, "score": 0}
+
+    def counting(kind, method):
+        def wrapper(*args, **kwargs):
+            calls[kind] += 1
+            return method(*args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(GeminiVisionAnalyzerTool, "_analyze_image", counting("image", GeminiVisionAnalyzerTool._analyze_image))
+    monkeypatch.setattr(GeminiTextAnalyzerTool, "_analyze_text", counting("text", GeminiTextAnalyzerTool._analyze_text))
+    monkeypatch.setattr(ScoreCalculatorTool, "_score_item", counting("score", ScoreCalculatorTool._score_item))
+
+    posts = make_posts(4)
+    for i, post in enumerate(posts):
+        post["id"] = f"rescrape-{i}"
+        post["image_url"] = f"https://example.com/{i}.jpg"
+        post["raw_content"] = f"post {i}"
+    runtime = get_tool_runtime()
+
+    def run_pipeline():
+        collected = json.loads(_store_collected(PostBatch.from_records(posts), kind="hashtag_posts", run_id=None))
+        vision = json.loads(runtime.run(GeminiVisionAnalyzerTool()._execute(dataset_id=collected["dataset_id"])))
+        text = json.loads(runtime.run(GeminiTextAnalyzerTool()._execute(dataset_id=vision["dataset_id"])))
+        ScoreCalculatorTool()._run(dataset_id=vision["dataset_id"])
+        return collected, vision, text
+
+    collected, vision, text = run_pipeline()
+    assert collected["previously_scored"] == 0
+    assert calls == {"image": 4, "text": 4, "score": 4}
+    assert vision["images_analyzed"] == 4 and text["posts_analyzed"] == 4
+
+    collected, vision, text = run_pipeline()
+    assert collected["previously_scored"] == 4
+    # Only the first scrape reached the analyzers and the score calculator
+    assert calls == {"image": 4, "text": 4, "score": 4}
+    assert vision["images_analyzed"] == 0 and vision["images_previously_analyzed"] == 4
+    assert vision["average_virality_score"] == 75
+    assert text["posts_analyzed"] == 0 and text["posts_previously_analyzed"] == 4
@@ -0,0 +1,70 @@
+# tests/test_server.py
+
+import os
+import sys
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    """Capture uvicorn.run calls instead of starting a server."""
+    calls = []
+    monkeypatch.setattr(server.uvicorn, "run", lambda app, **options: calls.append((app, options)))
+    monkeypatch.delenv("SERVER_MODE", raising=False)
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    # main() exports this for the workers; restore it afterwards
+    monkeypatch.setenv("WORKER_SUPERVISED", "false")
+    return calls
+
+
+def test_default_workers(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    assert server.default_workers() == 3
+    monkeypatch.delenv("WEB_CONCURRENCY")
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0}, raising=False)
+    # Production mode always runs at least two workers
+    assert server.default_workers() == 2
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(8)), raising=False)
+    assert server.default_workers() == 8
+
+
+def test_production_options(monkeypatch):
+    monkeypatch.setenv("CREW_DRAIN_TIMEOUT", "45")
+    monkeypatch.setenv("SERVER_BACKLOG", "512")
+    options = server.production_options()
+    assert options["timeout_graceful_shutdown"] == 45 and options["backlog"] == 512
+    assert options["proxy_headers"] and not options["server_header"] and not options["access_log"]
+    assert options["loop"] in ("uvloop", "auto") and options["http"] in ("httptools", "auto")
+    assert "reload" not in options
+
+
+def test_development_mode_reloads(runs, monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["server.py"])
+    server.main()
+    [(app, options)] = runs
+    assert app == server.APP and options["reload"] is True and "workers" not in options
+    assert os.environ["WORKER_SUPERVISED"] == "false"
+
+
+@pytest.mark.parametrize("argv, mode", [(["server.py", "--production"], None), (["server.py"], "production")])
+def test_production_mode_runs_supervised_workers(runs, monkeypatch, argv, mode):
+    monkeypatch.setattr(sys, "argv", argv)
+    if mode:
+        monkeypatch.setenv("SERVER_MODE", mode)
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    server.main()
+    [(app, options)] = runs
+    assert options["workers"] == 4 and "reload" not in options
+    # Workers that recycle themselves are replaced by uvicorn's supervisor
+    assert os.environ["WORKER_SUPERVISED"] == "true"
+
+
+def test_a_single_production_worker_is_not_supervised(runs, monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["server.py", "--production"])
+    monkeypatch.setattr(server, "default_workers", lambda: 1)
+    server.main()
+    assert runs[0][1]["workers"] == 1
+    assert os.environ["WORKER_SUPERVISED"] == "false"
@@ -0,0 +1,56 @@
+# tests/test_social_media_crew.py
+
+import threading
+import time
+
+from crewai import Agent
+
+from src.agentic_api.social_media_crew import SocialMediaCrew
+
+COLLECTION_TASKS = ["hashtag_collection_task", "account_collection_task"]
+
+
+def test_collection_tasks_run_in_parallel_on_their_own_agents():
+    crew = SocialMediaCrew(run_id="test-run").build()
+    tasks = {task.name: task for task in crew.tasks}
+
+    assert [task.name for task in crew.tasks] == COLLECTION_TASKS + ["data_collection_task", "trend_analysis_task"]
+    assert all(tasks[name].async_execution for name in COLLECTION_TASKS)
+    assert tasks["hashtag_collection_task"].agent is not tasks["account_collection_task"].agent
+    # Both downstream steps join the two collection outputs explicitly
+    assert [task.name for task in tasks["data_collection_task"].context] == COLLECTION_TASKS
+    assert [task.name for task in tasks["trend_analysis_task"].context] == COLLECTION_TASKS + ["data_collection_task"]
+    # The collection tools write datasets scoped to the run
+    for name in COLLECTION_TASKS:
+        assert [tool.run_id for tool in tasks[name].agent.tools] == ["test-run"]
+
+
+def test_collection_wall_time_is_the_slower_of_the_two(monkeypatch):
+    started = {}
+    descriptions = {}
+    contexts = {}
+    lock = threading.Lock()
+
+    def execute_task(self, task, context=None, tools=None):
+        with lock:
+            started[task.name] = time.monotonic()
+            descriptions[task.name] = task.description
+            contexts[task.name] = context or ""
+        time.sleep(0.3)
+        return f"dataset of {task.name}"
+
+    monkeypatch.setattr(Agent, "execute_task", execute_task)
+    crew = SocialMediaCrew(run_id="test-run").build()
+    start = time.monotonic()
+    crew.kickoff(inputs={"hashtags": ["denim"], "instagram_max_images": 3})
+
+    # The two collection tasks overlap, the merge step waits for both
+    assert abs(started["hashtag_collection_task"] - started["account_collection_task"]) < 0.2
+    assert started["data_collection_task"] - start >= 0.3
+    assert started["data_collection_task"] - start < 0.55
+    assert "dataset of hashtag_collection_task" in contexts["data_collection_task"]
+    assert "dataset of account_collection_task" in contexts["data_collection_task"]
+    # Task descriptions are filled in from the run inputs and the defaults of prepare_inputs
+    assert "['denim']" in descriptions["hashtag_collection_task"]
+    assert "Limit to 3 images" in descriptions["account_collection_task"]
+    assert "social_media_data.csv" in descriptions["data_collection_task"]
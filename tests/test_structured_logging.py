@@ -0,0 +1,147 @@
+# tests/test_structured_logging.py
+
+import io
+import json
+import logging
+import queue
+import threading
+
+import pytest
+from crewai import Agent, Task
+
+from src.agentic_api import structured_logging
+from src.agentic_api.structured_logging import (
+    TRACE_LOGGER, ContextFilter, DroppingQueueHandler, JsonFormatter, bind_log_context, log_context,
+    propagate_context_to_async_tasks, update_log_context,
+)
+from src.agentic_api.tools.runtime import get_tool_runtime
+
+
+class Pipeline:
+    """The handler chain of configure_logging, writing to a buffer and drained by hand."""
+
+    def __init__(self, size=100, sample_rate=1.0):
+        self.handler = DroppingQueueHandler(queue.Queue(size))
+        self.handler.addFilter(ContextFilter(level="INFO", sample_rate=sample_rate))
+        self.output = io.StringIO()
+        self.writer = logging.StreamHandler(self.output)
+        self.writer.setFormatter(JsonFormatter())
+
+    def logger(self, name):
+        logger = logging.getLogger(name)
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        logger.addHandler(self.handler)
+        return logger
+
+    def lines(self):
+        while not self.handler.queue.empty():
+            self.writer.handle(self.handler.queue.get_nowait())
+        return [json.loads(line) for line in self.output.getvalue().splitlines()]
+
+    def close(self, *loggers):
+        for logger in loggers:
+            logger.removeHandler(self.handler)
+            logger.propagate = True
+
+
+@pytest.fixture(autouse=True)
+def empty_log_context():
+    # Crews kicked off by other tests outside a run leave their last task in the main thread's context
+    token = structured_logging._log_context.set({})
+    yield
+    structured_logging._log_context.reset(token)
+
+
+@pytest.fixture
+def pipeline():
+    pipeline = Pipeline()
+    logger = pipeline.logger("src.agentic_api.test")
+    yield pipeline, logger
+    pipeline.close(logger)
+
+
+def test_records_carry_the_run_context(pipeline):
+    pipeline, logger = pipeline
+    logger.info("outside")
+    with log_context(run_id="run-1"):
+        update_log_context(task="scrape")
+        logger.info("Scraped %d posts", 12, extra={"tool": "social_media_scraper"})
+        try:
+            raise ValueError("bad row")
+        except ValueError:
+            logger.exception("Parse failed")
+    logger.info("after")
+
+    outside, scraped, failed, after = pipeline.lines()
+    assert outside["run_id"] is None and after["run_id"] is None and after["task"] is None
+    assert scraped["message"] == "Scraped 12 posts" and scraped["level"] == "info"
+    assert (scraped["run_id"], scraped["task"], scraped["tool"]) == ("run-1", "scrape", "social_media_scraper")
+    assert scraped["ts"].endswith("Z") and scraped["logger"] == "src.agentic_api.test"
+    assert failed["level"] == "error" and "ValueError: bad row" in failed["exc"]
+
+
+def test_runs_can_lower_their_level(pipeline):
+    pipeline, logger = pipeline
+    logger.debug("hidden")
+    with log_context(run_id="run-1", level="debug"):
+        logger.debug("shown")
+    with log_context(run_id="run-2", level="warning"):
+        logger.info("hidden too")
+    assert [line["message"] for line in pipeline.lines()] == ["shown"]
+
+
+def test_trace_records_are_sampled_unless_the_run_debugs():
+    pipeline = Pipeline(sample_rate=0.0)
+    trace = pipeline.logger(TRACE_LOGGER)
+    try:
+        trace.info("Tool call finished")
+        with log_context(run_id="run-1", level="debug"):
+            trace.info("LLM call completed")
+    finally:
+        pipeline.close(trace)
+    assert [line["message"] for line in pipeline.lines()] == ["LLM call completed"]
+
+
+def test_a_full_queue_drops_records_instead_of_blocking():
+    pipeline = Pipeline(size=2)
+    logger = pipeline.logger("src.agentic_api.test_full")
+    try:
+        items = ["a"]
+        logger.info("Items: %s", items)
+        # The message is rendered when it is logged, not when the writer gets to it
+        items.append("b")
+        for i in range(3):
+            logger.info("record %d", i)
+    finally:
+        pipeline.close(logger)
+    assert pipeline.handler.dropped == 2
+    assert [line["message"] for line in pipeline.lines()] == ["Items: ['a']", "record 0"]
+
+
+def test_context_follows_coroutines_to_the_tool_runtime():
+    async def task():
+        return structured_logging._log_context.get().get("run_id"), threading.current_thread().name
+
+    with log_context(run_id="run-1"):
+        assert get_tool_runtime().run(task()) == ("run-1", "tool-runtime")
+    assert get_tool_runtime().run(bind_log_context(task())) == (None, "tool-runtime")
+
+
+def test_async_crew_tasks_keep_the_context_of_the_crew_thread(monkeypatch):
+    seen = {}
+
+    def execute_task(self, task, context=None, tools=None):
+        seen["run_id"] = structured_logging._log_context.get().get("run_id")
+        seen["thread"] = threading.current_thread()
+        return "done"
+
+    monkeypatch.setattr(Agent, "execute_task", execute_task)
+    propagate_context_to_async_tasks()
+    propagate_context_to_async_tasks()
+    agent = Agent(role="Collector", goal="Collect", backstory="Collects")
+    task = Task(description="Collect posts", expected_output="Posts", agent=agent, async_execution=True)
+
+    with log_context(run_id="run-1"):
+        assert task.execute_async().result(timeout=5).raw == "done"
+    assert seen["run_id"] == "run-1" and seen["thread"] is not threading.current_thread()
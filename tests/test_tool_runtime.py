@@ -0,0 +1,128 @@
+# tests/test_tool_runtime.py
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from src.agentic_api.tools import runtime
+from src.agentic_api.tools.runtime import (
+    AsyncTool, BlockingTool, ParallelToolCallsTool, ToolTimeout, get_tool_runtime,
+)
+
+
+class SleepTool(AsyncTool):
+    name: str = "sleep"
+    description: str = "Sleeps"
+    max_concurrency: int = 2
+    in_flight: list = []
+
+    async def _execute(self, seconds: float = 0.1, dataset_id: str = "") -> str:
+        """Sleep for a while."""
+        self.in_flight.append(1)
+        peak = len(self.in_flight)
+        await asyncio.sleep(seconds)
+        self.in_flight.pop()
+        return json.dumps({"status": "success", "peak": peak, "thread": threading.current_thread().name})
+
+
+class BlockingSleepTool(BlockingTool):
+    name: str = "blocking_sleep"
+    description: str = "Sleeps on a thread"
+    timeout: float = 0.1
+
+    def _run(self, seconds: float = 0.0) -> str:
+        time.sleep(seconds)
+        return threading.current_thread().name
+
+
+def test_async_tools_run_on_the_runtime_loop():
+    result = json.loads(SleepTool(in_flight=[])._run(seconds=0))
+    assert result["thread"] == "tool-runtime"
+    # crewai builds the argument schema from _execute
+    assert "seconds" in SleepTool(in_flight=[]).args_schema.model_fields
+
+
+def test_tool_concurrency_is_limited():
+    tool = SleepTool(in_flight=[])
+
+    async def calls():
+        return await asyncio.gather(*(tool._arun(seconds=0.05) for _ in range(6)))
+
+    started = time.monotonic()
+    peaks = [json.loads(result)["peak"] for result in asyncio.run(calls())]
+    assert max(peaks) == 2
+    assert time.monotonic() - started >= 0.15
+
+
+def test_blocking_tools_are_offloaded_and_time_out():
+    tool = BlockingSleepTool()
+    assert asyncio.run(tool._arun()).startswith("tool")
+    error = json.loads(asyncio.run(tool._arun(seconds=0.5)))
+    assert error["status"] == "error" and "timed out after 0.1s" in error["message"]
+
+
+def test_dataset_calls_get_the_dataset_timeout():
+    tool = SleepTool(in_flight=[], timeout=0.05, dataset_timeout=1)
+    assert json.loads(tool._run(seconds=0.2))["status"] == "error"
+    assert json.loads(tool._run(seconds=0.2, dataset_id="ds"))["status"] == "success"
+
+
+def test_map_keeps_order_and_times_out_items_one_by_one():
+    async def work(seconds):
+        await asyncio.sleep(seconds)
+        return seconds
+
+    results = get_tool_runtime().run(get_tool_runtime().map(work, [0.02, 1, 0.01], limit=2, timeout=0.2))
+    assert results[0] == 0.02 and results[2] == 0.01
+    assert isinstance(results[1], ToolTimeout)
+
+
+def test_parallel_tool_calls_overlap_and_report_errors():
+    sleeper = SleepTool(name="parallel_sleep", in_flight=[], max_concurrency=4)
+    parallel = ParallelToolCallsTool(tools=[sleeper, BlockingSleepTool()])
+
+    started = time.monotonic()
+    result = json.loads(parallel._run(calls=[
+        {"tool": "parallel_sleep", "args": {"seconds": 0.2}},
+        {"tool": "parallel_sleep", "args": {"seconds": 0.2}},
+        {"tool": "blocking_sleep", "args": {"seconds": 0.5}},
+    ]))
+    assert time.monotonic() - started < 0.5
+    first, second, slow = result["results"]
+    # JSON results are embedded as objects
+    assert first["result"]["status"] == "success" and second["result"]["peak"] == 2
+    assert slow == {"tool": "blocking_sleep", "error": "Tool blocking_sleep timed out after 0.1s"}
+
+    assert "Unknown tool 'missing'" in parallel._run(calls=[{"tool": "missing"}])
+    assert json.loads(parallel._run(calls=[]))["message"] == "Provide calls"
+
+
+def test_concurrency_overrides(monkeypatch):
+    assert runtime._parse_overrides("web_search=16, gemini_vision_analyzer=4,") == {
+        "web_search": 16, "gemini_vision_analyzer": 4,
+    }
+    monkeypatch.setattr(runtime, "TOOL_CONCURRENCY_OVERRIDES", "override_sleep=1")
+    local = runtime.ToolRuntime()
+    tool = SleepTool(name="override_sleep", in_flight=[])
+
+    async def calls():
+        return await asyncio.gather(*(local.invoke(tool, seconds=0.02) for _ in range(3)))
+
+    assert {json.loads(result)["peak"] for result in local.run(calls())} == {1}
+
+
+def test_run_from_the_runtime_loop_is_rejected():
+    local = runtime.ToolRuntime()
+
+    async def nested():
+        inner = asyncio.sleep(0)
+        try:
+            local.run(inner)
+        finally:
+            inner.close()
+
+    with pytest.raises(RuntimeError, match="await the coroutine instead"):
+        local.run(nested())
@@ -0,0 +1,87 @@
+# tests/test_trend_aggregator.py
+
+from datetime import datetime, timezone
+
+import pytest
+
+from src.agentic_api.posts import PostBatch
+from src.agentic_api.trend_aggregator import TrendAggregator, window_snapshot
+
+NOW = 1_800_000_000.0
+
+
+def iso(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+def post(hours_ago, hashtag="#style", content_type="image", likes=10):
+    return {
+        "id": f"{hashtag}-{hours_ago}-{likes}",
+        "hashtag": hashtag,
+        "content_type": content_type,
+        "timestamp": iso(NOW - hours_ago * 3600),
+        "engagement_stats": {"likes": likes, "shares": 1, "comments": 2},
+    }
+
+
+@pytest.fixture
+def aggregator(tmp_path):
+    return TrendAggregator(str(tmp_path / "trends.sqlite3"), window_hours=4, bucket_minutes=60)
+
+
+def test_window_snapshot():
+    snapshot = window_snapshot([4, 40, 4, 8], recent=3, window_seconds=4 * 3600)
+    assert snapshot["engagement_means"] == {"likes": 10.0, "shares": 1.0, "comments": 2.0}
+    assert snapshot["velocity_per_hour"] == 1.0 and snapshot["recent_velocity_per_hour"] == 1.5
+    assert snapshot["growth_rate"] == 2.0
+    assert window_snapshot([0, 0, 0, 0], recent=0, window_seconds=3600)["engagement_means"] == {}
+
+
+def test_fold_and_snapshot(aggregator):
+    batch = PostBatch.from_records([
+        post(0.5), post(1.5), post(3.5, likes=20),
+        post(1, hashtag="#denim", content_type="video"),
+        post(10),  # outside the window
+    ])
+    assert aggregator.fold(batch, now=NOW) == 4
+
+    style = aggregator.snapshot("hashtag", now=NOW)["#style"]
+    assert style["posts"] == 3
+    assert style["engagement_sums"] == {"likes": 40, "shares": 3, "comments": 6}
+    assert aggregator.snapshot("content_type", now=NOW)["video"]["posts"] == 1
+    assert list(aggregator.snapshot("hashtag", keys=["#denim", "#none"], now=NOW)) == ["#denim"]
+    assert aggregator.snapshot("hashtag", keys=[], now=NOW) == {}
+    with pytest.raises(ValueError):
+        aggregator.snapshot("platform", now=NOW)
+
+
+def test_successive_folds_accumulate_and_evict(aggregator, tmp_path):
+    aggregator.fold(PostBatch.from_records([post(0.5)]), now=NOW)
+    aggregator.fold(PostBatch.from_records([post(0.5, likes=5)]), now=NOW)
+    assert aggregator.snapshot(now=NOW)["#style"]["engagement_sums"]["likes"] == 15
+
+    # Another worker sees the same windows
+    other = TrendAggregator(aggregator.state_path, window_hours=4, bucket_minutes=60)
+    assert other.snapshot(now=NOW)["#style"]["posts"] == 2
+
+    # Folding later evicts the buckets that left the window
+    later = NOW + 5 * 3600
+    aggregator.fold(PostBatch.from_records([{**post(0), "timestamp": iso(later)}]), now=later)
+    assert aggregator.snapshot(now=later)["#style"]["posts"] == 1
+    count = aggregator._conn.execute("SELECT COUNT(*) FROM trend_buckets WHERE dimension = 'hashtag'").fetchone()[0]
+    assert count == 1
+
+
+def test_posts_in_the_oldest_partial_bucket_are_kept(aggregator):
+    # NOW is not on a bucket boundary, so the oldest bucket starts before the window does
+    now = NOW + 1800
+    batch = PostBatch.from_records([{**post(0), "timestamp": iso(now - 4 * 3600 + 60)}, {**post(0), "timestamp": iso(now)}])
+    assert aggregator.fold(batch, now=now) == 2
+    assert aggregator.snapshot(now=now)["#style"]["posts"] == 2
+    count = aggregator._conn.execute("SELECT COUNT(*) FROM trend_buckets WHERE dimension = 'hashtag'").fetchone()[0]
+    assert count == 2
+
+    # Once the bucket has ended before the window starts it is evicted
+    later = now + 3600
+    aggregator.fold(PostBatch.from_records([{**post(0), "timestamp": iso(later)}]), now=later)
+    assert aggregator.snapshot(now=later)["#style"]["posts"] == 2